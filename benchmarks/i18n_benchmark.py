@@ -0,0 +1,65 @@
+"""Compare the translation overhead per update with and without the preloaded catalogs.
+
+The catalogs were previously loaded on every call, which is compared with the preloaded
+catalogs of the language service. Each update sets the app language a few times, as the
+handlers and the Telegram service do. Compile the translation files first and run it from
+the project root:
+
+    pybabel compile -D pdf_bot -d locale/
+    python -m benchmarks.i18n_benchmark --num-updates 10000
+"""
+
+import argparse
+import gettext
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, cast
+
+from telegram import Update
+
+from pdf_bot.language import LanguageRepository, LanguageService
+
+_CALLS_PER_UPDATE = 4
+_LANGUAGE_CODE = "language_code"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--num-updates", type=int, default=10_000)
+    parser.add_argument("--language", default="zh_TW")
+    args = parser.parse_args()
+
+    if not any(Path("locale").glob("*/LC_MESSAGES/*.mo")):
+        print("Compile the translation files first, see the module docstring")  # noqa: T201
+        sys.exit(1)
+
+    # The repository and the update are only used if the language isn't in the user data
+    service = LanguageService(cast(LanguageRepository, None))
+    engines: dict[str, Callable[[Any], Callable[[str], str]]] = {
+        "per call": _set_app_language_per_call,
+        "preloaded": lambda context: service.set_app_language(cast(Update, None), context),
+    }
+
+    for name, set_app_language in engines.items():
+        start_time = time.perf_counter()
+        for _ in range(args.num_updates):
+            # Each update has its own context with the same user data
+            context = SimpleNamespace(user_data={_LANGUAGE_CODE: args.language})
+            for _ in range(_CALLS_PER_UPDATE):
+                set_app_language(context)("Cancel")
+
+        elapsed = time.perf_counter() - start_time
+        print(f"{name:>10}: {elapsed / args.num_updates * 1e6:8.1f} µs per update")  # noqa: T201
+
+
+def _set_app_language_per_call(context: Any) -> Callable[[str], str]:
+    lang = cast(str, context.user_data[_LANGUAGE_CODE])
+    t = gettext.translation("pdf_bot", localedir="locale", languages=[lang])
+    return t.gettext
+
+
+if __name__ == "__main__":
+    main()
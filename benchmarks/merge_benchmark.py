@@ -0,0 +1,90 @@
+"""Compare the peak memory usage and wall time of the merge engines.
+
+Each run is done in a fresh process so that the peak RSS of one engine doesn't affect
+the other. Run it from the project root:
+
+    python -m benchmarks.merge_benchmark --num-files 20 --file-size-mb 20
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import time
+from collections.abc import Callable
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from pikepdf import Dictionary, Name, Pdf, Stream
+
+from pdf_bot.pdf.pypdf_merge import pypdf_merge
+from pdf_bot.pdf.streaming_merge import streaming_merge
+
+_ENGINES: dict[str, Callable[[list[Path], list[str | None], Path], None]] = {
+    "pypdf": pypdf_merge,
+    "streaming": streaming_merge,
+}
+_PAGES_PER_FILE = 10
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--num-files", type=int, default=20)
+    parser.add_argument("--file-size-mb", type=float, default=20)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as td:
+        dir_path = Path(td)
+        file_paths = [
+            _create_scan_pdf(dir_path / f"{i}.pdf", int(args.file_size_mb * 1024**2))
+            for i in range(args.num_files)
+        ]
+        total_size = sum(x.stat().st_size for x in file_paths)
+        print(f"Merging {len(file_paths)} files of {total_size / 1024**2:.1f} MB in total")  # noqa: T201
+
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Pool(1, maxtasksperchild=1) as pool:
+            for name in _ENGINES:
+                out_path = dir_path / f"{name}.pdf"
+                elapsed, max_rss = pool.apply(_run, (name, file_paths, out_path))
+                print(  # noqa: T201
+                    f"{name:>10}: {elapsed:6.2f}s, peak RSS {max_rss / 1024:8.1f} MB, "
+                    f"output {out_path.stat().st_size / 1024**2:.1f} MB"
+                )
+
+
+def _run(name: str, file_paths: list[Path], out_path: Path) -> tuple[float, int]:
+    start_time = time.perf_counter()
+    _ENGINES[name](file_paths, [x.name for x in file_paths], out_path)
+    elapsed = time.perf_counter() - start_time
+
+    # The maximum resident set size is in kilobytes on Linux
+    return elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _create_scan_pdf(path: Path, size: int) -> Path:
+    # Random data can't be compressed, which is similar to scanned images
+    image_size = size // _PAGES_PER_FILE
+    width = 1000
+    height = image_size // (width * 3)
+
+    with Pdf.new() as pdf:
+        for _ in range(_PAGES_PER_FILE):
+            image = Stream(pdf, os.urandom(width * height * 3))
+            image.Type = Name.XObject
+            image.Subtype = Name.Image
+            image.Width = width
+            image.Height = height
+            image.ColorSpace = Name.DeviceRGB
+            image.BitsPerComponent = 8
+
+            pdf.add_blank_page()
+            page = pdf.pages[-1]
+            page.Resources = Dictionary(XObject=Dictionary(Im0=image))
+            page.Contents = pdf.make_stream(b"q 612 0 0 792 0 0 cm /Im0 Do Q")
+        pdf.save(path)
+    return path
+
+
+if __name__ == "__main__":
+    main()
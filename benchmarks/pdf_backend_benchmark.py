@@ -0,0 +1,82 @@
+"""Compare the wall time and peak memory usage of the PDF backends per operation.
+
+Each run is done in a fresh process so that the peak RSS of one run doesn't affect
+another. Run it from the project root:
+
+    python -m benchmarks.pdf_backend_benchmark --num-pages 2000
+"""
+
+import argparse
+import multiprocessing
+import resource
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any
+
+from pikepdf import Dictionary, Name, Pdf
+
+from pdf_bot.pdf import AbstractPdfBackend, PikepdfBackend, PypdfBackend, ScaleByData
+
+_BACKENDS: dict[str, AbstractPdfBackend] = {"pypdf": PypdfBackend(), "pikepdf": PikepdfBackend()}
+_OPERATIONS: dict[str, tuple[str, tuple[Any, ...]]] = {
+    "rotate": ("rotate", (90,)),
+    "scale": ("scale_by_factor", (ScaleByData(1.5, 1.5),)),
+    "encrypt": ("encrypt", ("password",)),
+    "split": ("split", ("::2",)),
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--num-pages", type=int, default=2000)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as td:
+        dir_path = Path(td)
+        file_path = _create_text_pdf(dir_path / "file.pdf", args.num_pages)
+        print(f"Running on {args.num_pages} pages of {file_path.stat().st_size / 1024**2:.1f} MB")  # noqa: T201
+
+        ctx = multiprocessing.get_context("spawn")
+        for operation in _OPERATIONS:
+            for name in _BACKENDS:
+                out_path = dir_path / f"{operation}_{name}.pdf"
+                with ctx.Pool(1, maxtasksperchild=1) as pool:
+                    elapsed, max_rss = pool.apply(_run, (name, operation, file_path, out_path))
+                out_size = out_path.stat().st_size / 1024**2
+                print(  # noqa: T201
+                    f"{operation:>8} {name:>8}: {elapsed:6.2f}s, "
+                    f"peak RSS {max_rss / 1024:7.1f} MB, output {out_size:.1f} MB"
+                )
+
+
+def _run(name: str, operation: str, file_path: Path, out_path: Path) -> tuple[float, int]:
+    method, args = _OPERATIONS[operation]
+    start_time = time.perf_counter()
+    getattr(_BACKENDS[name], method)(file_path, *args, out_path)
+    elapsed = time.perf_counter() - start_time
+
+    # The maximum resident set size is in kilobytes on Linux
+    return elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _create_text_pdf(path: Path, num_pages: int) -> Path:
+    with Pdf.new() as pdf:
+        font = pdf.make_indirect(
+            Dictionary(Type=Name.Font, Subtype=Name.Type1, BaseFont=Name.Helvetica)
+        )
+        lines = b" ".join(b"0 -14 Td (Lorem ipsum dolor sit amet %d) Tj" % i for i in range(50))
+
+        for i in range(num_pages):
+            pdf.add_blank_page()
+            page = pdf.pages[-1]
+            page.Resources = Dictionary(Font=Dictionary(F1=font))
+            page.Contents = pdf.make_stream(
+                b"BT /F1 12 Tf 72 760 Td (Page %d) Tj %s ET" % (i + 1, lines)
+            )
+        pdf.save(path)
+    return path
+
+
+if __name__ == "__main__":
+    main()
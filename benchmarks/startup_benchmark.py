@@ -0,0 +1,79 @@
+"""Measure the cold start time of the bot until it's ready to serve the first update.
+
+Each run is done in a fresh process so that none of the modules are imported yet. The
+cold start covers importing the bot, and building the containers and the Telegram
+application with all the processors and handlers registered. The heavy engines are
+imported on their first use, and the time to preload them after the start is reported
+separately. Run it from the project root:
+
+    python -m benchmarks.startup_benchmark --runs 5 --budget 3
+"""
+
+import argparse
+import importlib
+import multiprocessing
+import statistics
+import sys
+import time
+
+from dependency_injector import providers
+
+_PHASES = ("import", "setup", "cold start", "preload")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--budget", type=float, default=None, help="maximum median cold start in seconds"
+    )
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    results: dict[str, list[float]] = {x: [] for x in _PHASES}
+    for _ in range(args.runs):
+        with ctx.Pool(1, maxtasksperchild=1) as pool:
+            timings = pool.apply(_run)
+        for phase, elapsed in timings.items():
+            results[phase].append(elapsed)
+
+    for phase, phase_timings in results.items():
+        print(  # noqa: T201
+            f"{phase:>10}: median {statistics.median(phase_timings):6.2f}s, "
+            f"max {max(phase_timings):6.2f}s"
+        )
+
+    cold_start = statistics.median(results["cold start"])
+    if args.budget is not None and cold_start > args.budget:
+        print(f"Cold start of {cold_start:.2f}s is over the budget of {args.budget:.2f}s")  # noqa: T201
+        sys.exit(1)
+
+
+def _run() -> dict[str, float]:
+    start_time = time.perf_counter()
+    bot_main = importlib.import_module("pdf_bot.__main__")
+    containers = importlib.import_module("pdf_bot.containers")
+    startup = importlib.import_module("pdf_bot.startup")
+    import_time = time.perf_counter()
+
+    app = containers.Application()
+
+    # The datastore client needs valid credentials, and it's only used by the handlers
+    # once they receive updates
+    app.clients.datastore.override(providers.Object(None))
+    bot_main.build_telegram_app(app)
+    setup_time = time.perf_counter()
+
+    startup.load_lazy_modules()
+    preload_time = time.perf_counter()
+
+    return {
+        "import": import_time - start_time,
+        "setup": setup_time - import_time,
+        "cold start": setup_time - start_time,
+        "preload": preload_time - setup_time,
+    }
+
+
+if __name__ == "__main__":
+    main()
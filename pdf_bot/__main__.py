@@ -1,4 +1,4 @@
-from typing import Any
+from threading import Thread
 
 import sentry_sdk
 from dependency_injector.providers import Singleton
@@ -6,26 +6,26 @@ from dependency_injector.wiring import Provide, inject
 from loguru import logger
 from telegram.ext import Application as TelegramApp
 
+from pdf_bot.analytics import AnalyticsService
 from pdf_bot.containers import Application
+from pdf_bot.datastore import DatastoreService
 from pdf_bot.error import ErrorHandler
+from pdf_bot.executor import ExecutorService
 from pdf_bot.log import MyLogHandler
+from pdf_bot.result_cache import ResultCacheService
 from pdf_bot.settings import Settings
+from pdf_bot.startup import load_lazy_modules
 from pdf_bot.telegram_handler import AbstractTelegramHandler
 
 
 @inject
 def main(
     telegram_app: TelegramApp,
-    settings: Settings | dict[str, Any] = Provide[Application.core.settings],
+    settings: Settings = Provide[Application.core.app_settings],
     log_handler: MyLogHandler = Provide[Application.core.log_handler],
 ) -> None:
     log_handler.setup()
 
-    # There's a bug where configurations are passed as a dict, so we attempt to pass it
-    # here. See https://github.com/ets-labs/python-dependency-injector/issues/593
-    if isinstance(settings, dict):
-        settings = Settings(**settings)
-
     if settings.sentry_dsn is not None:
         sentry_sdk.init(settings.sentry_dsn, traces_sample_rate=0.8, profiles_sample_rate=0.8)
     else:
@@ -42,12 +42,40 @@ def main(
         telegram_app.run_polling()
 
 
-if __name__ == "__main__":
-    app = Application()
-    app.wire(modules=[__name__])
+@inject
+async def post_init(
+    _telegram_app: TelegramApp,
+    preload_lazy_modules: bool = Provide[
+        Application.core.settings.preload_lazy_modules  # type: ignore[attr-defined]
+    ],
+) -> None:
+    if preload_lazy_modules:
+        # Load the modules in a separate thread so that the updates are served meanwhile
+        Thread(target=load_lazy_modules, name="lazy-module-loader", daemon=True).start()
+
+
+@inject
+async def post_shutdown(
+    _telegram_app: TelegramApp,
+    analytics_service: AnalyticsService = Provide[Application.services.analytics],
+    datastore_service: DatastoreService = Provide[Application.repositories.datastore],
+    executor_service: ExecutorService = Provide[Application.services.executor],
+    result_cache_service: ResultCacheService = Provide[Application.services.result_cache],
+) -> None:
+    await analytics_service.flush()
+    await datastore_service.flush()
+    executor_service.shutdown()
+    result_cache_service.close()
 
-    _telegram_app = (
-        TelegramApp.builder().bot(app.core.telegram_bot()).concurrent_updates(True).build()
+
+def build_telegram_app(app: Application) -> TelegramApp:
+    telegram_app = (
+        TelegramApp.builder()
+        .bot(app.core.telegram_bot())
+        .concurrent_updates(True)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
     )
 
     # Dependency injectior only initialises the classes if they are referenced. Since
@@ -62,8 +90,14 @@ if __name__ == "__main__":
         if isinstance(provider, Singleton):
             handler = provider()
             if isinstance(handler, AbstractTelegramHandler):
-                _telegram_app.add_handlers(handler.handlers)
+                telegram_app.add_handlers(handler.handlers, group=handler.group)
             elif isinstance(handler, ErrorHandler):
-                _telegram_app.add_error_handler(handler.callback)
+                telegram_app.add_error_handler(handler.callback)
+
+    return telegram_app
 
-    main(_telegram_app)
+
+if __name__ == "__main__":
+    app = Application()
+    app.wire(modules=[__name__])
+    main(build_telegram_app(app))
@@ -1,4 +1,5 @@
+from .account_handler import AccountHandler
 from .account_repository import AccountRepository
 from .account_service import AccountService
 
-__all__ = ["AccountRepository", "AccountService"]
+__all__ = ["AccountHandler", "AccountRepository", "AccountService"]
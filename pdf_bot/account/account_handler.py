@@ -0,0 +1,20 @@
+from telegram import Update
+from telegram.ext import BaseHandler, TypeHandler
+
+from pdf_bot.telegram_handler import AbstractTelegramHandler
+
+from .account_service import AccountService
+
+
+class AccountHandler(AbstractTelegramHandler):
+    def __init__(self, account_service: AccountService) -> None:
+        self.account_service = account_service
+
+    @property
+    def group(self) -> int:
+        # Run before the other handlers so that the user is cached when they need it
+        return -1
+
+    @property
+    def handlers(self) -> list[BaseHandler]:
+        return [TypeHandler(Update, self.account_service.prefetch_user)]
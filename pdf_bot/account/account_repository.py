@@ -1,26 +1,35 @@
-from google.cloud.datastore import Client, Entity
+from collections import OrderedDict
 
-from pdf_bot.consts import LANGUAGE, USER
+from google.cloud.datastore import Entity
 
+from pdf_bot.consts import LANGUAGE
+from pdf_bot.datastore import DatastoreService
+from pdf_bot.settings import Settings
 
-class AccountRepository:
-    def __init__(self, datastore_client: Client) -> None:
-        self.datastore_client = datastore_client
-
-    def get_user(self, user_id: int) -> Entity | None:
-        key = self.datastore_client.key(USER, user_id)
-        entity: Entity | None = self.datastore_client.get(key)
-
-        return entity
 
-    def upsert_user(self, user_id: int, language_code: str) -> None:
-        with self.datastore_client.transaction():
-            key = self.datastore_client.key(USER, user_id)
-            db_user = self.datastore_client.get(key)
-
-            if db_user is None:
-                db_user = Entity(key)
-            if LANGUAGE not in db_user:
-                db_user[LANGUAGE] = language_code
-
-            self.datastore_client.put(db_user)
+class AccountRepository:
+    def __init__(self, datastore_service: DatastoreService, settings: Settings) -> None:
+        self.datastore_service = datastore_service
+        self.known_users_max_size = settings.datastore_known_users_max_size
+
+        # Users that are known to have been created, so they aren't looked up on /start
+        self._known_users: OrderedDict[int, None] = OrderedDict()
+
+    async def get_user(self, user_id: int) -> Entity | None:
+        return await self.datastore_service.get_user(user_id)
+
+    async def upsert_user(self, user_id: int, language_code: str) -> None:
+        if user_id in self._known_users:
+            self._known_users.move_to_end(user_id)
+            return
+
+        db_user = await self.datastore_service.get_user(user_id)
+        if db_user is None:
+            db_user = self.datastore_service.create_user(user_id)
+        if LANGUAGE not in db_user:
+            db_user[LANGUAGE] = language_code
+            await self.datastore_service.put_user(db_user)
+
+        self._known_users[user_id] = None
+        while len(self._known_users) > self.known_users_max_size:
+            self._known_users.popitem(last=False)
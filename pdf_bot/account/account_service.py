@@ -1,6 +1,9 @@
-from telegram import User
+from loguru import logger
+from telegram import Update, User
+from telegram.ext import ContextTypes
 
 from pdf_bot.account.account_repository import AccountRepository
+from pdf_bot.errors import UserIdError
 from pdf_bot.language import LanguageService
 
 
@@ -13,7 +16,7 @@ class AccountService:
         self.account_repository = account_repository
         self.language_service = language_service
 
-    def create_user(self, telegram_user: User) -> None:
+    async def create_user(self, telegram_user: User) -> None:
         user_lang_code = telegram_user.language_code
         lang_code = self._LANGUAGE_CODE
 
@@ -22,4 +25,21 @@ class AccountService:
             if code is not None:
                 lang_code = code
 
-        self.account_repository.upsert_user(telegram_user.id, lang_code)
+        await self.account_repository.upsert_user(telegram_user.id, lang_code)
+
+    async def prefetch_user(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        # The user is only looked up when the language service would read it, and with the
+        # same ID, so that the language is served from the cache
+        if self.language_service.is_user_language_cached(context):
+            return
+
+        try:
+            user_id = self.language_service.get_user_id(update)
+        except UserIdError:
+            return
+
+        try:
+            await self.account_repository.get_user(user_id)
+        except Exception as e:  # noqa: BLE001
+            # The user is looked up again when it's needed, and the update is still handled
+            logger.warning("Failed to prefetch user: {error}", error=e)
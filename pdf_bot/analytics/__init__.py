@@ -1,5 +1,11 @@
 from .analytics_repository import AnalyticsRepository
 from .analytics_service import AnalyticsService
-from .models import EventAction, TaskType
+from .models import AnalyticsStats, EventAction, TaskType
 
-__all__ = ["AnalyticsRepository", "AnalyticsService", "EventAction", "TaskType"]
+__all__ = [
+    "AnalyticsRepository",
+    "AnalyticsService",
+    "AnalyticsStats",
+    "EventAction",
+    "TaskType",
+]
@@ -1,26 +1,58 @@
-from typing import cast
+import asyncio
+from collections import deque
+from contextlib import suppress
+from dataclasses import dataclass
+from typing import Any, cast
 from uuid import UUID
 
 from loguru import logger
-from requests.exceptions import HTTPError
+from requests.exceptions import RequestException
 from telegram import Message, Update, User
 from telegram.ext import ContextTypes
 
 from pdf_bot.language import LanguageService
+from pdf_bot.settings import Settings
 
 from .analytics_repository import AnalyticsRepository
-from .models import EventAction, TaskType
+from .models import AnalyticsStats, EventAction, TaskType
+
+
+@dataclass
+class _Event:
+    client_id: str
+    language: str
+    params: dict[str, Any]
 
 
 class AnalyticsService:
+    # The maximum number of events per request of the Measurement Protocol
+    _MAX_EVENTS_PER_REQUEST = 25
+
     def __init__(
         self,
         analytics_repository: AnalyticsRepository,
         language_service: LanguageService,
+        settings: Settings,
     ) -> None:
         self.analytics_repository = analytics_repository
         self.language_service = language_service
 
+        self.queue_max_size = settings.analytics_queue_max_size
+        self.batch_size = settings.analytics_batch_size
+        self.flush_interval = settings.analytics_flush_interval
+        self.flush_timeout = settings.analytics_flush_timeout
+        self.max_retries = settings.analytics_max_retries
+        self.retry_backoff = settings.analytics_retry_backoff
+
+        self.stats = AnalyticsStats()
+        self._events: deque[_Event] = deque()
+
+        # Number of events taken off the queue that are being sent
+        self._num_sending = 0
+        self._request_semaphore = asyncio.Semaphore(settings.analytics_max_concurrent_requests)
+        self._flush_event = asyncio.Event()
+        self._worker: asyncio.Task[None] | None = None
+
     def send_event(
         self,
         update: Update,
@@ -28,22 +60,106 @@ class AnalyticsService:
         task_type: TaskType,
         action: EventAction,
     ) -> None:
+        """Queue the event to be sent in the background.
+
+        The oldest queued event is dropped if the queue is full.
+        """
         lang = self.language_service.get_user_language(update, context)
         msg = cast(Message, update.effective_message)
         msg_user = cast(User, msg.from_user)
 
-        event = {
-            "client_id": str(UUID(int=msg_user.id)),
-            "user_properties": {"bot_language": {"value": lang}},
-            "events": [
-                {
-                    "name": task_type.value,
-                    "params": {"action": action.value},
-                }
-            ],
-        }
+        if len(self._events) >= self.queue_max_size:
+            self._events.popleft()
+            self.stats.dropped += 1
+
+        self._events.append(
+            _Event(
+                client_id=str(UUID(int=msg_user.id)),
+                language=lang,
+                params={"name": task_type.value, "params": {"action": action.value}},
+            )
+        )
+
+        # The events stay queued until they're flushed if there isn't a running event loop
+        with suppress(RuntimeError):
+            self._start_worker()
 
+    async def flush(self) -> None:
+        """Send all the queued events now and wait for them to be sent.
+
+        The events that aren't sent within the flush timeout are dropped.
+        """
+        self._flush_event.set()
+        if self._events:
+            self._start_worker()
+
+        try:
+            if self._worker is not None:
+                async with asyncio.timeout(self.flush_timeout):
+                    await self._worker
+        except TimeoutError:
+            num_unsent = len(self._events) + self._num_sending
+            logger.warning("Dropped {count} unsent analytics events", count=num_unsent)
+            self.stats.dropped += num_unsent
+            self._events.clear()
+            self._num_sending = 0
+        finally:
+            self._flush_event.clear()
+
+    def _start_worker(self) -> None:
+        if self._worker is None:
+            self._worker = asyncio.get_running_loop().create_task(self._run_worker())
+
+    async def _run_worker(self) -> None:
         try:
-            self.analytics_repository.send_event(event)
-        except HTTPError:
-            logger.exception("Failed to send analytics")
+            while self._events:
+                if not self._flush_event.is_set():
+                    with suppress(TimeoutError):
+                        await asyncio.wait_for(self._flush_event.wait(), self.flush_interval)
+
+                events = [
+                    self._events.popleft() for _ in range(min(self.batch_size, len(self._events)))
+                ]
+                self._num_sending += len(events)
+                await asyncio.gather(
+                    *(self._send_payload(x) for x in self._create_payloads(events))
+                )
+        finally:
+            self._worker = None
+
+    def _create_payloads(self, events: list[_Event]) -> list[dict[str, Any]]:
+        # Events are grouped by the users, with the latest language of each user
+        user_events: dict[str, list[_Event]] = {}
+        for event in events:
+            user_events.setdefault(event.client_id, []).append(event)
+
+        payloads = []
+        for client_id, client_events in user_events.items():
+            for i in range(0, len(client_events), self._MAX_EVENTS_PER_REQUEST):
+                batch = client_events[i : i + self._MAX_EVENTS_PER_REQUEST]
+                payloads.append(
+                    {
+                        "client_id": client_id,
+                        "user_properties": {"bot_language": {"value": batch[-1].language}},
+                        "events": [x.params for x in batch],
+                    }
+                )
+        return payloads
+
+    async def _send_payload(self, payload: dict[str, Any]) -> None:
+        num_events = len(payload["events"])
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._request_semaphore:
+                    await asyncio.to_thread(self.analytics_repository.send_event, payload)
+            except RequestException:
+                if attempt == self.max_retries:
+                    logger.exception("Failed to send {count} analytics events", count=num_events)
+                    self.stats.failed += num_events
+                    self._num_sending -= num_events
+                    return
+                await asyncio.sleep(self.retry_backoff * 2**attempt)
+            else:
+                self.stats.sent += num_events
+                self._num_sending -= num_events
+                return
@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from enum import Enum
 
 
@@ -15,6 +16,7 @@ class TaskType(Enum):
     merge_pdf = "merge_pdf"
     ocr_pdf = "ocr_pdf"
     pdf_to_image = "pdf_to_image"
+    pipeline_pdf = "pipeline_pdf"
     preview_pdf = "preview_pdf"
     rename_pdf = "rename_pdf"
     rotate_pdf = "rotate_pdf"
@@ -27,3 +29,10 @@ class TaskType(Enum):
 
 class EventAction(Enum):
     complete = "complete"
+
+
+@dataclass
+class AnalyticsStats:
+    sent: int = 0
+    dropped: int = 0
+    failed: int = 0
@@ -1,35 +1,209 @@
-import shlex
+import asyncio
+import os
+import signal
+from asyncio import StreamReader
+from asyncio.subprocess import PIPE, Process, create_subprocess_exec
+from contextlib import suppress
 from gettext import gettext as _
 from pathlib import Path
-from subprocess import PIPE, Popen
 
 from loguru import logger
 
-from pdf_bot.cli.exceptions import CLINonZeroExitStatusError
+from pdf_bot.cli.exceptions import CLINonZeroExitStatusError, CLITimeoutError
+from pdf_bot.settings import Settings
 
 
 class CLIService:
-    def compress_pdf(self, input_path: Path, output_path: Path) -> None:
-        command = (
-            "gs -sDEVICE=pdfwrite -dCompatibilityLevel=1.4 -dPDFSETTINGS=/default "
-            f'-dNOPAUSE -dQUIET -dBATCH -sOutputFile="{output_path}" "{input_path}"'
-        )
-        self._run_command(command)
+    _READ_CHUNK_SIZE = 4096
 
-    def extract_pdf_images(self, input_path: Path, output_path: Path) -> None:
-        command = f'pdfimages -png "{input_path}" "{output_path}/images"'
-        self._run_command(command)
+    def __init__(self, settings: Settings) -> None:
+        self.default_timeout = settings.cli_default_timeout
+        self.timeouts = settings.cli_timeouts
+        self.max_output_size = settings.cli_max_output_size
+        self._semaphore = asyncio.Semaphore(settings.cli_max_processes)
 
-    @staticmethod
-    def _run_command(command: str) -> None:
-        proc = Popen(shlex.split(command), stdout=PIPE, stderr=PIPE, shell=False)
-        out, err = proc.communicate()
+    def get_timeout(self, command_name: str) -> float:
+        return self.timeouts.get(command_name, self.default_timeout)
+
+    async def compress_pdf(
+        self, input_path: Path, output_path: Path, profile: str = "default"
+    ) -> None:
+        # The profile sets the image downsampling and quality, see the -dPDFSETTINGS
+        # option of Ghostscript
+        args = [
+            "gs",
+            "-sDEVICE=pdfwrite",
+            "-dCompatibilityLevel=1.4",
+            f"-dPDFSETTINGS=/{profile}",
+            "-dNOPAUSE",
+            "-dQUIET",
+            "-dBATCH",
+            f"-sOutputFile={output_path}",
+            str(input_path),
+        ]
+        await self._run_command("compress_pdf", args)
+
+    async def grayscale_pdf(self, input_path: Path, output_path: Path) -> None:
+        # Convert the colour spaces of the content streams and images while keeping the
+        # text and vector graphics as they are
+        args = [
+            "gs",
+            "-sDEVICE=pdfwrite",
+            "-sColorConversionStrategy=Gray",
+            "-dProcessColorModel=/DeviceGray",
+            "-dAutoRotatePages=/None",
+            "-dNOPAUSE",
+            "-dQUIET",
+            "-dBATCH",
+            f"-sOutputFile={output_path}",
+            str(input_path),
+        ]
+        await self._run_command("grayscale_pdf", args)
+
+    async def extract_pdf_images(self, input_path: Path, output_path: Path) -> None:
+        args = ["pdfimages", "-png", str(input_path), f"{output_path}/images"]
+        await self._run_command("extract_pdf_images", args)
+
+    async def convert_pdf_to_images(  # noqa: PLR0913
+        self,
+        input_path: Path,
+        output_path: Path,
+        first_page: int,
+        last_page: int,
+        dpi: int,
+        grayscale: bool = False,
+    ) -> None:
+        """Render the pages of the PDF file to PNG images.
+
+        Args:
+            input_path: the path of the PDF file
+            output_path: the path prefix of the images, each image is named with the
+                prefix followed by `-<page number>.png`
+            first_page: the first page number to render, starting from 1
+            last_page: the last page number to render
+            dpi: the resolution of the images
+            grayscale: whether to render the images in grayscale
+        """
+        args = [
+            "pdftoppm",
+            "-png",
+            "-r",
+            str(dpi),
+            "-f",
+            str(first_page),
+            "-l",
+            str(last_page),
+        ]
+        if grayscale:
+            args.append("-gray")
+
+        args.extend([str(input_path), str(output_path)])
+        await self._run_command("convert_pdf_to_images", args)
+
+    async def render_pdf_previews(self, input_path: Path, output_path: Path, dpi: int) -> None:
+        # Render all the pages as grayscale PGM images, which are cheap to analyse
+        args = ["pdftoppm", "-gray", "-r", str(dpi), str(input_path), str(output_path)]
+        await self._run_command("render_pdf_previews", args)
+
+    async def extract_pdf_text(
+        self, input_path: Path, output_path: Path, first_page: int, last_page: int
+    ) -> None:
+        args = [
+            "pdftotext",
+            "-enc",
+            "UTF-8",
+            "-f",
+            str(first_page),
+            "-l",
+            str(last_page),
+            str(input_path),
+            str(output_path),
+        ]
+        await self._run_command("extract_pdf_text", args)
+
+    async def render_pdf_page(
+        self, input_path: Path, output_path: Path, page: int, size: int
+    ) -> None:
+        """Render the page of the PDF file to a PNG image.
+
+        Only the given page is parsed and rendered, and the image is scaled so that its
+        longest side is the given size in pixels.
+
+        Args:
+            input_path: the path of the PDF file
+            output_path: the path of the image without the extension, `.png` is appended
+                to it
+            page: the page number starting from 1
+            size: the size of the longest side of the image in pixels
+        """
+        args = [
+            "pdftoppm",
+            "-png",
+            "-singlefile",
+            "-f",
+            str(page),
+            "-l",
+            str(page),
+            "-scale-to",
+            str(size),
+            str(input_path),
+            str(output_path),
+        ]
+        await self._run_command("render_pdf_page", args)
+
+    async def _run_command(self, command_name: str, args: list[str]) -> None:
+        async with self._semaphore:
+            # Start the process in a new session so that we can kill its process group,
+            # including any processes that it spawns
+            proc = await create_subprocess_exec(
+                *args, stdout=PIPE, stderr=PIPE, start_new_session=True
+            )
+
+            try:
+                async with asyncio.timeout(self.get_timeout(command_name)):
+                    out, err, _returncode = await asyncio.gather(
+                        self._read_stream(proc.stdout),
+                        self._read_stream(proc.stderr),
+                        proc.wait(),
+                    )
+            except TimeoutError as e:
+                logger.error("Command timed out:\n{command}", command=args)
+                raise CLITimeoutError(_("The process took too long to complete")) from e
+            finally:
+                await self._kill_process(proc)
 
         if proc.returncode != 0:
             logger.error(
                 "Command:\n{command}\n\nStdout:\n{stdout}\n\nStderr:\n{stderr}",
-                command=command,
-                stdout=out.decode("utf-8"),
-                stderr=err.decode("utf-8"),
+                command=args,
+                stdout=out.decode("utf-8", errors="replace"),
+                stderr=err.decode("utf-8", errors="replace"),
             )
             raise CLINonZeroExitStatusError(_("Failed to complete process"))
+
+    async def _read_stream(self, stream: StreamReader | None) -> bytes:
+        """Read the stream until EOF, only keeping up to the maximum output size.
+
+        The rest of the output is still consumed so that the process doesn't block on a
+        full pipe.
+        """
+        if stream is None:
+            return b""
+
+        data = bytearray()
+        while chunk := await stream.read(self._READ_CHUNK_SIZE):
+            remaining = self.max_output_size - len(data)
+            if remaining > 0:
+                data.extend(chunk[:remaining])
+        return bytes(data)
+
+    @staticmethod
+    async def _kill_process(proc: Process) -> None:
+        if proc.returncode is not None:
+            return
+
+        with suppress(ProcessLookupError):
+            os.killpg(proc.pid, signal.SIGKILL)
+
+        # Shield the wait so that the process is reaped even if we're being cancelled
+        await asyncio.shield(proc.wait())
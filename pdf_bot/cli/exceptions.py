@@ -4,3 +4,7 @@ class CLIServiceError(Exception):
 
 class CLINonZeroExitStatusError(CLIServiceError):
     pass
+
+
+class CLITimeoutError(CLIServiceError):
+    pass
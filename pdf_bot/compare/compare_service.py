@@ -1,6 +1,5 @@
-from typing import cast
+from typing import TYPE_CHECKING, cast
 
-from pdf_diff import NoDifferenceError
 from telegram import Message, ReplyKeyboardMarkup, ReplyKeyboardRemove, Update
 from telegram.ext import ContextTypes, ConversationHandler
 
@@ -8,12 +7,19 @@ from pdf_bot.analytics import TaskType
 from pdf_bot.consts import BACK, CANCEL
 from pdf_bot.language import LanguageService
 from pdf_bot.pdf import PdfService
+from pdf_bot.scheduler import SchedulerService
+from pdf_bot.startup import lazy_import
 from pdf_bot.telegram_internal import (
     TelegramGetUserDataError,
     TelegramService,
     TelegramServiceError,
 )
 
+if TYPE_CHECKING:
+    import pdf_diff
+else:
+    pdf_diff = lazy_import("pdf_diff")
+
 
 class CompareService:
     WAIT_FIRST_PDF = 0
@@ -25,10 +31,12 @@ class CompareService:
         pdf_service: PdfService,
         telegram_service: TelegramService,
         language_service: LanguageService,
+        scheduler_service: SchedulerService,
     ) -> None:
         self.pdf_service = pdf_service
         self.telegram_service = telegram_service
         self.language_service = language_service
+        self.scheduler_service = scheduler_service
 
     async def ask_first_pdf(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         _ = self.language_service.set_app_language(update, context)
@@ -83,11 +91,14 @@ class CompareService:
         await msg.reply_text(_("Comparing your PDF files"), reply_markup=ReplyKeyboardRemove())
 
         try:
-            async with self.pdf_service.compare_pdfs(file_id, doc.file_id) as out_path:
+            async with (
+                self.scheduler_service.schedule_update(update, context, TaskType.compare_pdf),
+                self.pdf_service.compare_pdfs(file_id, doc.file_id) as out_path,
+            ):
                 await self.telegram_service.send_file(
                     update, context, out_path, TaskType.compare_pdf
                 )
-        except NoDifferenceError:
+        except pdf_diff.NoDifferenceError:
             await msg.reply_text(_("There are no text differences between your PDF files"))
 
         return ConversationHandler.END
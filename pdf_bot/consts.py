@@ -21,3 +21,8 @@ USER = "User"
 LANGUAGE = "language"
 
 GENERIC_ERROR = _("Something went wrong, start over with your file or command")
+FILE_TOO_LARGE_ERROR = _(
+    "The file is too large for me to send to you\n\n"
+    "Note that this limit is enforced by Telegram and there's "
+    "nothing I can do unless Telegram changes it"
+)
@@ -4,13 +4,15 @@ from slack_sdk import WebClient as SlackClient
 from telegram.ext import AIORateLimiter, ExtBot
 from telegram.request import HTTPXRequest
 
-from pdf_bot.account import AccountRepository, AccountService
+from pdf_bot.account import AccountHandler, AccountRepository, AccountService
 from pdf_bot.analytics import AnalyticsRepository, AnalyticsService
 from pdf_bot.cli import CLIService
 from pdf_bot.command import CommandService, MyCommandHandler
 from pdf_bot.compare import CompareHandler, CompareService
-from pdf_bot.datastore import MyDatastoreClient
+from pdf_bot.datastore import DatastoreService, MyDatastoreClient
+from pdf_bot.download_cache import DownloadCacheService
 from pdf_bot.error import ErrorCallbackQueryHandler, ErrorHandler, ErrorService
+from pdf_bot.executor import ExecutorService
 from pdf_bot.feedback import FeedbackHandler, FeedbackRepository, FeedbackService
 from pdf_bot.file import FileHandler, FileService
 from pdf_bot.image import ImageService
@@ -20,6 +22,7 @@ from pdf_bot.io import IOService
 from pdf_bot.language import LanguageHandler, LanguageRepository, LanguageService
 from pdf_bot.log import InterceptLoggingHandler, MyLogHandler
 from pdf_bot.merge import MergeHandler, MergeService
+from pdf_bot.page_render import PageRenderService
 from pdf_bot.payment import PaymentHandler, PaymentService
 from pdf_bot.pdf import PdfService
 from pdf_bot.pdf_processor import (
@@ -33,12 +36,19 @@ from pdf_bot.pdf_processor import (
     OcrPdfProcessor,
     PdfTaskProcessor,
     PdfToImageProcessor,
+    PipelinePdfProcessor,
     PreviewPdfProcessor,
     RenamePdfProcessor,
     RotatePdfProcessor,
     ScalePdfProcessor,
     SplitPdfProcessor,
 )
+from pdf_bot.result_cache import (
+    MemoryResultCacheBackend,
+    ResultCacheService,
+    SqliteResultCacheBackend,
+)
+from pdf_bot.scheduler import SchedulerService
 from pdf_bot.settings import Settings
 from pdf_bot.telegram_internal import TelegramService
 from pdf_bot.text import TextHandler, TextRepository, TextService
@@ -46,8 +56,20 @@ from pdf_bot.watermark import WatermarkHandler, WatermarkService
 from pdf_bot.webpage import WebpageHandler, WebpageService
 
 
+def _create_api_session() -> Session:
+    session = Session()
+    session.hooks = {
+        "response": lambda r, *_args, **_kwargs: r.raise_for_status()  # pragma: no cover
+    }
+    return session
+
+
 class Core(containers.DeclarativeContainer):
-    settings = providers.Configuration(pydantic_settings=[Settings()])
+    # The settings are only loaded once. They're shared with the other containers as the
+    # configuration for the individual values, and as the instance for the services that
+    # are given all the settings.
+    app_settings = providers.Object(Settings())
+    settings = providers.Configuration(pydantic_settings=[app_settings()])
 
     _bot_request = providers.Singleton(
         HTTPXRequest,
@@ -76,42 +98,88 @@ class Core(containers.DeclarativeContainer):
 
 
 class Clients(containers.DeclarativeContainer):
-    _settings = providers.Configuration(pydantic_settings=[Settings()])
-
-    _session = Session()
-    _session.hooks = {  # noqa: RUF012
-        "response": lambda r, *_args, **_kwargs: r.raise_for_status()  # pragma: no cover
-    }
+    _settings = providers.Configuration()
 
-    api = providers.Object(_session)
+    api = providers.Singleton(_create_api_session)
     datastore = providers.Singleton(MyDatastoreClient, _settings.gcp_service_account)
     slack = providers.Singleton(SlackClient, token=_settings.slack_token)
 
 
 class Repositories(containers.DeclarativeContainer):
-    _settings = providers.Configuration(pydantic_settings=[Settings()])
+    _settings = providers.Configuration()
+    _app_settings = providers.Dependency(instance_of=Settings)
     clients = providers.DependenciesContainer()
 
-    account = providers.Singleton(AccountRepository, datastore_client=clients.datastore)
-    analytics = providers.Singleton(AnalyticsRepository, api_client=clients.api, settings=_settings)
+    datastore = providers.Singleton(
+        DatastoreService, datastore_client=clients.datastore, settings=_app_settings
+    )
+
+    account = providers.Singleton(
+        AccountRepository, datastore_service=datastore, settings=_app_settings
+    )
+    analytics = providers.Singleton(
+        AnalyticsRepository, api_client=clients.api, settings=_app_settings
+    )
     feedback = providers.Singleton(FeedbackRepository, slack_client=clients.slack)
-    language = providers.Singleton(LanguageRepository, datastore_client=clients.datastore)
+    language = providers.Singleton(LanguageRepository, datastore_service=datastore)
     text = providers.Singleton(
         TextRepository,
         api_client=clients.api,
         google_fonts_token=_settings.google_fonts_token,
+        cache_dir=_settings.google_fonts_cache_dir,
+        catalog_ttl=_settings.google_fonts_catalog_ttl,
     )
 
 
 class Services(containers.DeclarativeContainer):
-    _settings = providers.Configuration(pydantic_settings=[Settings()])
+    _settings = providers.Configuration()
+    _app_settings = providers.Dependency(instance_of=Settings)
     core = providers.DependenciesContainer()
     repositories = providers.DependenciesContainer()
 
-    cli = providers.Singleton(CLIService)
+    cli = providers.Singleton(CLIService, settings=_app_settings)
+    executor = providers.Singleton(ExecutorService, settings=_app_settings)
     io = providers.Singleton(IOService)
+    download_cache = providers.Singleton(
+        DownloadCacheService,
+        cache_dir=_settings.download_cache_dir,
+        max_bytes=_settings.download_cache_max_bytes,
+    )
+    _preview_cache = providers.Singleton(
+        DownloadCacheService,
+        cache_dir=_settings.preview_cache_dir,
+        max_bytes=_settings.preview_cache_max_bytes,
+    )
+    _watermark_cache = providers.Singleton(
+        DownloadCacheService,
+        cache_dir=_settings.watermark_cache_dir,
+        max_bytes=_settings.watermark_cache_max_bytes,
+    )
+    _font_cache = providers.Singleton(
+        DownloadCacheService,
+        cache_dir=_settings.font_cache_dir,
+        max_bytes=_settings.font_cache_max_bytes,
+    )
+    _result_cache_backend = providers.Selector(
+        _settings.result_cache_backend,
+        memory=providers.Singleton(
+            MemoryResultCacheBackend,
+            max_size=_settings.result_cache_max_size,
+            ttl=_settings.result_cache_ttl,
+        ),
+        sqlite=providers.Singleton(
+            SqliteResultCacheBackend,
+            max_size=_settings.result_cache_max_size,
+            ttl=_settings.result_cache_ttl,
+            path=_settings.result_cache_sqlite_path,
+        ),
+    )
+    result_cache = providers.Singleton(ResultCacheService, backend=_result_cache_backend)
 
     language = providers.Singleton(LanguageService, language_repository=repositories.language)
+    scheduler = providers.Singleton(
+        SchedulerService, language_service=language, settings=_app_settings
+    )
 
     account = providers.Singleton(
         AccountService,
@@ -122,6 +190,7 @@ class Services(containers.DeclarativeContainer):
         AnalyticsService,
         analytics_repository=repositories.analytics,
         language_service=language,
+        settings=_app_settings,
     )
     command = providers.Singleton(
         CommandService, account_service=account, language_service=language
@@ -129,16 +198,34 @@ class Services(containers.DeclarativeContainer):
     error = providers.Singleton(ErrorService, language_service=language)
     telegram = providers.Singleton(
         TelegramService,
-        io_service=io,
+        download_cache_service=download_cache,
         language_service=language,
         analytics_service=analytics,
         bot=core.telegram_bot,
+        max_concurrent_downloads=_settings.telegram_max_concurrent_downloads,
     )
 
     image = providers.Singleton(
         ImageService, cli_service=cli, io_service=io, telegram_service=telegram
     )
-    pdf = providers.Singleton(PdfService, cli_service=cli, io_service=io, telegram_service=telegram)
+    pdf = providers.Singleton(
+        PdfService,
+        cli_service=cli,
+        executor_service=executor,
+        io_service=io,
+        telegram_service=telegram,
+        watermark_cache_service=_watermark_cache,
+        settings=_app_settings,
+    )
+    page_render = providers.Singleton(
+        PageRenderService,
+        cli_service=cli,
+        executor_service=executor,
+        io_service=io,
+        telegram_service=telegram,
+        preview_cache_service=_preview_cache,
+        settings=_app_settings,
+    )
 
     _image_task = providers.Singleton(ImageTaskProcessor, language_service=language)
     _pdf_task = providers.Singleton(PdfTaskProcessor, language_service=language)
@@ -155,6 +242,7 @@ class Services(containers.DeclarativeContainer):
         pdf_service=pdf,
         telegram_service=telegram,
         language_service=language,
+        scheduler_service=scheduler,
     )
     feedback = providers.Singleton(
         FeedbackService,
@@ -174,6 +262,7 @@ class Services(containers.DeclarativeContainer):
         pdf_service=pdf,
         telegram_service=telegram,
         language_service=language,
+        scheduler_service=scheduler,
     )
     payment = providers.Singleton(
         PaymentService,
@@ -184,21 +273,25 @@ class Services(containers.DeclarativeContainer):
     text = providers.Singleton(
         TextService,
         text_repository=repositories.text,
+        font_cache_service=_font_cache,
         pdf_service=pdf,
         telegram_service=telegram,
         language_service=language,
+        scheduler_service=scheduler,
     )
     watermark = providers.Singleton(
         WatermarkService,
         pdf_service=pdf,
         telegram_service=telegram,
         language_service=language,
+        scheduler_service=scheduler,
     )
     webpage = providers.Singleton(
         WebpageService,
         io_service=io,
         telegram_service=telegram,
         language_service=language,
+        scheduler_service=scheduler,
     )
 
 
@@ -210,84 +303,121 @@ class Processors(containers.DeclarativeContainer):
         pdf_service=services.pdf,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
     crop = providers.Singleton(
         CropPdfProcessor,
         pdf_service=services.pdf,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
     decrypt = providers.Singleton(
         DecryptPdfProcessor,
         pdf_service=services.pdf,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
     encrypt = providers.Singleton(
         EncryptPdfProcessor,
         pdf_service=services.pdf,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
     extract_image = providers.Singleton(
         ExtractPdfImageProcessor,
         pdf_service=services.pdf,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
     extract_text = providers.Singleton(
         ExtractPdfTextProcessor,
         pdf_service=services.pdf,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
     grayscale = providers.Singleton(
         GrayscalePdfProcessor,
         pdf_service=services.pdf,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
     ocr = providers.Singleton(
         OcrPdfProcessor,
         pdf_service=services.pdf,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
     pdf_to_image = providers.Singleton(
         PdfToImageProcessor,
         pdf_service=services.pdf,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
+    )
+    pipeline = providers.Singleton(
+        PipelinePdfProcessor,
+        pdf_service=services.pdf,
+        telegram_service=services.telegram,
+        language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
     preview_pdf = providers.Singleton(
         PreviewPdfProcessor,
         pdf_service=services.pdf,
+        page_render_service=services.page_render,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
     rename = providers.Singleton(
         RenamePdfProcessor,
         pdf_service=services.pdf,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
     rotate = providers.Singleton(
         RotatePdfProcessor,
         pdf_service=services.pdf,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
     scale = providers.Singleton(
         ScalePdfProcessor,
         pdf_service=services.pdf,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
     split = providers.Singleton(
         SplitPdfProcessor,
         pdf_service=services.pdf,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
 
     beautify = providers.Singleton(
@@ -295,21 +425,28 @@ class Processors(containers.DeclarativeContainer):
         image_service=services.image,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
     image_to_pdf = providers.Singleton(
         ImageToPdfProcessor,
         image_service=services.image,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
 
 
 class Handlers(containers.DeclarativeContainer):
-    _settings = providers.Configuration(pydantic_settings=[Settings()])
+    _settings = providers.Configuration()
     services = providers.DependenciesContainer()
 
     error = providers.Singleton(ErrorHandler, language_service=services.language)
 
+    # The account handler prefetches the users in a group of its own before the others
+    account = providers.Singleton(AccountHandler, account_service=services.account)
+
     # Make sure payment handler comes first as it contains handlers that need to be
     # priortised
     payment = providers.Singleton(PaymentHandler, payment_service=services.payment)
@@ -363,9 +500,21 @@ class Handlers(containers.DeclarativeContainer):
 
 
 class Application(containers.DeclarativeContainer):
+    # The settings are only loaded once by the core container and shared with the others
     core = providers.Container(Core)
-    clients = providers.Container(Clients)
-    repositories = providers.Container(Repositories, clients=clients)
-    services = providers.Container(Services, core=core, repositories=repositories)
+    clients = providers.Container(Clients, _settings=core.settings)
+    repositories = providers.Container(
+        Repositories,
+        _settings=core.settings,
+        _app_settings=core.app_settings,
+        clients=clients,
+    )
+    services = providers.Container(
+        Services,
+        _settings=core.settings,
+        _app_settings=core.app_settings,
+        core=core,
+        repositories=repositories,
+    )
     processors = providers.Container(Processors, services=services)
-    handlers = providers.Container(Handlers, services=services)
+    handlers = providers.Container(Handlers, _settings=core.settings, services=services)
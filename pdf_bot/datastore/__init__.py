@@ -1,3 +1,4 @@
 from .datastore_client import MyDatastoreClient
+from .datastore_service import DatastoreService
 
-__all__ = ["MyDatastoreClient"]
+__all__ = ["DatastoreService", "MyDatastoreClient"]
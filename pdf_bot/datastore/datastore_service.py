@@ -0,0 +1,217 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Coroutine
+from typing import Any, cast
+
+from google.cloud.datastore import Client, Entity, Key
+from loguru import logger
+
+from pdf_bot.consts import USER
+from pdf_bot.settings import Settings
+
+
+class DatastoreService:
+    # The maximum number of keys per lookup and entities per commit of Datastore
+    _MAX_GET_BATCH_SIZE = 1000
+    _MAX_PUT_BATCH_SIZE = 500
+
+    def __init__(self, datastore_client: Client, settings: Settings) -> None:
+        self.datastore_client = datastore_client
+        self.cache_max_size = settings.datastore_cache_max_size
+        self.cache_ttl = settings.datastore_cache_ttl
+        self.batch_window = settings.datastore_batch_window
+        self.put_max_retries = settings.datastore_put_max_retries
+        self.put_retry_backoff = settings.datastore_put_retry_backoff
+
+        # Users that don't exist are cached as None
+        self._users: OrderedDict[int, tuple[float, Entity | None]] = OrderedDict()
+
+        # Concurrent lookups of the same user share the same future, and the users are
+        # looked up together once the batch window is over
+        self._pending_gets: dict[int, asyncio.Future[Entity | None]] = {}
+        self._get_batch: list[int] = []
+        self._get_task: asyncio.Task[None] | None = None
+
+        # Users that are written but not committed yet, which take precedence over the
+        # looked up users
+        self._dirty_users: dict[int, Entity] = {}
+        self._put_batch: dict[int, Entity] = {}
+        self._put_task: asyncio.Task[None] | None = None
+
+        # Number of failed attempts of the users whose writes are retried
+        self._put_attempts: dict[int, int] = {}
+
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def create_user(self, user_id: int) -> Entity:
+        return Entity(self._get_key(user_id))
+
+    async def get_user(self, user_id: int) -> Entity | None:
+        """Get the user entity from the cache or look it up in Datastore.
+
+        The lookup runs in a thread and is batched with the other lookups within the
+        batch window, and the concurrent lookups of the same user are coalesced.
+        """
+        is_cached, user = self._get_cached_user(user_id)
+        if is_cached:
+            return user
+
+        future = self._pending_gets.get(user_id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending_gets[user_id] = future
+            self._get_batch.append(user_id)
+
+            if self._get_task is None:
+                self._get_task = self._create_task(self._run_get_batch())
+
+        # The future is shared with the other callers, so don't cancel it with this one
+        return await asyncio.shield(future)
+
+    def get_user_blocking(self, user_id: int) -> Entity | None:
+        """Get the user entity from the cache or look it up in Datastore in this thread."""
+        is_cached, user = self._get_cached_user(user_id)
+        if not is_cached:
+            user = self.datastore_client.get(self._get_key(user_id))
+            self._set_cached_user(user_id, user)
+        return user
+
+    async def put_user(self, user: Entity) -> None:
+        """Cache the user entity and write it to Datastore in the background.
+
+        The writes within the batch window are committed together in a thread.
+        """
+        user_id = self._get_user_id(user)
+        self._dirty_users[user_id] = user
+        self._put_batch[user_id] = user
+        self._set_cached_user(user_id, user)
+
+        if self._put_task is None:
+            self._put_task = self._create_task(self._run_put_batch(self.batch_window))
+
+    async def flush(self) -> None:
+        """Commit the pending writes now and wait for the running lookups and writes.
+
+        The failed writes are still retried before this returns.
+        """
+        if self._put_task is not None:
+            self._put_task.cancel()
+        await self._commit_put_batch()
+
+        # The retries are done in new tasks, so wait until there are none left
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run_get_batch(self) -> None:
+        await asyncio.sleep(self.batch_window)
+        user_ids, self._get_batch = self._get_batch, []
+        self._get_task = None
+
+        for i in range(0, len(user_ids), self._MAX_GET_BATCH_SIZE):
+            batch = user_ids[i : i + self._MAX_GET_BATCH_SIZE]
+            keys = [self._get_key(x) for x in batch]
+
+            try:
+                entities = await asyncio.to_thread(self.datastore_client.get_multi, keys)
+            except Exception as e:  # noqa: BLE001
+                # The error is raised to the callers that are waiting for the users
+                for user_id in batch:
+                    self._pending_gets.pop(user_id).set_exception(e)
+                continue
+
+            users = {self._get_user_id(x): x for x in entities}
+            for user_id in batch:
+                user = self._dirty_users.get(user_id, users.get(user_id))
+                self._set_cached_user(user_id, user)
+                self._pending_gets.pop(user_id).set_result(user)
+
+    async def _run_put_batch(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self._commit_put_batch()
+
+    async def _commit_put_batch(self) -> None:
+        users = list(self._put_batch.values())
+        self._put_batch = {}
+        self._put_task = None
+        max_attempts = 0
+
+        for i in range(0, len(users), self._MAX_PUT_BATCH_SIZE):
+            batch = users[i : i + self._MAX_PUT_BATCH_SIZE]
+            try:
+                await asyncio.to_thread(self.datastore_client.put_multi, batch)
+            except Exception:  # noqa: BLE001
+                logger.exception("Failed to write {count} users", count=len(batch))
+                for user in batch:
+                    max_attempts = max(max_attempts, self._requeue_put(user))
+            else:
+                for user in batch:
+                    self._put_attempts.pop(self._get_user_id(user), None)
+
+            for user in batch:
+                user_id = self._get_user_id(user)
+                if user_id not in self._put_batch and self._dirty_users.get(user_id) is user:
+                    del self._dirty_users[user_id]
+
+        if max_attempts > 0 and self._put_task is None:
+            delay = self.put_retry_backoff * 2 ** (max_attempts - 1)
+            self._put_task = self._create_task(self._run_put_batch(delay))
+
+    def _requeue_put(self, user: Entity) -> int:
+        """Queue the failed write of the user again and return its number of attempts.
+
+        Zero is returned if the write isn't retried, which is when there's a newer write
+        of the user or the retries have run out.
+        """
+        user_id = self._get_user_id(user)
+        if user_id in self._put_batch:
+            self._put_attempts.pop(user_id, None)
+            return 0
+
+        attempts = self._put_attempts.pop(user_id, 0) + 1
+        if attempts > self.put_max_retries:
+            # Remove the user from the cache so that it's looked up again
+            logger.error("Gave up writing user {user_id}", user_id=user_id)
+            self._users.pop(user_id, None)
+            return 0
+
+        self._put_attempts[user_id] = attempts
+        self._put_batch[user_id] = user
+        return attempts
+
+    def _get_cached_user(self, user_id: int) -> tuple[bool, Entity | None]:
+        if user_id in self._dirty_users:
+            return True, self._dirty_users[user_id]
+
+        entry = self._users.get(user_id)
+        if entry is None:
+            return False, None
+
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            del self._users[user_id]
+            return False, None
+
+        self._users.move_to_end(user_id)
+        return True, user
+
+    def _set_cached_user(self, user_id: int, user: Entity | None) -> None:
+        self._users[user_id] = (time.monotonic() + self.cache_ttl, user)
+        self._users.move_to_end(user_id)
+
+        while len(self._users) > self.cache_max_size:
+            self._users.popitem(last=False)
+
+    def _get_key(self, user_id: int) -> Key:
+        key: Key = self.datastore_client.key(USER, user_id)
+        return key
+
+    def _create_task(self, coro: Coroutine[Any, Any, None]) -> asyncio.Task[None]:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    @staticmethod
+    def _get_user_id(user: Entity) -> int:
+        return cast(int, cast(Key, user.key).id)
@@ -0,0 +1,3 @@
+from .download_cache_service import DownloadCacheService
+
+__all__ = ["DownloadCacheService"]
@@ -0,0 +1,154 @@
+import asyncio
+import os
+from collections import OrderedDict
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass
+from pathlib import Path
+from tempfile import mkstemp
+
+from loguru import logger
+
+
+@dataclass
+class _CacheEntry:
+    path: Path
+    size: int
+    ref_count: int = 0
+
+
+class DownloadCacheService:
+    _PARTIAL_SUFFIX = ".part"
+
+    def __init__(self, cache_dir: Path, max_bytes: int) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+
+        self._entries: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._in_flight: dict[str, asyncio.Future[None]] = {}
+        self._load_entries()
+
+    @asynccontextmanager
+    async def get_file(
+        self,
+        unique_id: str,
+        download: Callable[[Path], Awaitable[object]],
+        suffix: str = "",
+    ) -> AsyncGenerator[Path, None]:
+        """Get the cached file, downloading it first if it's not cached.
+
+        The file is kept in the cache until the context exits, and it must not be
+        modified as it's shared with concurrent readers.
+
+        Args:
+            unique_id: the unique ID of the file, which is the same across bots and
+                over time
+            download: the function to download or create the file at the given path
+            suffix: the suffix of the cached file
+
+        Yields:
+            Path: the path of the cached file
+        """
+        name = f"{unique_id}{suffix}"
+        entry = await self._acquire(name, download)
+
+        try:
+            yield entry.path
+        finally:
+            entry.ref_count -= 1
+            self._evict()
+
+    async def _acquire(
+        self, name: str, download: Callable[[Path], Awaitable[object]]
+    ) -> _CacheEntry:
+        while True:
+            entry = self._entries.get(name)
+            if entry is not None:
+                entry.ref_count += 1
+                self._entries.move_to_end(name)
+                return entry
+
+            future = self._in_flight.get(name)
+            if future is None:
+                break
+
+            # Wait for the concurrent download of the same file, and download it here
+            # if that has failed
+            await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[name] = future
+
+        try:
+            entry = await self._download(name, download)
+        finally:
+            del self._in_flight[name]
+            future.set_result(None)
+
+        entry.ref_count += 1
+        self._entries[name] = entry
+        self.total_bytes += entry.size
+        return entry
+
+    async def _download(
+        self, name: str, download: Callable[[Path], Awaitable[object]]
+    ) -> _CacheEntry:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = mkstemp(dir=self.cache_dir, prefix=".", suffix=self._PARTIAL_SUFFIX)
+        os.close(fd)
+        tmp_path = Path(tmp_name)
+
+        try:
+            await download(tmp_path)
+
+            # Publish the file atomically so that it's never seen partially written
+            path = self.cache_dir / name
+            tmp_path.replace(path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+        return _CacheEntry(path, path.stat().st_size)
+
+    def _evict(self) -> None:
+        for name, entry in list(self._entries.items()):
+            if self.total_bytes <= self.max_bytes:
+                break
+            if entry.ref_count > 0:
+                continue
+
+            del self._entries[name]
+            self.total_bytes -= entry.size
+            entry.path.unlink(missing_ok=True)
+
+    def _load_entries(self) -> None:
+        if not self.cache_dir.is_dir():
+            return
+
+        paths: list[tuple[float, Path, int]] = []
+        for path in self.cache_dir.iterdir():
+            if not path.is_file():
+                continue
+
+            # Partial files are left behind by downloads that were interrupted
+            if path.name.endswith(self._PARTIAL_SUFFIX):
+                with suppress(OSError):
+                    path.unlink()
+                continue
+
+            stat = path.stat()
+            paths.append((stat.st_mtime, path, stat.st_size))
+
+        # Files are ordered by their modified time as the last access time is unknown
+        for _mtime, path, size in sorted(paths):
+            self._entries[path.name] = _CacheEntry(path, size)
+            self.total_bytes += size
+
+        self._evict()
+        logger.info(
+            "Loaded {count} cached files with {size} bytes from {cache_dir}",
+            count=len(self._entries),
+            size=self.total_bytes,
+            cache_dir=self.cache_dir,
+        )
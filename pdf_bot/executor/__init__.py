@@ -0,0 +1,10 @@
+from .exceptions import ExecutorServiceError, ExecutorWorkerCrashError
+from .executor_service import ExecutorService
+from .models import ExecutorOperation
+
+__all__ = [
+    "ExecutorOperation",
+    "ExecutorService",
+    "ExecutorServiceError",
+    "ExecutorWorkerCrashError",
+]
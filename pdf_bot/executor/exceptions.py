@@ -0,0 +1,6 @@
+class ExecutorServiceError(Exception):
+    pass
+
+
+class ExecutorWorkerCrashError(ExecutorServiceError):
+    pass
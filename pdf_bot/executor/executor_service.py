@@ -0,0 +1,93 @@
+import asyncio
+import multiprocessing
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from gettext import gettext as _
+from typing import ParamSpec, TypeVar
+
+from loguru import logger
+
+from pdf_bot.settings import Settings
+
+from .exceptions import ExecutorWorkerCrashError
+from .models import ExecutorOperation
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+class ExecutorService:
+    # Spawn is required for recycling workers and avoids forking the event loop thread
+    _START_METHOD = "spawn"
+
+    def __init__(self, settings: Settings) -> None:
+        self.default_max_workers = settings.executor_default_max_workers
+        self.max_workers = settings.executor_max_workers
+        self.max_tasks_per_worker = settings.executor_max_tasks_per_worker
+
+        self._mp_context = multiprocessing.get_context(self._START_METHOD)
+        self._pools: dict[ExecutorOperation, ProcessPoolExecutor] = {}
+
+    def get_max_workers(self, operation: ExecutorOperation) -> int:
+        return self.max_workers.get(operation.value, self.default_max_workers)
+
+    async def run(
+        self,
+        operation: ExecutorOperation,
+        func: Callable[P, T],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> T:
+        """Run the function in the worker pool of the operation.
+
+        The function and its arguments must be picklable. If the operation is configured
+        with zero workers, the function is run in a thread instead.
+
+        Raises:
+            ExecutorWorkerCrashError: if the worker process died while running the
+                function
+
+        Returns:
+            T: the return value of the function
+        """
+        max_workers = self.get_max_workers(operation)
+        if max_workers <= 0:
+            return await asyncio.to_thread(func, *args, **kwargs)
+
+        pool = self._get_pool(operation, max_workers)
+        loop = asyncio.get_running_loop()
+
+        try:
+            return await loop.run_in_executor(pool, partial(func, *args, **kwargs))
+        except BrokenProcessPool as e:
+            logger.exception("Worker crashed for operation: {operation}", operation=operation)
+            self._discard_pool(operation, pool)
+            raise ExecutorWorkerCrashError(
+                _("Something went wrong while processing your file, please try again")
+            ) from e
+
+    def shutdown(self) -> None:
+        pools = list(self._pools.values())
+        self._pools.clear()
+
+        for pool in pools:
+            pool.shutdown(cancel_futures=True)
+
+    def _get_pool(self, operation: ExecutorOperation, max_workers: int) -> ProcessPoolExecutor:
+        pool = self._pools.get(operation)
+        if pool is None:
+            pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=self._mp_context,
+                max_tasks_per_child=self.max_tasks_per_worker,
+            )
+            self._pools[operation] = pool
+        return pool
+
+    def _discard_pool(self, operation: ExecutorOperation, pool: ProcessPoolExecutor) -> None:
+        # Other jobs of the same broken pool may have already replaced it
+        if self._pools.get(operation) is pool:
+            del self._pools[operation]
+        pool.shutdown(wait=False, cancel_futures=True)
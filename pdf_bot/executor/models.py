@@ -0,0 +1,13 @@
+from enum import Enum
+
+
+class ExecutorOperation(Enum):
+    compare = "compare"
+    crop = "crop"
+    grayscale = "grayscale"
+    html = "html"
+    image = "image"
+    ocr = "ocr"
+    pdf = "pdf"
+    preview = "preview"
+    text = "text"
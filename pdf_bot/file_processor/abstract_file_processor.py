@@ -1,19 +1,23 @@
-import shutil
 from abc import ABC, abstractmethod
 from collections.abc import AsyncGenerator, Callable, Coroutine, Sequence
 from contextlib import asynccontextmanager, suppress
+from functools import partial
 from pathlib import Path
 from typing import Any, ClassVar, cast
 
 from telegram import Message, Update
+from telegram.constants import FileSizeLimit
 from telegram.error import BadRequest
 from telegram.ext import BaseHandler, ContextTypes, ConversationHandler
 
 from pdf_bot.analytics import TaskType
 from pdf_bot.errors import CallbackQueryDataTypeError
 from pdf_bot.file_processor.errors import DuplicateClassError
+from pdf_bot.io import ArchiveTooLargeError, ZipArchiveWriter
 from pdf_bot.language import LanguageService
 from pdf_bot.models import FileData, FileTaskResult, TaskData
+from pdf_bot.result_cache import CachedResult, ResultCacheService
+from pdf_bot.scheduler import SchedulerService
 from pdf_bot.telegram_internal import TelegramGetUserDataError, TelegramService
 
 from .file_task_mixin import FileTaskMixin
@@ -31,10 +35,14 @@ class AbstractFileProcessor(FileTaskMixin, ABC):
         self,
         telegram_service: TelegramService,
         language_service: LanguageService,
+        result_cache_service: ResultCacheService,
+        scheduler_service: SchedulerService,
         bypass_init_check: bool = False,
     ) -> None:
         self.telegram_service = telegram_service
         self.language_service = language_service
+        self.result_cache_service = result_cache_service
+        self.scheduler_service = scheduler_service
 
         cls_name = self.__class__.__name__
         if not bypass_init_check and cls_name in self._FILE_PROCESSORS:
@@ -70,6 +78,10 @@ class AbstractFileProcessor(FileTaskMixin, ABC):
     async def process_file_task(self, file_data: FileData) -> AsyncGenerator[FileTaskResult, None]:
         yield FileTaskResult(Path())
 
+    @property
+    def cache_results(self) -> bool:
+        return True
+
     @property
     def generic_error_types(self) -> set[type[Exception]]:
         return set()
@@ -124,18 +136,18 @@ class AbstractFileProcessor(FileTaskMixin, ABC):
         self, update: Update, context: ContextTypes.DEFAULT_TYPE, file_data: FileData
     ) -> str | int | None:
         try:
-            async with self.process_file_task(file_data) as result:
-                if result.message is not None:
-                    await self.telegram_service.send_message(update, context, result.message)
-
-                out_path = final_path = result.path
-                final_path = out_path
-
-                if out_path.is_dir():
-                    shutil.make_archive(str(out_path), "zip", out_path)
-                    final_path = out_path.with_suffix(".zip")
-
-                await self.telegram_service.send_file(update, context, final_path, self.task_type)
+            key = None
+            if self.cache_results:
+                key = self.result_cache_service.get_key(file_data, self.task_type)
+
+            if key is None:
+                await self._process_and_send_file(update, context, file_data)
+            else:
+                result, is_computed = await self.result_cache_service.get_or_compute(
+                    key, partial(self._process_and_send_file, update, context, file_data)
+                )
+                if not is_computed and result is not None:
+                    await self._send_cached_result(update, context, result)
         except Exception as e:
             handlers = self._get_error_handlers()
             error_handler: ErrorHandlerType | None = None
@@ -148,6 +160,52 @@ class AbstractFileProcessor(FileTaskMixin, ABC):
             raise
         return None
 
+    async def _process_and_send_file(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE, file_data: FileData
+    ) -> CachedResult | None:
+        async with (
+            self.scheduler_service.schedule_update(update, context, self.task_type),
+            self.process_file_task(file_data) as result,
+        ):
+            if result.message is not None:
+                await self.telegram_service.send_message(update, context, result.message)
+
+            out_path = result.path
+            if out_path.is_dir():
+                async with self._archive_dir(out_path) as zip_path:
+                    message = await self.telegram_service.send_file(
+                        update, context, zip_path, self.task_type
+                    )
+            else:
+                message = await self.telegram_service.send_file(
+                    update, context, out_path, self.task_type
+                )
+
+        if message is None:
+            return None
+        return CachedResult.from_telegram_message(message, result.message)
+
+    @staticmethod
+    @asynccontextmanager
+    async def _archive_dir(dir_path: Path) -> AsyncGenerator[Path, None]:
+        zip_path = dir_path.with_suffix(".zip")
+        try:
+            async with ZipArchiveWriter(zip_path, FileSizeLimit.FILESIZE_UPLOAD) as writer:
+                await writer.add_dir(dir_path)
+            yield zip_path
+        finally:
+            zip_path.unlink(missing_ok=True)
+
+    async def _send_cached_result(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE, result: CachedResult
+    ) -> None:
+        if result.message is not None:
+            await self.telegram_service.send_message(update, context, result.message)
+
+        await self.telegram_service.send_file_by_id(
+            update, context, result.file_id, self.task_type, is_photo=result.is_photo
+        )
+
     async def _process_previous_message(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
     ) -> None:
@@ -166,8 +224,9 @@ class AbstractFileProcessor(FileTaskMixin, ABC):
         self,
     ) -> dict[type[Exception], ErrorHandlerType]:
         handlers: dict[type[Exception], ErrorHandlerType] = {
-            x: self._handle_generic_error for x in self.generic_error_types
+            ArchiveTooLargeError: self._handle_generic_error
         }
+        handlers.update({x: self._handle_generic_error for x in self.generic_error_types})
         handlers.update(self.custom_error_handlers)
         return handlers
 
@@ -1,16 +1,21 @@
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 from pathlib import Path
-
-import img2pdf
-import noteshrink
-from img2pdf import Rotation
+from typing import TYPE_CHECKING
 
 from pdf_bot.cli import CLIService
 from pdf_bot.io import IOService
 from pdf_bot.models import FileData
+from pdf_bot.startup import lazy_import
 from pdf_bot.telegram_internal import TelegramService
 
+if TYPE_CHECKING:
+    import img2pdf
+    import noteshrink
+else:
+    img2pdf = lazy_import("img2pdf")
+    noteshrink = lazy_import("noteshrink")
+
 
 class ImageService:
     def __init__(
@@ -44,7 +49,7 @@ class ImageService:
             file_path_strs = [str(x) for x in file_paths]
             with self.io_service.create_temp_pdf_file("Converted") as out_path:
                 with out_path.open("wb") as f:
-                    f.write(img2pdf.convert(file_path_strs, rotation=Rotation.ifvalid))
+                    f.write(img2pdf.convert(file_path_strs, rotation=img2pdf.Rotation.ifvalid))
                 yield out_path
 
     @staticmethod
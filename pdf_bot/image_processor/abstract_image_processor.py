@@ -5,17 +5,21 @@ from pdf_bot.file_processor.errors import DuplicateClassError
 from pdf_bot.image import ImageService
 from pdf_bot.language import LanguageService
 from pdf_bot.models import TaskData
+from pdf_bot.result_cache import ResultCacheService
+from pdf_bot.scheduler import SchedulerService
 from pdf_bot.telegram_internal import TelegramService
 
 
 class AbstractImageProcessor(AbstractFileProcessor):
     _IMAGE_PROCESSORS: ClassVar[dict[str, "AbstractImageProcessor"]] = {}
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         image_service: ImageService,
         telegram_service: TelegramService,
         language_service: LanguageService,
+        result_cache_service: ResultCacheService,
+        scheduler_service: SchedulerService,
         bypass_init_check: bool = False,
     ) -> None:
         self.image_service = image_service
@@ -25,7 +29,13 @@ class AbstractImageProcessor(AbstractFileProcessor):
             raise DuplicateClassError(cls_name)
         self._IMAGE_PROCESSORS[cls_name] = self
 
-        super().__init__(telegram_service, language_service, bypass_init_check)
+        super().__init__(
+            telegram_service,
+            language_service,
+            result_cache_service,
+            scheduler_service,
+            bypass_init_check,
+        )
 
     @classmethod
     def get_task_data_list(cls) -> list[TaskData]:
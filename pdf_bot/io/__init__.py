@@ -1,3 +1,5 @@
+from .exceptions import ArchiveTooLargeError, IOServiceError
 from .io_service import IOService
+from .zip_archive_writer import ZipArchiveWriter
 
-__all__ = ["IOService"]
+__all__ = ["ArchiveTooLargeError", "IOService", "IOServiceError", "ZipArchiveWriter"]
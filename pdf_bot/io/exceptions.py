@@ -0,0 +1,6 @@
+class IOServiceError(Exception):
+    pass
+
+
+class ArchiveTooLargeError(IOServiceError):
+    pass
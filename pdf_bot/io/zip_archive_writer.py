@@ -0,0 +1,129 @@
+import asyncio
+from collections.abc import Sequence
+from gettext import gettext as _
+from io import BufferedWriter
+from pathlib import Path
+from types import TracebackType
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+
+from pdf_bot.consts import FILE_TOO_LARGE_ERROR
+
+from .exceptions import ArchiveTooLargeError
+
+
+class ZipArchiveWriter:
+    """Write files into a ZIP archive incrementally without blocking the event loop.
+
+    Files that are already compressed are stored as they are and the others are
+    deflated. The size limit is enforced while the archive is being written, so writing
+    stops as soon as the archive exceeds it.
+
+    Usage:
+        async with ZipArchiveWriter(path, max_size) as writer:
+            await writer.add_files([(file_path, "name.png")])
+    """
+
+    _STORED_SUFFIXES = frozenset(
+        {".7z", ".gif", ".gz", ".jp2", ".jpeg", ".jpg", ".jpx", ".png", ".webp", ".zip"}
+    )
+
+    def __init__(self, path: Path, max_size: int | None = None) -> None:
+        self.path = path
+        self.max_size = max_size
+        self._file: _SizeLimitedFile | None = None
+        self._zf: ZipFile | None = None
+
+    async def __aenter__(self) -> "ZipArchiveWriter":
+        await asyncio.to_thread(self._open)
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        await asyncio.to_thread(self._close, exc_type is None)
+
+    async def add_files(
+        self, files: Sequence[tuple[Path, str]], remove_files: bool = False
+    ) -> None:
+        """Add the files to the archive.
+
+        Args:
+            files: the paths of the files and their names in the archive
+            remove_files: whether to remove each file once it's added to the archive, so
+                that the files and the archive don't take up twice the disk space
+
+        Raises:
+            ArchiveTooLargeError: if the archive has exceeded the size limit
+        """
+        await asyncio.to_thread(self._add_files, files, remove_files)
+
+    async def add_dir(self, dir_path: Path, remove_files: bool = False) -> None:
+        """Add the files in the directory to the archive, named by their relative paths.
+
+        Raises:
+            ArchiveTooLargeError: if the archive has exceeded the size limit
+        """
+        files = [
+            (x, x.relative_to(dir_path).as_posix())
+            for x in sorted(dir_path.rglob("*"))
+            if x.is_file()
+        ]
+        await self.add_files(files, remove_files)
+
+    def _open(self) -> None:
+        self._file = _SizeLimitedFile(self.path.open("wb"), self.max_size)
+        self._zf = ZipFile(self._file, "w")
+
+    def _close(self, is_successful: bool) -> None:
+        if self._zf is None or self._file is None:
+            return
+
+        # Lift the size limit to write the end of the archive if writing has failed, so
+        # that the archive is closed cleanly and the original error is raised instead
+        if not is_successful:
+            self._file.max_size = None
+
+        try:
+            self._zf.close()
+        finally:
+            self._file.close()
+
+    def _add_files(self, files: Sequence[tuple[Path, str]], remove_files: bool) -> None:
+        if self._zf is None:
+            msg = "The archive has not been opened"
+            raise RuntimeError(msg)
+
+        for file_path, name in files:
+            compress_type = (
+                ZIP_STORED if file_path.suffix.lower() in self._STORED_SUFFIXES else ZIP_DEFLATED
+            )
+            self._zf.write(file_path, name, compress_type=compress_type)
+
+            if remove_files:
+                file_path.unlink()
+
+
+class _SizeLimitedFile:
+    def __init__(self, file: BufferedWriter, max_size: int | None) -> None:
+        self.file = file
+        self.max_size = max_size
+
+    def write(self, data: bytes) -> int:
+        if self.max_size is not None and self.file.tell() + len(data) > self.max_size:
+            raise ArchiveTooLargeError(_(FILE_TOO_LARGE_ERROR))
+        return self.file.write(data)
+
+    def tell(self) -> int:
+        return self.file.tell()
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self.file.seek(offset, whence)
+
+    def flush(self) -> None:
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
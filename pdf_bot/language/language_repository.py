@@ -1,18 +1,18 @@
-from google.cloud.datastore import Client, Entity
-
-from pdf_bot.consts import LANGUAGE, USER
+from pdf_bot.consts import LANGUAGE
+from pdf_bot.datastore import DatastoreService
 
 
 class LanguageRepository:
     EN_GB_CODE = "en_GB"
     EN_CODE = "en"
 
-    def __init__(self, datastore_client: Client) -> None:
-        self.datastore_client = datastore_client
+    def __init__(self, datastore_service: DatastoreService) -> None:
+        self.datastore_service = datastore_service
 
     def get_language(self, user_id: int) -> str:
-        user_key = self.datastore_client.key(USER, user_id)
-        user = self.datastore_client.get(key=user_key)
+        # The user is prefetched before the handlers run, so this only blocks the event
+        # loop if the user isn't cached, such as when the prefetch failed
+        user = self.datastore_service.get_user_blocking(user_id)
         lang: str
 
         if user is None or LANGUAGE not in user:
@@ -25,11 +25,9 @@ class LanguageRepository:
             return self.EN_GB_CODE
         return lang
 
-    def upsert_language(self, user_id: int, language_code: str) -> None:
-        with self.datastore_client.transaction():
-            user_key = self.datastore_client.key(USER, user_id)
-            user = self.datastore_client.get(key=user_key)
-            if user is None:
-                user = Entity(user_key)
-            user[LANGUAGE] = language_code
-            self.datastore_client.put(user)
+    async def upsert_language(self, user_id: int, language_code: str) -> None:
+        user = await self.datastore_service.get_user(user_id)
+        if user is None:
+            user = self.datastore_service.create_user(user_id)
+        user[LANGUAGE] = language_code
+        await self.datastore_service.put_user(user)
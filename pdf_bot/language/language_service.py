@@ -1,8 +1,10 @@
 import gettext
 from collections.abc import Callable
 from contextlib import suppress
+from types import MappingProxyType
 from typing import cast
 
+from loguru import logger
 from telegram import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message, Update
 from telegram.ext import ContextTypes
 
@@ -14,6 +16,9 @@ from .models import LanguageData
 
 class LanguageService:
     _LANGUAGE_CODE = "language_code"
+    _CONTEXT_LANGUAGE_CODE = "pdf_bot_language_code"
+    _LOCALE_DIR = "locale"
+    _DOMAIN = "pdf_bot"
     _KEYBOARD_SIZE = 2
 
     _LANGUAGE_DATA_LIST = sorted(
@@ -65,11 +70,16 @@ class LanguageService:
     def __init__(self, language_repository: LanguageRepository) -> None:
         self.language_repository = language_repository
 
+        # The first language of each short code in the sorted list is its default
+        self._long_codes = MappingProxyType(
+            {x.short_code: x.long_code for x in reversed(self._LANGUAGE_DATA_LIST)}
+        )
+        self._translations = MappingProxyType(
+            {x.long_code: self._load_translations(x.long_code) for x in self._LANGUAGE_DATA_LIST}
+        )
+
     def get_language_code_from_short_code(self, short_code: str) -> str | None:
-        for data in self._LANGUAGE_DATA_LIST:
-            if data.short_code == short_code:
-                return data.long_code
-        return None
+        return self._long_codes.get(short_code)
 
     async def send_language_options(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
@@ -87,19 +97,51 @@ class LanguageService:
         await msg.reply_text(_("Select your language"), reply_markup=reply_markup)
 
     def get_user_language(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> str:
+        # The language is memoised on the context, which is shared by all the handlers of
+        # an update, so that it's only looked up once even without the user data
+        lang: str | None = vars(context).get(self._CONTEXT_LANGUAGE_CODE)
+        if lang is not None:
+            return lang
+
         user_data = context.user_data
         if user_data is not None:
-            lang: str | None = user_data.get(self._LANGUAGE_CODE)
-            if lang is not None:
-                return lang
+            lang = user_data.get(self._LANGUAGE_CODE)
 
-        user_id = self._get_user_id(update)
-        lang = self.language_repository.get_language(user_id)
+        if lang is None:
+            user_id = self.get_user_id(update)
+            lang = self.language_repository.get_language(user_id)
+            if user_data is not None:
+                user_data[self._LANGUAGE_CODE] = lang
 
-        if user_data is not None:
-            user_data[self._LANGUAGE_CODE] = lang
+        setattr(context, self._CONTEXT_LANGUAGE_CODE, lang)
         return lang
 
+    def is_user_language_cached(self, context: ContextTypes.DEFAULT_TYPE) -> bool:
+        """Check if the user language is looked up without the language repository."""
+        if vars(context).get(self._CONTEXT_LANGUAGE_CODE) is not None:
+            return True
+
+        user_data = context.user_data
+        return user_data is not None and user_data.get(self._LANGUAGE_CODE) is not None
+
+    def get_user_id(self, update: Update) -> int:
+        """Get the ID of the user whose language is used for the update.
+
+        Raises:
+            UserIdError: if the update doesn't have a user or a chat
+        """
+        query: CallbackQuery | None = update.callback_query
+        if query is None:
+            if (
+                update.effective_message is not None
+                and update.effective_message.from_user is not None
+            ):
+                return update.effective_message.from_user.id
+            if update.effective_chat is not None:
+                return update.effective_chat.id
+            raise UserIdError
+        return query.from_user.id
+
     async def update_user_language(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
     ) -> None:
@@ -110,9 +152,10 @@ class LanguageService:
         if not isinstance(data, LanguageData):
             raise CallbackQueryDataTypeError(data)
 
-        self.language_repository.upsert_language(query.from_user.id, data.long_code)
+        await self.language_repository.upsert_language(query.from_user.id, data.long_code)
         if context.user_data is not None:
             context.user_data[self._LANGUAGE_CODE] = data.long_code
+        setattr(context, self._CONTEXT_LANGUAGE_CODE, data.long_code)
 
         _ = self.set_app_language(update, context)
         await query.edit_message_text(
@@ -123,10 +166,19 @@ class LanguageService:
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
     ) -> Callable[[str], str]:
         lang = self.get_user_language(update, context)
-        t = gettext.translation("pdf_bot", localedir="locale", languages=[lang])
+        t = self._translations.get(lang)
 
+        if t is None:
+            t = self._load_translations(lang)
         return t.gettext
 
+    def _load_translations(self, lang: str) -> gettext.NullTranslations:
+        try:
+            return gettext.translation(self._DOMAIN, localedir=self._LOCALE_DIR, languages=[lang])
+        except FileNotFoundError:
+            logger.warning("Translations not found for language: {lang}", lang=lang)
+            return gettext.NullTranslations()
+
     async def _answer_query_and_drop_data(
         self, context: ContextTypes.DEFAULT_TYPE, query: CallbackQuery
     ) -> None:
@@ -150,16 +202,3 @@ class LanguageService:
         ]
 
         return InlineKeyboardMarkup(keyboard)
-
-    def _get_user_id(self, update: Update) -> int:
-        query: CallbackQuery | None = update.callback_query
-        if query is None:
-            if (
-                update.effective_message is not None
-                and update.effective_message.from_user is not None
-            ):
-                return update.effective_message.from_user.id
-            if update.effective_chat is not None:
-                return update.effective_chat.id
-            raise UserIdError
-        return query.from_user.id
@@ -10,6 +10,7 @@ from pdf_bot.consts import CANCEL, DONE
 from pdf_bot.language import LanguageService
 from pdf_bot.models import FileData
 from pdf_bot.pdf import PdfService, PdfServiceError
+from pdf_bot.scheduler import SchedulerService
 from pdf_bot.telegram_internal import TelegramService, TelegramServiceError
 
 
@@ -23,10 +24,12 @@ class MergeService:
         pdf_service: PdfService,
         telegram_service: TelegramService,
         language_service: LanguageService,
+        scheduler_service: SchedulerService,
     ) -> None:
         self.pdf_service = pdf_service
         self.telegram_service = telegram_service
         self.language_service = language_service
+        self.scheduler_service = scheduler_service
 
     async def ask_first_pdf(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         self.telegram_service.update_user_data(context, self._MERGE_PDF_DATA, [])
@@ -162,7 +165,10 @@ class MergeService:
         await msg.reply_text(_("Merging your PDF files"), reply_markup=ReplyKeyboardRemove())
 
         try:
-            async with self.pdf_service.merge_pdfs(file_data_list) as out_path:
+            async with (
+                self.scheduler_service.schedule_update(update, context, TaskType.merge_pdf),
+                self.pdf_service.merge_pdfs(file_data_list) as out_path,
+            ):
                 await self.telegram_service.send_file(update, context, out_path, TaskType.merge_pdf)
         except PdfServiceError as e:
             await msg.reply_text(_(str(e)))
@@ -14,12 +14,13 @@ class SupportData: ...
 class FileData:
     id: str
     name: str | None = None
+    unique_id: str | None = None
 
     @classmethod
     def from_telegram_object(cls, obj: Document | PhotoSize) -> "FileData":
         if isinstance(obj, Document):
-            return cls(obj.file_id, obj.file_name)
-        return cls(obj.file_id)
+            return cls(obj.file_id, obj.file_name, obj.file_unique_id)
+        return cls(obj.file_id, unique_id=obj.file_unique_id)
 
 
 @dataclass
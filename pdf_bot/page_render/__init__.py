@@ -0,0 +1,3 @@
+from .page_render_service import PageRenderService
+
+__all__ = ["PageRenderService"]
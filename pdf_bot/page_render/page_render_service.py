@@ -0,0 +1,98 @@
+import shutil
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+from functools import partial
+from gettext import gettext as _
+from pathlib import Path
+
+from pikepdf import PasswordError, Pdf, PdfError
+
+from pdf_bot.cli import CLIService, CLIServiceError
+from pdf_bot.download_cache import DownloadCacheService
+from pdf_bot.executor import ExecutorOperation, ExecutorService, ExecutorServiceError
+from pdf_bot.io import IOService
+from pdf_bot.models import FileData
+from pdf_bot.pdf import PdfEncryptedError, PdfReadError, PdfServiceError
+from pdf_bot.settings import Settings
+from pdf_bot.telegram_internal import TelegramService
+
+
+class PageRenderService:
+    _PNG_SUFFIX = ".png"
+
+    def __init__(  # noqa: PLR0913
+        self,
+        cli_service: CLIService,
+        executor_service: ExecutorService,
+        io_service: IOService,
+        telegram_service: TelegramService,
+        preview_cache_service: DownloadCacheService,
+        settings: Settings,
+    ) -> None:
+        self.cli_service = cli_service
+        self.executor_service = executor_service
+        self.io_service = io_service
+        self.telegram_service = telegram_service
+        self.preview_cache_service = preview_cache_service
+        self.preview_size = settings.preview_size
+
+    @asynccontextmanager
+    async def preview_page(self, file_data: FileData, page: int = 1) -> AsyncGenerator[Path, None]:
+        """Render the page of the PDF file to a PNG image at the preview size.
+
+        The previews are cached by the unique ID of the file, so the file is only
+        downloaded and rendered again if the preview is no longer cached.
+
+        Args:
+            file_data: the data of the PDF file
+            page: the page number starting from 1
+
+        Yields:
+            Path: the path of the rendered image, which must not be modified
+        """
+        render = partial(self._render_page, file_data.id, page, self.preview_size)
+
+        if file_data.unique_id is None:
+            with self.io_service.create_temp_png_file("Preview") as out_path:
+                await render(out_path)
+                yield out_path
+            return
+
+        key = f"{file_data.unique_id}_{page}_{self.preview_size}"
+        async with self.preview_cache_service.get_file(key, render, self._PNG_SUFFIX) as out_path:
+            yield out_path
+
+    async def _render_page(self, file_id: str, page: int, size: int, out_path: Path) -> None:
+        async with self.telegram_service.download_pdf_file(file_id) as file_path:
+            with self.io_service.create_temp_directory() as dir_path:
+                page_path = dir_path / "page"
+                try:
+                    await self.cli_service.render_pdf_page(file_path, page_path, page, size)
+                except CLIServiceError as e:
+                    await self._check_page(file_path, page)
+                    raise PdfServiceError(e) from e
+                shutil.move(page_path.with_suffix(self._PNG_SUFFIX), out_path)
+
+    async def _check_page(self, file_path: Path, page: int) -> None:
+        # The file is only validated after a failed render so that the user is told why
+        try:
+            await self.executor_service.run(ExecutorOperation.preview, _check_page, file_path, page)
+        except ExecutorServiceError as e:
+            raise PdfServiceError(e) from e
+
+
+def _check_page(file_path: Path, page: int) -> None:
+    """Check that the PDF file can be opened and that it has the page.
+
+    Only the cross-reference table and the page tree are parsed.
+    """
+    try:
+        pdf = Pdf.open(file_path)
+    except PasswordError as e:
+        raise PdfEncryptedError from e
+    except PdfError as e:
+        raise PdfReadError(_("Your PDF file is invalid")) from e
+
+    with pdf:
+        if not 1 <= page <= len(pdf.pages):
+            raise PdfServiceError(_("Page %d doesn't exist in your PDF file") % page)
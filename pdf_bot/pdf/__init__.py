@@ -1,25 +1,45 @@
+from .abstract_pdf_backend import AbstractPdfBackend
 from .exceptions import (
     PdfDecryptError,
     PdfEncryptedError,
     PdfIncorrectPasswordError,
     PdfNoTextError,
+    PdfPipelineError,
     PdfReadError,
     PdfServiceError,
 )
-from .models import CompressResult, FontData, ScaleByData, ScaleData, ScaleToData
+from .models import (
+    CompressResult,
+    FontData,
+    PdfBackendOperation,
+    PipelineOperation,
+    PipelineStep,
+    ScaleByData,
+    ScaleData,
+    ScaleToData,
+)
 from .pdf_service import PdfService
+from .pikepdf_backend import PikepdfBackend
+from .pypdf_backend import PypdfBackend
 
 __all__ = [
+    "AbstractPdfBackend",
     "CompressResult",
     "FontData",
+    "PdfBackendOperation",
     "PdfDecryptError",
     "PdfEncryptedError",
     "PdfIncorrectPasswordError",
     "PdfNoTextError",
+    "PdfPipelineError",
     "PdfReadError",
     "PdfService",
     "PdfServiceError",
     "PdfServiceError",
+    "PikepdfBackend",
+    "PipelineOperation",
+    "PipelineStep",
+    "PypdfBackend",
     "ScaleByData",
     "ScaleData",
     "ScaleToData",
@@ -0,0 +1,47 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from .models import PipelineStep, ScaleData
+
+
+class AbstractPdfBackend(ABC):
+    """Backend of the structural operations on PDF files.
+
+    The methods are run in the executor worker processes, so the backends must be
+    picklable and they read the input file and write the output file themselves.
+    """
+
+    @abstractmethod
+    def apply_steps(self, file_path: Path, steps: list[PipelineStep], out_path: Path) -> None:
+        """Apply the structural steps in order with a single read and write of the file.
+
+        Decryption can only be the first step and encryption the last step.
+        """
+
+    @abstractmethod
+    def decrypt(self, file_path: Path, password: str, out_path: Path) -> None:
+        pass
+
+    @abstractmethod
+    def encrypt(self, file_path: Path, password: str, out_path: Path) -> None:
+        pass
+
+    @abstractmethod
+    def rotate(self, file_path: Path, degree: int, out_path: Path) -> None:
+        pass
+
+    @abstractmethod
+    def scale_by_factor(self, file_path: Path, scale_data: ScaleData, out_path: Path) -> None:
+        pass
+
+    @abstractmethod
+    def scale_to_dimension(self, file_path: Path, scale_data: ScaleData, out_path: Path) -> None:
+        pass
+
+    @abstractmethod
+    def split(self, file_path: Path, split_range: str, out_path: Path) -> None:
+        pass
+
+    @abstractmethod
+    def split_many(self, file_path: Path, split_ranges: list[str], out_paths: list[Path]) -> None:
+        """Split the file into a file per range with a single read of the file."""
@@ -0,0 +1,145 @@
+import hashlib
+from gettext import gettext as _
+from pathlib import Path
+
+from pikepdf import Array, Dictionary, Name, Object, ObjectStreamMode, PasswordError, Pdf, PdfError
+from pikepdf import Stream as PdfStream
+
+from pdf_bot.pdf.exceptions import PdfEncryptedError, PdfReadError
+
+ObjGen = tuple[int, int]
+
+_XOBJECT_SUBTYPES = (Name.Image, Name.Form)
+
+# The functions below are run in the executor worker processes
+
+
+def compress_losslessly(file_path: Path, out_path: Path) -> None:
+    """Compress the PDF file without changing its content.
+
+    Duplicate streams, such as the same image embedded on multiple pages, are replaced
+    by a single copy, and the unused resources are removed. The file is then written
+    with object streams and all streams are recompressed with Flate.
+    """
+    try:
+        pdf = Pdf.open(file_path)
+    except PasswordError as e:
+        raise PdfEncryptedError from e
+    except PdfError as e:
+        raise PdfReadError(_("Your PDF file is invalid")) from e
+
+    with pdf:
+        _dedupe_streams(pdf)
+        pdf.remove_unreferenced_resources()
+        pdf.save(
+            out_path,
+            compress_streams=True,
+            recompress_flate=True,
+            object_stream_mode=ObjectStreamMode.generate,
+        )
+
+
+def _dedupe_streams(pdf: Pdf) -> None:
+    # Only the images and forms are deduplicated as they hold nearly all the duplicate
+    # data, and the other streams aren't read
+    streams: dict[ObjGen, PdfStream] = {
+        x.objgen: x
+        for x in pdf.objects
+        if isinstance(x, PdfStream) and x.get(Name.Subtype) in _XOBJECT_SUBTYPES
+    }
+    hasher = _StreamHasher(streams)
+
+    originals: dict[bytes, PdfStream] = {}
+    replacements: dict[ObjGen, PdfStream] = {}
+    for objgen, stream in streams.items():
+        original = originals.setdefault(hasher.hash_stream(objgen), stream)
+        if original.objgen != objgen:
+            replacements[objgen] = original
+
+    # The replaced streams are no longer referenced and aren't saved
+    if replacements:
+        for obj in pdf.objects:
+            _replace_references(obj, replacements)
+
+
+class _StreamHasher:
+    """Hash the streams by their contents.
+
+    The references to other streams are hashed by the contents of those streams, so that
+    streams referencing duplicates, such as images with the same soft masks, have the
+    same hashes without replacing the duplicates first. Each stream is only read and
+    hashed once.
+    """
+
+    def __init__(self, streams: dict[ObjGen, PdfStream]) -> None:
+        self.streams = streams
+        self._digests: dict[ObjGen, bytes] = {}
+        self._in_progress: set[ObjGen] = set()
+
+    def hash_stream(self, objgen: ObjGen) -> bytes:
+        if objgen in self._digests:
+            return self._digests[objgen]
+
+        self._in_progress.add(objgen)
+        stream = self.streams[objgen]
+        digest = hashlib.sha256()
+
+        # The length is left out as it's derived from the data, which is hashed as it is
+        for key in sorted(stream.keys()):
+            if key != Name.Length:
+                digest.update(key.encode())
+                self._hash_object(stream[key], digest)
+        digest.update(stream.read_raw_bytes())
+
+        self._in_progress.discard(objgen)
+        self._digests[objgen] = digest.digest()
+        return self._digests[objgen]
+
+    def _hash_object(self, obj: object, digest: "hashlib._Hash") -> None:
+        if not isinstance(obj, Object):
+            # Numbers and booleans are returned as Python objects
+            digest.update(repr(obj).encode())
+        elif obj.is_indirect:
+            # Streams referencing each other in a cycle are only equal to themselves
+            if obj.objgen in self.streams and obj.objgen not in self._in_progress:
+                digest.update(self.hash_stream(obj.objgen))
+            else:
+                digest.update(repr(obj.objgen).encode())
+        elif isinstance(obj, Array):
+            digest.update(b"[")
+            for value in obj:
+                self._hash_object(value, digest)
+            digest.update(b"]")
+        elif isinstance(obj, Dictionary):
+            digest.update(b"<<")
+            for key in sorted(obj.keys()):
+                digest.update(key.encode())
+                self._hash_object(obj[key], digest)
+            digest.update(b">>")
+        else:
+            digest.update(obj.unparse())
+        digest.update(b"\0")
+
+
+def _replace_references(obj: Object, replacements: dict[ObjGen, PdfStream]) -> None:
+    keys: list[str] | range
+    if isinstance(obj, Array):
+        keys = range(len(obj))
+    elif isinstance(obj, Dictionary | PdfStream):
+        keys = list(obj.keys())
+    else:
+        return
+
+    for key in keys:
+        # Numbers and booleans are returned as Python objects
+        value: object = obj[key]
+        if not isinstance(value, Object):
+            continue
+
+        if value.is_indirect:
+            if value.objgen in replacements:
+                obj[key] = replacements[value.objgen]
+        else:
+            # Only the direct objects are nested here, the indirect objects are
+            # replaced when they're visited on their own
+            _replace_references(value, replacements)
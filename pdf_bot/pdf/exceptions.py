@@ -25,8 +25,17 @@ class PdfNoImagesError(PdfServiceError):
     pass
 
 
+class PdfPipelineError(PdfServiceError):
+    pass
+
+
 class PdfEncryptedError(PdfServiceError):
     _MESSAGE = _("Your PDF file is encrypted, decrypt it first then try again")
 
     def __init__(self, *args: object, **kwargs: object) -> None:
         super().__init__(self._MESSAGE, *args, **kwargs)
+
+    def __reduce__(self) -> tuple[type["PdfEncryptedError"], tuple[object, ...]]:
+        # Exclude the message from the arguments as it's added back on initialisation,
+        # this is required for passing the error from the executor worker processes
+        return self.__class__, self.args[1:]
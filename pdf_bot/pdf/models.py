@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from enum import Enum
 from pathlib import Path
 
 import humanize
@@ -10,6 +11,10 @@ class CompressResult:
     new_size: int
     out_path: Path
 
+    @property
+    def is_reduced(self) -> bool:
+        return self.new_size < self.old_size
+
     @property
     def reduced_percentage(self) -> float:
         return 1 - self.new_size / self.old_size
@@ -33,6 +38,76 @@ class FontData:
     font_url: str
 
 
+@dataclass
+class OcrOptions:
+    languages: list[str]
+    jobs: int
+    optimize: int
+    redo_ocr: bool
+    pages: list[int] | None = None
+
+
+@dataclass
+class PageChange:
+    first_pages: list[int]
+    second_pages: list[int]
+
+    @property
+    def is_modified(self) -> bool:
+        return bool(self.first_pages and self.second_pages)
+
+    @property
+    def name(self) -> str:
+        return f"pages_{self.first_range or 'none'}_vs_{self.second_range or 'none'}"
+
+    @property
+    def first_range(self) -> str:
+        return self._format_range(self.first_pages)
+
+    @property
+    def second_range(self) -> str:
+        return self._format_range(self.second_pages)
+
+    @staticmethod
+    def _format_range(pages: list[int]) -> str:
+        if not pages:
+            return ""
+        if len(pages) == 1:
+            return str(pages[0])
+        return f"{pages[0]}-{pages[-1]}"
+
+
+class PdfBackendOperation(Enum):
+    decrypt = "decrypt"
+    encrypt = "encrypt"
+    pipeline = "pipeline"
+    rotate = "rotate"
+    scale = "scale"
+    split = "split"
+
+
+class PipelineOperation(Enum):
+    compress = "compress"
+    decrypt = "decrypt"
+    encrypt = "encrypt"
+    grayscale = "grayscale"
+    rotate = "rotate"
+    scale_by_factor = "scale_by_factor"
+    scale_to_dimension = "scale_to_dimension"
+    split = "split"
+
+    @property
+    def is_structural(self) -> bool:
+        # Structural operations are done by the PDF backends, the others by external tools
+        return self not in {PipelineOperation.compress, PipelineOperation.grayscale}
+
+
+@dataclass
+class PipelineStep:
+    operation: PipelineOperation
+    value: "int | str | ScaleData | None" = None
+
+
 @dataclass
 class ScaleData:
     x: float
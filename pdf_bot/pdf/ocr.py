@@ -0,0 +1,105 @@
+from pathlib import Path
+
+# Tesseract language models by the bot language codes, either the long or short code
+_TESSERACT_LANGUAGES = {
+    "af": "afr",
+    "am": "amh",
+    "ar": "ara",
+    "ca": "cat",
+    "cs": "ces",
+    "da": "dan",
+    "de": "deu",
+    "el": "ell",
+    "en": "eng",
+    "es": "spa",
+    "fa": "fas",
+    "fi": "fin",
+    "fr": "fra",
+    "he": "heb",
+    "hi": "hin",
+    "hu": "hun",
+    "id": "ind",
+    "it": "ita",
+    "ja": "jpn",
+    "ko": "kor",
+    "ky": "kir",
+    "ms": "msa",
+    "nl": "nld",
+    "no": "nor",
+    "pl": "pol",
+    "pt": "por",
+    "ro": "ron",
+    "ru": "rus",
+    "si": "sin",
+    "sv": "swe",
+    "ta": "tam",
+    "tr": "tur",
+    "uk": "ukr",
+    "uz": "uzb",
+    "vi": "vie",
+    "zh_CN": "chi_sim",
+    "zh_HK": "chi_tra",
+    "zh_TW": "chi_tra",
+}
+DEFAULT_TESSERACT_LANGUAGE = "eng"
+
+# Pages are considered blank if almost none of their pixels are dark in the low
+# resolution renders, which still picks up a single line of text
+_DARK_PIXEL_THRESHOLD = 192
+_MAX_BLANK_DARK_RATIO = 0.001
+_LIGHT_PIXELS = bytes(range(_DARK_PIXEL_THRESHOLD, 256))
+_PGM_HEADER_TOKENS = 4
+_WHITESPACE = b" \t\n\r"
+
+
+def get_tesseract_languages(language_code: str | None) -> list[str]:
+    """Get the Tesseract languages to OCR with for the bot language.
+
+    English is always included as it's commonly mixed with other languages, and only
+    the models of the returned languages are loaded by Tesseract.
+    """
+    if language_code is None:
+        return [DEFAULT_TESSERACT_LANGUAGE]
+
+    language = _TESSERACT_LANGUAGES.get(language_code) or _TESSERACT_LANGUAGES.get(
+        language_code.split("_")[0]
+    )
+    if language is None or language == DEFAULT_TESSERACT_LANGUAGE:
+        return [DEFAULT_TESSERACT_LANGUAGE]
+    return [language, DEFAULT_TESSERACT_LANGUAGE]
+
+
+def find_blank_pages(image_paths: list[Path]) -> set[int]:
+    """Find the blank pages from their grayscale PGM renders.
+
+    Args:
+        image_paths: the paths of the renders, named with the page numbers after the
+            last hyphen as `pdftoppm` does
+
+    Returns:
+        set[int]: the blank page numbers
+    """
+    pages: set[int] = set()
+    for image_path in image_paths:
+        pixels = _read_pgm_pixels(image_path)
+        num_dark = len(pixels.translate(None, _LIGHT_PIXELS))
+
+        if not pixels or num_dark / len(pixels) < _MAX_BLANK_DARK_RATIO:
+            pages.add(int(image_path.stem.rsplit("-", 1)[1]))
+
+    return pages
+
+
+def _read_pgm_pixels(image_path: Path) -> bytes:
+    # The binary PGM header is made up of the magic number, width, height and maximum
+    # value separated by whitespaces, followed by a single whitespace and the pixels
+    data = image_path.read_bytes()
+    pos = 0
+
+    for _ in range(_PGM_HEADER_TOKENS):
+        while data[pos] in _WHITESPACE:
+            pos += 1
+        while data[pos] not in _WHITESPACE:
+            pos += 1
+
+    return data[pos + 1 :]
@@ -0,0 +1,39 @@
+import hashlib
+from difflib import SequenceMatcher
+from pathlib import Path
+
+from pdf_bot.pdf.models import PageChange
+
+
+def hash_pages(text_path: Path, num_pages: int) -> list[str]:
+    """Fingerprint the pages by their extracted text.
+
+    Args:
+        text_path: the path of the text file, with the pages separated by form feeds
+        num_pages: the number of pages
+
+    Returns:
+        list[str]: the page hashes, which ignore the differences in whitespaces
+    """
+    pages = text_path.read_text(encoding="utf-8", errors="replace").split("\f")
+    pages += [""] * (num_pages - len(pages))
+
+    return [
+        hashlib.sha256(" ".join(page.split()).encode("utf-8")).hexdigest()
+        for page in pages[:num_pages]
+    ]
+
+
+def align_pages(hashes_a: list[str], hashes_b: list[str]) -> list[PageChange]:
+    """Align the pages of two files by their hashes.
+
+    Returns:
+        list[PageChange]: the runs of pages that are changed, added or removed, with
+            the page numbers starting from 1
+    """
+    matcher = SequenceMatcher(None, hashes_a, hashes_b, autojunk=False)
+    return [
+        PageChange(list(range(i1 + 1, i2 + 1)), list(range(j1 + 1, j2 + 1)))
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != "equal"
+    ]
@@ -1,105 +1,178 @@
 import asyncio
+import math
 import os
 import shutil
 import textwrap
-from collections.abc import AsyncGenerator, Generator
-from contextlib import asynccontextmanager, contextmanager
+from collections.abc import AsyncGenerator, Callable, Sequence
+from contextlib import asynccontextmanager
+from functools import lru_cache, partial
 from gettext import gettext as _
+from io import TextIOWrapper
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, ParamSpec, TypeVar
 
-import img2pdf
-import ocrmypdf
-import pdf2image
-import pdf_diff
-from img2pdf import Rotation
-from ocrmypdf.exceptions import EncryptedPdfError, PriorOcrFoundError, TaggedPDFError
-from pdfCropMargins import crop
-from pdfminer.high_level import extract_text
-from pdfminer.pdfdocument import PDFPasswordIncorrect
-from pypdf import PasswordType, PdfReader, PdfWriter
-from pypdf.errors import PdfReadError as PyPdfReadError
+from loguru import logger
+from pikepdf import PasswordError, Pdf, PdfError
 from pypdf.pagerange import PageRange
-from weasyprint import CSS, HTML
-from weasyprint.text.fonts import FontConfiguration
+from telegram.constants import FileSizeLimit
 
-from pdf_bot.cli import CLIService, CLIServiceError
-from pdf_bot.io import IOService
+from pdf_bot.cli import CLINonZeroExitStatusError, CLIService, CLIServiceError
+from pdf_bot.download_cache import DownloadCacheService
+from pdf_bot.executor import ExecutorOperation, ExecutorService, ExecutorServiceError
+from pdf_bot.io import IOService, ZipArchiveWriter
 from pdf_bot.models import FileData
+from pdf_bot.pdf.abstract_pdf_backend import AbstractPdfBackend
+from pdf_bot.pdf.compression import compress_losslessly
 from pdf_bot.pdf.exceptions import (
-    PdfDecryptError,
     PdfEncryptedError,
-    PdfIncorrectPasswordError,
     PdfNoImagesError,
     PdfNoTextError,
+    PdfPipelineError,
     PdfReadError,
     PdfServiceError,
 )
-from pdf_bot.pdf.models import CompressResult, FontData, ScaleData
+from pdf_bot.pdf.models import (
+    CompressResult,
+    FontData,
+    OcrOptions,
+    PageChange,
+    PdfBackendOperation,
+    PipelineOperation,
+    PipelineStep,
+    ScaleData,
+)
+from pdf_bot.pdf.ocr import DEFAULT_TESSERACT_LANGUAGE, find_blank_pages, get_tesseract_languages
+from pdf_bot.pdf.page_diff import align_pages, hash_pages
+from pdf_bot.pdf.pikepdf_backend import PikepdfBackend
+from pdf_bot.pdf.pypdf_backend import PypdfBackend
+from pdf_bot.pdf.pypdf_merge import pypdf_merge
+from pdf_bot.pdf.streaming_merge import streaming_merge
+from pdf_bot.pdf.text_extraction import extract_text_with_pdfminer, extract_text_with_pypdf
+from pdf_bot.pdf.watermark import add_watermark, create_watermark_template
+from pdf_bot.settings import Settings
+from pdf_bot.startup import lazy_import
 from pdf_bot.telegram_internal import TelegramService
 
+if TYPE_CHECKING:
+    import img2pdf
+    import ocrmypdf
+    import pdf_diff
+    import pdfCropMargins
+    import weasyprint
+    from ocrmypdf import exceptions as ocrmypdf_exceptions
+    from weasyprint.text import fonts as weasyprint_fonts
+else:
+    img2pdf = lazy_import("img2pdf")
+    ocrmypdf = lazy_import("ocrmypdf")
+    ocrmypdf_exceptions = lazy_import("ocrmypdf.exceptions")
+    pdf_diff = lazy_import("pdf_diff")
+    pdfCropMargins = lazy_import("pdfCropMargins")  # noqa: N816
+    weasyprint = lazy_import("weasyprint")
+    weasyprint_fonts = lazy_import("weasyprint.text.fonts")
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+# Number of font configurations that are kept loaded per worker for the recently used fonts
+_FONT_CONFIG_CACHE_SIZE = 16
+
 
 class PdfService:
-    def __init__(
+    _IMAGE_DPI = 200
+    _BLANK_PAGE_DPI = 20
+
+    def __init__(  # noqa: PLR0913
         self,
         cli_service: CLIService,
+        executor_service: ExecutorService,
         io_service: IOService,
         telegram_service: TelegramService,
+        watermark_cache_service: DownloadCacheService,
+        settings: Settings,
     ) -> None:
         self.cli_service = cli_service
+        self.executor_service = executor_service
         self.io_service = io_service
         self.telegram_service = telegram_service
+        self.watermark_cache_service = watermark_cache_service
+        self.streaming_merge_threshold = settings.pdf_streaming_merge_threshold
+        self.streaming_merge_memory_limit = settings.pdf_streaming_merge_memory_limit
+        self.images_window_size = settings.pdf_to_images_window_size
+        self.text_engine = settings.pdf_text_engine
+        self.text_window_size = settings.pdf_text_window_size
+        self.text_laparams = settings.pdf_text_pdfminer_laparams
+        self.compress_target_ratio = settings.compress_target_ratio
+        self.compress_lossy_profile = settings.compress_lossy_profile
+
+        # Split the CPU budget across the OCR workers so that they don't oversubscribe the
+        # CPUs with their Tesseract processes
+        cpu_budget = settings.ocr_cpu_budget or os.cpu_count() or 1
+        ocr_workers = max(executor_service.get_max_workers(ExecutorOperation.ocr), 1)
+        self.ocr_jobs = max(cpu_budget // ocr_workers, 1)
+        self.ocr_mode = settings.ocr_mode
+        self.ocr_optimize = settings.ocr_optimize
+
+        self.default_backend = settings.pdf_default_backend
+        self.backend_names = settings.pdf_backends
+        self.backends: dict[str, AbstractPdfBackend] = {
+            "pikepdf": PikepdfBackend(),
+            "pypdf": PypdfBackend(),
+        }
 
     @asynccontextmanager
     async def add_watermark_to_pdf(
-        self, source_file_id: str, watermark_file_id: str
+        self, source_file_id: str, watermark_file_data: FileData
     ) -> AsyncGenerator[Path, None]:
-        src_reader, wmk_reader = await asyncio.gather(
-            self._open_pdf(source_file_id), self._open_pdf(watermark_file_id)
-        )
-        wmk_page = wmk_reader.pages[0]
-        writer = PdfWriter()
-
-        for page in src_reader.pages:
-            page.merge_page(wmk_page)
-            writer.add_page(page)
-
-        with self._write_pdf(writer, "File_with_watermark") as out_path:
-            yield out_path
+        async with (
+            self._get_watermark_template(watermark_file_data) as template_path,
+            self.telegram_service.download_pdf_file(source_file_id) as file_path,
+        ):
+            with self.io_service.create_temp_pdf_file("File_with_watermark") as out_path:
+                await self._run(
+                    ExecutorOperation.pdf, add_watermark, file_path, template_path, out_path
+                )
+                yield out_path
 
     @asynccontextmanager
     async def grayscale_pdf(self, file_id: str) -> AsyncGenerator[Path, None]:
         async with self.telegram_service.download_pdf_file(file_id) as file_path:
+            with self.io_service.create_temp_pdf_file("Grayscale") as out_path:
+                await self._grayscale(file_id, file_path, out_path)
+                yield out_path
+
+    @asynccontextmanager
+    async def burst_pdf(self, file_id: str) -> AsyncGenerator[Path, None]:
+        async with self.telegram_service.download_pdf_file(file_id) as file_path:
+            num_pages = await self._run(ExecutorOperation.pdf, _get_num_pages, file_path)
+            split_ranges = [str(x) for x in range(num_pages)]
+
             with (
-                self.io_service.create_temp_directory() as dir_name,
-                self.io_service.create_temp_pdf_file("Grayscale") as out_path,
+                self.io_service.create_temp_directory() as dir_path,
+                self.io_service.create_temp_zip_file("Pages") as out_path,
             ):
-                images = pdf2image.convert_from_path(
-                    file_path,
-                    output_folder=dir_name,
-                    fmt="png",
-                    grayscale=True,
-                    paths_only=True,
-                )
-
-                with out_path.open("wb") as f:
-                    f.write(img2pdf.convert(images, rotation=Rotation.ifvalid))
+                await self._write_split_zip(file_path, split_ranges, "page", dir_path, out_path)
                 yield out_path
 
     @asynccontextmanager
     async def compare_pdfs(self, file_id_a: str, file_id_b: str) -> AsyncGenerator[Path, None]:
-        async with (
-            self.telegram_service.download_pdf_file(file_id_a) as file_name_a,
-            self.telegram_service.download_pdf_file(file_id_b) as file_name_b,
-        ):
-            with self.io_service.create_temp_png_file("Differences") as out_path:
-                pdf_diff.main(files=[file_name_a, file_name_b], out_file=out_path)
+        async with self.telegram_service.download_pdf_files([file_id_a, file_id_b]) as file_paths:
+            path_a, path_b = file_paths
+            with (
+                self.io_service.create_temp_directory() as dir_path,
+                self.io_service.create_temp_zip_file("Differences") as out_path,
+            ):
+                changes = await self._get_page_changes(path_a, path_b, dir_path)
+                if not changes:
+                    raise pdf_diff.NoDifferenceError
+
+                await self._write_differences_zip(path_a, path_b, changes, dir_path, out_path)
                 yield out_path
 
     @asynccontextmanager
     async def compress_pdf(self, file_id: str) -> AsyncGenerator[CompressResult, None]:
         async with self.telegram_service.download_pdf_file(file_id) as file_path:
             with self.io_service.create_temp_pdf_file("Compressed") as out_path:
-                self.cli_service.compress_pdf(file_path, out_path)
+                await self._compress(file_path, out_path)
                 old_size = file_path.stat().st_size
                 new_size = out_path.stat().st_size
                 yield CompressResult(old_size, new_size, out_path)
@@ -107,36 +180,20 @@ class PdfService:
     @asynccontextmanager
     async def convert_pdf_to_images(self, file_id: str) -> AsyncGenerator[Path, None]:
         async with self.telegram_service.download_pdf_file(file_id) as file_path:
-            with self.io_service.create_temp_directory("PDF_images") as out_dir:
-                pdf2image.convert_from_path(file_path, output_folder=out_dir, fmt="png")
-                yield out_dir
+            num_pages = await self._run(ExecutorOperation.pdf, _get_num_pages, file_path)
+            with (
+                self.io_service.create_temp_directory() as dir_path,
+                self.io_service.create_temp_zip_file("PDF_images") as out_path,
+            ):
+                await self._write_images_zip(file_path, num_pages, dir_path, out_path)
+                yield out_path
 
     @asynccontextmanager
     async def create_pdf_from_text(
         self, text: str, font_data: FontData | None
     ) -> AsyncGenerator[Path, None]:
-        html = HTML(string="<p>{content}</p>".format(content=text.replace("\n", "<br/>")))
-        font_config = FontConfiguration()
-        stylesheets: list[CSS] | None = None
-
-        if font_data is not None:
-            stylesheets = [
-                CSS(
-                    string=(
-                        "@font-face {"
-                        f"font-family: {font_data.font_family};"
-                        f"src: url({font_data.font_url});"
-                        "}"
-                        "p {"
-                        f"font-family: {font_data.font_family};"
-                        "}"
-                    ),
-                    font_config=font_config,
-                )
-            ]
-
         with self.io_service.create_temp_pdf_file("Text") as out_path:
-            html.write_pdf(out_path, stylesheets=stylesheets, font_config=font_config)
+            await self._run(ExecutorOperation.html, _write_text_pdf, text, font_data, out_path)
             yield out_path
 
     @asynccontextmanager
@@ -145,7 +202,11 @@ class PdfService:
     ) -> AsyncGenerator[Path, None]:
         async with self.telegram_service.download_pdf_file(file_id) as file_path:
             with self.io_service.create_temp_pdf_file("Cropped") as out_path:
-                crop(["-p", str(percentage), "-o", str(out_path), str(file_path)])
+                await self._run(
+                    ExecutorOperation.crop,
+                    pdfCropMargins.crop,
+                    ["-p", str(percentage), "-o", str(out_path), str(file_path)],
+                )
                 yield out_path
 
     @asynccontextmanager
@@ -154,48 +215,45 @@ class PdfService:
     ) -> AsyncGenerator[Path, None]:
         async with self.telegram_service.download_pdf_file(file_id) as file_path:
             with self.io_service.create_temp_pdf_file("Cropped") as out_path:
-                crop(["-a", str(margin_size), "-o", str(out_path), str(file_path)])
+                await self._run(
+                    ExecutorOperation.crop,
+                    pdfCropMargins.crop,
+                    ["-a", str(margin_size), "-o", str(out_path), str(file_path)],
+                )
                 yield out_path
 
     @asynccontextmanager
     async def decrypt_pdf(self, file_id: str, password: str) -> AsyncGenerator[Path, None]:
-        reader = await self._open_pdf(file_id, allow_encrypted=True)
-        if not reader.is_encrypted:
-            raise PdfDecryptError(_("Your PDF file is not encrypted"))
-
-        try:
-            if reader.decrypt(password) == PasswordType.NOT_DECRYPTED:
-                raise PdfIncorrectPasswordError(_("Incorrect password, please try again"))
-        except NotImplementedError as e:
-            raise PdfDecryptError(
-                _("Your PDF file is encrypted with a method that I can't decrypt")
-            ) from e
-
-        writer = PdfWriter()
-        for page in reader.pages:
-            writer.add_page(page)
-
-        with self._write_pdf(writer, "Decrypted") as out_path:
-            yield out_path
+        async with self.telegram_service.download_pdf_file(file_id) as file_path:
+            with self.io_service.create_temp_pdf_file("Decrypted") as out_path:
+                await self._run(
+                    ExecutorOperation.pdf,
+                    self._get_backend(PdfBackendOperation.decrypt).decrypt,
+                    file_path,
+                    password,
+                    out_path,
+                )
+                yield out_path
 
     @asynccontextmanager
     async def encrypt_pdf(self, file_id: str, password: str) -> AsyncGenerator[Path, None]:
-        reader = await self._open_pdf(file_id)
-        writer = PdfWriter()
-
-        for page in reader.pages:
-            writer.add_page(page)
-        writer.encrypt(password)
-
-        with self._write_pdf(writer, "Encrypted") as out_path:
-            yield out_path
+        async with self.telegram_service.download_pdf_file(file_id) as file_path:
+            with self.io_service.create_temp_pdf_file("Encrypted") as out_path:
+                await self._run(
+                    ExecutorOperation.pdf,
+                    self._get_backend(PdfBackendOperation.encrypt).encrypt,
+                    file_path,
+                    password,
+                    out_path,
+                )
+                yield out_path
 
     @asynccontextmanager
     async def extract_pdf_images(self, file_id: str) -> AsyncGenerator[Path, None]:
         async with self.telegram_service.download_pdf_file(file_id) as file_path:
             with self.io_service.create_temp_directory("PDF_images") as out_dir:
                 try:
-                    self.cli_service.extract_pdf_images(file_path, out_dir)
+                    await self.cli_service.extract_pdf_images(file_path, out_dir)
                 except CLIServiceError as e:
                     raise PdfServiceError(e) from e
 
@@ -206,65 +264,58 @@ class PdfService:
     @asynccontextmanager
     async def extract_pdf_text(self, file_id: str) -> AsyncGenerator[Path, None]:
         async with self.telegram_service.download_pdf_file(file_id) as file_path:
-            try:
-                text = extract_text(file_path)
-            except PDFPasswordIncorrect as e:
-                raise PdfEncryptedError from e
-
-        if not text:
-            raise PdfNoTextError(_("No text found in your PDF file"))
-
-        wrapped_text = textwrap.wrap(text)
-        with self.io_service.create_temp_txt_file("PDF_text") as out_path:
-            with out_path.open("w") as f:
-                f.write("\n".join(wrapped_text))
-            yield out_path
+            num_pages = await self._run(ExecutorOperation.pdf, _get_num_pages, file_path)
+            with (
+                self.io_service.create_temp_directory() as dir_path,
+                self.io_service.create_temp_txt_file("PDF_text") as out_path,
+            ):
+                await self._write_pdf_text(file_path, num_pages, dir_path, out_path)
+                yield out_path
 
     @asynccontextmanager
     async def merge_pdfs(self, file_data_list: list[FileData]) -> AsyncGenerator[Path, None]:
         file_ids = self._get_file_ids(file_data_list)
-        writer = PdfWriter()
+        file_names = [x.name for x in file_data_list]
 
         async with self.telegram_service.download_files(file_ids) as file_paths:
-            for i, file_path in enumerate(file_paths):
-                try:
-                    writer.append(file_path)
-                except (PyPdfReadError, ValueError) as e:
-                    raise PdfReadError(
-                        _("I couldn't merge your PDF files as this file is invalid: %s")
-                        % file_data_list[i].name
-                    ) from e
-
-        with self._write_pdf(writer, "Merged") as out_path:
-            yield out_path
+            with self.io_service.create_temp_pdf_file("Merged") as out_path:
+                # The default merge is faster for small files but it reads all the files
+                # into memory, so large merges are streamed instead
+                total_size = sum(x.stat().st_size for x in file_paths)
+                if total_size > self.streaming_merge_threshold:
+                    await self._run(
+                        ExecutorOperation.pdf,
+                        streaming_merge,
+                        file_paths,
+                        file_names,
+                        out_path,
+                        self.streaming_merge_memory_limit,
+                    )
+                else:
+                    await self._run(
+                        ExecutorOperation.pdf, pypdf_merge, file_paths, file_names, out_path
+                    )
+                yield out_path
 
     @asynccontextmanager
-    async def ocr_pdf(self, file_id: str) -> AsyncGenerator[Path, None]:
+    async def ocr_pdf(
+        self, file_id: str, language_code: str | None = None
+    ) -> AsyncGenerator[Path, None]:
         async with self.telegram_service.download_pdf_file(file_id) as file_path:
+            pages = await self._get_non_blank_pages(file_path)
+            if pages is not None and not pages:
+                raise PdfServiceError(_("Your PDF file only has blank pages"))
+
+            options = OcrOptions(
+                languages=get_tesseract_languages(language_code),
+                jobs=self.ocr_jobs,
+                optimize=self.ocr_optimize,
+                redo_ocr=self.ocr_mode == "redo_ocr",
+                pages=pages,
+            )
             with self.io_service.create_temp_pdf_file("OCR") as out_path:
-                try:
-                    ocrmypdf.ocr(file_path, out_path, progress_bar=False)
-                    yield out_path
-                except (PriorOcrFoundError, TaggedPDFError) as e:
-                    raise PdfServiceError(_("Your PDF file already has a text layer")) from e
-                except EncryptedPdfError as e:
-                    raise PdfEncryptedError from e
-
-    @asynccontextmanager
-    async def preview_pdf(self, file_id: str) -> AsyncGenerator[Path, None]:
-        with (
-            self.io_service.create_temp_pdf_file() as pdf_path,
-            self.io_service.create_temp_png_file("Preview") as out_path,
-        ):
-            reader = await self._open_pdf(file_id)
-            writer = PdfWriter()
-            writer.add_page(reader.pages[0])
-            writer.write(pdf_path)
-
-            # Convert cover preview to image
-            imgs = pdf2image.convert_from_path(pdf_path, fmt="png")
-            imgs[0].save(out_path)
-            yield out_path
+                await self._run(ExecutorOperation.ocr, _ocr, file_path, out_path, options)
+                yield out_path
 
     @asynccontextmanager
     async def rename_pdf(self, file_id: str, file_name: str) -> AsyncGenerator[Path, None]:
@@ -276,42 +327,65 @@ class PdfService:
 
     @asynccontextmanager
     async def rotate_pdf(self, file_id: str, degree: int) -> AsyncGenerator[Path, None]:
-        reader = await self._open_pdf(file_id)
-        writer = PdfWriter()
-
-        for page in reader.pages:
-            writer.add_page(page.rotate(degree))
+        async with self.telegram_service.download_pdf_file(file_id) as file_path:
+            with self.io_service.create_temp_pdf_file("Rotated") as out_path:
+                await self._run(
+                    ExecutorOperation.pdf,
+                    self._get_backend(PdfBackendOperation.rotate).rotate,
+                    file_path,
+                    degree,
+                    out_path,
+                )
+                yield out_path
 
-        with self._write_pdf(writer, "Rotated") as out_path:
-            yield out_path
+    @asynccontextmanager
+    async def run_pipeline(
+        self, file_id: str, steps: list[PipelineStep]
+    ) -> AsyncGenerator[Path, None]:
+        groups = self._group_pipeline_steps(steps)
+        async with self.telegram_service.download_pdf_file(file_id) as file_path:
+            with (
+                self.io_service.create_temp_directory() as dir_path,
+                self.io_service.create_temp_pdf_file("Processed") as out_path,
+            ):
+                in_path = file_path
+                for i, group in enumerate(groups, start=1):
+                    # Only the last group writes to the output file, the others write the
+                    # intermediate files for the next group
+                    group_out_path = out_path if i == len(groups) else dir_path / f"step_{i}.pdf"
+                    await self._run_pipeline_steps(file_id, in_path, group, group_out_path)
+                    in_path = group_out_path
+                yield out_path
 
     @asynccontextmanager
     async def scale_pdf_by_factor(
         self, file_id: str, scale_data: ScaleData
     ) -> AsyncGenerator[Path, None]:
-        reader = await self._open_pdf(file_id)
-        writer = PdfWriter()
-
-        for page in reader.pages:
-            page.scale(scale_data.x, scale_data.y)
-            writer.add_page(page)
-
-        with self._write_pdf(writer, "Scaled") as out_path:
-            yield out_path
+        async with self.telegram_service.download_pdf_file(file_id) as file_path:
+            with self.io_service.create_temp_pdf_file("Scaled") as out_path:
+                await self._run(
+                    ExecutorOperation.pdf,
+                    self._get_backend(PdfBackendOperation.scale).scale_by_factor,
+                    file_path,
+                    scale_data,
+                    out_path,
+                )
+                yield out_path
 
     @asynccontextmanager
     async def scale_pdf_to_dimension(
         self, file_id: str, scale_data: ScaleData
     ) -> AsyncGenerator[Path, None]:
-        reader = await self._open_pdf(file_id)
-        writer = PdfWriter()
-
-        for page in reader.pages:
-            page.scale_to(scale_data.x, scale_data.y)
-            writer.add_page(page)
-
-        with self._write_pdf(writer, "Scaled") as out_path:
-            yield out_path
+        async with self.telegram_service.download_pdf_file(file_id) as file_path:
+            with self.io_service.create_temp_pdf_file("Scaled") as out_path:
+                await self._run(
+                    ExecutorOperation.pdf,
+                    self._get_backend(PdfBackendOperation.scale).scale_to_dimension,
+                    file_path,
+                    scale_data,
+                    out_path,
+                )
+                yield out_path
 
     @staticmethod
     def split_range_valid(split_range: str) -> bool:
@@ -319,30 +393,574 @@ class PdfService:
 
     @asynccontextmanager
     async def split_pdf(self, file_id: str, split_range: str) -> AsyncGenerator[Path, None]:
-        reader = await self._open_pdf(file_id)
-        writer = PdfWriter()
-        writer.append(reader, pages=PageRange(split_range))
+        async with self.telegram_service.download_pdf_file(file_id) as file_path:
+            with self.io_service.create_temp_pdf_file("Split") as out_path:
+                await self._run(
+                    ExecutorOperation.pdf,
+                    self._get_backend(PdfBackendOperation.split).split,
+                    file_path,
+                    split_range,
+                    out_path,
+                )
+                yield out_path
+
+    @asynccontextmanager
+    async def split_pdf_by_ranges(
+        self, file_id: str, split_ranges: list[str]
+    ) -> AsyncGenerator[Path, None]:
+        async with self.telegram_service.download_pdf_file(file_id) as file_path:
+            with (
+                self.io_service.create_temp_directory() as dir_path,
+                self.io_service.create_temp_zip_file("Split") as out_path,
+            ):
+                await self._write_split_zip(file_path, split_ranges, "range", dir_path, out_path)
+                yield out_path
+
+    @staticmethod
+    def _group_pipeline_steps(steps: list[PipelineStep]) -> list[list[PipelineStep]]:
+        if not steps:
+            raise PdfPipelineError(_("No tasks to run on your PDF file"))
+
+        last_index = len(steps) - 1
+        for i, step in enumerate(steps):
+            if (step.operation == PipelineOperation.decrypt and i != 0) or (
+                step.operation == PipelineOperation.encrypt and i != last_index
+            ):
+                raise PdfPipelineError(
+                    _("Decrypt can only be the first task and encrypt the last task")
+                )
+
+        # Consecutive structural steps are fused into a single read and write of the file,
+        # while the other steps are run on their own by the external tools
+        groups: list[list[PipelineStep]] = []
+        for step in steps:
+            if groups and step.operation.is_structural and groups[-1][-1].operation.is_structural:
+                groups[-1].append(step)
+            else:
+                groups.append([step])
+        return groups
+
+    async def _run_pipeline_steps(
+        self, file_id: str, file_path: Path, steps: list[PipelineStep], out_path: Path
+    ) -> None:
+        operation = steps[0].operation
+        if operation.is_structural:
+            await self._run(
+                ExecutorOperation.pdf,
+                self._get_backend(PdfBackendOperation.pipeline).apply_steps,
+                file_path,
+                steps,
+                out_path,
+            )
+        elif operation == PipelineOperation.compress:
+            await self._compress(file_path, out_path)
+        else:
+            await self._grayscale(file_id, file_path, out_path)
+
+    async def _compress(self, file_path: Path, out_path: Path) -> None:
+        # The cheap lossless pass is run first, and the lossy pass only if the file isn't
+        # reduced enough. The smallest file is kept, which is the original file if none
+        # of the passes reduces it
+        profile = self.compress_lossy_profile
+        target_size = _get_file_size(file_path) * self.compress_target_ratio
+        candidates = [file_path]
+
+        with self.io_service.create_temp_directory() as dir_path:
+            lossless_path = dir_path / "lossless.pdf"
+            try:
+                await self._run(
+                    ExecutorOperation.pdf, compress_losslessly, file_path, lossless_path
+                )
+                candidates.append(lossless_path)
+            except PdfReadError:
+                # Ghostscript may still be able to repair and compress the file
+                if profile is None:
+                    raise
+                logger.warning("Failed to compress losslessly: {file_path}", file_path=file_path)
+
+            best_path = min(candidates, key=_get_file_size)
+            if profile is not None and _get_file_size(best_path) > target_size:
+                lossy_path = dir_path / "lossy.pdf"
+                if await self._compress_lossy(best_path, lossy_path, profile, len(candidates) > 1):
+                    candidates.append(lossy_path)
+                    best_path = min(candidates, key=_get_file_size)
+
+            shutil.copyfile(best_path, out_path)
+
+    async def _compress_lossy(
+        self, file_path: Path, out_path: Path, profile: str, has_fallback: bool
+    ) -> bool:
+        try:
+            await self.cli_service.compress_pdf(file_path, out_path, profile)
+        except CLIServiceError as e:
+            if not has_fallback:
+                raise PdfServiceError(e) from e
+            logger.warning("Failed to compress lossily: {file_path}", file_path=file_path)
+            return False
+        return True
+
+    async def _grayscale(self, file_id: str, file_path: Path, out_path: Path) -> None:
+        try:
+            await self.cli_service.grayscale_pdf(file_path, out_path)
+        except CLINonZeroExitStatusError:
+            # Rasterize the pages if the colour spaces can't be converted
+            logger.warning(
+                "Failed to convert colour spaces, rasterizing instead: {file_id}",
+                file_id=file_id,
+            )
+            await self._rasterize_grayscale(file_path, out_path)
+        except CLIServiceError as e:
+            raise PdfServiceError(e) from e
+
+    async def _write_images_zip(
+        self, file_path: Path, num_pages: int, dir_path: Path, out_path: Path
+    ) -> None:
+        # Each window is added to the archive as soon as it's done so that the images
+        # don't pile up on disk
+        tasks = self._create_render_tasks(file_path, num_pages, dir_path)
+        page_width = len(str(num_pages))
+
+        try:
+            async with ZipArchiveWriter(out_path, FileSizeLimit.FILESIZE_UPLOAD) as writer:
+                for task in asyncio.as_completed(tasks):
+                    image_paths = await task
+                    await writer.add_files(
+                        [(x, _get_image_name(x, page_width)) for x in image_paths],
+                        remove_files=True,
+                    )
+        finally:
+            await self._cancel_tasks(tasks)
+
+    async def _write_split_zip(
+        self,
+        file_path: Path,
+        split_ranges: list[str],
+        file_prefix: str,
+        dir_path: Path,
+        out_path: Path,
+    ) -> None:
+        # The ranges are split into batches that are written concurrently, each batch reads
+        # the file once and its files are added to the archive as soon as it's done
+        num_workers = max(self.executor_service.get_max_workers(ExecutorOperation.pdf), 1)
+        batch_size = max(math.ceil(len(split_ranges) / num_workers), 1)
+        name_width = len(str(len(split_ranges)))
+        split_paths = [
+            dir_path / f"{file_prefix}_{i:0{name_width}d}.pdf"
+            for i in range(1, len(split_ranges) + 1)
+        ]
+
+        tasks = [
+            asyncio.create_task(
+                self._split_many(
+                    file_path, split_ranges[i : i + batch_size], split_paths[i : i + batch_size]
+                )
+            )
+            for i in range(0, len(split_ranges), batch_size)
+        ]
+        try:
+            async with ZipArchiveWriter(out_path, FileSizeLimit.FILESIZE_UPLOAD) as writer:
+                for task in asyncio.as_completed(tasks):
+                    paths = await task
+                    await writer.add_files([(x, x.name) for x in paths], remove_files=True)
+        finally:
+            await self._cancel_tasks(tasks)
+
+    async def _split_many(
+        self, file_path: Path, split_ranges: list[str], out_paths: list[Path]
+    ) -> list[Path]:
+        await self._run(
+            ExecutorOperation.pdf,
+            self._get_backend(PdfBackendOperation.split).split_many,
+            file_path,
+            split_ranges,
+            out_paths,
+        )
+        return out_paths
+
+    @asynccontextmanager
+    async def _get_watermark_template(self, file_data: FileData) -> AsyncGenerator[Path, None]:
+        # Templates are cached by the unique ID of the watermark file, so repeated
+        # watermarks skip the download and the parsing of the whole watermark file
+        create = partial(self._create_watermark_template, file_data.id)
+
+        if file_data.unique_id is None:
+            with self.io_service.create_temp_pdf_file("Watermark") as out_path:
+                await create(out_path)
+                yield out_path
+            return
 
-        with self._write_pdf(writer, "Split") as out_path:
+        async with self.watermark_cache_service.get_file(
+            file_data.unique_id, create, ".pdf"
+        ) as out_path:
             yield out_path
 
+    async def _create_watermark_template(self, file_id: str, out_path: Path) -> None:
+        async with self.telegram_service.download_pdf_file(file_id) as file_path:
+            await self._run(ExecutorOperation.pdf, create_watermark_template, file_path, out_path)
+
+    async def _get_page_changes(
+        self, path_a: Path, path_b: Path, dir_path: Path
+    ) -> list[PageChange]:
+        # Pages are aligned by the hashes of their text so that only the changed pages are
+        # diffed and rendered, which are usually a small part of the files
+        tasks = [
+            asyncio.create_task(self._hash_pages(path_a, dir_path / "first")),
+            asyncio.create_task(self._hash_pages(path_b, dir_path / "second")),
+        ]
+        try:
+            hashes_a, hashes_b = await asyncio.gather(*tasks)
+        finally:
+            await self._cancel_tasks(tasks)
+
+        return align_pages(hashes_a, hashes_b)
+
+    async def _hash_pages(self, file_path: Path, dir_path: Path) -> list[str]:
+        num_pages = await self._run(ExecutorOperation.pdf, _get_num_pages, file_path)
+        if num_pages == 0:
+            return []
+
+        dir_path.mkdir()
+        text_path = await self._extract_text(file_path, dir_path, 1, num_pages)
+        return await asyncio.to_thread(hash_pages, text_path, num_pages)
+
+    async def _write_differences_zip(
+        self,
+        path_a: Path,
+        path_b: Path,
+        changes: list[PageChange],
+        dir_path: Path,
+        out_path: Path,
+    ) -> None:
+        # Pages that are only in one of the files are listed in the summary without a diff
+        tasks = [
+            asyncio.create_task(self._diff_pages(path_a, path_b, x, dir_path))
+            for x in changes
+            if x.is_modified
+        ]
+        diffed: set[str] = set()
+
+        try:
+            async with ZipArchiveWriter(out_path, FileSizeLimit.FILESIZE_UPLOAD) as writer:
+                for task in asyncio.as_completed(tasks):
+                    image_path = await task
+                    if image_path is not None:
+                        await writer.add_files([(image_path, image_path.name)], remove_files=True)
+                        diffed.add(image_path.stem)
+
+                reported = [x for x in changes if not x.is_modified or x.name in diffed]
+                if not reported:
+                    raise pdf_diff.NoDifferenceError
+
+                summary_path = dir_path / "summary.txt"
+                summary_path.write_text("".join(f"{_describe_page_change(x)}\n" for x in reported))
+                await writer.add_files([(summary_path, summary_path.name)], remove_files=True)
+        finally:
+            await self._cancel_tasks(tasks)
+
+    async def _diff_pages(
+        self, path_a: Path, path_b: Path, change: PageChange, dir_path: Path
+    ) -> Path | None:
+        first_path = dir_path / f"{change.name}_first.pdf"
+        second_path = dir_path / f"{change.name}_second.pdf"
+        image_path = dir_path / f"{change.name}.png"
+
+        await self._run(
+            ExecutorOperation.compare, _extract_pages, path_a, change.first_pages, first_path
+        )
+        await self._run(
+            ExecutorOperation.compare, _extract_pages, path_b, change.second_pages, second_path
+        )
+
+        try:
+            await self._run(
+                ExecutorOperation.compare,
+                pdf_diff.main,
+                files=[first_path, second_path],
+                out_file=image_path,
+            )
+        except pdf_diff.NoDifferenceError:
+            # The text only differs in ways that aren't rendered, such as the reading order
+            return None
+        return image_path
+
+    async def _get_non_blank_pages(self, file_path: Path) -> list[int] | None:
+        # Blank pages are detected from low resolution renders, which are much cheaper
+        # than running OCR on them. All the pages are processed if this fails, so that
+        # OCR reports the actual error, such as the file being encrypted
+        with self.io_service.create_temp_directory() as dir_path:
+            try:
+                await self.cli_service.render_pdf_previews(
+                    file_path, dir_path / "page", self._BLANK_PAGE_DPI
+                )
+            except CLIServiceError:
+                logger.warning("Failed to detect blank pages: {file_path}", file_path=file_path)
+                return None
+
+            image_paths = sorted(dir_path.glob("page-*.pgm"))
+            if not image_paths:
+                return None
+            blank_pages = await asyncio.to_thread(find_blank_pages, image_paths)
+
+        return [x for x in range(1, len(image_paths) + 1) if x not in blank_pages]
+
+    async def _write_pdf_text(
+        self, file_path: Path, num_pages: int, dir_path: Path, out_path: Path
+    ) -> None:
+        window_size = self.text_window_size
+        windows = [
+            (first, min(first + window_size - 1, num_pages))
+            for first in range(1, num_pages + 1, window_size)
+        ]
+        no_text_error = PdfNoTextError(_("No text found in your PDF file"))
+        if not windows:
+            raise no_text_error
+
+        with out_path.open("w", encoding="utf-8") as f:
+            # Extract the first window on its own so that files without a text layer, such
+            # as scanned documents, fail early instead of going through all the pages
+            text_path = await self._extract_text(file_path, dir_path, *windows[0])
+            if not await asyncio.to_thread(_write_wrapped_text, text_path, f):
+                raise no_text_error
+
+            # The rest of the windows are extracted concurrently and written in order
+            tasks = [
+                asyncio.create_task(self._extract_text(file_path, dir_path, first, last))
+                for first, last in windows[1:]
+            ]
+            try:
+                for task in tasks:
+                    text_path = await task
+                    await asyncio.to_thread(_write_wrapped_text, text_path, f)
+            finally:
+                await self._cancel_tasks(tasks)
+
+    async def _extract_text(
+        self, file_path: Path, dir_path: Path, first_page: int, last_page: int
+    ) -> Path:
+        text_path = dir_path / f"pages_{first_page}.txt"
+
+        if self.text_engine == "pdftotext":
+            try:
+                await self.cli_service.extract_pdf_text(file_path, text_path, first_page, last_page)
+            except CLIServiceError as e:
+                raise PdfServiceError(e) from e
+        elif self.text_engine == "pdfminer":
+            await self._run(
+                ExecutorOperation.text,
+                extract_text_with_pdfminer,
+                file_path,
+                first_page,
+                last_page,
+                text_path,
+                self.text_laparams,
+            )
+        else:
+            await self._run(
+                ExecutorOperation.text,
+                extract_text_with_pypdf,
+                file_path,
+                first_page,
+                last_page,
+                text_path,
+            )
+
+        return text_path
+
+    async def _rasterize_grayscale(self, file_path: Path, out_path: Path) -> None:
+        num_pages = await self._run(ExecutorOperation.pdf, _get_num_pages, file_path)
+        with self.io_service.create_temp_directory() as dir_path:
+            tasks = self._create_render_tasks(file_path, num_pages, dir_path, grayscale=True)
+            try:
+                windows = await asyncio.gather(*tasks)
+            finally:
+                await self._cancel_tasks(tasks)
+
+            image_paths = [x for window in windows for x in window]
+            await self._run(ExecutorOperation.grayscale, _write_images_pdf, image_paths, out_path)
+
+    def _create_render_tasks(
+        self, file_path: Path, num_pages: int, dir_path: Path, grayscale: bool = False
+    ) -> list[asyncio.Task[list[Path]]]:
+        # The pages are split into windows that are rendered concurrently
+        window_size = self.images_window_size
+        return [
+            asyncio.create_task(
+                self._render_images(
+                    file_path,
+                    dir_path,
+                    first,
+                    min(first + window_size - 1, num_pages),
+                    grayscale,
+                )
+            )
+            for first in range(1, num_pages + 1, window_size)
+        ]
+
+    @staticmethod
+    async def _cancel_tasks(tasks: Sequence[asyncio.Task[Any]]) -> None:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _render_images(
+        self,
+        file_path: Path,
+        dir_path: Path,
+        first_page: int,
+        last_page: int,
+        grayscale: bool,
+    ) -> list[Path]:
+        prefix = f"pages_{first_page}"
+        try:
+            await self.cli_service.convert_pdf_to_images(
+                file_path, dir_path / prefix, first_page, last_page, self._IMAGE_DPI, grayscale
+            )
+        except CLIServiceError as e:
+            raise PdfServiceError(e) from e
+        return sorted(dir_path.glob(f"{prefix}-*.png"))
+
     @staticmethod
     def _get_file_ids(file_data_list: list[FileData]) -> list[str]:
         return [x.id for x in file_data_list]
 
-    async def _open_pdf(self, file_id: str, allow_encrypted: bool = False) -> PdfReader:
-        async with self.telegram_service.download_pdf_file(file_id) as file_name:
-            try:
-                pdf_reader = PdfReader(file_name)
-            except PyPdfReadError as e:
-                raise PdfReadError(_("Your PDF file is invalid")) from e
-
-        if pdf_reader.is_encrypted and not allow_encrypted:
-            raise PdfEncryptedError
-        return pdf_reader
-
-    @contextmanager
-    def _write_pdf(self, writer: PdfWriter, file_prefix: str) -> Generator[Path, None, None]:
-        with self.io_service.create_temp_pdf_file(file_prefix) as out_path:
-            writer.write(out_path)
-            yield out_path
+    def _get_backend(self, operation: PdfBackendOperation) -> AbstractPdfBackend:
+        name = self.backend_names.get(operation.value, self.default_backend)
+        return self.backends[name]
+
+    async def _run(
+        self,
+        operation: ExecutorOperation,
+        func: Callable[P, T],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> T:
+        try:
+            return await self.executor_service.run(operation, func, *args, **kwargs)
+        except ExecutorServiceError as e:
+            raise PdfServiceError(e) from e
+
+
+# The functions below are run in the executor worker processes, so they must be defined at
+# the module level and only take and return picklable values
+
+
+def _write_images_pdf(image_paths: list[Path], out_path: Path) -> None:
+    with out_path.open("wb") as f:
+        f.write(img2pdf.convert(image_paths, rotation=img2pdf.Rotation.ifvalid))
+
+
+def _get_num_pages(file_path: Path) -> int:
+    try:
+        with Pdf.open(file_path) as pdf:
+            return len(pdf.pages)
+    except PasswordError as e:
+        raise PdfEncryptedError from e
+    except PdfError as e:
+        raise PdfReadError(_("Your PDF file is invalid")) from e
+
+
+def _get_file_size(file_path: Path) -> int:
+    return file_path.stat().st_size
+
+
+def _extract_pages(file_path: Path, pages: list[int], out_path: Path) -> None:
+    with Pdf.open(file_path) as pdf, Pdf.new() as out_pdf:
+        out_pdf.pages.extend(pdf.pages[x - 1] for x in pages)
+        out_pdf.save(out_path)
+
+
+def _get_image_name(image_path: Path, page_width: int) -> str:
+    # The images are named by the page numbers, zero-padded to the number of pages
+    page = int(image_path.stem.rsplit("-", 1)[1])
+    return f"page_{page:0{page_width}d}.png"
+
+
+def _describe_page_change(change: PageChange) -> str:
+    if not change.second_pages:
+        return _("Pages {pages} of the first file were removed").format(pages=change.first_range)
+    if not change.first_pages:
+        return _("Pages {pages} of the second file were added").format(pages=change.second_range)
+    return _("Pages {first_pages} of the first file changed to pages {second_pages}").format(
+        first_pages=change.first_range, second_pages=change.second_range
+    )
+
+
+def _write_text_pdf(text: str, font_data: FontData | None, out_path: Path) -> None:
+    html = weasyprint.HTML(string="<p>{content}</p>".format(content=text.replace("\n", "<br/>")))
+    stylesheets: list[weasyprint.CSS] | None = None
+
+    if font_data is not None:
+        font_config, css = _get_font_stylesheet(font_data.font_family, font_data.font_url)
+        stylesheets = [css]
+    else:
+        font_config = weasyprint_fonts.FontConfiguration()
+
+    html.write_pdf(out_path, stylesheets=stylesheets, font_config=font_config)
+
+
+@lru_cache(maxsize=_FONT_CONFIG_CACHE_SIZE)
+def _get_font_stylesheet(
+    font_family: str, font_url: str
+) -> tuple["weasyprint_fonts.FontConfiguration", "weasyprint.CSS"]:
+    # The font is loaded once into the font configuration when the stylesheet is created,
+    # so both are reused for the later PDF files with the same font
+    font_config = weasyprint_fonts.FontConfiguration()
+    css = weasyprint.CSS(
+        string=(
+            "@font-face {"
+            f"font-family: {font_family};"
+            f"src: url({font_url});"
+            "}"
+            "p {"
+            f"font-family: {font_family};"
+            "}"
+        ),
+        font_config=font_config,
+    )
+    return font_config, css
+
+
+def _write_wrapped_text(text_path: Path, f: TextIOWrapper) -> bool:
+    text = text_path.read_text(encoding="utf-8", errors="replace")
+    text_path.unlink()
+    has_text = False
+
+    # Pages are separated by form feeds
+    for page_text in text.split("\f"):
+        lines = textwrap.wrap(page_text)
+        if lines:
+            f.write("\n".join(lines))
+            f.write("\n")
+            has_text = True
+
+    return has_text
+
+
+def _ocr(file_path: Path, out_path: Path, options: OcrOptions) -> None:
+    # Pages with text are skipped, or their OCR text layers are redone
+    ocr = partial(
+        ocrmypdf.ocr,
+        file_path,
+        out_path,
+        progress_bar=False,
+        jobs=options.jobs,
+        optimize=options.optimize,
+        pages=",".join(map(str, options.pages)) if options.pages is not None else None,
+        skip_text=not options.redo_ocr,
+        redo_ocr=options.redo_ocr,
+    )
+
+    try:
+        try:
+            ocr(language=options.languages)
+        except ocrmypdf_exceptions.MissingDependencyError:
+            if options.languages == [DEFAULT_TESSERACT_LANGUAGE]:
+                raise
+
+            # The language model of the user isn't installed
+            logger.warning("Missing Tesseract languages: {languages}", languages=options.languages)
+            ocr(language=[DEFAULT_TESSERACT_LANGUAGE])
+    except (ocrmypdf_exceptions.PriorOcrFoundError, ocrmypdf_exceptions.TaggedPDFError) as e:
+        raise PdfServiceError(_("Your PDF file already has a text layer")) from e
+    except ocrmypdf_exceptions.EncryptedPdfError as e:
+        raise PdfEncryptedError from e
@@ -0,0 +1,176 @@
+import warnings
+from contextlib import ExitStack
+from gettext import gettext as _
+from pathlib import Path
+from typing import cast
+
+from pikepdf import Array, Encryption, Name, Page, PasswordError, Pdf, PdfError, Rectangle
+from pypdf.pagerange import PageRange
+
+from .abstract_pdf_backend import AbstractPdfBackend
+from .exceptions import PdfDecryptError, PdfEncryptedError, PdfIncorrectPasswordError, PdfReadError
+from .models import PipelineOperation, PipelineStep, ScaleData
+
+
+class PikepdfBackend(AbstractPdfBackend):
+    """Backend that edits the PDF files in place with qpdf.
+
+    Only the edited objects are touched, the rest of the document is copied over by
+    qpdf without being rebuilt in Python.
+    """
+
+    def apply_steps(self, file_path: Path, steps: list[PipelineStep], out_path: Path) -> None:
+        if steps and steps[0].operation == PipelineOperation.decrypt:
+            pdf = self._open_encrypted_pdf(file_path, cast(str, steps[0].value))
+            steps = steps[1:]
+        else:
+            pdf = self._open_pdf(file_path)
+
+        encryption: Encryption | None = None
+        with ExitStack() as stack:
+            src = stack.enter_context(pdf)
+            for step in steps:
+                if encryption is not None:
+                    msg = "Encryption must be the last step"
+                    raise ValueError(msg)
+
+                if step.operation == PipelineOperation.encrypt:
+                    encryption = self._get_encryption(cast(str, step.value))
+                elif step.operation == PipelineOperation.rotate:
+                    self._rotate_pages(pdf, cast(int, step.value))
+                elif step.operation == PipelineOperation.scale_by_factor:
+                    self._scale_pages_by_factor(pdf, cast(ScaleData, step.value))
+                elif step.operation == PipelineOperation.scale_to_dimension:
+                    self._scale_pages_to_dimension(pdf, cast(ScaleData, step.value))
+                elif step.operation == PipelineOperation.split:
+                    # The later steps are applied to the split document, which copies its
+                    # pages from the opened documents that are kept open until it's saved
+                    pdf = stack.enter_context(self._split_pages(pdf, cast(str, step.value)))
+                else:
+                    msg = f"Unsupported pipeline step: {step.operation}"
+                    raise ValueError(msg)
+            pdf.save(out_path, min_version=src.pdf_version, encryption=encryption)
+
+    def decrypt(self, file_path: Path, password: str, out_path: Path) -> None:
+        with self._open_encrypted_pdf(file_path, password) as pdf:
+            pdf.save(out_path)
+
+    def encrypt(self, file_path: Path, password: str, out_path: Path) -> None:
+        with self._open_pdf(file_path) as pdf:
+            pdf.save(out_path, encryption=self._get_encryption(password))
+
+    def rotate(self, file_path: Path, degree: int, out_path: Path) -> None:
+        with self._open_pdf(file_path) as pdf:
+            self._rotate_pages(pdf, degree)
+            pdf.save(out_path)
+
+    def scale_by_factor(self, file_path: Path, scale_data: ScaleData, out_path: Path) -> None:
+        with self._open_pdf(file_path) as pdf:
+            self._scale_pages_by_factor(pdf, scale_data)
+            pdf.save(out_path)
+
+    def scale_to_dimension(self, file_path: Path, scale_data: ScaleData, out_path: Path) -> None:
+        with self._open_pdf(file_path) as pdf:
+            self._scale_pages_to_dimension(pdf, scale_data)
+            pdf.save(out_path)
+
+    def split(self, file_path: Path, split_range: str, out_path: Path) -> None:
+        with self._open_pdf(file_path) as pdf, self._split_pages(pdf, split_range) as out_pdf:
+            out_pdf.save(out_path, min_version=pdf.pdf_version)
+
+    def split_many(self, file_path: Path, split_ranges: list[str], out_paths: list[Path]) -> None:
+        # The file is opened once and each range is copied into its own document
+        with self._open_pdf(file_path) as pdf:
+            for split_range, out_path in zip(split_ranges, out_paths, strict=True):
+                with self._split_pages(pdf, split_range) as out_pdf:
+                    out_pdf.save(out_path, min_version=pdf.pdf_version)
+
+    @staticmethod
+    def _open_pdf(file_path: Path) -> Pdf:
+        try:
+            pdf = Pdf.open(file_path)
+        except PasswordError as e:
+            raise PdfEncryptedError from e
+        except PdfError as e:
+            raise PdfReadError(_("Your PDF file is invalid")) from e
+
+        # Files with only an owner password can be opened without a password
+        if pdf.is_encrypted:
+            pdf.close()
+            raise PdfEncryptedError
+        return pdf
+
+    @staticmethod
+    def _open_encrypted_pdf(file_path: Path, password: str) -> Pdf:
+        try:
+            with warnings.catch_warnings():
+                # qpdf warns about the unneeded password if the file isn't encrypted
+                warnings.simplefilter("ignore", UserWarning)
+                pdf = Pdf.open(file_path, password=password)
+        except PasswordError as e:
+            raise PdfIncorrectPasswordError(_("Incorrect password, please try again")) from e
+        except PdfError as e:
+            raise PdfReadError(_("Your PDF file is invalid")) from e
+
+        if not pdf.is_encrypted:
+            pdf.close()
+            raise PdfDecryptError(_("Your PDF file is not encrypted"))
+        return pdf
+
+    @staticmethod
+    def _get_encryption(password: str) -> Encryption:
+        # AES-256 is used, which is the default of the latest security handler
+        return Encryption(user=password, owner=password)
+
+    @staticmethod
+    def _rotate_pages(pdf: Pdf, degree: int) -> None:
+        for page in pdf.pages:
+            page.rotate(degree, relative=True)
+
+    def _scale_pages_by_factor(self, pdf: Pdf, scale_data: ScaleData) -> None:
+        for page in pdf.pages:
+            self._scale_page(pdf, page, scale_data.x, scale_data.y)
+
+    def _scale_pages_to_dimension(self, pdf: Pdf, scale_data: ScaleData) -> None:
+        for page in pdf.pages:
+            mediabox = Rectangle(page.mediabox)
+            self._scale_page(
+                pdf, page, scale_data.x / mediabox.width, scale_data.y / mediabox.height
+            )
+
+    @staticmethod
+    def _split_pages(pdf: Pdf, split_range: str) -> Pdf:
+        # The selected pages are copied into a new document instead of removing the other
+        # pages, as the outlines, named destinations, form fields and structure tree of the
+        # document would still refer to the removed pages and keep them in the file
+        indices = range(*PageRange(split_range).indices(len(pdf.pages)))
+        out_pdf = Pdf.new()
+        out_pdf.pages.extend(pdf.pages[i] for i in indices)
+        return out_pdf
+
+    @staticmethod
+    def _scale_page(pdf: Pdf, page: Page, sx: float, sy: float) -> None:
+        # The content is scaled with a transformation matrix instead of /UserUnit, which
+        # can only scale both axes equally and is ignored by many viewers
+        page.contents_add(pdf.make_stream(f"{sx:f} 0 0 {sy:f} 0 0 cm".encode()), prepend=True)
+
+        # All the boxes are set explicitly as the inherited and default ones are scaled
+        boxes = {
+            Name.MediaBox: page.mediabox,
+            Name.CropBox: page.cropbox,
+            Name.BleedBox: page.bleedbox,
+            Name.TrimBox: page.trimbox,
+            Name.ArtBox: page.artbox,
+        }
+        for name, box in boxes.items():
+            page.obj[name] = _scale_rect(box, sx, sy)
+
+        for annot in page.obj.get(Name.Annots, Array()):
+            rect = annot.get(Name.Rect)
+            if isinstance(rect, Array):
+                annot.Rect = _scale_rect(rect, sx, sy)
+
+
+def _scale_rect(rect: Array, sx: float, sy: float) -> Array:
+    x0, y0, x1, y1 = (float(x) for x in rect)
+    return Array([x0 * sx, y0 * sy, x1 * sx, y1 * sy])
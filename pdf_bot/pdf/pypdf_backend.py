@@ -0,0 +1,143 @@
+from gettext import gettext as _
+from pathlib import Path
+from typing import cast
+
+from pypdf import PageObject, PasswordType, PdfReader, PdfWriter
+from pypdf.errors import PdfReadError as PyPdfReadError
+from pypdf.pagerange import PageRange
+
+from .abstract_pdf_backend import AbstractPdfBackend
+from .exceptions import PdfDecryptError, PdfEncryptedError, PdfIncorrectPasswordError, PdfReadError
+from .models import PipelineOperation, PipelineStep, ScaleData
+
+
+class PypdfBackend(AbstractPdfBackend):
+    def apply_steps(self, file_path: Path, steps: list[PipelineStep], out_path: Path) -> None:
+        if steps and steps[0].operation == PipelineOperation.decrypt:
+            reader = self._read_pdf(file_path, allow_encrypted=True)
+            self._decrypt_reader(reader, cast(str, steps[0].value))
+            steps = steps[1:]
+        else:
+            reader = self._read_pdf(file_path)
+
+        pages = list(reader.pages)
+        password: str | None = None
+
+        for step in steps:
+            if password is not None:
+                msg = "Encryption must be the last step"
+                raise ValueError(msg)
+
+            if step.operation == PipelineOperation.encrypt:
+                password = cast(str, step.value)
+            else:
+                pages = self._apply_page_step(pages, step)
+
+        writer = PdfWriter()
+        for page in pages:
+            writer.add_page(page)
+        if password is not None:
+            writer.encrypt(password)
+        writer.write(out_path)
+
+    def decrypt(self, file_path: Path, password: str, out_path: Path) -> None:
+        reader = self._read_pdf(file_path, allow_encrypted=True)
+        self._decrypt_reader(reader, password)
+
+        writer = PdfWriter()
+        for page in reader.pages:
+            writer.add_page(page)
+        writer.write(out_path)
+
+    def encrypt(self, file_path: Path, password: str, out_path: Path) -> None:
+        reader = self._read_pdf(file_path)
+        writer = PdfWriter()
+
+        for page in reader.pages:
+            writer.add_page(page)
+        writer.encrypt(password)
+        writer.write(out_path)
+
+    def rotate(self, file_path: Path, degree: int, out_path: Path) -> None:
+        reader = self._read_pdf(file_path)
+        writer = PdfWriter()
+
+        for page in reader.pages:
+            writer.add_page(page.rotate(degree))
+        writer.write(out_path)
+
+    def scale_by_factor(self, file_path: Path, scale_data: ScaleData, out_path: Path) -> None:
+        reader = self._read_pdf(file_path)
+        writer = PdfWriter()
+
+        for page in reader.pages:
+            page.scale(scale_data.x, scale_data.y)
+            writer.add_page(page)
+        writer.write(out_path)
+
+    def scale_to_dimension(self, file_path: Path, scale_data: ScaleData, out_path: Path) -> None:
+        reader = self._read_pdf(file_path)
+        writer = PdfWriter()
+
+        for page in reader.pages:
+            page.scale_to(scale_data.x, scale_data.y)
+            writer.add_page(page)
+        writer.write(out_path)
+
+    def split(self, file_path: Path, split_range: str, out_path: Path) -> None:
+        reader = self._read_pdf(file_path)
+        writer = PdfWriter()
+        writer.append(reader, pages=PageRange(split_range))
+        writer.write(out_path)
+
+    def split_many(self, file_path: Path, split_ranges: list[str], out_paths: list[Path]) -> None:
+        reader = self._read_pdf(file_path)
+        for split_range, out_path in zip(split_ranges, out_paths, strict=True):
+            writer = PdfWriter()
+            writer.append(reader, pages=PageRange(split_range))
+            writer.write(out_path)
+
+    @staticmethod
+    def _read_pdf(file_path: Path, allow_encrypted: bool = False) -> PdfReader:
+        try:
+            reader = PdfReader(file_path)
+        except PyPdfReadError as e:
+            raise PdfReadError(_("Your PDF file is invalid")) from e
+
+        if reader.is_encrypted and not allow_encrypted:
+            raise PdfEncryptedError
+        return reader
+
+    @staticmethod
+    def _apply_page_step(pages: list[PageObject], step: PipelineStep) -> list[PageObject]:
+        if step.operation == PipelineOperation.rotate:
+            for page in pages:
+                page.rotate(cast(int, step.value))
+        elif step.operation == PipelineOperation.scale_by_factor:
+            scale_data = cast(ScaleData, step.value)
+            for page in pages:
+                page.scale(scale_data.x, scale_data.y)
+        elif step.operation == PipelineOperation.scale_to_dimension:
+            scale_data = cast(ScaleData, step.value)
+            for page in pages:
+                page.scale_to(scale_data.x, scale_data.y)
+        elif step.operation == PipelineOperation.split:
+            indices = PageRange(cast(str, step.value)).indices(len(pages))
+            pages = [pages[i] for i in range(*indices)]
+        else:
+            msg = f"Unsupported pipeline step: {step.operation}"
+            raise ValueError(msg)
+        return pages
+
+    @staticmethod
+    def _decrypt_reader(reader: PdfReader, password: str) -> None:
+        if not reader.is_encrypted:
+            raise PdfDecryptError(_("Your PDF file is not encrypted"))
+
+        try:
+            if reader.decrypt(password) == PasswordType.NOT_DECRYPTED:
+                raise PdfIncorrectPasswordError(_("Incorrect password, please try again"))
+        except NotImplementedError as e:
+            raise PdfDecryptError(
+                _("Your PDF file is encrypted with a method that I can't decrypt")
+            ) from e
@@ -0,0 +1,30 @@
+from gettext import gettext as _
+from pathlib import Path
+
+from pypdf import PdfWriter
+from pypdf.errors import PdfReadError as PyPdfReadError
+
+from pdf_bot.pdf.exceptions import PdfReadError
+
+
+def pypdf_merge(file_paths: list[Path], file_names: list[str | None], out_path: Path) -> None:
+    """Merge the PDF files in memory with pypdf.
+
+    Args:
+        file_paths: the paths of the PDF files to merge
+        file_names: the names of the PDF files for error messages
+        out_path: the path of the merged PDF file
+
+    Raises:
+        PdfReadError: if any of the PDF files is invalid
+    """
+    writer = PdfWriter()
+
+    for i, file_path in enumerate(file_paths):
+        try:
+            writer.append(file_path)
+        except (PyPdfReadError, ValueError) as e:
+            raise PdfReadError(
+                _("I couldn't merge your PDF files as this file is invalid: %s") % file_names[i]
+            ) from e
+    writer.write(out_path)
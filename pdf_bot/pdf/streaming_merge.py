@@ -0,0 +1,116 @@
+import multiprocessing
+import os
+import resource
+from collections.abc import Generator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from gettext import gettext as _
+from pathlib import Path
+
+from loguru import logger
+from pikepdf import AccessMode, Job, PasswordError, Pdf, PdfError
+
+from pdf_bot.pdf.exceptions import PdfEncryptedError, PdfReadError, PdfServiceError
+
+_MAX_CHECK_THREADS = 4
+
+
+def streaming_merge(
+    file_paths: list[Path],
+    file_names: list[str | None],
+    out_path: Path,
+    memory_limit: int | None = None,
+) -> None:
+    """Merge the PDF files with bounded memory usage.
+
+    The inputs are parsed concurrently to validate them, then merged with qpdf which
+    copies the page contents from the input files while the output is being written.
+    Resources shared between the pages of the same input are only copied once.
+
+    Args:
+        file_paths: the paths of the PDF files to merge
+        file_names: the names of the PDF files for error messages
+        out_path: the path of the merged PDF file
+        memory_limit: the maximum amount of additional memory in bytes, this is only
+            enforced in the executor worker processes
+
+    Raises:
+        PdfReadError: if any of the PDF files is invalid
+        PdfEncryptedError: if any of the PDF files is encrypted
+        PdfServiceError: if the merge has failed or exceeded the memory limit
+    """
+    _check_pdfs(file_paths, file_names)
+
+    # Copy the streams as they are without decoding or recompressing them
+    job = Job(
+        [
+            "qpdf",
+            "--empty",
+            "--stream-data=preserve",
+            "--object-streams=preserve",
+            "--pages",
+            *(str(x) for x in file_paths),
+            "--",
+            str(out_path),
+        ]
+    )
+
+    try:
+        with _limit_memory(memory_limit):
+            job.run()
+    except MemoryError as e:
+        raise PdfServiceError(
+            _("Your PDF files are too large for me to merge, please try with fewer files")
+        ) from e
+    except PdfError as e:
+        raise PdfServiceError(_("Failed to merge your PDF files")) from e
+
+    if job.has_warnings:
+        logger.warning("Merged PDF files with warnings: {files}", files=file_paths)
+
+
+def _check_pdfs(file_paths: list[Path], file_names: list[str | None]) -> None:
+    with ThreadPoolExecutor(max_workers=_MAX_CHECK_THREADS) as executor:
+        futures = [executor.submit(_check_pdf, x) for x in file_paths]
+
+    for i, future in enumerate(futures):
+        try:
+            future.result()
+        except PasswordError as e:
+            raise PdfEncryptedError from e
+        except PdfError as e:
+            raise PdfReadError(
+                _("I couldn't merge your PDF files as this file is invalid: %s") % file_names[i]
+            ) from e
+
+
+def _check_pdf(file_path: Path) -> None:
+    # Only the cross-reference table is parsed here, the objects are loaded lazily
+    with Pdf.open(file_path, access_mode=AccessMode.stream):
+        pass
+
+
+@contextmanager
+def _limit_memory(memory_limit: int | None) -> Generator[None, None, None]:
+    # Only limit the worker processes as the limit applies to the whole process
+    if memory_limit is None or multiprocessing.parent_process() is None:
+        yield
+        return
+
+    try:
+        pages = int(Path("/proc/self/statm").read_text(encoding="utf-8").split()[0])
+    except OSError:
+        yield
+        return
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = pages * os.sysconf("SC_PAGE_SIZE") + memory_limit
+    for x in (soft, hard):
+        if x != resource.RLIM_INFINITY:
+            limit = min(limit, x)
+
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    try:
+        yield
+    finally:
+        resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
@@ -0,0 +1,74 @@
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from pypdf import PdfReader
+from pypdf.errors import FileNotDecryptedError
+
+from pdf_bot.pdf.exceptions import PdfEncryptedError
+from pdf_bot.startup import lazy_import
+
+if TYPE_CHECKING:
+    from pdfminer import high_level as pdfminer_high_level
+    from pdfminer import layout as pdfminer_layout
+    from pdfminer import pdfdocument as pdfminer_pdfdocument
+else:
+    pdfminer_high_level = lazy_import("pdfminer.high_level")
+    pdfminer_layout = lazy_import("pdfminer.layout")
+    pdfminer_pdfdocument = lazy_import("pdfminer.pdfdocument")
+
+# The functions below are run in the executor worker processes. Each of them extracts the
+# text of a range of pages and writes it to the output file page by page
+
+
+def extract_text_with_pdfminer(
+    file_path: Path,
+    first_page: int,
+    last_page: int,
+    out_path: Path,
+    laparams: dict[str, Any] | None = None,
+) -> None:
+    """Extract the text of the pages with pdfminer.
+
+    Args:
+        file_path: the path of the PDF file
+        first_page: the first page number, starting from 1
+        last_page: the last page number
+        out_path: the path of the text file
+        laparams: the layout analysis parameters, layout analysis is disabled if this is
+            None which is much faster but the text is in the content stream order
+    """
+    params = pdfminer_layout.LAParams(**laparams) if laparams is not None else None
+
+    try:
+        with file_path.open("rb") as in_file, out_path.open("wb") as out_file:
+            pdfminer_high_level.extract_text_to_fp(
+                in_file,
+                out_file,
+                page_numbers=range(first_page - 1, last_page),
+                laparams=params,
+                codec="utf-8",
+            )
+    except pdfminer_pdfdocument.PDFPasswordIncorrect as e:
+        raise PdfEncryptedError from e
+
+
+def extract_text_with_pypdf(
+    file_path: Path, first_page: int, last_page: int, out_path: Path
+) -> None:
+    """Extract the text of the pages with pypdf.
+
+    Args:
+        file_path: the path of the PDF file
+        first_page: the first page number, starting from 1
+        last_page: the last page number
+        out_path: the path of the text file
+    """
+    reader = PdfReader(file_path)
+
+    try:
+        with out_path.open("w", encoding="utf-8") as f:
+            for page in reader.pages[first_page - 1 : last_page]:
+                f.write(page.extract_text())
+                f.write("\f")
+    except FileNotDecryptedError as e:
+        raise PdfEncryptedError from e
@@ -0,0 +1,49 @@
+from gettext import gettext as _
+from pathlib import Path
+
+from pikepdf import PasswordError, Pdf, PdfError, Rectangle
+
+from pdf_bot.pdf.exceptions import PdfEncryptedError, PdfReadError
+
+# The functions below are run in the executor worker processes
+
+
+def create_watermark_template(file_path: Path, out_path: Path) -> None:
+    """Create the watermark template from the first page of the PDF file.
+
+    The template only has the watermark page and the resources that it uses, so that
+    it's cheap to parse every time it's applied.
+    """
+    with _open_pdf(file_path) as pdf, Pdf.new() as template:
+        if not pdf.pages:
+            raise PdfReadError(_("Your PDF file is invalid"))
+
+        template.pages.append(pdf.pages[0])
+        template.remove_unreferenced_resources()
+        template.save(out_path)
+
+
+def add_watermark(file_path: Path, template_path: Path, out_path: Path) -> None:
+    """Add the watermark template on top of every page of the PDF file.
+
+    The watermark is added once as a Form XObject that is referenced by all the pages,
+    instead of merging its content and resources into each page. It's drawn in its own
+    coordinates, the same as merging the watermark page.
+    """
+    with _open_pdf(file_path) as pdf, Pdf.open(template_path) as template:
+        wmk_page = template.pages[0]
+        wmk = pdf.copy_foreign(wmk_page.as_form_xobject())
+        rect = Rectangle(wmk_page.mediabox)
+
+        for page in pdf.pages:
+            page.add_overlay(wmk, rect)
+        pdf.save(out_path)
+
+
+def _open_pdf(file_path: Path) -> Pdf:
+    try:
+        return Pdf.open(file_path)
+    except PasswordError as e:
+        raise PdfEncryptedError from e
+    except PdfError as e:
+        raise PdfReadError(_("Your PDF file is invalid")) from e
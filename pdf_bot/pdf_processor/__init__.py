@@ -21,9 +21,15 @@ from .encrypt_pdf_processor import EncryptPdfData, EncryptPdfProcessor
 from .extract_pdf_image_processor import ExtractPdfImageData, ExtractPdfImageProcessor
 from .extract_pdf_text_processor import ExtractPdfTextData, ExtractPdfTextProcessor
 from .grayscale_pdf_processor import GrayscalePdfData, GrayscalePdfProcessor
-from .ocr_pdf_processor import OcrPdfData, OcrPdfProcessor
+from .ocr_pdf_processor import OcrLanguageData, OcrPdfData, OcrPdfProcessor
 from .pdf_task_processor import PdfTaskProcessor
 from .pdf_to_image_processor import PdfToImageData, PdfToImageProcessor
+from .pipeline_pdf_processor import (
+    PipelineInputData,
+    PipelinePdfData,
+    PipelinePdfProcessor,
+    PipelineRunData,
+)
 from .preview_pdf_processor import PreviewPdfData, PreviewPdfProcessor
 from .rename_pdf_processor import RenamePdfData, RenamePdfProcessor
 from .rotate_pdf_processor import RotateDegreeData, RotatePdfData, RotatePdfProcessor
@@ -33,12 +39,13 @@ from .scale_pdf_processor import (
     ScalePdfProcessor,
     ScaleType,
 )
-from .split_pdf_processor import SplitPdfData, SplitPdfProcessor
+from .split_pdf_processor import BurstPdfData, SplitPdfData, SplitPdfProcessor
 
 __all__ = [
     "AbstractPdfProcessor",
     "AbstractPdfSelectAndTextProcessor",
     "AbstractPdfTextInputProcessor",
+    "BurstPdfData",
     "CompressPdfData",
     "CompressPdfProcessor",
     "CropOptionAndInputData",
@@ -55,12 +62,17 @@ __all__ = [
     "ExtractPdfTextProcessor",
     "GrayscalePdfData",
     "GrayscalePdfProcessor",
+    "OcrLanguageData",
     "OcrPdfData",
     "OcrPdfProcessor",
     "OptionAndInputData",
     "PdfTaskProcessor",
     "PdfToImageData",
     "PdfToImageProcessor",
+    "PipelineInputData",
+    "PipelinePdfData",
+    "PipelinePdfProcessor",
+    "PipelineRunData",
     "PreviewPdfData",
     "PreviewPdfProcessor",
     "RenamePdfData",
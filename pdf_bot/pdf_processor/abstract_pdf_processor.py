@@ -5,20 +5,30 @@ from pdf_bot.file_processor.errors import DuplicateClassError
 from pdf_bot.language import LanguageService
 from pdf_bot.models import TaskData
 from pdf_bot.pdf import PdfService, PdfServiceError
+from pdf_bot.result_cache import ResultCacheService
+from pdf_bot.scheduler import SchedulerService
 from pdf_bot.telegram_internal import TelegramService
 
 
 class AbstractPdfProcessor(AbstractFileProcessor):
     _PDF_PROCESSORS: ClassVar[dict[str, "AbstractPdfProcessor"]] = {}
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         pdf_service: PdfService,
         telegram_service: TelegramService,
         language_service: LanguageService,
+        result_cache_service: ResultCacheService,
+        scheduler_service: SchedulerService,
         bypass_init_check: bool = False,
     ) -> None:
-        super().__init__(telegram_service, language_service, bypass_init_check)
+        super().__init__(
+            telegram_service,
+            language_service,
+            result_cache_service,
+            scheduler_service,
+            bypass_init_check,
+        )
 
         self.pdf_service = pdf_service
         cls_name = self.__class__.__name__
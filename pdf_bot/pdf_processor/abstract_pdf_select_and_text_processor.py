@@ -125,7 +125,10 @@ class AbstractPdfSelectAndTextProcessor(AbstractPdfProcessor):
                 InlineKeyboardButton(
                     _(option.value),
                     callback_data=SelectOptionData(
-                        id=query_data.id, name=query_data.name, option=option
+                        id=query_data.id,
+                        name=query_data.name,
+                        unique_id=query_data.unique_id,
+                        option=option,
                     ),
                 )
                 for option in self.select_option_type
@@ -165,7 +168,9 @@ class AbstractPdfSelectAndTextProcessor(AbstractPdfProcessor):
             [
                 InlineKeyboardButton(
                     _(BACK),
-                    callback_data=self.entry_point_data_type(query_data.id, query_data.name),
+                    callback_data=self.entry_point_data_type(
+                        query_data.id, query_data.name, query_data.unique_id
+                    ),
                 )
             ]
         ]
@@ -190,6 +195,7 @@ class AbstractPdfSelectAndTextProcessor(AbstractPdfProcessor):
         option_input_data = self.option_and_input_data_type(
             id=file_data.id,
             name=file_data.name,
+            unique_id=file_data.unique_id,
             option=file_data.option,
             text=cleaned_text,
         )
@@ -3,9 +3,10 @@ from collections.abc import Callable
 from dataclasses import dataclass
 from typing import cast
 
-from telegram import CallbackQuery, Message, Update
+from telegram import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message, Update
 from telegram.constants import ParseMode
 from telegram.ext import (
+    BaseHandler,
     CallbackQueryHandler,
     CommandHandler,
     ContextTypes,
@@ -48,6 +49,18 @@ class AbstractPdfTextInputProcessor(AbstractPdfProcessor):
     def invalid_text_input_error(self) -> str:
         pass
 
+    @property
+    def text_input_option_handlers(self) -> list[BaseHandler]:
+        return []
+
+    def get_text_input_option_buttons(
+        self,
+        _: Callable[[str], str],
+        file_data: FileData,  # noqa: ARG002
+    ) -> list[InlineKeyboardButton]:
+        # Options that can be selected instead of sending the text input
+        return []
+
     @property
     def handler(self) -> ConversationHandler:
         return ConversationHandler(
@@ -57,6 +70,7 @@ class AbstractPdfTextInputProcessor(AbstractPdfProcessor):
             states={
                 self.WAIT_TEXT_INPUT: [
                     MessageHandler(TEXT_FILTER, self._process_text_input),
+                    *self.text_input_option_handlers,
                     CallbackQueryHandler(self.ask_task, pattern=BackData),
                 ]
             },
@@ -72,7 +86,7 @@ class AbstractPdfTextInputProcessor(AbstractPdfProcessor):
         await self.telegram_service.answer_query_and_drop_data(context, query)
 
         _ = self.language_service.set_app_language(update, context)
-        reply_markup = self.telegram_service.get_back_inline_markup(update, context)
+        reply_markup = self._get_ask_text_input_markup(update, context, query.data)
         message = await query.edit_message_text(
             self.get_ask_text_input_text(_),
             parse_mode=ParseMode.HTML,
@@ -82,6 +96,23 @@ class AbstractPdfTextInputProcessor(AbstractPdfProcessor):
 
         return self.WAIT_TEXT_INPUT
 
+    def _get_ask_text_input_markup(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+        query_data: str | object | None,
+    ) -> InlineKeyboardMarkup:
+        buttons: list[InlineKeyboardButton] = []
+        if isinstance(query_data, FileData):
+            _ = self.language_service.set_app_language(update, context)
+            buttons = self.get_text_input_option_buttons(_, query_data)
+
+        if not buttons:
+            return self.telegram_service.get_back_inline_markup(update, context)
+        return InlineKeyboardMarkup(
+            [buttons, [self.telegram_service.get_back_button(update, context)]]
+        )
+
     async def _process_text_input(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
     ) -> str | int:
@@ -100,7 +131,9 @@ class AbstractPdfTextInputProcessor(AbstractPdfProcessor):
             await msg.reply_text(_(str(e)))
             return ConversationHandler.END
 
-        text_input_data = TextInputData(id=file_data.id, name=file_data.name, text=cleaned_text)
+        text_input_data = TextInputData(
+            id=file_data.id, name=file_data.name, unique_id=file_data.unique_id, text=cleaned_text
+        )
         self.telegram_service.cache_file_data(context, text_input_data)
 
         return await self.process_file(update, context)
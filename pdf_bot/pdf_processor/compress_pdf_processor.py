@@ -30,11 +30,12 @@ class CompressPdfProcessor(AbstractPdfProcessor):
     @asynccontextmanager
     async def process_file_task(self, file_data: FileData) -> AsyncGenerator[FileTaskResult, None]:
         async with self.pdf_service.compress_pdf(file_data.id) as result:
-            yield FileTaskResult(
-                result.out_path,
-                _("File size reduced by {percent}, from {old_size} to {new_size}").format(
+            if result.is_reduced:
+                message = _("File size reduced by {percent}, from {old_size} to {new_size}").format(
                     percent=f"{result.reduced_percentage:.0%}",
                     old_size=result.readable_old_size,
                     new_size=result.readable_new_size,
-                ),
-            )
+                )
+            else:
+                message = _("Your PDF file is already optimised and can't be compressed further")
+            yield FileTaskResult(result.out_path, message)
@@ -24,6 +24,11 @@ class DecryptPdfProcessor(AbstractPdfTextInputProcessor):
     def task_type(self) -> TaskType:
         return TaskType.decrypt_pdf
 
+    @property
+    def cache_results(self) -> bool:
+        # Avoid keeping results that are derived from the user's password
+        return False
+
     @property
     def entry_point_data_type(self) -> type[DecryptPdfData]:
         return DecryptPdfData
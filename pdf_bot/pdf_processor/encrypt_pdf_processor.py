@@ -18,6 +18,11 @@ class EncryptPdfProcessor(AbstractPdfTextInputProcessor):
     def task_type(self) -> TaskType:
         return TaskType.encrypt_pdf
 
+    @property
+    def cache_results(self) -> bool:
+        # Avoid keeping results that are derived from the user's password
+        return False
+
     @property
     def entry_point_data_type(self) -> type[EncryptPdfData]:
         return EncryptPdfData
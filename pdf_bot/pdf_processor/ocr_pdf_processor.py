@@ -1,7 +1,9 @@
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
 
-from telegram.ext import CallbackQueryHandler
+from telegram import Update
+from telegram.ext import CallbackQueryHandler, ContextTypes
 
 from pdf_bot.analytics import TaskType
 from pdf_bot.models import FileData, FileTaskResult, TaskData
@@ -13,6 +15,11 @@ class OcrPdfData(FileData):
     pass
 
 
+@dataclass(kw_only=True)
+class OcrLanguageData(OcrPdfData):
+    language: str
+
+
 class OcrPdfProcessor(AbstractPdfProcessor):
     @property
     def task_type(self) -> TaskType:
@@ -28,5 +35,16 @@ class OcrPdfProcessor(AbstractPdfProcessor):
 
     @asynccontextmanager
     async def process_file_task(self, file_data: FileData) -> AsyncGenerator[FileTaskResult, None]:
-        async with self.pdf_service.ocr_pdf(file_data.id) as path:
+        language = file_data.language if isinstance(file_data, OcrLanguageData) else None
+        async with self.pdf_service.ocr_pdf(file_data.id, language) as path:
             yield FileTaskResult(path)
+
+    async def _process_file_task(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE, file_data: FileData
+    ) -> str | int | None:
+        # OCR with the user language, which is also part of the cached result key
+        language = self.language_service.get_user_language(update, context)
+        file_data = OcrLanguageData(
+            file_data.id, file_data.name, file_data.unique_id, language=language
+        )
+        return await super()._process_file_task(update, context, file_data)
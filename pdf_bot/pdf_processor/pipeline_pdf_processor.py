@@ -0,0 +1,302 @@
+from collections.abc import AsyncGenerator, Callable
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass, field
+from gettext import gettext as _
+from typing import cast
+
+from telegram import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message, Update
+from telegram.error import BadRequest
+from telegram.ext import (
+    CallbackQueryHandler,
+    CommandHandler,
+    ContextTypes,
+    ConversationHandler,
+    MessageHandler,
+)
+
+from pdf_bot.analytics import TaskType
+from pdf_bot.consts import BACK, TEXT_FILTER
+from pdf_bot.errors import CallbackQueryDataTypeError, FileDataTypeError
+from pdf_bot.file_processor import AbstractFileTaskProcessor
+from pdf_bot.models import FileData, FileTaskResult, TaskData
+from pdf_bot.pdf import PipelineOperation, PipelineStep, ScaleData
+from pdf_bot.telegram_internal import BackData, TelegramGetUserDataError
+
+from .abstract_pdf_processor import AbstractPdfProcessor
+from .scale_pdf_processor import ScaleType
+
+_STEP_LABELS = {
+    PipelineOperation.compress: _("Compress"),
+    PipelineOperation.decrypt: _("Decrypt"),
+    PipelineOperation.encrypt: _("Encrypt"),
+    PipelineOperation.grayscale: _("Grayscale"),
+    PipelineOperation.rotate: _("Rotate"),
+    PipelineOperation.scale_by_factor: _("Scale by factor"),
+    PipelineOperation.scale_to_dimension: _("Scale to dimension"),
+    PipelineOperation.split: _("Split"),
+}
+_ASK_INPUT_TEXTS = {
+    PipelineOperation.decrypt: _("Send me the password to decrypt your PDF file"),
+    PipelineOperation.encrypt: _("Send me the password to encrypt your PDF file"),
+    PipelineOperation.scale_by_factor: ScaleType.by_factor.ask_value_text,
+    PipelineOperation.scale_to_dimension: ScaleType.to_dimension.ask_value_text,
+    PipelineOperation.split: _("Send me the range of pages that you'll like to keep"),
+}
+_INVALID_INPUT_ERRORS = {
+    PipelineOperation.scale_by_factor: _("The scale values are invalid, try again"),
+    PipelineOperation.scale_to_dimension: _("The scale values are invalid, try again"),
+    PipelineOperation.split: _("The split range is invalid, please try again"),
+}
+
+
+@dataclass(kw_only=True)
+class PipelinePdfData(FileData):
+    steps: list[PipelineStep] = field(default_factory=list)
+
+
+@dataclass(kw_only=True)
+class PipelineInputData(PipelinePdfData):
+    operation: PipelineOperation
+
+
+@dataclass(kw_only=True)
+class PipelineRunData(PipelinePdfData):
+    pass
+
+
+class PipelinePdfProcessor(AbstractPdfProcessor):
+    WAIT_STEP = "wait_pipeline_step"
+    WAIT_STEP_INPUT = "wait_pipeline_step_input"
+    MAX_STEPS = 10
+
+    _DEGREES = (90, 180, 270)
+
+    @property
+    def task_type(self) -> TaskType:
+        return TaskType.pipeline_pdf
+
+    @property
+    def task_data(self) -> TaskData:
+        return TaskData(_("Multiple tasks"), PipelinePdfData)
+
+    @property
+    def cache_results(self) -> bool:
+        # Avoid keeping results that are derived from the user's passwords
+        return False
+
+    @property
+    def handler(self) -> ConversationHandler:
+        return ConversationHandler(
+            entry_points=[CallbackQueryHandler(self.ask_step, pattern=PipelinePdfData)],
+            states={
+                self.WAIT_STEP: [
+                    CallbackQueryHandler(self.process_file, pattern=PipelineRunData),
+                    CallbackQueryHandler(self.ask_step_input, pattern=PipelineInputData),
+                    CallbackQueryHandler(self.ask_step, pattern=PipelinePdfData),
+                    CallbackQueryHandler(self.ask_task, pattern=BackData),
+                ],
+                self.WAIT_STEP_INPUT: [
+                    MessageHandler(TEXT_FILTER, self.process_step_input),
+                    CallbackQueryHandler(self.ask_step, pattern=PipelinePdfData),
+                ],
+            },
+            fallbacks=[CommandHandler("cancel", self.telegram_service.cancel_conversation)],
+            map_to_parent={
+                # Return to wait file task state
+                AbstractFileTaskProcessor.WAIT_FILE_TASK: AbstractFileTaskProcessor.WAIT_FILE_TASK,
+            },
+        )
+
+    @asynccontextmanager
+    async def process_file_task(self, file_data: FileData) -> AsyncGenerator[FileTaskResult, None]:
+        if not isinstance(file_data, PipelineRunData):
+            raise FileDataTypeError(file_data)
+
+        async with self.pdf_service.run_pipeline(file_data.id, file_data.steps) as path:
+            yield FileTaskResult(path)
+
+    async def ask_step(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> str:
+        query = cast(CallbackQuery, update.callback_query)
+        await self.telegram_service.answer_query_and_drop_data(context, query)
+        data: str | PipelinePdfData | None = query.data
+
+        if not isinstance(data, PipelinePdfData):
+            raise CallbackQueryDataTypeError(data)
+
+        _ = self.language_service.set_app_language(update, context)
+        await query.edit_message_text(
+            self._get_ask_step_text(_, data.steps),
+            reply_markup=self._get_ask_step_markup(update, context, data),
+        )
+
+        return self.WAIT_STEP
+
+    async def ask_step_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> str:
+        query = cast(CallbackQuery, update.callback_query)
+        await self.telegram_service.answer_query_and_drop_data(context, query)
+        data: str | PipelineInputData | None = query.data
+
+        if not isinstance(data, PipelineInputData):
+            raise CallbackQueryDataTypeError(data)
+
+        self.telegram_service.cache_file_data(context, data)
+        _ = self.language_service.set_app_language(update, context)
+
+        back_data = PipelinePdfData(
+            id=data.id, name=data.name, unique_id=data.unique_id, steps=data.steps
+        )
+        reply_markup = InlineKeyboardMarkup(
+            [[InlineKeyboardButton(_(BACK), callback_data=back_data)]]
+        )
+        message = await query.edit_message_text(
+            _(_ASK_INPUT_TEXTS[data.operation]), reply_markup=reply_markup
+        )
+        self.telegram_service.cache_message_data(context, message)
+
+        return self.WAIT_STEP_INPUT
+
+    async def process_step_input(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+    ) -> str | int:
+        _ = self.language_service.set_app_language(update, context)
+        msg = cast(Message, update.effective_message)
+
+        try:
+            file_data = self.telegram_service.get_file_data(context)
+        except TelegramGetUserDataError as e:
+            await msg.reply_text(_(str(e)))
+            return ConversationHandler.END
+
+        if not isinstance(file_data, PipelineInputData):
+            raise FileDataTypeError(file_data)
+
+        value = self._get_step_value(file_data.operation, cast(str, msg.text))
+        if value is None:
+            await msg.reply_text(_(_INVALID_INPUT_ERRORS[file_data.operation]))
+            return self.WAIT_STEP_INPUT
+
+        steps = [*file_data.steps, PipelineStep(file_data.operation, value)]
+        if file_data.operation == PipelineOperation.encrypt:
+            # Encryption can only be the last step, so the steps are run right away
+            run_data = PipelineRunData(
+                id=file_data.id, name=file_data.name, unique_id=file_data.unique_id, steps=steps
+            )
+            self.telegram_service.cache_file_data(context, run_data)
+            return await self.process_file(update, context)
+
+        await self._delete_input_message(context)
+        data = PipelinePdfData(
+            id=file_data.id, name=file_data.name, unique_id=file_data.unique_id, steps=steps
+        )
+        await msg.reply_text(
+            self._get_ask_step_text(_, steps),
+            reply_markup=self._get_ask_step_markup(update, context, data),
+        )
+
+        return self.WAIT_STEP
+
+    def _get_step_value(self, operation: PipelineOperation, text: str) -> str | ScaleData | None:
+        if operation in {PipelineOperation.scale_by_factor, PipelineOperation.scale_to_dimension}:
+            try:
+                return ScaleData.from_string(text)
+            except ValueError:
+                return None
+
+        if operation == PipelineOperation.split and not self.pdf_service.split_range_valid(text):
+            return None
+        return text
+
+    def _get_ask_step_text(self, _: Callable[[str], str], steps: list[PipelineStep]) -> str:
+        text = _("Select the tasks that you'll like to perform in order, then select Run")
+        if not steps:
+            return text
+
+        lines = [f"{i}. {self._get_step_text(_, step)}" for i, step in enumerate(steps, start=1)]
+        return "{text}\n\n{steps}".format(text=text, steps="\n".join(lines))
+
+    def _get_step_text(self, _: Callable[[str], str], step: PipelineStep) -> str:
+        label = _(_STEP_LABELS[step.operation])
+
+        # Passwords are not shown back to the user
+        if step.value is None or step.operation in {
+            PipelineOperation.decrypt,
+            PipelineOperation.encrypt,
+        }:
+            return label
+        return f"{label} {step.value}"
+
+    def _get_ask_step_markup(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+        data: PipelinePdfData,
+    ) -> InlineKeyboardMarkup:
+        _ = self.language_service.set_app_language(update, context)
+        keyboard: list[list[InlineKeyboardButton]] = []
+
+        if len(data.steps) < self.MAX_STEPS:
+            keyboard.append(
+                [
+                    self._get_step_button(
+                        f"{_(_STEP_LABELS[PipelineOperation.rotate])} {degree}",
+                        data,
+                        PipelineStep(PipelineOperation.rotate, degree),
+                    )
+                    for degree in self._DEGREES
+                ]
+            )
+
+            operations = [
+                PipelineOperation.scale_by_factor,
+                PipelineOperation.scale_to_dimension,
+                PipelineOperation.split,
+                PipelineOperation.compress,
+                PipelineOperation.grayscale,
+                PipelineOperation.encrypt,
+            ]
+            if not data.steps:
+                operations.insert(0, PipelineOperation.decrypt)
+
+            buttons = [self._get_operation_button(_, data, x) for x in operations]
+            keyboard.extend(
+                buttons[i : i + self._KEYBOARD_SIZE]
+                for i in range(0, len(buttons), self._KEYBOARD_SIZE)
+            )
+
+        if data.steps:
+            run_data = PipelineRunData(
+                id=data.id, name=data.name, unique_id=data.unique_id, steps=data.steps
+            )
+            keyboard.append([InlineKeyboardButton(_("Run"), callback_data=run_data)])
+
+        keyboard.append([self.telegram_service.get_back_button(update, context)])
+        return InlineKeyboardMarkup(keyboard)
+
+    def _get_operation_button(
+        self, _: Callable[[str], str], data: PipelinePdfData, operation: PipelineOperation
+    ) -> InlineKeyboardButton:
+        label = _(_STEP_LABELS[operation])
+        if operation in _ASK_INPUT_TEXTS:
+            input_data = PipelineInputData(
+                id=data.id,
+                name=data.name,
+                unique_id=data.unique_id,
+                steps=data.steps,
+                operation=operation,
+            )
+            return InlineKeyboardButton(label, callback_data=input_data)
+        return self._get_step_button(label, data, PipelineStep(operation))
+
+    @staticmethod
+    def _get_step_button(
+        label: str, data: PipelinePdfData, step: PipelineStep
+    ) -> InlineKeyboardButton:
+        next_data = PipelinePdfData(
+            id=data.id, name=data.name, unique_id=data.unique_id, steps=[*data.steps, step]
+        )
+        return InlineKeyboardButton(label, callback_data=next_data)
+
+    async def _delete_input_message(self, context: ContextTypes.DEFAULT_TYPE) -> None:
+        with suppress(TelegramGetUserDataError, BadRequest):
+            message_data = self.telegram_service.get_message_data(context)
+            await context.bot.delete_message(message_data.chat_id, message_data.message_id)
@@ -5,7 +5,13 @@ from gettext import gettext as _
 from telegram.ext import CallbackQueryHandler
 
 from pdf_bot.analytics import TaskType
+from pdf_bot.language import LanguageService
 from pdf_bot.models import FileData, FileTaskResult, TaskData
+from pdf_bot.page_render import PageRenderService
+from pdf_bot.pdf import PdfService
+from pdf_bot.result_cache import ResultCacheService
+from pdf_bot.scheduler import SchedulerService
+from pdf_bot.telegram_internal import TelegramService
 
 from .abstract_pdf_processor import AbstractPdfProcessor
 
@@ -15,6 +21,26 @@ class PreviewPdfData(FileData):
 
 
 class PreviewPdfProcessor(AbstractPdfProcessor):
+    def __init__(  # noqa: PLR0913
+        self,
+        pdf_service: PdfService,
+        page_render_service: PageRenderService,
+        telegram_service: TelegramService,
+        language_service: LanguageService,
+        result_cache_service: ResultCacheService,
+        scheduler_service: SchedulerService,
+        bypass_init_check: bool = False,
+    ) -> None:
+        super().__init__(
+            pdf_service,
+            telegram_service,
+            language_service,
+            result_cache_service,
+            scheduler_service,
+            bypass_init_check,
+        )
+        self.page_render_service = page_render_service
+
     @property
     def task_type(self) -> TaskType:
         return TaskType.preview_pdf
@@ -29,5 +55,5 @@ class PreviewPdfProcessor(AbstractPdfProcessor):
 
     @asynccontextmanager
     async def process_file_task(self, file_data: FileData) -> AsyncGenerator[FileTaskResult, None]:
-        async with self.pdf_service.preview_pdf(file_data.id) as path:
+        async with self.page_render_service.preview_page(file_data) as path:
             yield FileTaskResult(path)
@@ -90,7 +90,10 @@ class RotatePdfProcessor(AbstractPdfProcessor):
                 InlineKeyboardButton(
                     str(degree),
                     callback_data=RotateDegreeData(
-                        id=rotate_data.id, name=rotate_data.name, degree=degree
+                        id=rotate_data.id,
+                        name=rotate_data.name,
+                        unique_id=rotate_data.unique_id,
+                        degree=degree,
                     ),
                 )
                 for degree in self._DEGREES
@@ -2,6 +2,9 @@ from collections.abc import AsyncGenerator, Callable
 from contextlib import asynccontextmanager
 from gettext import gettext as _
 
+from telegram import InlineKeyboardButton
+from telegram.ext import BaseHandler, CallbackQueryHandler
+
 from pdf_bot.analytics import TaskType
 from pdf_bot.errors import FileDataTypeError
 from pdf_bot.models import FileData, FileTaskResult, TaskData
@@ -13,6 +16,10 @@ class SplitPdfData(FileData):
     pass
 
 
+class BurstPdfData(FileData):
+    pass
+
+
 class SplitPdfProcessor(AbstractPdfTextInputProcessor):
     WAIT_SPLIT_RANGE = "wait_split_range"
 
@@ -32,6 +39,20 @@ class SplitPdfProcessor(AbstractPdfTextInputProcessor):
     def invalid_text_input_error(self) -> str:  # pragma: no cover
         return _("The split range is invalid, please try again")
 
+    @property
+    def text_input_option_handlers(self) -> list[BaseHandler]:
+        return [CallbackQueryHandler(self.process_file, pattern=BurstPdfData)]
+
+    def get_text_input_option_buttons(
+        self, _: Callable[[str], str], file_data: FileData
+    ) -> list[InlineKeyboardButton]:
+        return [
+            InlineKeyboardButton(
+                _("Split every page"),
+                callback_data=BurstPdfData(file_data.id, file_data.name, file_data.unique_id),
+            )
+        ]
+
     def get_ask_text_input_text(self, _: Callable[[str], str]) -> str:  # pragma: no cover
         return (
             "{intro}\n\n"
@@ -50,7 +71,8 @@ class SplitPdfProcessor(AbstractPdfTextInputProcessor):
             "<code>{odd_pages}</code>\n"
             "<code>{all_reversed}</code>\n"
             "<code>{pages_except}</code>\n"
-            "<code>{pages_reverse_from}</code>"
+            "<code>{pages_reverse_from}</code>\n"
+            "<code>{multiple_ranges}</code>"
         ).format(
             intro=_("Send me the range of pages that you'll like to keep"),
             general=_("General usage"),
@@ -73,17 +95,30 @@ class SplitPdfProcessor(AbstractPdfTextInputProcessor):
                 range="3:0:-1", pages="3 2 1", page="0"
             ),
             pages_reverse_from=_("{range}  pages {pages}").format(range="2::-1", pages="2 1 0"),
+            multiple_ranges=_("{ranges} a separate file for each range").format(ranges="0:3, 3:6"),
         )
 
     def get_cleaned_text_input(self, text: str) -> str | None:
-        if not self.pdf_service.split_range_valid(text):
+        # Multiple ranges are separated by commas or whitespaces
+        split_ranges = text.replace(",", " ").split()
+        if not split_ranges or not all(self.pdf_service.split_range_valid(x) for x in split_ranges):
             return None
-        return text
+        return " ".join(split_ranges)
 
     @asynccontextmanager
     async def process_file_task(self, file_data: FileData) -> AsyncGenerator[FileTaskResult, None]:
+        if isinstance(file_data, BurstPdfData):
+            async with self.pdf_service.burst_pdf(file_data.id) as path:
+                yield FileTaskResult(path)
+            return
+
         if not isinstance(file_data, TextInputData):
             raise FileDataTypeError(file_data)
 
-        async with self.pdf_service.split_pdf(file_data.id, file_data.text) as path:
-            yield FileTaskResult(path)
+        split_ranges = file_data.text.split()
+        if len(split_ranges) == 1:
+            async with self.pdf_service.split_pdf(file_data.id, split_ranges[0]) as path:
+                yield FileTaskResult(path)
+        else:
+            async with self.pdf_service.split_pdf_by_ranges(file_data.id, split_ranges) as path:
+                yield FileTaskResult(path)
@@ -0,0 +1,14 @@
+from .abstract_result_cache_backend import AbstractResultCacheBackend
+from .memory_result_cache_backend import MemoryResultCacheBackend
+from .models import CachedResult, ResultCacheStats
+from .result_cache_service import ResultCacheService
+from .sqlite_result_cache_backend import SqliteResultCacheBackend
+
+__all__ = [
+    "AbstractResultCacheBackend",
+    "CachedResult",
+    "MemoryResultCacheBackend",
+    "ResultCacheService",
+    "ResultCacheStats",
+    "SqliteResultCacheBackend",
+]
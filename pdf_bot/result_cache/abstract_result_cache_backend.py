@@ -0,0 +1,32 @@
+from abc import ABC, abstractmethod
+
+from .models import CachedResult
+
+
+class AbstractResultCacheBackend(ABC):
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+
+    @abstractmethod
+    def get(self, key: str) -> CachedResult | None:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, result: CachedResult) -> None:
+        pass
+
+    async def get_async(self, key: str) -> CachedResult | None:
+        """Get the result without blocking the event loop."""
+        return self.get(key)
+
+    async def set_async(self, key: str, result: CachedResult) -> None:
+        """Set the result without blocking the event loop."""
+        self.set(key, result)
+
+    def close(self) -> None:  # noqa: B027
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
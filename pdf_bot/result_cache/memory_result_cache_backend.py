@@ -0,0 +1,34 @@
+import time
+from collections import OrderedDict
+
+from .abstract_result_cache_backend import AbstractResultCacheBackend
+from .models import CachedResult
+
+
+class MemoryResultCacheBackend(AbstractResultCacheBackend):
+    def __init__(self, max_size: int, ttl: float) -> None:
+        super().__init__(max_size, ttl)
+        self._entries: OrderedDict[str, tuple[float, CachedResult]] = OrderedDict()
+
+    def get(self, key: str) -> CachedResult | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, result = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return result
+
+    def set(self, key: str, result: CachedResult) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, result)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,27 @@
+from dataclasses import dataclass
+
+from telegram import Message
+
+
+@dataclass
+class CachedResult:
+    file_id: str
+    is_photo: bool = False
+    message: str | None = None
+
+    @classmethod
+    def from_telegram_message(
+        cls, message: Message, result_message: str | None = None
+    ) -> "CachedResult | None":
+        if message.document is not None:
+            return cls(message.document.file_id, message=result_message)
+        if message.photo:
+            return cls(message.photo[-1].file_id, is_photo=True, message=result_message)
+        return None
+
+
+@dataclass
+class ResultCacheStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
@@ -0,0 +1,102 @@
+import asyncio
+import hashlib
+import json
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, fields, is_dataclass
+from enum import Enum
+from typing import Any
+
+from loguru import logger
+
+from pdf_bot.analytics import TaskType
+from pdf_bot.models import FileData
+
+from .abstract_result_cache_backend import AbstractResultCacheBackend
+from .models import CachedResult, ResultCacheStats
+
+
+class ResultCacheService:
+    # Fields identifying the source file rather than the task parameters
+    _FILE_FIELDS = frozenset(("id", "name", "unique_id"))
+
+    def __init__(self, backend: AbstractResultCacheBackend) -> None:
+        self.backend = backend
+        self.stats = ResultCacheStats()
+        self._in_flight: dict[str, asyncio.Future[CachedResult | None]] = {}
+
+    def get_key(self, file_data: FileData, task_type: TaskType) -> str | None:
+        if file_data.unique_id is None:
+            return None
+
+        params = {
+            x.name: getattr(file_data, x.name)
+            for x in fields(file_data)
+            if x.name not in self._FILE_FIELDS
+        }
+        raw = json.dumps(
+            [file_data.unique_id, task_type.value, params],
+            sort_keys=True,
+            default=self._normalise_param,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get_or_compute(
+        self, key: str, compute: Callable[[], Awaitable[CachedResult | None]]
+    ) -> tuple[CachedResult | None, bool]:
+        """Get the cached result of the key, or compute it if it's not cached.
+
+        Concurrent calls with the same key are coalesced onto a single computation. If
+        the computation fails or doesn't produce a result, the waiting calls compute it
+        themselves.
+
+        Returns:
+            tuple[CachedResult | None, bool]: the result and whether it was computed by
+                this call
+        """
+        while True:
+            result = await self.backend.get_async(key)
+            if result is not None:
+                self.stats.hits += 1
+                return result, False
+
+            future = self._in_flight.get(key)
+            if future is None:
+                break
+
+            self.stats.coalesced += 1
+            result = await asyncio.shield(future)
+            if result is not None:
+                return result, False
+
+        self.stats.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        result = None
+
+        try:
+            result = await compute()
+        finally:
+            future.set_result(result)
+            try:
+                # The call stays in flight until the result is cached, so that the calls
+                # in the meantime don't compute it again
+                if result is not None:
+                    await self.backend.set_async(key, result)
+            finally:
+                del self._in_flight[key]
+
+        logger.debug("Result cache stats: {stats}", stats=self.stats)
+        return result, True
+
+    def close(self) -> None:
+        self.backend.close()
+
+    @staticmethod
+    def _normalise_param(value: Any) -> Any:
+        if isinstance(value, Enum):
+            return f"{value.__class__.__name__}.{value.name}"
+        if is_dataclass(value) and not isinstance(value, type):
+            return asdict(value)
+
+        msg = f"Unsupported task parameter type: {type(value)}"
+        raise TypeError(msg)
@@ -0,0 +1,88 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from .abstract_result_cache_backend import AbstractResultCacheBackend
+from .models import CachedResult
+
+
+class SqliteResultCacheBackend(AbstractResultCacheBackend):
+    def __init__(self, max_size: int, ttl: float, path: Path | str) -> None:
+        super().__init__(max_size, ttl)
+        self.path = Path(path)
+
+        # The connection is shared by the worker threads that the async methods run on
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS result_cache (
+                key TEXT PRIMARY KEY,
+                file_id TEXT NOT NULL,
+                is_photo INTEGER NOT NULL,
+                message TEXT,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS result_cache_accessed_at ON result_cache (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> CachedResult | None:
+        # Wall-clock time is used as the entries outlive the process
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT file_id, is_photo, message, expires_at FROM result_cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+
+            file_id, is_photo, message, expires_at = row
+            with self._conn:
+                if expires_at <= now:
+                    self._conn.execute("DELETE FROM result_cache WHERE key = ?", (key,))
+                    return None
+
+                self._conn.execute(
+                    "UPDATE result_cache SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+        return CachedResult(file_id, is_photo=bool(is_photo), message=message)
+
+    async def get_async(self, key: str) -> CachedResult | None:
+        return await asyncio.to_thread(self.get, key)
+
+    def set(self, key: str, result: CachedResult) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO result_cache VALUES (?, ?, ?, ?, ?, ?)",
+                (key, result.file_id, result.is_photo, result.message, now + self.ttl, now),
+            )
+            self._conn.execute("DELETE FROM result_cache WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                """
+                DELETE FROM result_cache WHERE key IN (
+                    SELECT key FROM result_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_size,),
+            )
+
+    async def set_async(self, key: str, result: CachedResult) -> None:
+        await asyncio.to_thread(self.set, key, result)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*) FROM result_cache").fetchone()
+        return int(row[0])
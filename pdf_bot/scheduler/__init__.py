@@ -0,0 +1,4 @@
+from .models import TaskCost
+from .scheduler_service import SchedulerService
+
+__all__ = ["SchedulerService", "TaskCost"]
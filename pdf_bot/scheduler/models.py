@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class TaskCost(Enum):
+    light = "light"
+    medium = "medium"
+    heavy = "heavy"
@@ -0,0 +1,187 @@
+import asyncio
+from collections import deque
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass, field
+from typing import cast
+
+from loguru import logger
+from telegram import Message, Update
+from telegram.error import TelegramError
+from telegram.ext import ContextTypes
+
+from pdf_bot.analytics import TaskType
+from pdf_bot.language import LanguageService
+from pdf_bot.settings import Settings
+
+from .models import TaskCost
+
+QueuedCallback = Callable[[int], Awaitable[None]]
+
+
+@dataclass(eq=False)
+class _Job:
+    user_id: int
+    event: asyncio.Event = field(default_factory=asyncio.Event)
+    is_admitted: bool = False
+
+
+class _JobQueue:
+    def __init__(self, max_jobs: int) -> None:
+        self.max_jobs = max_jobs
+        self.num_running = 0
+
+        # The users take turns in the insertion order, and a user with more jobs goes to
+        # the back after each of their jobs is admitted
+        self._user_jobs: dict[int, deque[_Job]] = {}
+
+    def push(self, job: _Job) -> None:
+        self._user_jobs.setdefault(job.user_id, deque()).append(job)
+        self._dispatch()
+
+    def remove(self, job: _Job) -> None:
+        jobs = self._user_jobs[job.user_id]
+        jobs.remove(job)
+        if not jobs:
+            del self._user_jobs[job.user_id]
+        self._notify()
+
+    def release(self) -> None:
+        self.num_running -= 1
+        self._dispatch()
+
+    def get_position(self, job: _Job) -> int:
+        # The job is admitted in the turn of its index, after the jobs of the earlier
+        # turns and the jobs of the users before it in the same turn
+        index = self._user_jobs[job.user_id].index(job)
+        position = 1
+        is_before = True
+
+        for user_id, jobs in self._user_jobs.items():
+            position += min(len(jobs), index)
+            if user_id == job.user_id:
+                is_before = False
+            elif is_before and len(jobs) > index:
+                position += 1
+        return position
+
+    def _dispatch(self) -> None:
+        while self.num_running < self.max_jobs and self._user_jobs:
+            user_id, jobs = next(iter(self._user_jobs.items()))
+            del self._user_jobs[user_id]
+
+            job = jobs.popleft()
+            if jobs:
+                self._user_jobs[user_id] = jobs
+
+            job.is_admitted = True
+            job.event.set()
+            self.num_running += 1
+        self._notify()
+
+    def _notify(self) -> None:
+        # Wake up the queued jobs to update their positions
+        for jobs in self._user_jobs.values():
+            for job in jobs:
+                job.event.set()
+
+
+class SchedulerService:
+    def __init__(self, language_service: LanguageService, settings: Settings) -> None:
+        self.language_service = language_service
+        self.default_task_cost = TaskCost(settings.scheduler_default_task_cost)
+        self.task_costs = {k: TaskCost(v) for k, v in settings.scheduler_task_costs.items()}
+        self._queues = {
+            x: _JobQueue(
+                settings.scheduler_max_jobs.get(x.value, settings.scheduler_default_max_jobs)
+            )
+            for x in TaskCost
+        }
+
+    def get_task_cost(self, task_type: TaskType) -> TaskCost:
+        return self.task_costs.get(task_type.value, self.default_task_cost)
+
+    @asynccontextmanager
+    async def schedule(
+        self, task_type: TaskType, user_id: int, on_queued: QueuedCallback | None = None
+    ) -> AsyncGenerator[None, None]:
+        """Wait for the turn of the task and hold its slot until the context exits.
+
+        The tasks are limited by the maximum number of concurrent jobs of their cost
+        classes, and the queued jobs of each class are admitted in turns across the
+        users.
+
+        Args:
+            task_type: the type of the task
+            user_id: the ID of the user that the task is for
+            on_queued: the callback that's called with the queue position of the job
+                whenever it changes while it's queued
+        """
+        queue = self._queues[self.get_task_cost(task_type)]
+        job = _Job(user_id)
+        queue.push(job)
+
+        try:
+            await self._wait_for_turn(queue, job, on_queued)
+            yield
+        finally:
+            if job.is_admitted:
+                queue.release()
+            else:
+                queue.remove(job)
+
+    @asynccontextmanager
+    async def schedule_update(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE, task_type: TaskType
+    ) -> AsyncGenerator[None, None]:
+        """Schedule the task of the update and tell the user its position while queued."""
+        msg = cast(Message, update.effective_message)
+        queue_message: Message | None = None
+
+        async def send_position(position: int) -> None:
+            nonlocal queue_message
+            _ = self.language_service.set_app_language(update, context)
+            text = _(
+                "I'm busy with other files right now, you're number {position} in the queue"
+            ).format(position=position)
+
+            with suppress(TelegramError):
+                if queue_message is None:
+                    queue_message = await msg.reply_text(text)
+                else:
+                    await queue_message.edit_text(text)
+
+        try:
+            async with self.schedule(task_type, msg.chat_id, send_position):
+                await self._delete_message(queue_message)
+                queue_message = None
+                yield
+        finally:
+            await self._delete_message(queue_message)
+
+    @staticmethod
+    async def _wait_for_turn(queue: _JobQueue, job: _Job, on_queued: QueuedCallback | None) -> None:
+        position: int | None = None
+        while True:
+            job.event.clear()
+            if job.is_admitted:
+                return
+
+            new_position = queue.get_position(job)
+            if new_position != position:
+                if position is None:
+                    logger.debug("Job queued at position: {position}", position=new_position)
+
+                position = new_position
+                if on_queued is not None:
+                    # The queue may have changed while the callback was running
+                    await on_queued(position)
+                    continue
+
+            await job.event.wait()
+
+    @staticmethod
+    async def _delete_message(message: Message | None) -> None:
+        if message is not None:
+            with suppress(TelegramError):
+                await message.delete()
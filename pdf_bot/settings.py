@@ -1,4 +1,6 @@
 from pathlib import Path
+from tempfile import gettempdir
+from typing import Any, Literal
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -15,6 +17,7 @@ class Settings(BaseSettings):
     google_fonts_token: str = Field(...)
     ga_api_secret: str = Field(...)
     ga_measurement_id: str = Field(...)
+    ga_api_url: str = "https://www.google-analytics.com/mp/collect"
     gcp_service_account: dict = Field(...)
     sentry_dsn: str | None = Field(default=None)
 
@@ -30,3 +33,142 @@ class Settings(BaseSettings):
     request_pool_timeout: int = 45
 
     telegram_max_retries: int = 2
+    telegram_max_concurrent_downloads: int = 4
+
+    # The heavy engines, such as OCR and HTML rendering, are imported on their first use.
+    # They're also loaded in the background once the bot starts serving updates if this
+    # is set, so that the first tasks that use them don't wait for the imports
+    preload_lazy_modules: bool = True
+
+    # Number of worker processes per executor operation, operations not listed here use
+    # the default. Setting it to zero runs the operation in a thread instead
+    executor_default_max_workers: int = 2
+    executor_max_workers: dict[str, int] = Field(default_factory=lambda: {"ocr": 1, "preview": 0})
+    executor_max_tasks_per_worker: int | None = 20
+
+    # User entities are cached for the TTL in seconds. Lookups and writes are batched
+    # within the window in seconds, and the writes are done in the background. Failed
+    # writes are retried with exponential backoff from the given seconds. Users known to
+    # have been created are remembered so that they aren't created again
+    datastore_cache_max_size: int = 100_000
+    datastore_cache_ttl: float = 60 * 60
+    datastore_batch_window: float = 0.05
+    datastore_put_max_retries: int = 3
+    datastore_put_retry_backoff: float = 1
+    datastore_known_users_max_size: int = 1_000_000
+
+    # Analytics events are queued and sent in batches of up to the batch size in the
+    # background every flush interval in seconds, with the requests of a batch sent
+    # concurrently. The oldest events are dropped if the queue is full, and the failed
+    # requests are retried with exponential backoff. The events that aren't sent within
+    # the flush timeout in seconds on shutdown are dropped
+    analytics_queue_max_size: int = 10_000
+    analytics_batch_size: int = 100
+    analytics_flush_interval: float = 1
+    analytics_flush_timeout: float = 10
+    analytics_max_concurrent_requests: int = 4
+    analytics_max_retries: int = 3
+    analytics_retry_backoff: float = 0.5
+
+    # File tasks are scheduled by their cost classes, which are "light", "medium" and
+    # "heavy", with the maximum number of concurrent jobs per class. The queued jobs of a
+    # class are admitted in turns across the users. Tasks and classes not listed here use
+    # the defaults
+    scheduler_default_task_cost: Literal["light", "medium", "heavy"] = "medium"
+    scheduler_task_costs: dict[str, str] = Field(
+        default_factory=lambda: {
+            "compare_pdf": "heavy",
+            "decrypt_pdf": "light",
+            "encrypt_pdf": "light",
+            "grayscale_pdf": "heavy",
+            "ocr_pdf": "heavy",
+            "pdf_to_image": "heavy",
+            "preview_pdf": "light",
+            "rename_pdf": "light",
+            "rotate_pdf": "light",
+            "scale_pdf": "light",
+            "split_pdf": "light",
+            "url_to_pdf": "heavy",
+        }
+    )
+    scheduler_default_max_jobs: int = 4
+    scheduler_max_jobs: dict[str, int] = Field(default_factory=lambda: {"light": 32, "heavy": 2})
+
+    # Wall-clock timeouts in seconds per external command, commands not listed here use
+    # the default
+    cli_default_timeout: float = 300
+    cli_timeouts: dict[str, float] = Field(
+        default_factory=lambda: {"extract_pdf_images": 120.0, "render_pdf_page": 30.0}
+    )
+    cli_max_processes: int = 4
+    cli_max_output_size: int = 64 * 1024
+
+    # Cache of the uploaded task results by the source file, task and task parameters. The
+    # backend can either be "memory" or "sqlite", and the TTL is in seconds
+    result_cache_backend: Literal["memory", "sqlite"] = "memory"
+    result_cache_max_size: int = 10_000
+    result_cache_ttl: float = 7 * 24 * 60 * 60
+    result_cache_sqlite_path: Path = Path("result_cache.sqlite3")
+
+    # Local cache of the downloaded files by their unique IDs, the least recently used
+    # files that are not in use are removed when the cache exceeds the size limit
+    download_cache_dir: Path = Path(gettempdir()) / "pdf_bot_downloads"
+    download_cache_max_bytes: int = 1024**3
+
+    # Page previews are rendered with their longest side in pixels, Telegram downscales
+    # photos to 1280 pixels so larger previews are wasted. The rendered previews are
+    # cached by the file unique ID, page and size
+    preview_size: int = 1280
+    preview_cache_dir: Path = Path(gettempdir()) / "pdf_bot_previews"
+    preview_cache_max_bytes: int = 256 * 1024**2
+
+    # Watermark templates, which are the watermark pages stripped of everything else, are
+    # cached by the watermark file unique ID
+    watermark_cache_dir: Path = Path(gettempdir()) / "pdf_bot_watermarks"
+    watermark_cache_max_bytes: int = 64 * 1024**2
+
+    # The Google Fonts catalog is cached in memory and on disk, and it's refreshed in the
+    # background once it's older than the TTL in seconds
+    google_fonts_cache_dir: Path = Path(gettempdir()) / "pdf_bot_fonts"
+    google_fonts_catalog_ttl: float = 24 * 60 * 60
+
+    # Font files are downloaded once into the cache by their URLs, the least recently used
+    # fonts are removed when the cache exceeds the size limit
+    font_cache_dir: Path = Path(gettempdir()) / "pdf_bot_font_files"
+    font_cache_max_bytes: int = 128 * 1024**2
+
+    # Compression runs a lossless pass first, then a lossy pass with Ghostscript and the
+    # PDF settings profile if the file isn't reduced to the target ratio of its original
+    # size. The lossy pass is disabled if the profile is None, and the original file is
+    # returned if neither of the passes reduces it
+    compress_target_ratio: float = 0.8
+    compress_lossy_profile: Literal["screen", "ebook", "printer", "prepress", "default"] | None = (
+        "default"
+    )
+
+    # PDF files are converted to images in windows of pages that are rendered concurrently
+    pdf_to_images_window_size: int = 10
+
+    # Text is extracted in windows of pages concurrently with the engine. pdfminer only
+    # runs layout analysis if its parameters are set, see pdfminer.layout.LAParams
+    pdf_text_engine: Literal["pdftotext", "pdfminer", "pypdf"] = "pdftotext"
+    pdf_text_window_size: int = 20
+    pdf_text_pdfminer_laparams: dict[str, Any] | None = None
+
+    # OCR skips pages that already have text, or redoes the OCR text layers in "redo_ocr"
+    # mode, and blank pages. Tesseract uses up to the CPU budget split across the OCR
+    # workers, which defaults to the number of CPUs
+    ocr_mode: Literal["skip_text", "redo_ocr"] = "skip_text"
+    ocr_optimize: int = 1
+    ocr_cpu_budget: int | None = None
+
+    # Backend of the structural operations per operation, operations not listed here use
+    # the default. The operations are "decrypt", "encrypt", "pipeline", "rotate", "scale"
+    # and "split", where "pipeline" is the fused pass of the chained structural operations
+    pdf_default_backend: Literal["pikepdf", "pypdf"] = "pikepdf"
+    pdf_backends: dict[str, Literal["pikepdf", "pypdf"]] = Field(default_factory=dict)
+
+    # Merges with a total input size in bytes above the threshold are streamed, which is
+    # limited to the given amount of additional memory in bytes if it's set
+    pdf_streaming_merge_threshold: int = 50 * 1024**2
+    pdf_streaming_merge_memory_limit: int | None = 2 * 1024**3
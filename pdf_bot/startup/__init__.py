@@ -0,0 +1,13 @@
+from .import_profiler import parse_import_times, profile_imports
+from .lazy_module import LazyModule, lazy_import, load_lazy_modules
+from .models import ImportProfile, ImportTime
+
+__all__ = [
+    "ImportProfile",
+    "ImportTime",
+    "LazyModule",
+    "lazy_import",
+    "load_lazy_modules",
+    "parse_import_times",
+    "profile_imports",
+]
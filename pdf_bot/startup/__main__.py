@@ -0,0 +1,30 @@
+"""Report the import time breakdown of the bot's startup.
+
+Run it from the project root:
+
+    python -m pdf_bot.startup --top 20
+"""
+
+import argparse
+
+from .import_profiler import profile_imports
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="pdf_bot.containers")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    profile = profile_imports(args.module)
+    total_us = profile.total_us
+    print(f"Importing {args.module} took {total_us / 1000:.0f} ms")  # noqa: T201
+
+    for package, package_us in profile.get_package_times()[: args.top]:
+        print(  # noqa: T201
+            f"{package:>32}: {package_us / 1000:8.1f} ms ({package_us / total_us:6.1%})"
+        )
+
+
+if __name__ == "__main__":
+    main()
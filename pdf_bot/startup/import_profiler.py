@@ -0,0 +1,37 @@
+import re
+import subprocess
+import sys
+
+from .models import ImportProfile, ImportTime
+
+_IMPORT_TIME_REGEX = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|\s+(\S+)$")
+
+
+def profile_imports(module: str) -> ImportProfile:
+    """Import the module in a fresh interpreter and return the import time breakdown.
+
+    Args:
+        module: the name of the module to import
+
+    Returns:
+        the self and cumulative import times of the module and all the modules that it
+        imports, as reported by `python -X importtime`
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_import_times(proc.stderr)
+
+
+def parse_import_times(output: str) -> ImportProfile:
+    import_times: list[ImportTime] = []
+    for line in output.splitlines():
+        match = _IMPORT_TIME_REGEX.match(line.strip())
+        if match is not None:
+            self_us, cumulative_us, module = match.groups()
+            import_times.append(ImportTime(module, int(self_us), int(cumulative_us)))
+
+    return ImportProfile(import_times)
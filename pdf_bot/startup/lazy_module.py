@@ -0,0 +1,62 @@
+import importlib
+import time
+from types import ModuleType
+from typing import Any
+
+from loguru import logger
+
+
+class LazyModule(ModuleType):
+    """A module that is imported when one of its attributes is first accessed."""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self._module: ModuleType | None = None
+
+    def __getattr__(self, name: str) -> Any:
+        # The attributes are looked up on the module every time so that they can be
+        # patched on the module itself
+        return getattr(self.load(), name)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._module is not None
+
+    def load(self) -> ModuleType:
+        if self._module is None:
+            self._module = importlib.import_module(self.__name__)
+        return self._module
+
+
+_lazy_modules: dict[str, LazyModule] = {}
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Return the module that's only imported on its first use.
+
+    The modules of the heavy engines, such as OCR and HTML rendering, take a while to
+    import and most of them aren't needed to start serving updates.
+    """
+    if name not in _lazy_modules:
+        _lazy_modules[name] = LazyModule(name)
+    return _lazy_modules[name]
+
+
+def load_lazy_modules() -> None:
+    """Import the lazy modules that haven't been used yet."""
+    for name, module in list(_lazy_modules.items()):
+        if module.is_loaded:
+            continue
+
+        start_time = time.perf_counter()
+        try:
+            module.load()
+        except Exception as e:  # noqa: BLE001
+            # The error is raised again when the module is used
+            logger.warning("Failed to load module {name}: {error}", name=name, error=e)
+        else:
+            logger.debug(
+                "Loaded module {name} in {elapsed:.2f}s",
+                name=name,
+                elapsed=time.perf_counter() - start_time,
+            )
@@ -0,0 +1,34 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class ImportTime:
+    module: str
+    self_us: int
+    cumulative_us: int
+
+    @property
+    def package(self) -> str:
+        return self.module.split(".", 1)[0]
+
+
+@dataclass
+class ImportProfile:
+    import_times: list[ImportTime]
+
+    @property
+    def total_us(self) -> int:
+        return sum(x.self_us for x in self.import_times)
+
+    def get_package_times(self) -> list[tuple[str, int]]:
+        """Return the total import time of each top level package, slowest first.
+
+        The self times are summed up instead of the cumulative times, as the cumulative
+        time of a module also covers the other packages that it imports.
+        """
+        package_times: dict[str, int] = {}
+        for import_time in self.import_times:
+            package_times[import_time.package] = (
+                package_times.get(import_time.package, 0) + import_time.self_us
+            )
+        return sorted(package_times.items(), key=lambda x: x[1], reverse=True)
@@ -4,6 +4,10 @@ from telegram.ext import BaseHandler
 
 
 class AbstractTelegramHandler(ABC):
+    @property
+    def group(self) -> int:
+        return 0
+
     @property
     @abstractmethod
     def handlers(self) -> list[BaseHandler]:
@@ -1,9 +1,12 @@
+import asyncio
+import time
 from collections.abc import AsyncGenerator, Coroutine
-from contextlib import asynccontextmanager, suppress
+from contextlib import AsyncExitStack, asynccontextmanager, suppress
 from gettext import gettext as _
 from pathlib import Path
 from typing import Any, cast
 
+from loguru import logger
 from pydantic import BaseModel
 from telegram import (
     Bot,
@@ -21,8 +24,15 @@ from telegram.constants import ChatAction, FileSizeLimit, MessageLimit, ParseMod
 from telegram.ext import ContextTypes, ConversationHandler
 
 from pdf_bot.analytics import AnalyticsService, EventAction, TaskType
-from pdf_bot.consts import BACK, CANCEL, CHANNEL_NAME, FILE_DATA, MESSAGE_DATA
-from pdf_bot.io import IOService
+from pdf_bot.consts import (
+    BACK,
+    CANCEL,
+    CHANNEL_NAME,
+    FILE_DATA,
+    FILE_TOO_LARGE_ERROR,
+    MESSAGE_DATA,
+)
+from pdf_bot.download_cache import DownloadCacheService
 from pdf_bot.language import LanguageService
 from pdf_bot.models import BackData, FileData, MessageData, SupportData
 
@@ -44,21 +54,24 @@ class _ReplyData(BaseModel):
 class TelegramService:
     IMAGE_MIME_TYPE_PREFIX = "image"
     PDF_MIME_TYPE_SUFFIX = "pdf"
+    PDF_SUFFIX = ".pdf"
     PNG_SUFFIX = ".png"
     BACK = _("Back")
     MESSAGE_TRUNCATED = "\n..."
 
     def __init__(
         self,
-        io_service: IOService,
+        download_cache_service: DownloadCacheService,
         language_service: LanguageService,
         analytics_service: AnalyticsService,
         bot: Bot,
+        max_concurrent_downloads: int = 4,
     ) -> None:
-        self.io_service = io_service
+        self.download_cache_service = download_cache_service
         self.language_service = language_service
         self.analytics_service = analytics_service
         self.bot = bot
+        self._download_semaphore = asyncio.Semaphore(max_concurrent_downloads)
 
     @staticmethod
     def check_file_size(file: Document | PhotoSize) -> None:
@@ -76,13 +89,7 @@ class TelegramService:
     @staticmethod
     def check_file_upload_size(path: Path) -> None:
         if path.stat().st_size > FileSizeLimit.FILESIZE_UPLOAD:
-            raise TelegramFileTooLargeError(
-                _(
-                    "The file is too large for me to send to you\n\n"
-                    "Note that this limit is enforced by Telegram and there's "
-                    "nothing I can do unless Telegram changes it"
-                )
-            )
+            raise TelegramFileTooLargeError(_(FILE_TOO_LARGE_ERROR))
 
     @staticmethod
     def get_user_data(context: ContextTypes.DEFAULT_TYPE, key: str) -> Any:
@@ -175,18 +182,18 @@ class TelegramService:
 
     @asynccontextmanager
     async def download_pdf_file(self, file_id: str) -> AsyncGenerator[Path, None]:
-        with self.io_service.create_temp_pdf_file() as path:
-            file = await self.bot.get_file(file_id)
-            await file.download_to_drive(custom_path=path)
+        async with self._download_file(file_id, self.PDF_SUFFIX) as path:
             yield path
 
+    @asynccontextmanager
+    async def download_pdf_files(self, file_ids: list[str]) -> AsyncGenerator[list[Path], None]:
+        async with self._download_files(file_ids, self.PDF_SUFFIX) as paths:
+            yield paths
+
     @asynccontextmanager
     async def download_files(self, file_ids: list[str]) -> AsyncGenerator[list[Path], None]:
-        with self.io_service.create_temp_files(len(file_ids)) as out_paths:
-            for i, file_id in enumerate(file_ids):
-                file = await self.bot.get_file(file_id)
-                await file.download_to_drive(custom_path=out_paths[i])
-            yield out_paths
+        async with self._download_files(file_ids) as paths:
+            yield paths
 
     async def cancel_conversation(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         _ = self.language_service.set_app_language(update, context)
@@ -252,7 +259,7 @@ class TelegramService:
         context: ContextTypes.DEFAULT_TYPE,
         file_path: Path,
         task: TaskType,
-    ) -> None:
+    ) -> Message | None:
         _ = self.language_service.set_app_language(update, context)
         chat_id = self._get_chat_id(update)
 
@@ -260,28 +267,28 @@ class TelegramService:
             self.check_file_upload_size(file_path)
         except TelegramFileTooLargeError as e:
             await self.bot.send_message(chat_id, _(str(e)))
-            return
+            return None
 
-        reply_markup = self.get_support_markup(update, context)
-        if file_path.suffix == self.PNG_SUFFIX:
-            await self.bot.send_chat_action(chat_id, ChatAction.UPLOAD_PHOTO)
-            await self.bot.send_photo(
-                chat_id,
-                file_path,
-                caption=_("Here is your result file"),
-                reply_markup=reply_markup,
-            )
-        else:
-            await self.bot.send_chat_action(chat_id, ChatAction.UPLOAD_DOCUMENT)
-            await self.bot.send_document(
-                chat_id,
-                file_path,
-                caption=_("Here is your result file"),
-                reply_markup=reply_markup,
-            )
+        message = await self._send_result_file(
+            update, context, file_path, is_photo=file_path.suffix == self.PNG_SUFFIX
+        )
+        self.analytics_service.send_event(update, context, task, EventAction.complete)
+
+        return message
 
+    async def send_file_by_id(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+        file_id: str,
+        task: TaskType,
+        is_photo: bool = False,
+    ) -> Message:
+        message = await self._send_result_file(update, context, file_id, is_photo=is_photo)
         self.analytics_service.send_event(update, context, task, EventAction.complete)
 
+        return message
+
     async def send_file_names(
         self, chat_id: int, text: str, file_data_list: list[FileData]
     ) -> None:
@@ -307,6 +314,93 @@ class TelegramService:
         chat_id = self._get_chat_id(update)
         await self.bot.send_message(chat_id, _(text))
 
+    async def _send_result_file(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+        file: Path | str,
+        is_photo: bool,
+    ) -> Message:
+        _ = self.language_service.set_app_language(update, context)
+        chat_id = self._get_chat_id(update)
+        reply_markup = self.get_support_markup(update, context)
+
+        if is_photo:
+            await self.bot.send_chat_action(chat_id, ChatAction.UPLOAD_PHOTO)
+            return await self.bot.send_photo(
+                chat_id,
+                file,
+                caption=_("Here is your result file"),
+                reply_markup=reply_markup,
+            )
+
+        await self.bot.send_chat_action(chat_id, ChatAction.UPLOAD_DOCUMENT)
+        return await self.bot.send_document(
+            chat_id,
+            file,
+            caption=_("Here is your result file"),
+            reply_markup=reply_markup,
+        )
+
+    @asynccontextmanager
+    async def _download_files(
+        self, file_ids: list[str], suffix: str = ""
+    ) -> AsyncGenerator[list[Path], None]:
+        """Download the files concurrently, bounded by the maximum concurrent downloads.
+
+        The paths are in the same order as the file IDs. If any of the downloads fails,
+        the remaining ones are cancelled and the downloaded files are released.
+        """
+        start_time = time.perf_counter()
+
+        async with AsyncExitStack() as stack:
+            tasks = [
+                asyncio.create_task(stack.enter_async_context(self._download_file(x, suffix)))
+                for x in file_ids
+            ]
+
+            try:
+                paths = await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+
+            logger.info(
+                "Downloaded {count} files in {elapsed:.3f}s",
+                count=len(file_ids),
+                elapsed=time.perf_counter() - start_time,
+            )
+            yield paths
+
+    @asynccontextmanager
+    async def _download_file(self, file_id: str, suffix: str = "") -> AsyncGenerator[Path, None]:
+        # Downloaded files are shared through the cache, so they must not be modified
+        start_time = time.perf_counter()
+        is_downloaded = False
+
+        async with self._download_semaphore:
+            file = await self.bot.get_file(file_id)
+
+        async def download(path: Path) -> None:
+            nonlocal is_downloaded
+            async with self._download_semaphore:
+                await file.download_to_drive(custom_path=path)
+            is_downloaded = True
+
+        async with self.download_cache_service.get_file(
+            file.file_unique_id, download, suffix=suffix
+        ) as path:
+            logger.debug(
+                "Got file {file_id} of {size} bytes in {elapsed:.3f}s (downloaded: {downloaded})",
+                file_id=file_id,
+                size=file.file_size,
+                elapsed=time.perf_counter() - start_time,
+                downloaded=is_downloaded,
+            )
+            yield path
+
     @staticmethod
     def _get_chat_id(update: Update) -> int:
         query = update.callback_query
@@ -0,0 +1,56 @@
+import difflib
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any, cast
+
+from pdf_bot.pdf import FontData
+
+
+@dataclass
+class FontCatalog:
+    """The Google Fonts catalog indexed by the case-folded font families.
+
+    Families without a regular font are indexed as None, so that they're not suggested.
+    """
+
+    fonts: dict[str, FontData | None]
+    _names: list[str] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._names = sorted(k for k, v in self.fonts.items() if v is not None)
+
+    @classmethod
+    def from_items(cls, items: list[dict[str, Any]]) -> "FontCatalog":
+        fonts: dict[str, FontData | None] = {}
+        for item in items:
+            family: str = item["family"]
+            url: str | None = item["files"].get("regular")
+            fonts[family.casefold()] = FontData(family, url) if url is not None else None
+
+        return cls(fonts)
+
+    def get_font(self, font: str) -> FontData | None:
+        return self.fonts.get(font.strip().casefold())
+
+    def get_suggestions(self, font: str, limit: int) -> list[str]:
+        """Get the font families that start with or closely match the font.
+
+        The families that start with the font are suggested first, followed by the
+        closest matches.
+        """
+        name = font.strip().casefold()
+        if not name:
+            return []
+
+        names: list[str] = []
+        i = bisect_left(self._names, name)
+        while i < len(self._names) and len(names) < limit and self._names[i].startswith(name):
+            names.append(self._names[i])
+            i += 1
+
+        if len(names) < limit:
+            for match in difflib.get_close_matches(name, self._names, n=limit):
+                if match not in names and len(names) < limit:
+                    names.append(match)
+
+        return [cast(FontData, self.fonts[x]).font_family for x in names]
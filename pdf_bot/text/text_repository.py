@@ -1,26 +1,145 @@
+import asyncio
+import json
+import os
+import time
+from contextlib import suppress
+from http import HTTPStatus
+from pathlib import Path
+from tempfile import mkstemp
+from typing import Any, cast
+
+from loguru import logger
 from requests import Session
 
 from pdf_bot.pdf import FontData
 
+from .models import FontCatalog
+
 
 class TextRepository:
-    def __init__(self, api_client: Session, google_fonts_token: str) -> None:
+    _CATALOG_URL = "https://www.googleapis.com/webfonts/v1/webfonts"
+    _CATALOG_FILE = "webfonts.json"
+
+    # Seconds to wait before refreshing the catalog again after a failed refresh
+    _RETRY_INTERVAL = 60
+
+    def __init__(
+        self,
+        api_client: Session,
+        google_fonts_token: str,
+        cache_dir: Path,
+        catalog_ttl: float,
+    ) -> None:
         self.api_client = api_client
         self.google_fonts_token = google_fonts_token
+        self.catalog_path = Path(cache_dir) / self._CATALOG_FILE
+        self.catalog_ttl = catalog_ttl
+
+        self._catalog: FontCatalog | None = None
+        self._etag: str | None = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: asyncio.Task[None] | None = None
+
+    async def get_font(self, font: str) -> FontData | None:
+        catalog = await self._get_catalog()
+        return catalog.get_font(font)
+
+    async def get_font_suggestions(self, font: str, limit: int = 3) -> list[str]:
+        catalog = await self._get_catalog()
+        return catalog.get_suggestions(font, limit)
+
+    def download_font(self, font_url: str, out_path: Path) -> None:
+        r = self.api_client.get(font_url, timeout=30)
+
+        # An error page must not be written, as the file is cached as the font
+        r.raise_for_status()
+        out_path.write_bytes(r.content)
 
-    def get_font(self, font: str) -> FontData | None:
-        font_data: FontData | None = None
-        font = font.lower()
+    async def _get_catalog(self) -> FontCatalog:
+        """Get the catalog from memory, the disk or the Google Fonts API.
 
-        r = self.api_client.get(
-            "https://www.googleapis.com/webfonts/v1/webfonts",
+        An expired catalog is still returned while it's refreshed in the background.
+        """
+        if self._catalog is None:
+            async with self._lock:
+                if self._catalog is None:
+                    await asyncio.to_thread(self._load_catalog)
+                if self._catalog is None:
+                    await self._fetch_catalog()
+
+        if self._expires_at <= time.time() and self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_catalog())
+
+        # The catalog is either loaded or fetched above, or the fetch has raised an error
+        return cast(FontCatalog, self._catalog)
+
+    async def _refresh_catalog(self) -> None:
+        try:
+            async with self._lock:
+                await self._fetch_catalog()
+        except Exception:  # noqa: BLE001
+            # The refresh isn't retried until the retry interval is over whatever the error
+            # is, so that a failing API isn't requested for every lookup
+            logger.exception("Failed to refresh the Google Fonts catalog")
+            self._expires_at = time.time() + self._RETRY_INTERVAL
+        finally:
+            self._refresh_task = None
+
+    async def _fetch_catalog(self) -> None:
+        headers = {"If-None-Match": self._etag} if self._etag is not None else {}
+        r = await asyncio.to_thread(
+            self.api_client.get,
+            self._CATALOG_URL,
             params={"key": self.google_fonts_token},
+            headers=headers,
+            timeout=30,
         )
 
-        for item in r.json()["items"]:
-            if item["family"].lower() == font:
-                if "regular" in item["files"]:
-                    font_data = FontData(item["family"], item["files"]["regular"])
-                break
+        if r.status_code == HTTPStatus.NOT_MODIFIED:
+            self._expires_at = time.time() + self.catalog_ttl
+            with suppress(OSError):
+                await asyncio.to_thread(self.catalog_path.touch)
+            return
+
+        r.raise_for_status()
+        data = await asyncio.to_thread(r.json)
+        items: list[dict[str, Any]] | None = data.get("items") if isinstance(data, dict) else None
+        if items is None:
+            msg = "The Google Fonts catalog doesn't have any items"
+            raise ValueError(msg)
+
+        etag: str | None = r.headers.get("ETag")
+        self._set_catalog(items, etag, time.time() + self.catalog_ttl)
+        await asyncio.to_thread(self._save_catalog, items, etag)
+
+    def _load_catalog(self) -> None:
+        try:
+            with self.catalog_path.open(encoding="utf-8") as f:
+                data = json.load(f)
+            fetched_at = self.catalog_path.stat().st_mtime
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            logger.exception("Failed to load the Google Fonts catalog")
+            return
+
+        self._set_catalog(data["items"], data.get("etag"), fetched_at + self.catalog_ttl)
+
+    def _save_catalog(self, items: list[dict[str, Any]], etag: str | None) -> None:
+        # Write to a temporary file first so that a partially written catalog isn't loaded
+        try:
+            self.catalog_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = mkstemp(dir=self.catalog_path.parent, suffix=".part")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"etag": etag, "items": items}, f)
+            Path(tmp_path).replace(self.catalog_path)
+        except OSError:
+            logger.exception("Failed to save the Google Fonts catalog")
 
-        return font_data
+    def _set_catalog(
+        self, items: list[dict[str, Any]], etag: str | None, expires_at: float
+    ) -> None:
+        self._catalog = FontCatalog.from_items(items)
+        self._etag = etag
+        self._expires_at = expires_at
@@ -1,14 +1,25 @@
+import asyncio
+import hashlib
+from collections.abc import AsyncGenerator
+from contextlib import AsyncExitStack, asynccontextmanager
+from functools import partial
 from gettext import gettext as _
+from pathlib import Path
 from typing import cast
+from urllib.parse import urlparse
 
+from loguru import logger
+from requests.exceptions import RequestException
 from telegram import Message, ReplyKeyboardMarkup, ReplyKeyboardRemove, Update
 from telegram.constants import ChatAction, ParseMode
 from telegram.ext import ContextTypes, ConversationHandler
 
 from pdf_bot.analytics import TaskType
 from pdf_bot.consts import CANCEL
+from pdf_bot.download_cache import DownloadCacheService
 from pdf_bot.language import LanguageService
 from pdf_bot.pdf import FontData, PdfService
+from pdf_bot.scheduler import SchedulerService
 from pdf_bot.telegram_internal import TelegramService, TelegramServiceError
 from pdf_bot.text.text_repository import TextRepository
 
@@ -20,17 +31,21 @@ class TextService:
     TEXT_KEY = "text"
     SKIP = _("Skip")
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         text_repository: TextRepository,
+        font_cache_service: DownloadCacheService,
         pdf_service: PdfService,
         telegram_service: TelegramService,
         language_service: LanguageService,
+        scheduler_service: SchedulerService,
     ) -> None:
         self.text_repository = text_repository
+        self.font_cache_service = font_cache_service
         self.pdf_service = pdf_service
         self.telegram_service = telegram_service
         self.language_service = language_service
+        self.scheduler_service = scheduler_service
 
     async def ask_pdf_text(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         _ = self.language_service.set_app_language(update, context)
@@ -83,11 +98,23 @@ class TextService:
         if msg_text == _(self.SKIP):
             return await self._text_to_pdf(update, context)
 
-        font_data = self.text_repository.get_font(msg_text)
+        font_data = await self.text_repository.get_font(msg_text)
         if font_data is not None:
             return await self._text_to_pdf(update, context, font_data)
 
-        await msg.reply_text(_("Unknown font, please try again"))
+        suggestions = await self.text_repository.get_font_suggestions(msg_text)
+        if not suggestions:
+            await msg.reply_text(_("Unknown font, please try again"))
+            return self.WAIT_FONT
+
+        reply_markup = ReplyKeyboardMarkup(
+            [[x] for x in suggestions] + [[_(self.SKIP)]],
+            resize_keyboard=True,
+            one_time_keyboard=True,
+        )
+        await msg.reply_text(
+            _("Unknown font, did you mean one of these fonts?"), reply_markup=reply_markup
+        )
         return self.WAIT_FONT
 
     async def _text_to_pdf(
@@ -106,7 +133,41 @@ class TextService:
             return ConversationHandler.END
 
         await msg.reply_text(_("Creating your PDF file"), reply_markup=ReplyKeyboardRemove())
-        async with self.pdf_service.create_pdf_from_text(text, font_data) as out_path:
+        async with (
+            self.scheduler_service.schedule_update(update, context, TaskType.text_to_pdf),
+            self._get_local_font(font_data) as local_font_data,
+            self.pdf_service.create_pdf_from_text(text, local_font_data) as out_path,
+        ):
             await self.telegram_service.send_file(update, context, out_path, TaskType.text_to_pdf)
 
         return ConversationHandler.END
+
+    @asynccontextmanager
+    async def _get_local_font(
+        self, font_data: FontData | None
+    ) -> AsyncGenerator[FontData | None, None]:
+        # Font files are cached by their URLs, which change with the font versions, so
+        # the PDF files are created with the local font files instead of downloading them
+        if font_data is None:
+            yield None
+            return
+
+        font_url = font_data.font_url
+        key = hashlib.sha256(font_url.encode("utf-8")).hexdigest()
+        suffix = Path(urlparse(font_url).path).suffix
+        download = partial(self._download_font, font_url)
+
+        async with AsyncExitStack() as stack:
+            try:
+                font_path = await stack.enter_async_context(
+                    self.font_cache_service.get_file(key, download, suffix)
+                )
+                font_data = FontData(font_data.font_family, font_path.as_uri())
+            except RequestException:
+                # The PDF file is still created with the remote font file
+                logger.exception("Failed to download the font {url}", url=font_url)
+
+            yield font_data
+
+    async def _download_font(self, font_url: str, out_path: Path) -> None:
+        await asyncio.to_thread(self.text_repository.download_font, font_url, out_path)
@@ -6,8 +6,10 @@ from telegram.ext import ContextTypes, ConversationHandler
 from pdf_bot.analytics import TaskType
 from pdf_bot.consts import BACK, CANCEL
 from pdf_bot.language import LanguageService
+from pdf_bot.models import FileData
 from pdf_bot.pdf import PdfServiceError
 from pdf_bot.pdf.pdf_service import PdfService
+from pdf_bot.scheduler import SchedulerService
 from pdf_bot.telegram_internal import (
     TelegramGetUserDataError,
     TelegramService,
@@ -25,10 +27,12 @@ class WatermarkService:
         pdf_service: PdfService,
         telegram_service: TelegramService,
         language_service: LanguageService,
+        scheduler_service: SchedulerService,
     ) -> None:
         self.pdf_service = pdf_service
         self.telegram_service = telegram_service
         self.language_service = language_service
+        self.scheduler_service = scheduler_service
 
     async def ask_source_pdf(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         _ = self.language_service.set_app_language(update, context)
@@ -76,7 +80,12 @@ class WatermarkService:
         )
 
         try:
-            async with self.pdf_service.add_watermark_to_pdf(src_file_id, doc.file_id) as out_path:
+            async with (
+                self.scheduler_service.schedule_update(update, context, TaskType.watermark_pdf),
+                self.pdf_service.add_watermark_to_pdf(
+                    src_file_id, FileData.from_telegram_object(doc)
+                ) as out_path,
+            ):
                 await self.telegram_service.send_file(
                     update, context, out_path, TaskType.watermark_pdf
                 )
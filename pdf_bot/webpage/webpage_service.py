@@ -1,23 +1,31 @@
 import hashlib
 from contextlib import suppress
-from typing import cast
+from typing import TYPE_CHECKING, cast
 from urllib.parse import urlparse
 
 from telegram import Message, Update
 from telegram.ext import ContextTypes
-from weasyprint import HTML
-from weasyprint.css.utils import InvalidValues
-from weasyprint.urls import URLFetchingError
 
 from pdf_bot.analytics import TaskType
 from pdf_bot.io import IOService
 from pdf_bot.language import LanguageService
+from pdf_bot.scheduler import SchedulerService
+from pdf_bot.startup import lazy_import
 from pdf_bot.telegram_internal import (
     TelegramGetUserDataError,
     TelegramService,
     TelegramUpdateUserDataError,
 )
 
+if TYPE_CHECKING:
+    import weasyprint
+    from weasyprint import urls as weasyprint_urls
+    from weasyprint.css import utils as weasyprint_css_utils
+else:
+    weasyprint = lazy_import("weasyprint")
+    weasyprint_css_utils = lazy_import("weasyprint.css.utils")
+    weasyprint_urls = lazy_import("weasyprint.urls")
+
 
 class WebpageService:
     def __init__(
@@ -25,10 +33,12 @@ class WebpageService:
         io_service: IOService,
         language_service: LanguageService,
         telegram_service: TelegramService,
+        scheduler_service: SchedulerService,
     ) -> None:
         self.io_service = io_service
         self.language_service = language_service
         self.telegram_service = telegram_service
+        self.scheduler_service = scheduler_service
 
     async def url_to_pdf(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         _ = self.language_service.set_app_language(update, context)
@@ -62,26 +72,27 @@ class WebpageService:
         o = urlparse(url)
         err_text = None
 
-        with self.io_service.create_temp_pdf_file(o.hostname) as out_path:
-            try:
-                HTML(url=url).write_pdf(out_path)
-                await self.telegram_service.send_file(
-                    update, context, out_path, TaskType.url_to_pdf
-                )
-            except URLFetchingError:
-                err_text = _("Unable to reach your webpage")
-            except (
-                AssertionError,
-                AttributeError,
-                IndexError,
-                InvalidValues,
-                KeyError,
-                OverflowError,
-                RuntimeError,
-                ValueError,
-                TypeError,
-            ):
-                err_text = _("Failed to convert your webpage")
+        async with self.scheduler_service.schedule_update(update, context, TaskType.url_to_pdf):
+            with self.io_service.create_temp_pdf_file(o.hostname) as out_path:
+                try:
+                    weasyprint.HTML(url=url).write_pdf(out_path)
+                    await self.telegram_service.send_file(
+                        update, context, out_path, TaskType.url_to_pdf
+                    )
+                except weasyprint_urls.URLFetchingError:
+                    err_text = _("Unable to reach your webpage")
+                except (
+                    AssertionError,
+                    AttributeError,
+                    IndexError,
+                    weasyprint_css_utils.InvalidValues,
+                    KeyError,
+                    OverflowError,
+                    RuntimeError,
+                    ValueError,
+                    TypeError,
+                ):
+                    err_text = _("Failed to convert your webpage")
 
         if err_text is not None:
             msg = cast(Message, update.effective_message)
@@ -0,0 +1,30 @@
+from unittest.mock import MagicMock
+
+import pytest
+from telegram.ext import TypeHandler
+
+from pdf_bot.account import AccountHandler, AccountService
+from tests.telegram_internal import TelegramTestMixin
+
+
+class TestAccountHandler(TelegramTestMixin):
+    def setup_method(self) -> None:
+        super().setup_method()
+        self.account_service = MagicMock(spec=AccountService)
+        self.sut = AccountHandler(self.account_service)
+
+    def test_group(self) -> None:
+        assert self.sut.group == -1
+
+    @pytest.mark.asyncio
+    async def test_handlers(self) -> None:
+        actual = self.sut.handlers
+        assert len(actual) == 1
+
+        handler = actual[0]
+        assert isinstance(handler, TypeHandler)
+
+        await handler.callback(self.telegram_update, self.telegram_context)
+        self.account_service.prefetch_user.assert_called_once_with(
+            self.telegram_update, self.telegram_context
+        )
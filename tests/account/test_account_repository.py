@@ -1,58 +1,95 @@
-from unittest.mock import MagicMock, patch
-
-from google.cloud.datastore import Client, Entity, Key
+import pytest
 
 from pdf_bot.account import AccountRepository
 from pdf_bot.consts import LANGUAGE
+from pdf_bot.settings import Settings
+from tests.datastore import DatastoreServiceTestMixin
 
 
-class TestAccountRepository:
+class TestAccountRepository(DatastoreServiceTestMixin):
     USER_ID = 0
+    OTHER_USER_ID = 1
     LANGUAGE_CODE = "lang_code"
 
     def setup_method(self) -> None:
-        self.user_entity = MagicMock(spec=Entity)
+        self.datastore_client = self.mock_datastore_client()
+        self.datastore_service = self.create_datastore_service(self.datastore_client)
+        self.user = self.create_user_entity(self.datastore_client, self.USER_ID)
 
-        self.datastore_client = MagicMock(spec=Client)
-        self.sut = AccountRepository(self.datastore_client)
+        self.sut = AccountRepository(self.datastore_service, Settings())
 
-    def test_get_user(self) -> None:
-        self.datastore_client.get.return_value = self.user_entity
-        actual = self.sut.get_user(self.USER_ID)
-        assert actual == self.user_entity
+    @pytest.mark.asyncio
+    async def test_get_user(self) -> None:
+        self._put_user()
+        actual = await self.sut.get_user(self.USER_ID)
+        assert actual == self.user
 
-    def test_get_user_null(self) -> None:
-        self.datastore_client.get.return_value = None
-        actual = self.sut.get_user(self.USER_ID)
+    @pytest.mark.asyncio
+    async def test_get_user_null(self) -> None:
+        actual = await self.sut.get_user(self.USER_ID)
         assert actual is None
 
-    def test_upsert_user(self) -> None:
-        user_dict: dict = {}
-        self.user_entity.__contains__.side_effect = user_dict.__contains__
-        self.datastore_client.get.return_value = self.user_entity
+    @pytest.mark.asyncio
+    async def test_upsert_user(self) -> None:
+        self._put_user()
+
+        await self.sut.upsert_user(self.USER_ID, self.LANGUAGE_CODE)
+        await self.datastore_service.flush()
+
+        actual = self.datastore_client.get(self.user.key)
+        assert actual[LANGUAGE] == self.LANGUAGE_CODE
+
+    @pytest.mark.asyncio
+    async def test_upsert_user_language_exists(self) -> None:
+        self.user[LANGUAGE] = "other_code"
+        self._put_user()
+
+        await self.sut.upsert_user(self.USER_ID, self.LANGUAGE_CODE)
+        await self.datastore_service.flush()
+
+        self.datastore_client.put_multi.assert_not_called()
+        assert self.datastore_client.get(self.user.key)[LANGUAGE] == "other_code"
+
+    @pytest.mark.asyncio
+    async def test_upsert_user_new_user(self) -> None:
+        await self.sut.upsert_user(self.USER_ID, self.LANGUAGE_CODE)
+        await self.datastore_service.flush()
+
+        actual = self.datastore_client.get(self.user.key)
+        assert actual[LANGUAGE] == self.LANGUAGE_CODE
+
+    @pytest.mark.asyncio
+    async def test_upsert_user_known_user(self) -> None:
+        # The known user is skipped even after the cached entity has expired
+        datastore_service = self.create_datastore_service(
+            self.datastore_client, datastore_cache_ttl=0
+        )
+        sut = AccountRepository(datastore_service, Settings())
 
-        self.sut.upsert_user(self.USER_ID, self.LANGUAGE_CODE)
+        await sut.upsert_user(self.USER_ID, self.LANGUAGE_CODE)
+        await datastore_service.flush()
+        self.datastore_client.reset_mock()
 
-        self.user_entity.__setitem__.assert_called_once_with(LANGUAGE, self.LANGUAGE_CODE)
-        self.datastore_client.put.assert_called_with(self.user_entity)
+        await sut.upsert_user(self.USER_ID, self.LANGUAGE_CODE)
 
-    def test_upsert_user_language_exists(self) -> None:
-        user_dict: dict = {LANGUAGE: self.LANGUAGE_CODE}
-        self.user_entity.__contains__.side_effect = user_dict.__contains__
-        self.datastore_client.get.return_value = self.user_entity
+        self.datastore_client.get_multi.assert_not_called()
 
-        self.sut.upsert_user(self.USER_ID, self.LANGUAGE_CODE)
+    @pytest.mark.asyncio
+    async def test_upsert_user_known_user_evicted(self) -> None:
+        datastore_service = self.create_datastore_service(
+            self.datastore_client, datastore_cache_ttl=0
+        )
+        sut = AccountRepository(datastore_service, Settings(datastore_known_users_max_size=1))
 
-        self.user_entity.__setitem__.assert_not_called()
-        self.datastore_client.put.assert_called_with(self.user_entity)
+        await sut.upsert_user(self.USER_ID, self.LANGUAGE_CODE)
+        await sut.upsert_user(self.OTHER_USER_ID, self.LANGUAGE_CODE)
+        await datastore_service.flush()
+        self.datastore_client.reset_mock()
 
-    def test_upsert_user_new_user(self) -> None:
-        key = MagicMock(spec=Key)
-        self.datastore_client.key.return_value = key
-        self.datastore_client.get.return_value = None
+        await sut.upsert_user(self.USER_ID, self.LANGUAGE_CODE)
 
-        with patch("pdf_bot.account.account_repository.Entity") as entity_cls:
-            self.sut.upsert_user(self.USER_ID, self.LANGUAGE_CODE)
+        self.datastore_client.get_multi.assert_called_once()
 
-            entity_cls.assert_called_once_with(key)
-            self.datastore_client.put.assert_called_once()
+    def _put_user(self) -> None:
+        self.datastore_client.put(self.user)
+        self.datastore_client.reset_mock()
@@ -1,43 +1,86 @@
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
+import pytest
+from google.api_core.exceptions import ServiceUnavailable
 from telegram import User
 
 from pdf_bot.account import AccountRepository, AccountService
+from pdf_bot.errors import UserIdError
 from tests.language import LanguageServiceTestMixin
+from tests.telegram_internal import TelegramTestMixin
 
 
-class TestAccountService(LanguageServiceTestMixin):
+class TestAccountService(LanguageServiceTestMixin, TelegramTestMixin):
     LANGUAGE_CODE = "en_GB"
     USER_ID = 0
 
     def setup_method(self) -> None:
+        super().setup_method()
         self.user = MagicMock(spec=User)
         self.user.id = self.USER_ID
 
         self.account_repository = MagicMock(spec=AccountRepository)
         self.language_service = self.mock_language_service()
         self.language_service.get_language_code_from_short_code.return_value = self.LANGUAGE_CODE
+        self.language_service.is_user_language_cached.return_value = False
 
         self.service = AccountService(self.account_repository, self.language_service)
 
-    def test_create_user(self) -> None:
+    @pytest.mark.asyncio
+    async def test_create_user(self) -> None:
         self.user.language_code = None
-        self.service.create_user(self.user)
+        await self.service.create_user(self.user)
         self.account_repository.upsert_user.assert_called_with(self.USER_ID, self.LANGUAGE_CODE)
 
-    def test_create_user_with_language_code(self) -> None:
+    @pytest.mark.asyncio
+    async def test_create_user_with_language_code(self) -> None:
         user_code = "user_code"
         self.user.language_code = user_code
         self.language_service.get_language_code_from_short_code.return_value = user_code
 
-        self.service.create_user(self.user)
+        await self.service.create_user(self.user)
 
         self.account_repository.upsert_user.assert_called_with(self.USER_ID, user_code)
 
-    def test_create_user_with_invalid_language_code(self) -> None:
+    @pytest.mark.asyncio
+    async def test_create_user_with_invalid_language_code(self) -> None:
         self.user.language_code = "clearly_invalid"
         self.language_service.get_language_code_from_short_code.return_value = None
 
-        self.service.create_user(self.user)
+        await self.service.create_user(self.user)
 
         self.account_repository.upsert_user.assert_called_with(self.USER_ID, self.LANGUAGE_CODE)
+
+    @pytest.mark.asyncio
+    async def test_prefetch_user(self) -> None:
+        self.language_service.get_user_id.return_value = self.TELEGRAM_USER_ID
+
+        await self.service.prefetch_user(self.telegram_update, self.telegram_context)
+
+        self.language_service.get_user_id.assert_called_once_with(self.telegram_update)
+        self.account_repository.get_user.assert_called_once_with(self.TELEGRAM_USER_ID)
+
+    @pytest.mark.asyncio
+    async def test_prefetch_user_language_cached(self) -> None:
+        self.language_service.is_user_language_cached.return_value = True
+
+        await self.service.prefetch_user(self.telegram_update, self.telegram_context)
+
+        self.language_service.is_user_language_cached.assert_called_once_with(self.telegram_context)
+        self.account_repository.get_user.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_prefetch_user_without_user_id(self) -> None:
+        self.language_service.get_user_id.side_effect = UserIdError()
+        await self.service.prefetch_user(self.telegram_update, self.telegram_context)
+        self.account_repository.get_user.assert_not_called()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("error", [ServiceUnavailable("error"), RuntimeError("error")])
+    async def test_prefetch_user_error(self, error: Exception) -> None:
+        self.language_service.get_user_id.return_value = self.TELEGRAM_USER_ID
+        self.account_repository.get_user.side_effect = error
+
+        with patch("pdf_bot.account.account_service.logger") as logger:
+            await self.service.prefetch_user(self.telegram_update, self.telegram_context)
+            logger.warning.assert_called_once()
@@ -0,0 +1,3 @@
+from .fake_ga_server import FakeGAServer
+
+__all__ = ["FakeGAServer"]
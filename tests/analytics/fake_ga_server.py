@@ -0,0 +1,58 @@
+import json
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from types import TracebackType
+from typing import Any
+
+
+class FakeGAServer:
+    """A local HTTP stand-in for the Measurement Protocol endpoint.
+
+    The JSON payloads of the requests are recorded, and the queued status codes are
+    returned before the successful responses.
+    """
+
+    def __init__(self) -> None:
+        self.payloads: list[dict[str, Any]] = []
+        self.status_codes: list[int] = []
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._create_handler())
+        self._thread = Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}/mp/collect"
+
+    def __enter__(self) -> "FakeGAServer":
+        self._thread.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _create_handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:  # noqa: N802
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                if server.status_codes:
+                    status = server.status_codes.pop(0)
+                else:
+                    status = HTTPStatus.NO_CONTENT
+                    server.payloads.append(json.loads(body))
+
+                self.send_response(status)
+                self.end_headers()
+
+            def log_message(self, *_args: Any) -> None:
+                pass
+
+        return Handler
@@ -1,9 +1,22 @@
+import asyncio
+import threading
+from http import HTTPStatus
+from typing import Any
 from unittest.mock import MagicMock, patch
 from uuid import UUID
 
-from requests import HTTPError
+import pytest
+from requests import HTTPError, Session
 
-from pdf_bot.analytics import AnalyticsRepository, AnalyticsService, EventAction, TaskType
+from pdf_bot.analytics import (
+    AnalyticsRepository,
+    AnalyticsService,
+    AnalyticsStats,
+    EventAction,
+    TaskType,
+)
+from pdf_bot.settings import Settings
+from tests.analytics import FakeGAServer
 from tests.language import LanguageServiceTestMixin
 from tests.telegram_internal import TelegramTestMixin
 
@@ -18,44 +31,172 @@ class TestAnalyticsService(LanguageServiceTestMixin, TelegramTestMixin):
         self.analytics_repository = MagicMock(spec=AnalyticsRepository)
         self.language_service = self.mock_language_service()
         self.language_service.get_user_language.return_value = self.LANGUAGE
+        self.settings = Settings(
+            analytics_queue_max_size=3,
+            analytics_flush_interval=0,
+            analytics_retry_backoff=0,
+        )
 
         self.sut = AnalyticsService(
             self.analytics_repository,
             self.language_service,
+            self.settings,
+        )
+
+    def test_send_event_without_event_loop(self) -> None:
+        self._send_event()
+
+        self.language_service.get_user_language.assert_called_once_with(
+            self.telegram_update, self.telegram_context
+        )
+        self.analytics_repository.send_event.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_send_event(self) -> None:
+        self._send_event()
+        self._send_event(TaskType.merge_pdf)
+        await self.sut.flush()
+
+        self.analytics_repository.send_event.assert_called_once_with(
+            self._create_payload(self.TASK_TYPE, TaskType.merge_pdf)
         )
+        assert self.sut.stats == AnalyticsStats(sent=2)
 
-    def test_send_event(self) -> None:
-        self._test_and_assert_send_event()
+    @pytest.mark.asyncio
+    async def test_send_event_background(self) -> None:
+        self._send_event()
+        for _ in range(10):
+            await asyncio.sleep(0)
 
-    def test_send_event_error(self) -> None:
-        self.analytics_repository.send_event.side_effect = HTTPError(
-            request=MagicMock(), response=MagicMock()
+        self.analytics_repository.send_event.assert_called_once_with(
+            self._create_payload(self.TASK_TYPE)
         )
+        assert self.sut.stats == AnalyticsStats(sent=1)
+
+    @pytest.mark.asyncio
+    async def test_send_event_queue_full(self) -> None:
+        self._send_event(TaskType.compare_pdf)
+        for task_type in (TaskType.crop_pdf, TaskType.merge_pdf, TaskType.ocr_pdf):
+            self._send_event(task_type)
+        await self.sut.flush()
+
+        self.analytics_repository.send_event.assert_called_once_with(
+            self._create_payload(TaskType.crop_pdf, TaskType.merge_pdf, TaskType.ocr_pdf)
+        )
+        assert self.sut.stats == AnalyticsStats(sent=3, dropped=1)
+
+    @pytest.mark.asyncio
+    async def test_send_event_retry(self) -> None:
+        self.analytics_repository.send_event.side_effect = [self._create_http_error(), None]
+
+        self._send_event()
+        await self.sut.flush()
+
+        assert self.analytics_repository.send_event.call_count == 2
+        assert self.sut.stats == AnalyticsStats(sent=1)
+
+    @pytest.mark.asyncio
+    async def test_send_event_error(self) -> None:
+        self.analytics_repository.send_event.side_effect = self._create_http_error()
 
         with patch("pdf_bot.analytics.analytics_service.logger") as logger:
-            self._test_and_assert_send_event()
+            self._send_event()
+            await self.sut.flush()
             logger.exception.assert_called_once()
 
-    def _test_and_assert_send_event(self) -> None:
-        self.sut.send_event(
-            self.telegram_update,
-            self.telegram_context,
-            self.TASK_TYPE,
-            self.EVENT_ACTION,
+        assert (
+            self.analytics_repository.send_event.call_count
+            == self.settings.analytics_max_retries + 1
         )
+        assert self.sut.stats == AnalyticsStats(failed=1)
 
-        self.language_service.get_user_language.assert_called_once_with(
-            self.telegram_update, self.telegram_context
+    @pytest.mark.asyncio
+    async def test_send_event_multiple_users(self) -> None:
+        self._send_event()
+        self.telegram_user.id = self.TELEGRAM_USER_ID + 1
+        self._send_event()
+        await self.sut.flush()
+
+        assert self.analytics_repository.send_event.call_count == 2
+        assert self.sut.stats == AnalyticsStats(sent=2)
+
+    @pytest.mark.asyncio
+    async def test_send_event_concurrent_requests(self) -> None:
+        # The requests of the users wait for each other, so they must be sent concurrently
+        barrier = threading.Barrier(2, timeout=5)
+        self.analytics_repository.send_event.side_effect = lambda _payload: barrier.wait()
+
+        self._send_event()
+        self.telegram_user.id = self.TELEGRAM_USER_ID + 1
+        self._send_event()
+        await self.sut.flush()
+
+        assert self.sut.stats == AnalyticsStats(sent=2)
+
+    @pytest.mark.asyncio
+    async def test_flush_timeout(self) -> None:
+        is_released = threading.Event()
+        self.analytics_repository.send_event.side_effect = lambda _payload: is_released.wait(5)
+        sut = AnalyticsService(
+            self.analytics_repository,
+            self.language_service,
+            Settings(analytics_flush_interval=0, analytics_flush_timeout=0.05),
         )
 
-        event = {
+        for _ in range(3):
+            self._send_event(sut=sut)
+
+        try:
+            with patch("pdf_bot.analytics.analytics_service.logger") as logger:
+                await sut.flush()
+                logger.warning.assert_called_once()
+        finally:
+            is_released.set()
+
+        # The events that are being sent are dropped as well
+        assert sut.stats == AnalyticsStats(dropped=3)
+
+    @pytest.mark.asyncio
+    async def test_send_event_fake_server(self) -> None:
+        session = Session()
+        session.trust_env = False
+
+        with FakeGAServer() as server:
+            settings = Settings(ga_api_url=server.url, analytics_retry_backoff=0)
+            server.status_codes.append(HTTPStatus.SERVICE_UNAVAILABLE)
+            sut = AnalyticsService(
+                AnalyticsRepository(session, settings), self.language_service, settings
+            )
+
+            task_types = list(TaskType) * 2
+            for task_type in task_types:
+                self._send_event(task_type, sut)
+            await sut.flush()
+
+        # The events are sent in batches of the maximum number of events per request, and
+        # the batches are sent concurrently
+        payloads = sorted(server.payloads, key=lambda x: len(x["events"]), reverse=True)
+        assert payloads == [
+            self._create_payload(*task_types[:25]),
+            self._create_payload(*task_types[25:]),
+        ]
+        assert sut.stats == AnalyticsStats(sent=len(task_types))
+
+    def _send_event(
+        self, task_type: TaskType = TASK_TYPE, sut: AnalyticsService | None = None
+    ) -> None:
+        (sut or self.sut).send_event(
+            self.telegram_update, self.telegram_context, task_type, self.EVENT_ACTION
+        )
+
+    def _create_payload(self, *task_types: TaskType) -> dict[str, Any]:
+        return {
             "client_id": str(UUID(int=self.TELEGRAM_USER_ID)),
             "user_properties": {"bot_language": {"value": self.LANGUAGE}},
             "events": [
-                {
-                    "name": self.TASK_TYPE.value,
-                    "params": {"action": self.EVENT_ACTION.value},
-                }
+                {"name": x.value, "params": {"action": self.EVENT_ACTION.value}} for x in task_types
             ],
         }
-        self.analytics_repository.send_event.assert_called_once_with(event)
+
+    def _create_http_error(self) -> HTTPError:
+        return HTTPError(request=MagicMock(), response=MagicMock())
@@ -1,87 +1,247 @@
-import shlex
-from subprocess import Popen
-from unittest.mock import MagicMock, patch
+import asyncio
+from asyncio.subprocess import Process, create_subprocess_exec
+from typing import Any
+from unittest.mock import patch
 
 import pytest
 
 from pdf_bot.cli import CLIService, CLIServiceError
+from pdf_bot.cli.exceptions import CLITimeoutError
+from pdf_bot.settings import Settings
 from tests.path_test_mixin import PathTestMixin
 
 
 class TestCLIService(PathTestMixin):
-    PERCENT = 0.1
-    MARGIN_SIZE = 10
+    MAX_OUTPUT_SIZE = 10
 
     def setup_method(self) -> None:
         self.input_path = self.mock_file_path()
         self.output_path = self.mock_file_path()
 
-        self.process = MagicMock(spec=Popen)
-        self.process.communicate.return_value = (
-            b"0",
-            b"1",
+        self.settings = Settings(
+            cli_default_timeout=5,
+            cli_timeouts={"compress_pdf": 0.5},
+            cli_max_processes=1,
+            cli_max_output_size=self.MAX_OUTPUT_SIZE,
         )
+        self.command_args: list[tuple[str, ...]] = []
+        self.processes: list[Process] = []
+        self.script = "exit 0"
+        self.process_started = asyncio.Event()
+
+        self.exec_patcher = patch(
+            "pdf_bot.cli.cli_service.create_subprocess_exec",
+            side_effect=self._create_subprocess_exec,
+        )
+        self.exec_patcher.start()
 
-        self.popen_patcher = patch("pdf_bot.cli.cli_service.Popen", return_value=self.process)
-        self.popen = self.popen_patcher.start()
-
-        self.sut = CLIService()
+        self.sut = CLIService(self.settings)
 
     def teardown_method(self) -> None:
-        self.popen_patcher.stop()
+        self.exec_patcher.stop()
+
+    def test_get_timeout(self) -> None:
+        assert self.sut.get_timeout("compress_pdf") == 0.5
+        assert self.sut.get_timeout("unknown") == 5
 
     @pytest.mark.asyncio
     async def test_compress_pdf(self) -> None:
-        self.process.returncode = 0
-        self.sut.compress_pdf(self.input_path, self.output_path)
+        await self.sut.compress_pdf(self.input_path, self.output_path)
         self._assert_compress_command()
 
+    @pytest.mark.asyncio
+    async def test_compress_pdf_profile(self) -> None:
+        await self.sut.compress_pdf(self.input_path, self.output_path, "ebook")
+        self._assert_compress_command("ebook")
+
     @pytest.mark.asyncio
     async def test_compress_pdf_error(self) -> None:
-        self.process.returncode = 1
+        self.script = "echo out; echo err >&2; exit 1"
 
         with pytest.raises(CLIServiceError):
-            self.sut.compress_pdf(self.input_path, self.output_path)
+            await self.sut.compress_pdf(self.input_path, self.output_path)
 
         self._assert_compress_command()
 
+    @pytest.mark.asyncio
+    async def test_compress_pdf_timeout(self) -> None:
+        self.script = "sleep 10"
+
+        with pytest.raises(CLITimeoutError):
+            await self.sut.compress_pdf(self.input_path, self.output_path)
+
+        self._assert_compress_command()
+        self._assert_process_killed()
+
+    @pytest.mark.asyncio
+    async def test_compress_pdf_cancelled(self) -> None:
+        self.script = "sleep 10"
+        task = asyncio.create_task(self.sut.compress_pdf(self.input_path, self.output_path))
+
+        await self.process_started.wait()
+        task.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        self._assert_process_killed()
+
     @pytest.mark.asyncio
     async def test_extract_pdf_images(self) -> None:
-        self.process.returncode = 0
-        self.sut.extract_pdf_images(self.input_path, self.output_path)
+        await self.sut.extract_pdf_images(self.input_path, self.output_path)
         self._assert_get_pdf_images_command()
 
     @pytest.mark.asyncio
     async def test_extract_pdf_images_error(self) -> None:
-        self.process.returncode = 1
+        self.script = "exit 1"
 
         with pytest.raises(CLIServiceError):
-            self.sut.extract_pdf_images(self.input_path, self.output_path)
+            await self.sut.extract_pdf_images(self.input_path, self.output_path)
 
         self._assert_get_pdf_images_command()
 
-    def _assert_compress_command(self) -> None:
-        args = self.popen.call_args.args[0]
-        assert args == shlex.split(
-            "gs -sDEVICE=pdfwrite -dCompatibilityLevel=1.4 -dPDFSETTINGS=/default "
-            f'-dNOPAUSE -dQUIET -dBATCH -sOutputFile="{self.output_path}" '
-            f'"{self.input_path}"'
-        )
+    @pytest.mark.asyncio
+    async def test_convert_pdf_to_images(self) -> None:
+        await self.sut.convert_pdf_to_images(self.input_path, self.output_path, 1, 10, 200)
+        assert self.command_args == [
+            (
+                "pdftoppm",
+                "-png",
+                "-r",
+                "200",
+                "-f",
+                "1",
+                "-l",
+                "10",
+                str(self.input_path),
+                str(self.output_path),
+            )
+        ]
 
-    def _assert_crop_pdf_percentage_command(self) -> None:
-        args = self.popen.call_args.args[0]
-        assert args == shlex.split(
-            f'pdfcropmargins -o "{self.output_path}" "{self.input_path}" -p {self.PERCENT}'
+    @pytest.mark.asyncio
+    async def test_convert_pdf_to_images_grayscale(self) -> None:
+        await self.sut.convert_pdf_to_images(
+            self.input_path, self.output_path, 1, 10, 200, grayscale=True
         )
+        assert self.command_args[0][-3:] == ("-gray", str(self.input_path), str(self.output_path))
 
-    def _assert_crop_pdf_margin_size_command(self) -> None:
-        args = self.popen.call_args.args[0]
-        assert args == shlex.split(
-            f'pdfcropmargins -o "{self.output_path}" "{self.input_path}" -a {self.MARGIN_SIZE}'
+    @pytest.mark.asyncio
+    async def test_grayscale_pdf(self) -> None:
+        await self.sut.grayscale_pdf(self.input_path, self.output_path)
+        assert self.command_args == [
+            (
+                "gs",
+                "-sDEVICE=pdfwrite",
+                "-sColorConversionStrategy=Gray",
+                "-dProcessColorModel=/DeviceGray",
+                "-dAutoRotatePages=/None",
+                "-dNOPAUSE",
+                "-dQUIET",
+                "-dBATCH",
+                f"-sOutputFile={self.output_path}",
+                str(self.input_path),
+            )
+        ]
+
+    @pytest.mark.asyncio
+    async def test_extract_pdf_text(self) -> None:
+        await self.sut.extract_pdf_text(self.input_path, self.output_path, 3, 4)
+        assert self.command_args == [
+            (
+                "pdftotext",
+                "-enc",
+                "UTF-8",
+                "-f",
+                "3",
+                "-l",
+                "4",
+                str(self.input_path),
+                str(self.output_path),
+            )
+        ]
+
+    @pytest.mark.asyncio
+    async def test_render_pdf_previews(self) -> None:
+        await self.sut.render_pdf_previews(self.input_path, self.output_path, 20)
+        assert self.command_args == [
+            ("pdftoppm", "-gray", "-r", "20", str(self.input_path), str(self.output_path))
+        ]
+
+    @pytest.mark.asyncio
+    async def test_render_pdf_page(self) -> None:
+        await self.sut.render_pdf_page(self.input_path, self.output_path, 2, 1280)
+        assert self.command_args == [
+            (
+                "pdftoppm",
+                "-png",
+                "-singlefile",
+                "-f",
+                "2",
+                "-l",
+                "2",
+                "-scale-to",
+                "1280",
+                str(self.input_path),
+                str(self.output_path),
+            )
+        ]
+
+    @pytest.mark.asyncio
+    async def test_read_stream_capped(self) -> None:
+        stream = asyncio.StreamReader()
+        stream.feed_data(b"a" * 10_000)
+        stream.feed_eof()
+
+        actual = await self.sut._read_stream(stream)  # noqa: SLF001
+        assert actual == b"a" * self.MAX_OUTPUT_SIZE
+
+    @pytest.mark.asyncio
+    async def test_read_stream_none(self) -> None:
+        actual = await self.sut._read_stream(None)  # noqa: SLF001
+        assert actual == b""
+
+    @pytest.mark.asyncio
+    async def test_max_processes(self) -> None:
+        self.script = "sleep 0.2"
+
+        await asyncio.gather(
+            self.sut.extract_pdf_images(self.input_path, self.output_path),
+            self.sut.extract_pdf_images(self.input_path, self.output_path),
         )
 
+        # The second process is only started after the first one has exited
+        assert len(self.processes) == 2
+        assert self.processes[0].returncode == 0
+
+    async def _create_subprocess_exec(self, *args: str, **kwargs: Any) -> Process:
+        assert all(x.returncode is not None for x in self.processes)
+        self.command_args.append(args)
+
+        proc = await create_subprocess_exec("sh", "-c", self.script, **kwargs)
+        self.processes.append(proc)
+        self.process_started.set()
+        return proc
+
+    def _assert_process_killed(self) -> None:
+        assert len(self.processes) == 1
+        assert self.processes[0].returncode is not None
+        assert self.processes[0].returncode < 0
+
+    def _assert_compress_command(self, profile: str = "default") -> None:
+        assert self.command_args == [
+            (
+                "gs",
+                "-sDEVICE=pdfwrite",
+                "-dCompatibilityLevel=1.4",
+                f"-dPDFSETTINGS=/{profile}",
+                "-dNOPAUSE",
+                "-dQUIET",
+                "-dBATCH",
+                f"-sOutputFile={self.output_path}",
+                str(self.input_path),
+            )
+        ]
+
     def _assert_get_pdf_images_command(self) -> None:
-        args = self.popen.call_args.args[0]
-        assert args == shlex.split(
-            f'pdfimages -png "{self.input_path}" "{self.output_path}/images"'
-        )
+        assert self.command_args == [
+            ("pdfimages", "-png", str(self.input_path), f"{self.output_path}/images")
+        ]
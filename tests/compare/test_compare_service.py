@@ -10,10 +10,16 @@ from pdf_bot.consts import BACK, CANCEL
 from pdf_bot.pdf import PdfService
 from pdf_bot.telegram_internal import TelegramGetUserDataError, TelegramServiceError
 from tests.language import LanguageServiceTestMixin
+from tests.scheduler import SchedulerServiceTestMixin
 from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
 
 
-class TestCompareService(LanguageServiceTestMixin, TelegramServiceTestMixin, TelegramTestMixin):
+class TestCompareService(
+    LanguageServiceTestMixin,
+    SchedulerServiceTestMixin,
+    TelegramServiceTestMixin,
+    TelegramTestMixin,
+):
     COMPARE_ID = "compare_id"
     WAIT_FIRST_PDF = 0
     WAIT_SECOND_PDF = 1
@@ -25,7 +31,10 @@ class TestCompareService(LanguageServiceTestMixin, TelegramServiceTestMixin, Tel
         self.telegram_service = self.mock_telegram_service()
         self.telegram_service.get_user_data.side_effect = None
 
-        self.sut = CompareService(self.pdf_service, self.telegram_service, self.language_service)
+        self.scheduler_service = self.mock_scheduler_service()
+        self.sut = CompareService(
+            self.pdf_service, self.telegram_service, self.language_service, self.scheduler_service
+        )
 
     @pytest.mark.asyncio
     async def test_ask_first_pdf(self) -> None:
@@ -67,6 +76,9 @@ class TestCompareService(LanguageServiceTestMixin, TelegramServiceTestMixin, Tel
             self.file_path,
             TaskType.compare_pdf,
         )
+        self.scheduler_service.schedule_update.assert_called_once_with(
+            self.telegram_update, self.telegram_context, TaskType.compare_pdf
+        )
 
     @pytest.mark.asyncio
     async def test_compare_pdfs_no_differences(self) -> None:
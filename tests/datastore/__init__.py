@@ -0,0 +1,4 @@
+from .datastore_service_test_mixin import DatastoreServiceTestMixin
+from .fake_datastore_client import FakeDatastoreClient
+
+__all__ = ["DatastoreServiceTestMixin", "FakeDatastoreClient"]
@@ -0,0 +1,25 @@
+from unittest.mock import MagicMock
+
+from google.cloud.datastore import Client, Entity
+
+from pdf_bot.datastore import DatastoreService
+from pdf_bot.settings import Settings
+
+from .fake_datastore_client import FakeDatastoreClient
+
+
+class DatastoreServiceTestMixin:
+    @staticmethod
+    def mock_datastore_client() -> MagicMock:
+        return MagicMock(spec=Client, wraps=FakeDatastoreClient())
+
+    @staticmethod
+    def create_datastore_service(datastore_client: MagicMock, **kwargs: float) -> DatastoreService:
+        settings = Settings(**{"datastore_batch_window": 0, **kwargs})  # type: ignore[arg-type]
+        return DatastoreService(datastore_client, settings)
+
+    @staticmethod
+    def create_user_entity(datastore_client: MagicMock, user_id: int, **properties: str) -> Entity:
+        entity = Entity(datastore_client.key("User", user_id))
+        entity.update(properties)
+        return entity
@@ -0,0 +1,40 @@
+from collections.abc import Iterable
+from typing import Any
+
+from google.cloud.datastore import Entity, Key
+
+
+class FakeDatastoreClient:
+    """An in-memory Datastore client with the methods that the bot uses.
+
+    The entities are copied when they're read and written, as they would be serialised
+    by Datastore.
+    """
+
+    PROJECT = "project"
+
+    def __init__(self) -> None:
+        self.entities: dict[Key, Entity] = {}
+
+    def key(self, *path_args: Any) -> Key:
+        return Key(*path_args, project=self.PROJECT)
+
+    def get(self, key: Key) -> Entity | None:
+        entity = self.entities.get(key)
+        return self._copy(entity) if entity is not None else None
+
+    def get_multi(self, keys: Iterable[Key]) -> list[Entity]:
+        return [self._copy(self.entities[x]) for x in keys if x in self.entities]
+
+    def put(self, entity: Entity) -> None:
+        self.entities[entity.key] = self._copy(entity)
+
+    def put_multi(self, entities: Iterable[Entity]) -> None:
+        for entity in entities:
+            self.put(entity)
+
+    @staticmethod
+    def _copy(entity: Entity) -> Entity:
+        copied = Entity(entity.key)
+        copied.update(entity)
+        return copied
@@ -0,0 +1,220 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from google.api_core.exceptions import ServiceUnavailable
+
+from pdf_bot.consts import LANGUAGE
+
+from .datastore_service_test_mixin import DatastoreServiceTestMixin
+
+
+class TestDatastoreService(DatastoreServiceTestMixin):
+    USER_ID = 1
+    OTHER_USER_ID = 2
+    LANGUAGE_CODE = "en_GB"
+
+    def setup_method(self) -> None:
+        self.datastore_client = self.mock_datastore_client()
+        self.user = self.create_user_entity(
+            self.datastore_client, self.USER_ID, **{LANGUAGE: self.LANGUAGE_CODE}
+        )
+        self.datastore_client.put(self.user)
+        self.datastore_client.reset_mock()
+
+        self.sut = self.create_datastore_service(self.datastore_client)
+
+    def test_create_user(self) -> None:
+        actual = self.sut.create_user(self.USER_ID)
+        assert actual.key == self.user.key
+        assert dict(actual) == {}
+
+    @pytest.mark.asyncio
+    async def test_get_user(self) -> None:
+        actual = await self.sut.get_user(self.USER_ID)
+        assert actual == self.user
+
+        # The user is cached
+        actual = await self.sut.get_user(self.USER_ID)
+        assert actual == self.user
+        self.datastore_client.get_multi.assert_called_once_with([self.user.key])
+
+    @pytest.mark.asyncio
+    async def test_get_user_not_found(self) -> None:
+        assert await self.sut.get_user(self.OTHER_USER_ID) is None
+        assert await self.sut.get_user(self.OTHER_USER_ID) is None
+        self.datastore_client.get_multi.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_get_user_coalesced(self) -> None:
+        actual = await asyncio.gather(
+            self.sut.get_user(self.USER_ID),
+            self.sut.get_user(self.OTHER_USER_ID),
+            self.sut.get_user(self.USER_ID),
+        )
+
+        assert actual == [self.user, None, self.user]
+        self.datastore_client.get_multi.assert_called_once_with(
+            [self.user.key, self.datastore_client.key("User", self.OTHER_USER_ID)]
+        )
+
+    @pytest.mark.asyncio
+    async def test_get_user_batches(self) -> None:
+        with patch.object(self.sut, "_MAX_GET_BATCH_SIZE", 1):
+            await asyncio.gather(
+                self.sut.get_user(self.USER_ID), self.sut.get_user(self.OTHER_USER_ID)
+            )
+        assert self.datastore_client.get_multi.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_get_user_expired(self) -> None:
+        sut = self.create_datastore_service(self.datastore_client, datastore_cache_ttl=0)
+
+        await sut.get_user(self.USER_ID)
+        await sut.get_user(self.USER_ID)
+
+        assert self.datastore_client.get_multi.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_get_user_evicted(self) -> None:
+        sut = self.create_datastore_service(self.datastore_client, datastore_cache_max_size=1)
+
+        await sut.get_user(self.USER_ID)
+        await sut.get_user(self.OTHER_USER_ID)
+        await sut.get_user(self.USER_ID)
+
+        assert self.datastore_client.get_multi.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_get_user_error(self) -> None:
+        self.datastore_client.get_multi.side_effect = ServiceUnavailable("error")
+
+        results = await asyncio.gather(
+            self.sut.get_user(self.USER_ID),
+            self.sut.get_user(self.USER_ID),
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(x, ServiceUnavailable) for x in results)
+        self.datastore_client.get_multi.assert_called_once()
+
+        # The error isn't cached
+        self.datastore_client.get_multi.side_effect = None
+        assert await self.sut.get_user(self.USER_ID) == self.user
+
+    def test_get_user_blocking(self) -> None:
+        assert self.sut.get_user_blocking(self.USER_ID) == self.user
+        assert self.sut.get_user_blocking(self.USER_ID) == self.user
+        self.datastore_client.get.assert_called_once_with(self.user.key)
+
+    @pytest.mark.asyncio
+    async def test_put_user(self) -> None:
+        user = self.sut.create_user(self.OTHER_USER_ID)
+        user[LANGUAGE] = self.LANGUAGE_CODE
+
+        await self.sut.put_user(user)
+
+        # The user is written in the background and it's cached meanwhile
+        self.datastore_client.put_multi.assert_not_called()
+        assert await self.sut.get_user(self.OTHER_USER_ID) is user
+        assert self.sut.get_user_blocking(self.OTHER_USER_ID) is user
+
+        await self.sut.flush()
+        self.datastore_client.put_multi.assert_called_once_with([user])
+        self.datastore_client.get_multi.assert_not_called()
+        assert self.datastore_client.get(user.key) == user
+
+    @pytest.mark.asyncio
+    async def test_put_user_batched(self) -> None:
+        other_user = self.sut.create_user(self.OTHER_USER_ID)
+
+        await self.sut.put_user(self.user)
+        await self.sut.put_user(other_user)
+        await self.sut.put_user(self.user)
+        await asyncio.sleep(0.01)
+
+        self.datastore_client.put_multi.assert_called_once_with([self.user, other_user])
+
+    @pytest.mark.asyncio
+    async def test_put_user_while_getting(self) -> None:
+        task = asyncio.create_task(self.sut.get_user(self.USER_ID))
+        await asyncio.sleep(0)
+
+        user = self.sut.create_user(self.USER_ID)
+        await self.sut.put_user(user)
+
+        # The written user takes precedence over the looked up one
+        assert await task is user
+        await self.sut.flush()
+        assert await self.sut.get_user(self.USER_ID) is user
+
+    @pytest.mark.asyncio
+    async def test_put_user_error(self) -> None:
+        self.datastore_client.put_multi.side_effect = ServiceUnavailable("error")
+        sut = self.create_datastore_service(
+            self.datastore_client, datastore_put_max_retries=2, datastore_put_retry_backoff=0
+        )
+        user = sut.create_user(self.USER_ID)
+
+        with patch("pdf_bot.datastore.datastore_service.logger") as logger:
+            await sut.put_user(user)
+            await sut.flush()
+            logger.error.assert_called_once()
+
+        # The user is looked up again as it wasn't written after all the retries
+        assert self.datastore_client.put_multi.call_count == 3
+        assert await sut.get_user(self.USER_ID) == self.user
+        self.datastore_client.get_multi.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_put_user_retry(self) -> None:
+        self.datastore_client.put_multi.side_effect = [ServiceUnavailable("error"), None]
+        sut = self.create_datastore_service(self.datastore_client, datastore_put_retry_backoff=0)
+        user = self.create_user_entity(self.datastore_client, self.USER_ID, **{LANGUAGE: "zh_TW"})
+
+        await sut.put_user(user)
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+        # The user is kept in the cache while the write is retried in the background
+        assert self.datastore_client.put_multi.call_count == 2
+        assert await sut.get_user(self.USER_ID) is user
+        self.datastore_client.get_multi.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_put_user_retry_on_flush(self) -> None:
+        self.datastore_client.put_multi.side_effect = [ServiceUnavailable("error"), None]
+        sut = self.create_datastore_service(
+            self.datastore_client, datastore_batch_window=10, datastore_put_retry_backoff=0
+        )
+        user = sut.create_user(self.USER_ID)
+
+        await sut.put_user(user)
+        await sut.flush()
+
+        self.datastore_client.put_multi.assert_called_with([user])
+        assert self.datastore_client.put_multi.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_put_user_newer_write_while_retrying(self) -> None:
+        self.datastore_client.put_multi.side_effect = [ServiceUnavailable("error"), None]
+        sut = self.create_datastore_service(self.datastore_client, datastore_put_retry_backoff=10)
+        user = sut.create_user(self.USER_ID)
+        newer_user = self.create_user_entity(
+            self.datastore_client, self.USER_ID, **{LANGUAGE: "zh_TW"}
+        )
+
+        await sut.put_user(user)
+        for _ in range(10):
+            await asyncio.sleep(0)
+        await sut.put_user(newer_user)
+        await sut.flush()
+
+        # Only the newer write is retried
+        self.datastore_client.put_multi.assert_called_with([newer_user])
+        assert self.datastore_client.put_multi.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_flush_without_writes(self) -> None:
+        await self.sut.flush()
+        self.datastore_client.put_multi.assert_not_called()
@@ -0,0 +1,123 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from pdf_bot.download_cache import DownloadCacheService
+
+
+class TestDownloadCacheService:
+    UNIQUE_ID = "unique_id"
+    SUFFIX = ".pdf"
+    CONTENT = b"content"
+
+    def setup_method(self) -> None:
+        self.download_count = 0
+
+    def test_load_entries(self, tmp_path: Path) -> None:
+        (tmp_path / "a").write_bytes(b"a")
+        (tmp_path / "b").write_bytes(b"bb")
+        partial_path = tmp_path / ".download.part"
+        partial_path.write_bytes(b"partial")
+
+        sut = self._create_sut(tmp_path)
+
+        assert sut.total_bytes == 3
+        assert not partial_path.exists()
+
+    def test_load_entries_evicted(self, tmp_path: Path) -> None:
+        (tmp_path / "a").write_bytes(b"a" * 10)
+
+        sut = self._create_sut(tmp_path, max_bytes=5)
+
+        assert sut.total_bytes == 0
+        assert not (tmp_path / "a").exists()
+
+    @pytest.mark.asyncio
+    async def test_get_file(self, tmp_path: Path) -> None:
+        sut = self._create_sut(tmp_path)
+
+        async with sut.get_file(self.UNIQUE_ID, self._download, self.SUFFIX) as actual:
+            assert actual == tmp_path / f"{self.UNIQUE_ID}{self.SUFFIX}"
+            assert actual.read_bytes() == self.CONTENT
+
+        async with sut.get_file(self.UNIQUE_ID, self._download, self.SUFFIX) as actual:
+            assert actual.read_bytes() == self.CONTENT
+
+        assert self.download_count == 1
+        assert sut.total_bytes == len(self.CONTENT)
+        assert self._list_files(tmp_path) == [f"{self.UNIQUE_ID}{self.SUFFIX}"]
+
+    @pytest.mark.asyncio
+    async def test_get_file_download_error(self, tmp_path: Path) -> None:
+        sut = self._create_sut(tmp_path)
+
+        async def download(path: Path) -> None:
+            path.write_bytes(b"partial")
+            raise ValueError
+
+        with pytest.raises(ValueError):  # noqa: PT011
+            async with sut.get_file(self.UNIQUE_ID, download):
+                pass
+
+        assert sut.total_bytes == 0
+        assert self._list_files(tmp_path) == []
+
+    @pytest.mark.asyncio
+    async def test_get_file_concurrent(self, tmp_path: Path) -> None:
+        sut = self._create_sut(tmp_path)
+        event = asyncio.Event()
+
+        async def download(path: Path) -> None:
+            # The file isn't published until it's completely downloaded
+            assert not (tmp_path / self.UNIQUE_ID).exists()
+            await event.wait()
+            await self._download(path)
+
+        async def read_file() -> bytes:
+            async with sut.get_file(self.UNIQUE_ID, download) as path:
+                return path.read_bytes()
+
+        tasks = [asyncio.create_task(read_file()) for _ in range(3)]
+        await asyncio.sleep(0)
+        event.set()
+
+        assert await asyncio.gather(*tasks) == [self.CONTENT] * 3
+        assert self.download_count == 1
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self, tmp_path: Path) -> None:
+        sut = self._create_sut(tmp_path, max_bytes=len(self.CONTENT) * 2)
+
+        for unique_id in ("a", "b", "a", "c"):
+            async with sut.get_file(unique_id, self._download):
+                pass
+
+        assert self._list_files(tmp_path) == ["a", "c"]
+        assert sut.total_bytes == len(self.CONTENT) * 2
+
+    @pytest.mark.asyncio
+    async def test_in_use_not_evicted(self, tmp_path: Path) -> None:
+        sut = self._create_sut(tmp_path, max_bytes=len(self.CONTENT))
+
+        async with sut.get_file("a", self._download) as path_a:
+            async with sut.get_file("b", self._download) as path_b:
+                assert path_a.read_bytes() == self.CONTENT
+                assert path_b.read_bytes() == self.CONTENT
+                assert sut.total_bytes == len(self.CONTENT) * 2
+
+            # The least recently used file is still in use, so the other one is evicted
+            assert self._list_files(tmp_path) == ["a"]
+
+        assert sut.total_bytes == len(self.CONTENT)
+
+    def _create_sut(self, cache_dir: Path, max_bytes: int = 1024) -> DownloadCacheService:
+        return DownloadCacheService(cache_dir, max_bytes)
+
+    async def _download(self, path: Path) -> None:
+        self.download_count += 1
+        path.write_bytes(self.CONTENT)
+
+    @staticmethod
+    def _list_files(path: Path) -> list[str]:
+        return sorted(x.name for x in path.iterdir())
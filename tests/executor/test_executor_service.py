@@ -0,0 +1,61 @@
+import os
+from unittest.mock import patch
+
+import pytest
+
+from pdf_bot.executor import ExecutorOperation, ExecutorService, ExecutorWorkerCrashError
+from pdf_bot.settings import Settings
+
+
+class TestExecutorService:
+    def setup_method(self) -> None:
+        self.settings = Settings(
+            executor_default_max_workers=1,
+            executor_max_workers={ExecutorOperation.text.value: 0},
+            executor_max_tasks_per_worker=2,
+        )
+        self.sut = ExecutorService(self.settings)
+
+    def teardown_method(self) -> None:
+        self.sut.shutdown()
+
+    def test_get_max_workers(self) -> None:
+        assert self.sut.get_max_workers(ExecutorOperation.pdf) == 1
+        assert self.sut.get_max_workers(ExecutorOperation.text) == 0
+
+    @pytest.mark.asyncio
+    async def test_run(self) -> None:
+        actual = await self.sut.run(ExecutorOperation.pdf, pow, 2, 10)
+        assert actual == 1024
+
+    @pytest.mark.asyncio
+    async def test_run_in_worker_process(self) -> None:
+        pid = await self.sut.run(ExecutorOperation.pdf, os.getpid)
+        assert pid != os.getpid()
+
+    @pytest.mark.asyncio
+    async def test_run_recycles_worker(self) -> None:
+        pids = {await self.sut.run(ExecutorOperation.pdf, os.getpid) for _ in range(3)}
+        assert len(pids) == 2
+
+    @pytest.mark.asyncio
+    async def test_run_without_workers(self) -> None:
+        pid = await self.sut.run(ExecutorOperation.text, os.getpid)
+        assert pid == os.getpid()
+
+    @pytest.mark.asyncio
+    async def test_run_error(self) -> None:
+        with pytest.raises(ValueError, match="invalid literal"):
+            await self.sut.run(ExecutorOperation.pdf, int, "a")
+
+    @pytest.mark.asyncio
+    async def test_run_worker_crash(self) -> None:
+        with (
+            patch("pdf_bot.executor.executor_service.logger"),
+            pytest.raises(ExecutorWorkerCrashError),
+        ):
+            await self.sut.run(ExecutorOperation.pdf, os._exit, 1)
+
+        # A new pool is created for the subsequent jobs
+        actual = await self.sut.run(ExecutorOperation.pdf, pow, 2, 10)
+        assert actual == 1024
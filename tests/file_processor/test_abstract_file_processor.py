@@ -1,7 +1,9 @@
-from collections.abc import AsyncGenerator, Sequence
+from collections.abc import AsyncGenerator, Awaitable, Callable, Sequence
 from contextlib import asynccontextmanager
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from typing import Any
+from unittest.mock import MagicMock, PropertyMock, patch
+from zipfile import ZipFile
 
 import pytest
 from telegram import Update
@@ -14,9 +16,13 @@ from pdf_bot.file_processor import AbstractFileProcessor, ErrorHandlerType
 from pdf_bot.file_processor.errors import DuplicateClassError
 from pdf_bot.language import LanguageService
 from pdf_bot.models import FileData, FileTaskResult, TaskData
+from pdf_bot.result_cache import CachedResult, ResultCacheService
+from pdf_bot.scheduler import SchedulerService
 from pdf_bot.telegram_internal import TelegramGetUserDataError, TelegramService
 from tests.language import LanguageServiceTestMixin
 from tests.path_test_mixin import PathTestMixin
+from tests.result_cache import ResultCacheServiceTestMixin
+from tests.scheduler import SchedulerServiceTestMixin
 from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
 
 
@@ -41,9 +47,17 @@ class MockProcessor(PathTestMixin, AbstractFileProcessor):
         self,
         telegram_service: TelegramService,
         language_service: LanguageService,
+        result_cache_service: ResultCacheService,
+        scheduler_service: SchedulerService,
         bypass_init_check: bool = False,
     ) -> None:
-        super().__init__(telegram_service, language_service, bypass_init_check)
+        super().__init__(
+            telegram_service,
+            language_service,
+            result_cache_service,
+            scheduler_service,
+            bypass_init_check,
+        )
         self.path = self.mock_file_path()
         self.file_task_result = FileTaskResult(self.path)
 
@@ -95,11 +109,15 @@ class MockProcessorWithCustomErrorHandler(MockProcessor):
 
 class TestAbstractFileProcessorInit(
     LanguageServiceTestMixin,
+    ResultCacheServiceTestMixin,
+    SchedulerServiceTestMixin,
     TelegramServiceTestMixin,
 ):
     def setup_method(self) -> None:
         super().setup_method()
         self.language_service = self.mock_language_service()
+        self.result_cache_service = self.mock_result_cache_service()
+        self.scheduler_service = self.mock_scheduler_service()
         self.telegram_service = self.mock_telegram_service()
 
         self.file_processors_patcher = patch(
@@ -115,7 +133,12 @@ class TestAbstractFileProcessorInit(
         processors: dict = {}
         self.file_processors.__contains__.side_effect = processors.__contains__
 
-        proc = MockProcessor(self.telegram_service, self.language_service)
+        proc = MockProcessor(
+            self.telegram_service,
+            self.language_service,
+            self.result_cache_service,
+            self.scheduler_service,
+        )
 
         self.file_processors.__setitem__.assert_called_once_with(proc.__class__.__name__, proc)
 
@@ -124,31 +147,44 @@ class TestAbstractFileProcessorInit(
         self.file_processors.__contains__.side_effect = processors.__contains__
 
         with pytest.raises(DuplicateClassError):
-            MockProcessor(self.telegram_service, self.language_service)
+            MockProcessor(
+                self.telegram_service,
+                self.language_service,
+                self.result_cache_service,
+                self.scheduler_service,
+            )
 
         self.file_processors.__setitem__.assert_not_called()
 
 
 class TestAbstractFileProcessor(
     LanguageServiceTestMixin,
+    ResultCacheServiceTestMixin,
+    SchedulerServiceTestMixin,
     TelegramServiceTestMixin,
     TelegramTestMixin,
 ):
     BACK = "Back"
     WAIT_FILE_TASK = "wait_file_task"
+    CACHE_KEY = "cache_key"
 
     def setup_method(self) -> None:
         super().setup_method()
         self.telegram_update.callback_query = None
 
         self.language_service = self.mock_language_service()
+        self.result_cache_service = self.mock_result_cache_service()
+        self.scheduler_service = self.mock_scheduler_service()
         self.telegram_service = self.mock_telegram_service()
 
         self.sut = MockProcessor(
             self.telegram_service,
             self.language_service,
+            self.result_cache_service,
+            self.scheduler_service,
             bypass_init_check=True,
         )
+        self.computed_results: list[CachedResult | None] = []
 
     @pytest.mark.asyncio
     async def test_ask_task(self) -> None:
@@ -192,6 +228,9 @@ class TestAbstractFileProcessor(
 
         assert actual == ConversationHandler.END
         self._assert_process_file_succeed()
+        self.scheduler_service.schedule_update.assert_called_once_with(
+            self.telegram_update, self.telegram_context, MockProcessor.TASK_TYPE
+        )
 
     @pytest.mark.asyncio
     async def test_process_file_with_result_message(self) -> None:
@@ -208,26 +247,119 @@ class TestAbstractFileProcessor(
             )
 
     @pytest.mark.asyncio
-    async def test_process_file_dir_output(self) -> None:
+    async def test_process_file_dir_output(self, tmp_path: Path) -> None:
+        dir_path = tmp_path / MockProcessor.PROCESS_RESULT
+        dir_path.mkdir()
+        (dir_path / "a.png").write_bytes(b"a")
+        (dir_path / "b.txt").write_bytes(b"b")
+        zip_path = dir_path.with_suffix(".zip")
+        zip_names: list[str] = []
+
+        async def send_file(*args: Any) -> None:
+            with ZipFile(args[2]) as zf:
+                zip_names.extend(zf.namelist())
+
+        self.telegram_service.send_file.side_effect = send_file
+
+        with patch.object(self.sut, "process_file_task") as process_file_task:
+            result = FileTaskResult(dir_path, self.TELEGRAM_TEXT)
+            process_file_task.return_value.__aenter__.return_value = result
+
+            actual = await self.sut.process_file(self.telegram_update, self.telegram_context)
+
+        assert actual == ConversationHandler.END
+        self._assert_process_file_succeed(zip_path)
+        assert zip_names == ["a.png", "b.txt"]
+        assert not zip_path.exists()
+
+    @pytest.mark.asyncio
+    async def test_process_file_dir_output_too_large(self, tmp_path: Path) -> None:
+        dir_path = tmp_path / MockProcessor.PROCESS_RESULT
+        dir_path.mkdir()
+        (dir_path / "a.png").write_bytes(b"a" * 100)
+
         with (
             patch.object(self.sut, "process_file_task") as process_file_task,
-            patch("pdf_bot.file_processor.abstract_file_processor.shutil") as mock_shutil,
+            patch(
+                "pdf_bot.file_processor.abstract_file_processor.FileSizeLimit"
+            ) as file_size_limit,
         ):
-            path_with_suffix = self.mock_file_path()
-            dir_path = self.mock_dir_path()
-            dir_path.with_suffix.return_value = path_with_suffix
-
-            result = FileTaskResult(dir_path, self.TELEGRAM_TEXT)
+            file_size_limit.FILESIZE_UPLOAD = 10
+            result = FileTaskResult(dir_path)
             process_file_task.return_value.__aenter__.return_value = result
 
             actual = await self.sut.process_file(self.telegram_update, self.telegram_context)
 
-            assert actual == ConversationHandler.END
-            self._assert_process_file_succeed(path_with_suffix)
-            dir_path.with_suffix.assert_called_once_with(".zip")
-            mock_shutil.make_archive(
-                MockProcessor.PROCESS_RESULT, "zip", MockProcessor.PROCESS_RESULT
-            )
+        assert actual == ConversationHandler.END
+        self.telegram_message.reply_text.assert_called_once()
+        self.telegram_service.send_file.assert_not_called()
+        assert not dir_path.with_suffix(".zip").exists()
+
+    @pytest.mark.asyncio
+    async def test_process_file_cache_miss(self) -> None:
+        self.result_cache_service.get_key.return_value = self.CACHE_KEY
+        self.result_cache_service.get_or_compute.side_effect = self._get_or_compute_side_effect
+        self.telegram_document.file_id = self.TELEGRAM_DOCUMENT_ID
+        self.telegram_message.document = self.telegram_document
+        self.telegram_service.send_file.return_value = self.telegram_message
+
+        actual = await self.sut.process_file(self.telegram_update, self.telegram_context)
+
+        assert actual == ConversationHandler.END
+        self._assert_process_file_succeed()
+        self.result_cache_service.get_key.assert_called_once_with(
+            self.FILE_DATA, MockProcessor.TASK_TYPE
+        )
+        assert self.computed_results == [CachedResult(self.TELEGRAM_DOCUMENT_ID)]
+        self.telegram_service.send_file_by_id.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_process_file_cache_miss_file_not_sent(self) -> None:
+        self.result_cache_service.get_key.return_value = self.CACHE_KEY
+        self.result_cache_service.get_or_compute.side_effect = self._get_or_compute_side_effect
+        self.telegram_service.send_file.return_value = None
+
+        actual = await self.sut.process_file(self.telegram_update, self.telegram_context)
+
+        assert actual == ConversationHandler.END
+        self._assert_process_file_succeed()
+        assert self.computed_results == [None]
+
+    @pytest.mark.asyncio
+    async def test_process_file_cache_hit(self) -> None:
+        result = CachedResult(self.TELEGRAM_DOCUMENT_ID, message=self.TELEGRAM_TEXT)
+        self.result_cache_service.get_key.return_value = self.CACHE_KEY
+        self.result_cache_service.get_or_compute.return_value = (result, False)
+
+        actual = await self.sut.process_file(self.telegram_update, self.telegram_context)
+
+        assert actual == ConversationHandler.END
+        self._assert_get_file_and_message_data()
+        self.telegram_service.send_file.assert_not_called()
+        self.telegram_service.send_message.assert_called_once_with(
+            self.telegram_update, self.telegram_context, self.TELEGRAM_TEXT
+        )
+        self.telegram_service.send_file_by_id.assert_called_once_with(
+            self.telegram_update,
+            self.telegram_context,
+            self.TELEGRAM_DOCUMENT_ID,
+            MockProcessor.TASK_TYPE,
+            is_photo=False,
+        )
+
+    @pytest.mark.asyncio
+    async def test_process_file_cache_disabled(self) -> None:
+        self.result_cache_service.get_key.return_value = self.CACHE_KEY
+
+        with patch.object(
+            MockProcessor, "cache_results", new_callable=PropertyMock, return_value=False
+        ):
+            actual = await self.sut.process_file(self.telegram_update, self.telegram_context)
+
+        assert actual == ConversationHandler.END
+        self._assert_process_file_succeed()
+        self.result_cache_service.get_key.assert_not_called()
+        self.result_cache_service.get_or_compute.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_process_file_generic_error_not_registered(self) -> None:
@@ -244,7 +376,11 @@ class TestAbstractFileProcessor(
     @pytest.mark.asyncio
     async def test_process_file_error(self) -> None:
         sut = MockProcessorWithGenericError(
-            self.telegram_service, self.language_service, bypass_init_check=True
+            self.telegram_service,
+            self.language_service,
+            self.result_cache_service,
+            self.scheduler_service,
+            bypass_init_check=True,
         )
 
         with patch.object(sut, "process_file_task", side_effect=GenericError):
@@ -258,7 +394,11 @@ class TestAbstractFileProcessor(
     @pytest.mark.asyncio
     async def test_process_file_custom_error(self) -> None:
         sut = MockProcessorWithCustomErrorHandler(
-            self.telegram_service, self.language_service, bypass_init_check=True
+            self.telegram_service,
+            self.language_service,
+            self.result_cache_service,
+            self.scheduler_service,
+            bypass_init_check=True,
         )
 
         with patch.object(sut, "process_file_task", side_effect=CustomError):
@@ -271,7 +411,11 @@ class TestAbstractFileProcessor(
     @pytest.mark.asyncio
     async def test_process_file_unknown_error(self) -> None:
         sut = MockProcessorWithCustomErrorHandler(
-            self.telegram_service, self.language_service, bypass_init_check=True
+            self.telegram_service,
+            self.language_service,
+            self.result_cache_service,
+            self.scheduler_service,
+            bypass_init_check=True,
         )
 
         with (
@@ -332,6 +476,13 @@ class TestAbstractFileProcessor(
         self._assert_process_file_succeed()
         self.telegram_context.bot.delete_message.assert_not_called()
 
+    async def _get_or_compute_side_effect(
+        self, _key: str, compute: Callable[[], Awaitable[CachedResult | None]]
+    ) -> tuple[CachedResult | None, bool]:
+        result = await compute()
+        self.computed_results.append(result)
+        return result, True
+
     def _assert_process_file_succeed(self, path: Path | None = None) -> None:
         if path is None:
             path = self.sut.path
@@ -36,12 +36,12 @@ class TestImageService(LanguageServiceTestMixin, TelegramServiceTestMixin, Teleg
         file_data_list, file_ids, file_paths = self._get_file_data_list(num_files)
         self.telegram_service.download_files.return_value.__aenter__.return_value = file_paths
 
-        with patch("pdf_bot.image.image_service.noteshrink") as noteshrink:
+        with patch("noteshrink.notescan_main") as notescan_main:
             async with self.sut.beautify_and_convert_images_to_pdf(file_data_list) as actual:
                 assert actual == self.file_path
                 self.telegram_service.download_files.assert_called_once_with(file_ids)
                 self.io_service.create_temp_pdf_file.assert_called_once_with("Beautified")
-                noteshrink.notescan_main.assert_called_once_with(
+                notescan_main.assert_called_once_with(
                     file_paths,
                     basename=f"{self.FILE_PATH_STEM}_page",
                     pdfname=self.file_path,
@@ -57,8 +57,8 @@ class TestImageService(LanguageServiceTestMixin, TelegramServiceTestMixin, Teleg
         file_path_strs = [str(x) for x in file_paths]
         self.telegram_service.download_files.return_value.__aenter__.return_value = file_paths
 
-        with patch("pdf_bot.image.image_service.img2pdf") as img2pdf:
-            img2pdf.convert.return_value = image_bytes
+        with patch("img2pdf.convert") as convert:
+            convert.return_value = image_bytes
 
             async with self.sut.convert_images_to_pdf(file_data_list) as actual:
                 assert actual == self.file_path
@@ -67,7 +67,7 @@ class TestImageService(LanguageServiceTestMixin, TelegramServiceTestMixin, Teleg
                 self.io_service.create_temp_pdf_file.assert_called_once_with("Converted")
 
                 self.file_path.open.assert_called_once_with("wb")
-                img2pdf.convert.assert_called_once_with(file_path_strs, rotation=Rotation.ifvalid)
+                convert.assert_called_once_with(file_path_strs, rotation=Rotation.ifvalid)
                 buffered_writer.write.assert_called_once_with(image_bytes)
 
     def _get_file_data_list(
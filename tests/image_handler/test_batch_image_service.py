@@ -55,7 +55,11 @@ class TestBatchImageService(LanguageServiceTestMixin, TelegramServiceTestMixin,
             self.telegram_context, self.IMAGE_DATA
         )
         self.file_data_list.append.assert_called_once_with(
-            FileData(self.TELEGRAM_DOCUMENT_ID, self.TELEGRAM_DOCUMENT_NAME)
+            FileData(
+                self.TELEGRAM_DOCUMENT_ID,
+                self.TELEGRAM_DOCUMENT_NAME,
+                self.TELEGRAM_DOCUMENT_UNIQUE_ID,
+            )
         )
         self.telegram_service.update_user_data.assert_called_once_with(
             self.telegram_context, self.IMAGE_DATA, self.file_data_list
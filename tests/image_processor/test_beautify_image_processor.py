@@ -9,11 +9,15 @@ from pdf_bot.image_processor import BeautifyImageProcessor
 from pdf_bot.image_processor.beautify_image_processor import BeautifyImageData
 from pdf_bot.models import TaskData
 from tests.language import LanguageServiceTestMixin
+from tests.result_cache import ResultCacheServiceTestMixin
+from tests.scheduler import SchedulerServiceTestMixin
 from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
 
 
 class TestBeautifyImageProcessor(
     LanguageServiceTestMixin,
+    ResultCacheServiceTestMixin,
+    SchedulerServiceTestMixin,
     TelegramServiceTestMixin,
     TelegramTestMixin,
 ):
@@ -21,12 +25,16 @@ class TestBeautifyImageProcessor(
         super().setup_method()
         self.image_service = MagicMock(spec=ImageService)
         self.language_service = self.mock_language_service()
+        self.result_cache_service = self.mock_result_cache_service()
+        self.scheduler_service = self.mock_scheduler_service()
         self.telegram_service = self.mock_telegram_service()
 
         self.sut = BeautifyImageProcessor(
             self.image_service,
             self.telegram_service,
             self.language_service,
+            self.result_cache_service,
+            self.scheduler_service,
             bypass_init_check=True,
         )
 
@@ -115,6 +115,12 @@ class TestIOService:
             assert actual == self.FILE_PATH
         self._assert_temp_file(self.FILE_PREFIX_UNDERSCORE, ".txt")
 
+    @pytest.mark.asyncio
+    async def test_create_temp_zip_file(self) -> None:
+        with self.sut.create_temp_zip_file(self.FILE_PREFIX_UNDERSCORE) as actual:
+            assert actual == self.FILE_PATH
+        self._assert_temp_file(self.FILE_PREFIX_UNDERSCORE, ".zip")
+
     def _assert_temp_file(self, prefix: str | None, suffix: str | None) -> None:
         self.tf_cls.assert_called_once_with(prefix=prefix, suffix=suffix)
         self.tf.close.assert_called_once()
@@ -0,0 +1,69 @@
+from pathlib import Path
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+
+import pytest
+
+from pdf_bot.io import ArchiveTooLargeError, ZipArchiveWriter
+
+
+class TestZipArchiveWriter:
+    @pytest.mark.asyncio
+    async def test_add_files(self, tmp_path: Path) -> None:
+        png_path = self._write_file(tmp_path / "image.PNG", b"png")
+        txt_path = self._write_file(tmp_path / "text.txt", b"text" * 100)
+        out_path = tmp_path / "out.zip"
+
+        async with ZipArchiveWriter(out_path) as sut:
+            await sut.add_files([(png_path, "a.png"), (txt_path, "b.txt")])
+
+        with ZipFile(out_path) as zf:
+            assert zf.getinfo("a.png").compress_type == ZIP_STORED
+            assert zf.getinfo("b.txt").compress_type == ZIP_DEFLATED
+            assert zf.read("b.txt") == b"text" * 100
+
+        assert png_path.exists()
+        assert txt_path.exists()
+
+    @pytest.mark.asyncio
+    async def test_add_files_remove_files(self, tmp_path: Path) -> None:
+        file_path = self._write_file(tmp_path / "image.png", b"png")
+        out_path = tmp_path / "out.zip"
+
+        async with ZipArchiveWriter(out_path) as sut:
+            await sut.add_files([(file_path, "image.png")], remove_files=True)
+
+        assert not file_path.exists()
+        with ZipFile(out_path) as zf:
+            assert zf.namelist() == ["image.png"]
+
+    @pytest.mark.asyncio
+    async def test_add_dir(self, tmp_path: Path) -> None:
+        dir_path = tmp_path / "dir"
+        (dir_path / "nested").mkdir(parents=True)
+        self._write_file(dir_path / "b.png", b"b")
+        self._write_file(dir_path / "a.png", b"a")
+        self._write_file(dir_path / "nested" / "c.png", b"c")
+        out_path = tmp_path / "out.zip"
+
+        async with ZipArchiveWriter(out_path) as sut:
+            await sut.add_dir(dir_path)
+
+        with ZipFile(out_path) as zf:
+            assert zf.namelist() == ["a.png", "b.png", "nested/c.png"]
+
+    @pytest.mark.asyncio
+    async def test_add_files_too_large(self, tmp_path: Path) -> None:
+        file_path = self._write_file(tmp_path / "image.png", b"a" * 1000)
+        out_path = tmp_path / "out.zip"
+
+        with pytest.raises(ArchiveTooLargeError):
+            async with ZipArchiveWriter(out_path, max_size=500) as sut:
+                await sut.add_files([(file_path, "image.png")])
+
+        # Writing stops at the limit instead of writing the whole archive
+        assert out_path.stat().st_size < 500
+
+    @staticmethod
+    def _write_file(path: Path, data: bytes) -> Path:
+        path.write_bytes(data)
+        return path
@@ -1,71 +1,69 @@
-from typing import Any, ClassVar
-from unittest.mock import MagicMock, patch
-
-from google.cloud.datastore import Client, Entity
+import pytest
 
 from pdf_bot.consts import LANGUAGE
 from pdf_bot.language import LanguageRepository
+from tests.datastore import DatastoreServiceTestMixin
 
 
-class TestLanguageRepository:
+class TestLanguageRepository(DatastoreServiceTestMixin):
     USER_ID = 0
     LANGUAGE_CODE = "lang_code"
-    USER_ENTITY_DICT: ClassVar[dict[str, str]] = {LANGUAGE: LANGUAGE_CODE}
 
     def setup_method(self) -> None:
-        self.user_entity = MagicMock(spec=Entity)
-        self.db_client = MagicMock(spec=Client)
+        self.datastore_client = self.mock_datastore_client()
+        self.datastore_service = self.create_datastore_service(self.datastore_client)
 
-        self.sut = LanguageRepository(self.db_client)
+        self.sut = LanguageRepository(self.datastore_service)
 
     def test_get_language(self) -> None:
-        self._mock_user_entity_dict()
-        self.db_client.get.return_value = self.user_entity
-
+        self._put_user(**{LANGUAGE: self.LANGUAGE_CODE})
         actual = self.sut.get_language(self.USER_ID)
-
         assert actual == self.LANGUAGE_CODE
 
     def test_get_language_without_user(self) -> None:
-        self.db_client.get.return_value = None
         actual = self.sut.get_language(self.USER_ID)
         assert actual == self.sut.EN_GB_CODE
 
     def test_get_language_and_language_not_set(self) -> None:
-        self.db_client.get.return_value = self.user_entity
+        self._put_user()
         actual = self.sut.get_language(self.USER_ID)
         assert actual == self.sut.EN_GB_CODE
 
     def test_get_language_legacy_en_code(self) -> None:
-        user_entity_dict = {LANGUAGE: "en"}
-        self._mock_user_entity_dict(user_entity_dict)
-        self.db_client.get.return_value = self.user_entity
-
+        self._put_user(**{LANGUAGE: "en"})
         actual = self.sut.get_language(self.USER_ID)
-
         assert actual == self.sut.EN_GB_CODE
 
-    def test_upsert_language(self) -> None:
-        self.db_client.get.return_value = self.user_entity
+    @pytest.mark.asyncio
+    async def test_get_language_prefetched(self) -> None:
+        self._put_user(**{LANGUAGE: self.LANGUAGE_CODE})
+        await self.datastore_service.get_user(self.USER_ID)
+
+        actual = self.sut.get_language(self.USER_ID)
+
+        assert actual == self.LANGUAGE_CODE
+        self.datastore_client.get.assert_not_called()
 
-        self.sut.upsert_language(self.USER_ID, self.LANGUAGE_CODE)
+    @pytest.mark.asyncio
+    async def test_upsert_language(self) -> None:
+        self._put_user(**{LANGUAGE: "en"})
 
-        self.user_entity.__setitem__.assert_called_with(LANGUAGE, self.LANGUAGE_CODE)
-        self.db_client.put.assert_called_once_with(self.user_entity)
+        await self.sut.upsert_language(self.USER_ID, self.LANGUAGE_CODE)
+        assert self.sut.get_language(self.USER_ID) == self.LANGUAGE_CODE
 
-    def test_upsert_language_without_user(self) -> None:
-        self.db_client.get.return_value = None
+        await self.datastore_service.flush()
+        user = self.datastore_client.get(self.datastore_client.key("User", self.USER_ID))
+        assert user[LANGUAGE] == self.LANGUAGE_CODE
 
-        with patch("pdf_bot.language.language_repository.Entity") as entity_cls:
-            entity_cls.return_value = self.user_entity
-            self.sut.upsert_language(self.USER_ID, self.LANGUAGE_CODE)
+    @pytest.mark.asyncio
+    async def test_upsert_language_without_user(self) -> None:
+        await self.sut.upsert_language(self.USER_ID, self.LANGUAGE_CODE)
+        await self.datastore_service.flush()
 
-        entity_cls.assert_called_once()
-        self.user_entity.__setitem__.assert_called_with(LANGUAGE, self.LANGUAGE_CODE)
-        self.db_client.put.assert_called_once_with(self.user_entity)
+        user = self.datastore_client.get(self.datastore_client.key("User", self.USER_ID))
+        assert user[LANGUAGE] == self.LANGUAGE_CODE
 
-    def _mock_user_entity_dict(self, user_entity_dict: dict[str, Any] | None = None) -> None:
-        if user_entity_dict is None:
-            user_entity_dict = self.USER_ENTITY_DICT
-        self.user_entity.__getitem__.side_effect = user_entity_dict.__getitem__
-        self.user_entity.__contains__.side_effect = user_entity_dict.__contains__
+    def _put_user(self, **properties: str) -> None:
+        user = self.create_user_entity(self.datastore_client, self.USER_ID, **properties)
+        self.datastore_client.put(user)
+        self.datastore_client.reset_mock()
@@ -1,4 +1,4 @@
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, call, patch
 
 import pytest
 
@@ -17,16 +17,19 @@ class TestLanguageService(TelegramTestMixin):
         self.language_repository = MagicMock(spec=LanguageRepository)
         self.language_repository.get_language.return_value = self.EN_CODE
 
-        self.sut = LanguageService(self.language_repository)
-
         self.gettext_patcher = patch("pdf_bot.language.language_service.gettext")
-        self.gettext_patcher.start()
+        self.gettext = self.gettext_patcher.start()
+
+        self.sut = LanguageService(self.language_repository)
 
     def teardown_method(self) -> None:
         self.gettext_patcher.stop()
         super().teardown_method()
 
-    @pytest.mark.parametrize(("value", "expected"), [("es", "es_ES"), ("clearly_invalid", None)])
+    @pytest.mark.parametrize(
+        ("value", "expected"),
+        [("es", "es_ES"), ("en", "en_GB"), ("zh", "zh_CN"), ("clearly_invalid", None)],
+    )
     def test_get_language_code_from_short_code(self, value: str, expected: str | None) -> None:
         actual = self.sut.get_language_code_from_short_code(value)
         assert actual == expected
@@ -63,6 +66,16 @@ class TestLanguageService(TelegramTestMixin):
             self.LANGUAGE_CODE, self.EN_CODE
         )
 
+    @pytest.mark.asyncio
+    async def test_get_user_language_memoised(self) -> None:
+        self.telegram_context.user_data = None
+
+        self.sut.get_user_language(self.telegram_update, self.telegram_context)
+        actual = self.sut.get_user_language(self.telegram_update, self.telegram_context)
+
+        assert actual == self.EN_CODE
+        self.language_repository.get_language.assert_called_once_with(self.TELEGRAM_QUERY_USER_ID)
+
     @pytest.mark.asyncio
     async def test_get_user_language_cached(self) -> None:
         self.telegram_user_data.get.return_value = self.EN_CODE
@@ -122,6 +135,34 @@ class TestLanguageService(TelegramTestMixin):
         self.language_repository.get_language.assert_not_called()
         self.telegram_user_data.__setitem__.assert_not_called()
 
+    def test_is_user_language_cached(self) -> None:
+        self.telegram_user_data.get.return_value = self.EN_CODE
+        assert self.sut.is_user_language_cached(self.telegram_context)
+
+    def test_is_user_language_cached_memoised(self) -> None:
+        self.telegram_user_data.get.return_value = None
+        self.telegram_update.callback_query = None
+        assert not self.sut.is_user_language_cached(self.telegram_context)
+
+        self.sut.get_user_language(self.telegram_update, self.telegram_context)
+        self.telegram_user_data.get.return_value = None
+
+        assert self.sut.is_user_language_cached(self.telegram_context)
+
+    def test_is_user_language_cached_without_user_data(self) -> None:
+        self.telegram_context.user_data = None
+        assert not self.sut.is_user_language_cached(self.telegram_context)
+
+    def test_get_user_id(self) -> None:
+        self.telegram_update.callback_query = self.telegram_callback_query
+        actual = self.sut.get_user_id(self.telegram_update)
+        assert actual == self.telegram_callback_query.from_user.id
+
+    def test_get_user_id_without_callback_query(self) -> None:
+        self.telegram_update.callback_query = None
+        actual = self.sut.get_user_id(self.telegram_update)
+        assert actual == self.TELEGRAM_USER_ID
+
     @pytest.mark.asyncio
     @pytest.mark.parametrize("side_effect", [None, KeyError])
     async def test_update_user_language(self, side_effect: type[Exception] | None) -> None:
@@ -140,6 +181,9 @@ class TestLanguageService(TelegramTestMixin):
         self.telegram_user_data.__setitem__.assert_called_once_with(
             self.LANGUAGE_CODE, self.EN_CODE
         )
+        assert self.sut.get_user_language(self.telegram_update, self.telegram_context) == (
+            self.EN_CODE
+        )
 
     @pytest.mark.asyncio
     async def test_update_user_language_without_user_data(self) -> None:
@@ -162,3 +206,40 @@ class TestLanguageService(TelegramTestMixin):
 
         self.language_repository.upsert_language.assert_not_called()
         self.telegram_user_data.__setitem__.assert_not_called()
+
+    def test_init_loads_translations(self) -> None:
+        self.gettext.translation.reset_mock()
+        LanguageService(self.language_repository)
+
+        calls = self.gettext.translation.call_args_list
+        langs = [x.kwargs["languages"][0] for x in calls]
+        assert len(langs) == len(set(langs))
+        assert {"en_GB", "en_US", "zh_HK"} <= set(langs)
+        assert calls[0] == call("pdf_bot", localedir="locale", languages=["af_ZA"])
+
+    def test_init_translations_not_found(self) -> None:
+        self.gettext.translation.side_effect = FileNotFoundError
+        sut = LanguageService(self.language_repository)
+
+        _ = sut.set_app_language(self.telegram_update, self.telegram_context)
+        assert _ == self.gettext.NullTranslations.return_value.gettext
+
+    def test_set_app_language(self) -> None:
+        self.gettext.translation.reset_mock()
+        self.telegram_user_data.get.return_value = self.EN_CODE
+
+        _ = self.sut.set_app_language(self.telegram_update, self.telegram_context)
+
+        assert _ == self.gettext.translation.return_value.gettext
+        self.gettext.translation.assert_not_called()
+
+    def test_set_app_language_unknown_language(self) -> None:
+        self.gettext.translation.reset_mock()
+        self.telegram_user_data.get.return_value = "unknown"
+
+        _ = self.sut.set_app_language(self.telegram_update, self.telegram_context)
+
+        assert _ == self.gettext.translation.return_value.gettext
+        self.gettext.translation.assert_called_once_with(
+            "pdf_bot", localedir="locale", languages=["unknown"]
+        )
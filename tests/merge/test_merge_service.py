@@ -9,11 +9,13 @@ from pdf_bot.models import FileData
 from pdf_bot.pdf import PdfService, PdfServiceError
 from pdf_bot.telegram_internal import TelegramServiceError
 from tests.language import LanguageServiceTestMixin
+from tests.scheduler import SchedulerServiceTestMixin
 from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
 
 
 class TestMergeService(
     LanguageServiceTestMixin,
+    SchedulerServiceTestMixin,
     TelegramServiceTestMixin,
     TelegramTestMixin,
 ):
@@ -33,10 +35,12 @@ class TestMergeService(
         self.telegram_service = self.mock_telegram_service()
         self.telegram_service.get_user_data.side_effect = None
 
+        self.scheduler_service = self.mock_scheduler_service()
         self.sut = MergeService(
             self.pdf_service,
             self.telegram_service,
             self.language_service,
+            self.scheduler_service,
         )
 
     @pytest.mark.asyncio
@@ -55,7 +59,9 @@ class TestMergeService(
         assert actual == self.WAIT_MERGE_PDF
 
         file_data = self.file_data_list.append.call_args.args[0]
-        assert file_data == FileData(self.TELEGRAM_DOCUMENT_ID, self.TELEGRAM_DOCUMENT_NAME)
+        assert file_data == FileData(
+            self.TELEGRAM_DOCUMENT_ID, self.TELEGRAM_DOCUMENT_NAME, self.TELEGRAM_DOCUMENT_UNIQUE_ID
+        )
 
         self.telegram_service.send_file_names.assert_called_once()
         self.telegram_update.effective_message.reply_text.assert_called_once()
@@ -158,6 +164,9 @@ class TestMergeService(
             self.file_path,
             TaskType.merge_pdf,
         )
+        self.scheduler_service.schedule_update.assert_called_once_with(
+            self.telegram_update, self.telegram_context, TaskType.merge_pdf
+        )
 
     @pytest.mark.asyncio
     async def test_check_text_done_pdf_service_error(self) -> None:
@@ -0,0 +1,168 @@
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock
+
+import pikepdf
+import pytest
+from pikepdf import Pdf
+
+from pdf_bot.cli import CLIService, CLIServiceError
+from pdf_bot.download_cache import DownloadCacheService
+from pdf_bot.executor import ExecutorOperation, ExecutorService, ExecutorServiceError
+from pdf_bot.io import IOService
+from pdf_bot.models import FileData
+from pdf_bot.page_render import PageRenderService
+from pdf_bot.page_render.page_render_service import _check_page
+from pdf_bot.pdf import PdfEncryptedError, PdfReadError, PdfServiceError
+from pdf_bot.settings import Settings
+from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
+
+
+class TestPageRenderService(TelegramServiceTestMixin, TelegramTestMixin):
+    PREVIEW_SIZE = 100
+    UNIQUE_ID = "unique_id"
+    RENDERED_DATA = b"rendered"
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path: Path) -> None:
+        super().setup_method()
+        self.tmp_path = tmp_path
+        self.file_data = FileData(self.TELEGRAM_DOCUMENT_ID, unique_id=self.UNIQUE_ID)
+
+        self.cli_service = MagicMock(spec=CLIService)
+        self.cli_service.render_pdf_page.side_effect = self._render_pdf_page
+
+        self.executor_service = MagicMock(spec=ExecutorService)
+
+        self.io_service = MagicMock(spec=IOService)
+        self.io_service.create_temp_directory.return_value.__enter__.return_value = tmp_path
+        self.io_service.create_temp_png_file.return_value.__enter__.return_value = (
+            tmp_path / "preview.png"
+        )
+
+        self.telegram_service = self.mock_telegram_service()
+        self.preview_cache_service = DownloadCacheService(tmp_path / "cache", 1024**2)
+
+        self.sut = PageRenderService(
+            self.cli_service,
+            self.executor_service,
+            self.io_service,
+            self.telegram_service,
+            self.preview_cache_service,
+            Settings(preview_size=self.PREVIEW_SIZE),
+        )
+
+    @pytest.mark.asyncio
+    async def test_preview_page(self) -> None:
+        async with self.sut.preview_page(self.file_data) as actual:
+            assert actual.parent == self.tmp_path / "cache"
+            assert actual.read_bytes() == self.RENDERED_DATA
+
+        self.telegram_service.download_pdf_file.assert_called_once_with(self.file_data.id)
+        self.executor_service.run.assert_not_called()
+        self.cli_service.render_pdf_page.assert_called_once_with(
+            self.download_path, self.tmp_path / "page", 1, self.PREVIEW_SIZE
+        )
+
+    @pytest.mark.asyncio
+    async def test_preview_page_cached(self) -> None:
+        async with self.sut.preview_page(self.file_data) as path:
+            expected = path
+
+        async with self.sut.preview_page(self.file_data) as actual:
+            assert actual == expected
+            assert actual.read_bytes() == self.RENDERED_DATA
+
+        self.telegram_service.download_pdf_file.assert_called_once()
+        self.cli_service.render_pdf_page.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_preview_page_different_page(self) -> None:
+        async with self.sut.preview_page(self.file_data):
+            pass
+        async with self.sut.preview_page(self.file_data, page=2):
+            pass
+
+        assert self.cli_service.render_pdf_page.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_preview_page_without_unique_id(self) -> None:
+        file_data = FileData(self.TELEGRAM_DOCUMENT_ID)
+
+        async with self.sut.preview_page(file_data) as actual:
+            assert actual == self.tmp_path / "preview.png"
+            assert actual.read_bytes() == self.RENDERED_DATA
+
+        self.io_service.create_temp_png_file.assert_called_once_with("Preview")
+        assert not (self.tmp_path / "cache").exists()
+
+    @pytest.mark.asyncio
+    async def test_preview_page_cli_error(self) -> None:
+        self.cli_service.render_pdf_page.side_effect = CLIServiceError
+
+        with pytest.raises(PdfServiceError):
+            async with self.sut.preview_page(self.file_data):
+                pass
+
+        # The file is checked to tell why the render has failed, and failed renders are
+        # not cached
+        self.executor_service.run.assert_called_once()
+        assert self.executor_service.run.call_args.args[0] == ExecutorOperation.preview
+        assert self.preview_cache_service.total_bytes == 0
+
+    @pytest.mark.asyncio
+    async def test_preview_page_cli_error_invalid_file(self) -> None:
+        self.cli_service.render_pdf_page.side_effect = CLIServiceError
+        self.executor_service.run.side_effect = PdfEncryptedError
+
+        with pytest.raises(PdfEncryptedError):
+            async with self.sut.preview_page(self.file_data):
+                pass
+
+    @pytest.mark.asyncio
+    async def test_preview_page_executor_error(self) -> None:
+        self.cli_service.render_pdf_page.side_effect = CLIServiceError
+        self.executor_service.run.side_effect = ExecutorServiceError
+
+        with pytest.raises(PdfServiceError):
+            async with self.sut.preview_page(self.file_data):
+                pass
+
+    async def _render_pdf_page(self, _input_path: Path, output_path: Path, *_args: Any) -> None:
+        output_path.with_suffix(".png").write_bytes(self.RENDERED_DATA)
+
+
+class TestCheckPage:
+    def test_check_page(self, tmp_path: Path) -> None:
+        file_path = self._create_pdf(tmp_path)
+        _check_page(file_path, 1)
+
+    def test_check_page_invalid_page(self, tmp_path: Path) -> None:
+        file_path = self._create_pdf(tmp_path)
+
+        with pytest.raises(PdfServiceError):
+            _check_page(file_path, 2)
+
+    def test_check_page_invalid_file(self, tmp_path: Path) -> None:
+        file_path = tmp_path / "invalid.pdf"
+        file_path.write_bytes(b"invalid")
+
+        with pytest.raises(PdfReadError):
+            _check_page(file_path, 1)
+
+    def test_check_page_encrypted_file(self, tmp_path: Path) -> None:
+        file_path = tmp_path / "encrypted.pdf"
+        with Pdf.new() as pdf:
+            pdf.add_blank_page()
+            pdf.save(file_path, encryption=pikepdf.Encryption(user="user", owner="owner"))
+
+        with pytest.raises(PdfEncryptedError):
+            _check_page(file_path, 1)
+
+    @staticmethod
+    def _create_pdf(tmp_path: Path) -> Path:
+        file_path = tmp_path / "file.pdf"
+        with Pdf.new() as pdf:
+            pdf.add_blank_page()
+            pdf.save(file_path)
+        return file_path
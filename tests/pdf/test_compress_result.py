@@ -22,3 +22,10 @@ class TestCompressResult(PathTestMixin):
         with patch("pdf_bot.pdf.models.humanize") as humanize:
             _ = self.sut.readable_new_size
             humanize.naturalsize.assert_called_once_with(self.sut.new_size)
+
+    def test_is_reduced(self) -> None:
+        assert self.sut.is_reduced is True
+
+    def test_is_reduced_same_size(self) -> None:
+        sut = CompressResult(10, 10, self.sut.out_path)
+        assert sut.is_reduced is False
@@ -0,0 +1,130 @@
+import os
+import zlib
+from pathlib import Path
+
+import pikepdf
+import pytest
+from pikepdf import Dictionary, Name, Pdf
+
+from pdf_bot.pdf import PdfEncryptedError, PdfReadError
+from pdf_bot.pdf.compression import compress_losslessly
+
+
+class TestCompression:
+    IMAGE_SIZE = 64
+
+    def test_compress_losslessly(self, tmp_path: Path) -> None:
+        file_path = self._create_pdf(tmp_path, num_pages=4)
+        out_path = tmp_path / "out.pdf"
+
+        compress_losslessly(file_path, out_path)
+
+        assert out_path.stat().st_size < file_path.stat().st_size
+        with Pdf.open(file_path) as pdf, Pdf.open(out_path) as out_pdf:
+            assert len(out_pdf.pages) == len(pdf.pages)
+
+            # The duplicate images and their soft masks are replaced by a single copy
+            images = [x.Resources.XObject.Im0 for x in out_pdf.pages]
+            assert len({x.objgen for x in images}) == 1
+            assert len({x.SMask.objgen for x in images}) == 1
+            assert images[0].read_bytes() == pdf.pages[0].Resources.XObject.Im0.read_bytes()
+
+            # The unused resources are removed
+            assert list(out_pdf.pages[0].Resources.XObject.keys()) == ["/Im0"]
+
+    def test_compress_losslessly_distinct_images(self, tmp_path: Path) -> None:
+        file_path = self._create_pdf(tmp_path, num_pages=2, same_images=False)
+        out_path = tmp_path / "out.pdf"
+
+        compress_losslessly(file_path, out_path)
+
+        with Pdf.open(out_path) as pdf:
+            images = [x.Resources.XObject.Im0 for x in pdf.pages]
+            assert len({x.objgen for x in images}) == 2
+
+    def test_compress_losslessly_forms(self, tmp_path: Path) -> None:
+        file_path = self._create_pdf(tmp_path, num_pages=3, use_forms=True)
+        out_path = tmp_path / "out.pdf"
+
+        compress_losslessly(file_path, out_path)
+
+        # The forms only become identical once their images are deduplicated
+        with Pdf.open(out_path) as pdf:
+            forms = [x.Resources.XObject.Fm0 for x in pdf.pages]
+            assert len({x.objgen for x in forms}) == 1
+            assert len({x.Resources.XObject.Im0.SMask.objgen for x in forms}) == 1
+
+    def test_compress_losslessly_encrypted(self, tmp_path: Path) -> None:
+        file_path = tmp_path / "in.pdf"
+        with Pdf.new() as pdf:
+            pdf.add_blank_page()
+            pdf.save(file_path, encryption=pikepdf.Encryption(user="user", owner="owner"))
+
+        with pytest.raises(PdfEncryptedError):
+            compress_losslessly(file_path, tmp_path / "out.pdf")
+
+    def test_compress_losslessly_invalid(self, tmp_path: Path) -> None:
+        file_path = tmp_path / "in.pdf"
+        file_path.write_bytes(b"invalid")
+
+        with pytest.raises(PdfReadError):
+            compress_losslessly(file_path, tmp_path / "out.pdf")
+
+    def _create_pdf(
+        self,
+        tmp_path: Path,
+        num_pages: int,
+        *,
+        same_images: bool = True,
+        use_forms: bool = False,
+    ) -> Path:
+        size = self.IMAGE_SIZE
+        image_data = os.urandom(size * size * 3)
+        file_path = tmp_path / "in.pdf"
+
+        with Pdf.new() as pdf:
+            for _ in range(num_pages):
+                if not same_images:
+                    image_data = os.urandom(size * size * 3)
+
+                smask = pdf.make_stream(
+                    zlib.compress(b"\x80" * size * size),
+                    Type=Name.XObject,
+                    Subtype=Name.Image,
+                    Width=size,
+                    Height=size,
+                    ColorSpace=Name.DeviceGray,
+                    BitsPerComponent=8,
+                    Filter=Name.FlateDecode,
+                )
+                image = pdf.make_stream(
+                    image_data,
+                    Type=Name.XObject,
+                    Subtype=Name.Image,
+                    Width=size,
+                    Height=size,
+                    ColorSpace=Name.DeviceRGB,
+                    BitsPerComponent=8,
+                    SMask=smask,
+                )
+
+                page = pdf.add_blank_page()
+                contents = b"q 100 0 0 100 0 0 cm /Im0 Do Q"
+                if use_forms:
+                    form = pdf.make_stream(
+                        contents,
+                        Type=Name.XObject,
+                        Subtype=Name.Form,
+                        BBox=[0, 0, 100, 100],
+                        Resources=Dictionary(XObject=Dictionary(Im0=image)),
+                    )
+                    page.Resources = Dictionary(XObject=Dictionary(Fm0=form))
+                    page.Contents = pdf.make_stream(b"/Fm0 Do")
+                else:
+                    page.Resources = Dictionary(
+                        XObject=Dictionary(Im0=image, Unused=pdf.make_stream(b"unused"))
+                    )
+                    page.Contents = pdf.make_stream(contents)
+
+            pdf.save(file_path)
+        return file_path
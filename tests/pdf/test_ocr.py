@@ -0,0 +1,36 @@
+from pathlib import Path
+
+import pytest
+
+from pdf_bot.pdf.ocr import find_blank_pages, get_tesseract_languages
+
+
+@pytest.mark.parametrize(
+    ("language_code", "expected"),
+    [
+        (None, ["eng"]),
+        ("en_GB", ["eng"]),
+        ("de_DE", ["deu", "eng"]),
+        ("zh_CN", ["chi_sim", "eng"]),
+        ("zh_TW", ["chi_tra", "eng"]),
+        ("xx_XX", ["eng"]),
+    ],
+)
+def test_get_tesseract_languages(language_code: str | None, expected: list[str]) -> None:
+    assert get_tesseract_languages(language_code) == expected
+
+
+def test_find_blank_pages(tmp_path: Path) -> None:
+    width = height = 100
+    blank = b"\xff" * width * height
+    text = b"\x00" * width + blank[width:]
+    # A few specks of dust are still blank
+    specks = b"\x00" * 5 + blank[5:]
+
+    paths = []
+    for i, pixels in enumerate([blank, text, specks], start=1):
+        path = tmp_path / f"page-{i}.pgm"
+        path.write_bytes(b"P5\n%d\t%d\n255\n" % (width, height) + pixels)
+        paths.append(path)
+
+    assert find_blank_pages(paths) == {1, 3}
@@ -0,0 +1,57 @@
+from pathlib import Path
+
+import pytest
+
+from pdf_bot.pdf.models import PageChange
+from pdf_bot.pdf.page_diff import align_pages, hash_pages
+
+
+def test_hash_pages(tmp_path: Path) -> None:
+    text_path = tmp_path / "text.txt"
+    text_path.write_text("Hello  world\f\nHello world \fBye\f")
+
+    actual = hash_pages(text_path, 3)
+
+    assert len(actual) == 3
+    assert actual[0] == actual[1]
+    assert actual[0] != actual[2]
+
+
+def test_hash_pages_missing_pages(tmp_path: Path) -> None:
+    text_path = tmp_path / "text.txt"
+    text_path.write_text("Hello\f")
+
+    actual = hash_pages(text_path, 3)
+
+    assert len(actual) == 3
+    assert actual[1] == actual[2]
+
+
+@pytest.mark.parametrize(
+    ("hashes_a", "hashes_b", "expected"),
+    [
+        (["a", "b", "c"], ["a", "b", "c"], []),
+        (["a", "b", "c"], ["a", "x", "c"], [PageChange([2], [2])]),
+        (["a", "b", "c"], ["a", "c"], [PageChange([2], [])]),
+        (["a", "c"], ["a", "b", "b", "c"], [PageChange([], [2, 3])]),
+        (
+            ["a", "b", "c", "d"],
+            ["x", "b", "c", "y", "z"],
+            [PageChange([1], [1]), PageChange([4], [4, 5])],
+        ),
+    ],
+)
+def test_align_pages(hashes_a: list[str], hashes_b: list[str], expected: list[PageChange]) -> None:
+    assert align_pages(hashes_a, hashes_b) == expected
+
+
+@pytest.mark.parametrize(
+    ("change", "expected"),
+    [
+        (PageChange([2], [2]), "pages_2_vs_2"),
+        (PageChange([4], [4, 5]), "pages_4_vs_4-5"),
+        (PageChange([], [2, 3]), "pages_none_vs_2-3"),
+    ],
+)
+def test_page_change_name(change: PageChange, expected: str) -> None:
+    assert change.name == expected
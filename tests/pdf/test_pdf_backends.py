@@ -0,0 +1,350 @@
+import os
+from pathlib import Path
+from typing import Any
+
+import pikepdf
+import pytest
+from pikepdf import Array, Dictionary, Name, OutlineItem, Pdf
+from pypdf import PageObject, PdfReader
+from pypdf.generic import ContentStream
+
+from pdf_bot.pdf import (
+    AbstractPdfBackend,
+    PdfDecryptError,
+    PdfEncryptedError,
+    PdfIncorrectPasswordError,
+    PdfReadError,
+    PikepdfBackend,
+    PipelineOperation,
+    PipelineStep,
+    PypdfBackend,
+    ScaleByData,
+    ScaleToData,
+)
+
+# The backends are checked against each other on real files, so that the pikepdf backend
+# produces the same documents as the pypdf backend that it replaces
+
+BACKENDS = [PypdfBackend(), PikepdfBackend()]
+PASSWORD = "password"
+
+
+@pytest.fixture(params=BACKENDS, ids=lambda x: type(x).__name__)
+def backend(request: pytest.FixtureRequest) -> AbstractPdfBackend:
+    return request.param  # type: ignore[no-any-return]
+
+
+@pytest.fixture
+def file_path(tmp_path: Path) -> Path:
+    return _create_pdf(tmp_path / "file.pdf", num_pages=10)
+
+
+@pytest.fixture
+def outlined_file_path(tmp_path: Path) -> Path:
+    return _create_pdf(tmp_path / "outlined.pdf", num_pages=10, has_outlines=True)
+
+
+def test_rotate(tmp_path: Path, file_path: Path) -> None:
+    actual = _run_all(tmp_path, "rotate", file_path, 90)
+
+    for summary in actual:
+        assert [x["rotation"] for x in summary] == [180] + [90] * 9
+    assert actual[0] == actual[1]
+
+
+@pytest.mark.parametrize("scale_data", [ScaleByData(2, 0.5), ScaleByData(1.5, 1.5)])
+def test_scale_by_factor(tmp_path: Path, file_path: Path, scale_data: ScaleByData) -> None:
+    actual = _run_all(tmp_path, "scale_by_factor", file_path, scale_data)
+
+    assert actual[0][1]["mediabox"] == [0, 0, 200 * scale_data.x, 300 * scale_data.y]
+    assert actual[0] == actual[1]
+
+
+def test_scale_to_dimension(tmp_path: Path, file_path: Path) -> None:
+    actual = _run_all(tmp_path, "scale_to_dimension", file_path, ScaleToData(400, 150))
+
+    assert actual[0][1]["mediabox"] == [0, 0, 400, 150]
+    assert actual[0] == actual[1]
+
+
+@pytest.mark.parametrize(
+    "split_range", [":", "7", "0:3", "7:", "-1", ":-1", "-3:-1", "::2", "1:10:2", "::-1", "3:0:-1"]
+)
+def test_split(tmp_path: Path, file_path: Path, split_range: str) -> None:
+    actual = _run_all(tmp_path, "split", file_path, split_range)
+    assert actual[0] == actual[1]
+
+
+def test_split_many(tmp_path: Path, file_path: Path, backend: AbstractPdfBackend) -> None:
+    split_ranges = ["0:3", "::-1", "7", "0:3"]
+    out_paths = [tmp_path / f"out_{i}.pdf" for i in range(len(split_ranges))]
+
+    backend.split_many(file_path, split_ranges, out_paths)
+
+    # Each file is the same as splitting the file with its range alone
+    for split_range, out_path in zip(split_ranges, out_paths, strict=True):
+        expected_path = tmp_path / "expected.pdf"
+        backend.split(file_path, split_range, expected_path)
+        assert _summarize(out_path) == _summarize(expected_path)
+        assert out_path.stat().st_size <= expected_path.stat().st_size * 1.1
+
+
+def test_split_outlined_file(
+    tmp_path: Path, outlined_file_path: Path, backend: AbstractPdfBackend
+) -> None:
+    out_path = tmp_path / "out.pdf"
+
+    backend.split(outlined_file_path, "0", out_path)
+
+    # The outlines of the removed pages don't keep the pages in the file
+    assert _summarize(out_path) == _summarize(outlined_file_path)[:1]
+    assert out_path.stat().st_size < outlined_file_path.stat().st_size / 5
+
+
+def test_split_many_outlined_file(
+    tmp_path: Path, outlined_file_path: Path, backend: AbstractPdfBackend
+) -> None:
+    split_ranges = [str(i) for i in range(10)]
+    out_paths = [tmp_path / f"out_{i}.pdf" for i in range(len(split_ranges))]
+
+    backend.split_many(outlined_file_path, split_ranges, out_paths)
+
+    # The burst files together are about as large as the source file
+    total_size = sum(x.stat().st_size for x in out_paths)
+    assert total_size < outlined_file_path.stat().st_size * 1.5
+    for i, out_path in enumerate(out_paths):
+        assert _summarize(out_path) == _summarize(outlined_file_path)[i : i + 1]
+
+
+def test_encrypt(tmp_path: Path, file_path: Path, backend: AbstractPdfBackend) -> None:
+    out_path = tmp_path / "out.pdf"
+    backend.encrypt(file_path, PASSWORD, out_path)
+
+    with pytest.raises(pikepdf.PasswordError):
+        Pdf.open(out_path)
+    with Pdf.open(out_path, password=PASSWORD) as pdf:
+        assert pdf.is_encrypted
+
+    reader = PdfReader(out_path)
+    reader.decrypt(PASSWORD)
+    assert _summarize_reader(reader) == _summarize(file_path)
+
+
+@pytest.mark.parametrize("aes", [True, False])
+def test_decrypt(tmp_path: Path, file_path: Path, backend: AbstractPdfBackend, aes: bool) -> None:
+    encrypted_path = _encrypt(tmp_path, file_path, aes=aes)
+    out_path = tmp_path / "out.pdf"
+
+    backend.decrypt(encrypted_path, PASSWORD, out_path)
+
+    with Pdf.open(out_path) as pdf:
+        assert not pdf.is_encrypted
+    assert _summarize(out_path) == _summarize(file_path)
+
+
+def test_decrypt_incorrect_password(
+    tmp_path: Path, file_path: Path, backend: AbstractPdfBackend
+) -> None:
+    encrypted_path = _encrypt(tmp_path, file_path)
+
+    with pytest.raises(PdfIncorrectPasswordError):
+        backend.decrypt(encrypted_path, "incorrect", tmp_path / "out.pdf")
+
+
+def test_decrypt_not_encrypted(
+    tmp_path: Path, file_path: Path, backend: AbstractPdfBackend
+) -> None:
+    with pytest.raises(PdfDecryptError):
+        backend.decrypt(file_path, PASSWORD, tmp_path / "out.pdf")
+
+
+@pytest.mark.parametrize("user_password", [PASSWORD, ""])
+def test_encrypted_file(
+    tmp_path: Path, file_path: Path, backend: AbstractPdfBackend, user_password: str
+) -> None:
+    encrypted_path = tmp_path / "encrypted.pdf"
+    with Pdf.open(file_path) as pdf:
+        pdf.save(encrypted_path, encryption=pikepdf.Encryption(user=user_password, owner="owner"))
+
+    with pytest.raises(PdfEncryptedError):
+        backend.rotate(encrypted_path, 90, tmp_path / "out.pdf")
+
+
+def test_invalid_file(tmp_path: Path, backend: AbstractPdfBackend) -> None:
+    file_path = tmp_path / "invalid.pdf"
+    file_path.write_bytes(b"invalid")
+
+    with pytest.raises(PdfReadError):
+        backend.split(file_path, ":", tmp_path / "out.pdf")
+
+
+def test_apply_steps(tmp_path: Path, file_path: Path) -> None:
+    steps = [
+        PipelineStep(PipelineOperation.rotate, 90),
+        PipelineStep(PipelineOperation.split, "1:8"),
+        PipelineStep(PipelineOperation.scale_by_factor, ScaleByData(2, 0.5)),
+    ]
+    actual = _run_all(tmp_path, "apply_steps", file_path, steps)
+
+    # The fused steps produce the same document as running the operations one by one
+    for backend, summary in zip(BACKENDS, actual, strict=True):
+        rotated_path = tmp_path / "rotated.pdf"
+        split_path = tmp_path / "split.pdf"
+        scaled_path = tmp_path / "scaled.pdf"
+
+        backend.rotate(file_path, 90, rotated_path)
+        backend.split(rotated_path, "1:8", split_path)
+        backend.scale_by_factor(split_path, ScaleByData(2, 0.5), scaled_path)
+        assert summary == _summarize(scaled_path)
+
+    assert len(actual[0]) == 7
+    assert actual[0] == actual[1]
+
+
+def test_apply_steps_split_outlined_file(
+    tmp_path: Path, outlined_file_path: Path, backend: AbstractPdfBackend
+) -> None:
+    out_path = tmp_path / "out.pdf"
+    steps = [
+        PipelineStep(PipelineOperation.split, "0"),
+        PipelineStep(PipelineOperation.rotate, 90),
+    ]
+
+    backend.apply_steps(outlined_file_path, steps, out_path)
+
+    assert len(_summarize(out_path)) == 1
+    assert out_path.stat().st_size < outlined_file_path.stat().st_size / 5
+
+
+def test_apply_steps_decrypt_and_encrypt(
+    tmp_path: Path, file_path: Path, backend: AbstractPdfBackend
+) -> None:
+    encrypted_path = _encrypt(tmp_path, file_path)
+    out_path = tmp_path / "out.pdf"
+    steps = [
+        PipelineStep(PipelineOperation.decrypt, PASSWORD),
+        PipelineStep(PipelineOperation.rotate, 180),
+        PipelineStep(PipelineOperation.encrypt, "new_password"),
+    ]
+
+    backend.apply_steps(encrypted_path, steps, out_path)
+
+    reader = PdfReader(out_path)
+    assert reader.is_encrypted
+    reader.decrypt("new_password")
+    assert [x["rotation"] for x in _summarize_reader(reader)] == [270] + [180] * 9
+
+
+@pytest.mark.parametrize(
+    "steps",
+    [
+        [PipelineStep(PipelineOperation.compress)],
+        [
+            PipelineStep(PipelineOperation.encrypt, PASSWORD),
+            PipelineStep(PipelineOperation.rotate, 90),
+        ],
+    ],
+)
+def test_apply_steps_invalid(
+    tmp_path: Path, file_path: Path, backend: AbstractPdfBackend, steps: list[PipelineStep]
+) -> None:
+    with pytest.raises(ValueError, match="step"):
+        backend.apply_steps(file_path, steps, tmp_path / "out.pdf")
+
+
+def _run_all(tmp_path: Path, method: str, file_path: Path, *args: Any) -> list[list[dict]]:
+    summaries = []
+    for backend in BACKENDS:
+        out_path = tmp_path / f"{type(backend).__name__}.pdf"
+        getattr(backend, method)(file_path, *args, out_path)
+        summaries.append(_summarize(out_path))
+    return summaries
+
+
+def _summarize(file_path: Path) -> list[dict]:
+    return _summarize_reader(PdfReader(file_path))
+
+
+def _summarize_reader(reader: PdfReader) -> list[dict]:
+    # The effective page properties, regardless of how they are stored in the files
+    summary = []
+    for page in reader.pages:
+        annots = [x.get_object() for x in page.get("/Annots", [])]
+        summary.append(
+            {
+                "text": page.extract_text(),
+                "rotation": page.rotation,
+                "mediabox": [round(float(x), 3) for x in page.mediabox],
+                "cropbox": [round(float(x), 3) for x in page.cropbox],
+                "annots": [[round(float(x), 3) for x in a["/Rect"]] for a in annots],
+                "ctm": _get_first_cm(page, reader),
+            }
+        )
+    return summary
+
+
+def _get_first_cm(page: PageObject, reader: PdfReader) -> list[float] | None:
+    for operands, operator in ContentStream(page.get_contents(), reader).operations:
+        if operator == b"cm":
+            return [round(float(x), 3) for x in operands]
+    return None
+
+
+def _create_pdf(file_path: Path, num_pages: int, has_outlines: bool = False) -> Path:
+    with Pdf.new() as pdf:
+        font = pdf.make_indirect(
+            Dictionary(
+                Type=Name.Font,
+                Subtype=Name.Type1,
+                BaseFont=Name.Helvetica,
+                Encoding=Name.WinAnsiEncoding,
+            )
+        )
+        for i in range(num_pages):
+            pdf.add_blank_page(page_size=(200, 300))
+            page = pdf.pages[-1]
+            page.Resources = Dictionary(Font=Dictionary(F1=font))
+            page.Contents = pdf.make_stream(b"BT /F1 12 Tf 20 250 Td (Page %d) Tj ET" % (i + 1))
+
+            if has_outlines:
+                # Each page has a large image that can't be compressed, so that the file
+                # size shows the pages that are kept
+                page.Resources.XObject = Dictionary(
+                    Im1=pdf.make_stream(
+                        os.urandom(100 * 100),
+                        Type=Name.XObject,
+                        Subtype=Name.Image,
+                        Width=100,
+                        Height=100,
+                        ColorSpace=Name.DeviceGray,
+                        BitsPerComponent=8,
+                    )
+                )
+
+        # The first page has a rotation, a crop box and an annotation to be preserved
+        first_page = pdf.pages[0]
+        first_page.Rotate = 90
+        first_page.CropBox = Array([10, 10, 190, 290])
+        first_page.Annots = pdf.make_indirect(
+            Array(
+                [Dictionary(Type=Name.Annot, Subtype=Name.Square, Rect=Array([20, 20, 100, 100]))]
+            )
+        )
+
+        if has_outlines:
+            with pdf.open_outline() as outline:
+                outline.root.extend(OutlineItem(f"Page {i + 1}", i) for i in range(num_pages))
+        pdf.save(file_path)
+    return file_path
+
+
+def _encrypt(tmp_path: Path, file_path: Path, aes: bool = True) -> Path:
+    out_path = tmp_path / "encrypted.pdf"
+    with Pdf.open(file_path) as pdf:
+        encryption = (
+            pikepdf.Encryption(user=PASSWORD, owner=PASSWORD)
+            if aes
+            else pikepdf.Encryption(user=PASSWORD, owner=PASSWORD, R=3, aes=False, metadata=False)
+        )
+        pdf.save(out_path, encryption=encryption)
+    return out_path
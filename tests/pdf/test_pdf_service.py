@@ -1,25 +1,45 @@
-from typing import Any
+import pickle
+from collections.abc import Callable
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Literal
 from unittest.mock import MagicMock, call, patch
+from uuid import uuid4
+from zipfile import ZIP_STORED, ZipFile
 
+import pikepdf
 import pytest
 from img2pdf import Rotation
-from ocrmypdf.exceptions import EncryptedPdfError, PriorOcrFoundError, TaggedPDFError
-from pdfminer.pdfdocument import PDFPasswordIncorrect
-from pypdf import PageObject, PdfReader, PdfWriter
+from ocrmypdf.exceptions import (
+    EncryptedPdfError,
+    MissingDependencyError,
+    PriorOcrFoundError,
+    TaggedPDFError,
+)
+from pdf_diff import NoDifferenceError
+from pypdf import PdfWriter
 from pypdf.errors import PdfReadError as PyPdfReadError
-from pypdf.pagerange import PageRange
 from weasyprint import CSS, HTML
 from weasyprint.text.fonts import FontConfiguration
 
-from pdf_bot.cli import CLIService, CLIServiceError
+from pdf_bot.cli import (
+    CLINonZeroExitStatusError,
+    CLIService,
+    CLIServiceError,
+    CLITimeoutError,
+)
+from pdf_bot.download_cache import DownloadCacheService
+from pdf_bot.executor import ExecutorOperation, ExecutorService, ExecutorWorkerCrashError
 from pdf_bot.io.io_service import IOService
 from pdf_bot.models import FileData
 from pdf_bot.pdf import (
+    AbstractPdfBackend,
     CompressResult,
     FontData,
-    PdfDecryptError,
     PdfReadError,
     PdfService,
+    PipelineOperation,
+    PipelineStep,
     ScaleByData,
     ScaleToData,
 )
@@ -28,8 +48,10 @@ from pdf_bot.pdf.exceptions import (
     PdfIncorrectPasswordError,
     PdfNoImagesError,
     PdfNoTextError,
+    PdfPipelineError,
     PdfServiceError,
 )
+from pdf_bot.settings import Settings
 from tests.language import LanguageServiceTestMixin
 from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
 
@@ -40,169 +62,381 @@ class TestPDFService(
     TelegramTestMixin,
 ):
     PASSWORD = "password"
+    STREAMING_MERGE_THRESHOLD = 10
+    IMAGES_WINDOW_SIZE = 2
+    TEXT_WINDOW_SIZE = 2
+    OCR_CPU_BUDGET = 4
 
     def setup_method(self) -> None:
         super().setup_method()
         self.cli_service = MagicMock(spec=CLIService)
         self.telegram_service = self.mock_telegram_service()
 
+        self.executor_service = MagicMock(spec=ExecutorService)
+        self.executor_service.run.side_effect = self._executor_run_side_effect
+        self.executor_service.get_max_workers.return_value = 2
+
         self.io_service = MagicMock(spec=IOService)
         self.io_service.create_temp_directory.return_value.__enter__.return_value = self.dir_path
         self.io_service.create_temp_pdf_file.return_value.__enter__.return_value = self.file_path
         self.io_service.create_temp_png_file.return_value.__enter__.return_value = self.file_path
         self.io_service.create_temp_txt_file.return_value.__enter__.return_value = self.file_path
+        self.watermark_cache_service = MagicMock(spec=DownloadCacheService)
 
         self.sut = PdfService(
             self.cli_service,
+            self.executor_service,
             self.io_service,
             self.telegram_service,
+            self.watermark_cache_service,
+            Settings(
+                pdf_streaming_merge_threshold=self.STREAMING_MERGE_THRESHOLD,
+                pdf_to_images_window_size=self.IMAGES_WINDOW_SIZE,
+                pdf_text_window_size=self.TEXT_WINDOW_SIZE,
+                ocr_cpu_budget=self.OCR_CPU_BUDGET,
+            ),
         )
 
         self.os_patcher = patch("pdf_bot.pdf.pdf_service.os")
         self.ocrmypdf_patcher = patch("pdf_bot.pdf.pdf_service.ocrmypdf")
-        self.extract_text_patcher = patch("pdf_bot.pdf.pdf_service.extract_text")
-        self.textwrap_patcher = patch("pdf_bot.pdf.pdf_service.textwrap")
-        self.pdf_reader_patcher = patch("pdf_bot.pdf.pdf_service.PdfReader")
-        self.pdf_writer_patcher = patch("pdf_bot.pdf.pdf_service.PdfWriter")
+        self.pdf_writer_patcher = patch("pdf_bot.pdf.pypdf_merge.PdfWriter")
 
         self.mock_os = self.os_patcher.start()
         self.ocrmypdf = self.ocrmypdf_patcher.start()
-        self.extract_text = self.extract_text_patcher.start()
-        self.textwrap_patcher.start()
-        self.pdf_reader_cls = self.pdf_reader_patcher.start()
         self.pdf_writer_cls = self.pdf_writer_patcher.start()
 
     def teardown_method(self) -> None:
         self.os_patcher.stop()
         self.ocrmypdf_patcher.stop()
-        self.extract_text_patcher.stop()
-        self.textwrap_patcher.stop()
-        self.pdf_reader_patcher.stop()
         self.pdf_writer_patcher.stop()
         super().teardown_method()
 
     @pytest.mark.asyncio
-    async def test_add_watermark_to_pdf(self) -> None:
-        src_file_id = "src_file_id"
-        wmk_file_id = "wmk_file_id"
+    async def test_add_watermark_to_pdf(self, tmp_path: Path) -> None:
+        self._mock_watermark_cache(tmp_path)
+        src_path = self._create_pdf(tmp_path / "src.pdf", num_pages=3)
+        wmk_path = self._create_pdf(tmp_path / "wmk.pdf", num_pages=2)
+        out_path = tmp_path / "out.pdf"
+        file_data = FileData("wmk_file_id", unique_id="wmk_unique_id")
+
+        self._mock_download_pdf_file({file_data.id: wmk_path, "src_file_id": src_path})
+        self.io_service.create_temp_pdf_file.return_value.__enter__.return_value = out_path
+
+        for _ in range(2):
+            async with self.sut.add_watermark_to_pdf("src_file_id", file_data) as actual:
+                assert actual == out_path
+                with pikepdf.open(actual) as pdf:
+                    assert len(pdf.pages) == 3
+
+                    # All the pages reference the same watermark
+                    xobjects = {
+                        x.objgen for page in pdf.pages for x in page.Resources.XObject.values()
+                    }
+                    assert len(xobjects) == 1
+
+        # The watermark template is cached
+        assert self.telegram_service.download_pdf_file.call_args_list == [
+            call(file_data.id),
+            call("src_file_id"),
+            call("src_file_id"),
+        ]
+        self.io_service.create_temp_pdf_file.assert_called_with("File_with_watermark")
 
-        src_reader = MagicMock(spec=PdfReader)
-        wmk_reader = MagicMock(spec=PdfReader)
-        writer = MagicMock(spec=PdfWriter)
-        src_reader.is_encrypted = wmk_reader.is_encrypted = False
+    @pytest.mark.asyncio
+    async def test_add_watermark_to_pdf_without_unique_id(self, tmp_path: Path) -> None:
+        cache_dir = self._mock_watermark_cache(tmp_path)
+        src_path = self._create_pdf(tmp_path / "src.pdf", num_pages=1)
+        wmk_path = self._create_pdf(tmp_path / "wmk.pdf", num_pages=1)
+        file_data = FileData("wmk_file_id")
+
+        self._mock_download_pdf_file({file_data.id: wmk_path, "src_file_id": src_path})
+        self.io_service.create_temp_pdf_file.side_effect = [
+            self._context_manager(tmp_path / "template.pdf"),
+            self._context_manager(tmp_path / "out.pdf"),
+        ]
+
+        async with self.sut.add_watermark_to_pdf("src_file_id", file_data) as actual:
+            assert actual == tmp_path / "out.pdf"
+
+        assert not cache_dir.exists()
+        self.io_service.create_temp_pdf_file.assert_has_calls(
+            [call("Watermark"), call("File_with_watermark")]
+        )
+
+    @pytest.mark.asyncio
+    async def test_add_watermark_to_pdf_read_error(self, tmp_path: Path) -> None:
+        wmk_path = tmp_path / "wmk.pdf"
+        wmk_path.write_bytes(b"invalid")
+        self.telegram_service.download_pdf_file.return_value.__aenter__.return_value = wmk_path
+
+        with pytest.raises(PdfReadError):
+            async with self.sut.add_watermark_to_pdf(self.TELEGRAM_FILE_ID, self.FILE_DATA):
+                pass
+
+        self.telegram_service.download_pdf_file.assert_called_once_with(self.FILE_DATA.id)
+
+    @pytest.mark.asyncio
+    async def test_grayscale_pdf(self) -> None:
+        async with self.sut.grayscale_pdf(self.TELEGRAM_FILE_ID) as actual:
+            assert actual == self.file_path
+            self._assert_telegram_and_io_services("Grayscale")
+            self.cli_service.grayscale_pdf.assert_called_once_with(
+                self.download_path, self.file_path
+            )
+            self.cli_service.convert_pdf_to_images.assert_not_called()
 
-        src_pages = [MagicMock(spec=PageObject) for _ in range(2)]
-        src_reader.pages = src_pages
+    @pytest.mark.asyncio
+    async def test_grayscale_pdf_rasterized(self, tmp_path: Path) -> None:
+        self._mock_convert_pdf_to_images(tmp_path, num_pages=3)
+        self.io_service.create_temp_pdf_file.return_value.__enter__.return_value = self.file_path
+        self.cli_service.grayscale_pdf.side_effect = CLINonZeroExitStatusError
+        buffered_writer = self.mock_path_open(self.file_path)
+
+        with patch("img2pdf.convert") as convert:
+            convert.return_value = b"image_bytes"
+
+            async with self.sut.grayscale_pdf(self.TELEGRAM_FILE_ID) as actual:
+                assert actual == self.file_path
 
-        wmk_page = MagicMock(spec=PageObject)
-        wmk_reader.pages = [wmk_page]
+                file_path = tmp_path / "file.pdf"
+                images_dir = tmp_path / "images"
+                self.cli_service.convert_pdf_to_images.assert_has_calls(
+                    [
+                        call(file_path, images_dir / "pages_1", 1, 2, 200, True),
+                        call(file_path, images_dir / "pages_3", 3, 3, 200, True),
+                    ]
+                )
+                convert.assert_called_once_with(
+                    [
+                        images_dir / "pages_1-1.png",
+                        images_dir / "pages_1-2.png",
+                        images_dir / "pages_3-3.png",
+                    ],
+                    rotation=Rotation.ifvalid,
+                )
+                buffered_writer.write.assert_called_once_with(b"image_bytes")
 
-        def pdf_file_reader_side_effect(file_id: str, *_args: Any, **_kwargs: Any) -> PdfReader:
-            if file_id == src_file_id:
-                return src_reader
-            return wmk_reader
+    @pytest.mark.asyncio
+    async def test_grayscale_pdf_timeout(self) -> None:
+        self.cli_service.grayscale_pdf.side_effect = CLITimeoutError
 
-        self.telegram_service.download_pdf_file.side_effect = (
-            self._async_context_manager_side_effect_echo
+        with pytest.raises(PdfServiceError):
+            async with self.sut.grayscale_pdf(self.TELEGRAM_FILE_ID):
+                pass
+
+        self.cli_service.convert_pdf_to_images.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_compare_pdfs(self, tmp_path: Path) -> None:
+        out_path = self._mock_compare_pdfs(
+            tmp_path, ["A", "B", "C", "D"], ["A", "X", "C", "D", "E"]
         )
-        self.pdf_reader_cls.side_effect = pdf_file_reader_side_effect
-        self.pdf_writer_cls.return_value = writer
 
-        async with self.sut.add_watermark_to_pdf(src_file_id, wmk_file_id):
-            assert self.telegram_service.download_pdf_file.call_count == 2
-            download_calls = [call(src_file_id), call(wmk_file_id)]
-            self.telegram_service.download_pdf_file.assert_has_calls(download_calls)
+        with patch("pdf_diff.main") as pdf_diff_main:
+            pdf_diff_main.side_effect = self._write_diff_image
 
-            add_page_calls = []
-            for src_page in src_pages:
-                src_page.merge_page.assert_called_once_with(wmk_page)
-                add_page_calls.append(call(src_page))
+            async with self.sut.compare_pdfs("a", "b") as actual:
+                assert actual == out_path
+                self.telegram_service.download_pdf_files.assert_called_once_with(["a", "b"])
+                self.io_service.create_temp_zip_file.assert_called_once_with("Differences")
+
+                with ZipFile(actual) as zf:
+                    assert sorted(zf.namelist()) == ["pages_2_vs_2.png", "summary.txt"]
+                    assert zf.read("summary.txt").decode() == (
+                        "Pages 2 of the first file changed to pages 2\n"
+                        "Pages 5 of the second file were added\n"
+                    )
 
-            writer.add_page.assert_has_calls(add_page_calls)
-            writer.write.assert_called_once()
-            self.io_service.create_temp_pdf_file.assert_called_once_with("File_with_watermark")
+            # Only the changed pages are diffed
+            pdf_diff_main.assert_called_once()
+            for path in pdf_diff_main.call_args.kwargs["files"]:
+                assert path.name.startswith("pages_2_vs_2")
 
     @pytest.mark.asyncio
-    async def test_add_watermark_to_pdf_read_error(self) -> None:
-        self.pdf_reader_cls.side_effect = PyPdfReadError()
-        with pytest.raises(PdfReadError):
-            async with self.sut.add_watermark_to_pdf(self.TELEGRAM_FILE_ID, self.TELEGRAM_FILE_ID):
+    async def test_compare_pdfs_whitespace_differences(self, tmp_path: Path) -> None:
+        self._mock_compare_pdfs(tmp_path, ["A  B", "C"], ["A B\n", "C"])
+
+        with patch("pdf_diff.main") as pdf_diff_main:
+            with pytest.raises(NoDifferenceError):
+                async with self.sut.compare_pdfs("a", "b"):
+                    pass
+
+            pdf_diff_main.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_compare_pdfs_no_rendered_differences(self, tmp_path: Path) -> None:
+        self._mock_compare_pdfs(tmp_path, ["A", "B"], ["A", "X"])
+
+        with patch("pdf_diff.main") as pdf_diff_main:
+            pdf_diff_main.side_effect = NoDifferenceError
+
+            with pytest.raises(NoDifferenceError):
+                async with self.sut.compare_pdfs("a", "b"):
+                    pass
+
+    @pytest.mark.asyncio
+    async def test_compare_pdfs_removed_pages(self, tmp_path: Path) -> None:
+        self._mock_compare_pdfs(tmp_path, ["A", "B", "C"], ["A"])
+
+        with patch("pdf_diff.main") as pdf_diff_main:
+            async with self.sut.compare_pdfs("a", "b") as actual:
+                with ZipFile(actual) as zf:
+                    assert zf.namelist() == ["summary.txt"]
+                    assert zf.read("summary.txt").decode() == (
+                        "Pages 2-3 of the first file were removed\n"
+                    )
+
+            pdf_diff_main.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_compare_pdfs_text_error(self, tmp_path: Path) -> None:
+        self._mock_compare_pdfs(tmp_path, ["A"], ["B"])
+        self.cli_service.extract_pdf_text.side_effect = CLIServiceError
+
+        with pytest.raises(PdfServiceError):
+            async with self.sut.compare_pdfs("a", "b"):
                 pass
 
-        calls = [call(self.TELEGRAM_FILE_ID) for _ in range(2)]
-        self.telegram_service.download_pdf_file.assert_has_calls(calls, any_order=True)
+    @pytest.mark.asyncio
+    async def test_compress_pdf(self, tmp_path: Path) -> None:
+        file_path, out_path = self._mock_compress(tmp_path)
+
+        with patch("pdf_bot.pdf.pdf_service.compress_losslessly") as compress_losslessly:
+            compress_losslessly.side_effect = self._write_file(70)
+            async with self.sut.compress_pdf(self.TELEGRAM_FILE_ID) as compress_result:
+                # The lossy pass is skipped as the target ratio is reached
+                assert compress_result == CompressResult(100, 70, out_path)
+                compress_losslessly.assert_called_once_with(file_path, tmp_path / "lossless.pdf")
+                self.cli_service.compress_pdf.assert_not_called()
+                self._assert_telegram_and_io_services("Compressed")
 
     @pytest.mark.asyncio
-    async def test_grayscale_pdf(self) -> None:
-        image_paths = "image_paths"
-        image_bytes = "image_bytes"
-        buffered_writer = self.mock_path_open(self.file_path)
+    async def test_compress_pdf_lossy(self, tmp_path: Path) -> None:
+        _file_path, out_path = self._mock_compress(tmp_path)
+        self.cli_service.compress_pdf.side_effect = self._write_file(50)
+
+        with patch("pdf_bot.pdf.pdf_service.compress_losslessly") as compress_losslessly:
+            compress_losslessly.side_effect = self._write_file(90)
+            async with self.sut.compress_pdf(self.TELEGRAM_FILE_ID) as compress_result:
+                assert compress_result == CompressResult(100, 50, out_path)
+                self.cli_service.compress_pdf.assert_called_once_with(
+                    tmp_path / "lossless.pdf", tmp_path / "lossy.pdf", "default"
+                )
+
+    @pytest.mark.asyncio
+    async def test_compress_pdf_not_reduced(self, tmp_path: Path) -> None:
+        file_path, out_path = self._mock_compress(tmp_path)
+        self.cli_service.compress_pdf.side_effect = self._write_file(120)
+
+        with patch("pdf_bot.pdf.pdf_service.compress_losslessly") as compress_losslessly:
+            compress_losslessly.side_effect = self._write_file(110)
+            async with self.sut.compress_pdf(self.TELEGRAM_FILE_ID) as compress_result:
+                # The original file is returned as none of the passes reduced it
+                assert compress_result == CompressResult(100, 100, out_path)
+                assert out_path.read_bytes() == file_path.read_bytes()
+                self.cli_service.compress_pdf.assert_called_once_with(
+                    file_path, tmp_path / "lossy.pdf", "default"
+                )
+
+    @pytest.mark.asyncio
+    async def test_compress_pdf_lossless_error(self, tmp_path: Path) -> None:
+        file_path, out_path = self._mock_compress(tmp_path)
+        self.cli_service.compress_pdf.side_effect = self._write_file(60)
+
+        with patch("pdf_bot.pdf.pdf_service.compress_losslessly") as compress_losslessly:
+            compress_losslessly.side_effect = PdfReadError
+            async with self.sut.compress_pdf(self.TELEGRAM_FILE_ID) as compress_result:
+                assert compress_result == CompressResult(100, 60, out_path)
+                self.cli_service.compress_pdf.assert_called_once_with(
+                    file_path, tmp_path / "lossy.pdf", "default"
+                )
+
+    @pytest.mark.asyncio
+    async def test_compress_pdf_lossless_error_without_lossy(self, tmp_path: Path) -> None:
+        self._mock_compress(tmp_path)
+        self.sut.compress_lossy_profile = None
 
         with (
-            patch("pdf_bot.pdf.pdf_service.pdf2image") as pdf2image,
-            patch("pdf_bot.pdf.pdf_service.img2pdf") as img2pdf,
+            patch("pdf_bot.pdf.pdf_service.compress_losslessly", side_effect=PdfReadError),
+            pytest.raises(PdfReadError),
         ):
-            pdf2image.convert_from_path.return_value = image_paths
-            img2pdf.convert.return_value = image_bytes
+            async with self.sut.compress_pdf(self.TELEGRAM_FILE_ID):
+                pass
 
-            async with self.sut.grayscale_pdf(self.TELEGRAM_FILE_ID) as actual:
-                assert actual == self.file_path
-                self._assert_telegram_and_io_services("Grayscale")
-                self.io_service.create_temp_directory.assert_called_once()
-                pdf2image.convert_from_path.assert_called_once_with(
-                    self.download_path,
-                    output_folder=self.dir_path,
-                    fmt="png",
-                    grayscale=True,
-                    paths_only=True,
-                )
-                img2pdf.convert.assert_called_once_with(image_paths, rotation=Rotation.ifvalid)
-                self.file_path.open.assert_called_once_with("wb")
-                buffered_writer.write.assert_called_once_with(image_bytes)
+        self.cli_service.compress_pdf.assert_not_called()
 
     @pytest.mark.asyncio
-    async def test_compare_pdfs(self) -> None:
-        file_ids = ["a", "b"]
-        with patch("pdf_bot.pdf.pdf_service.pdf_diff") as pdf_diff:
-            async with self.sut.compare_pdfs(*file_ids) as actual:
-                assert actual == self.file_path
-                calls = [call(x) for x in file_ids]
-                self.telegram_service.download_pdf_file.assert_has_calls(calls, any_order=True)
-                pdf_diff.main.assert_called_once_with(
-                    files=[self.download_path, self.download_path],
-                    out_file=self.file_path,
-                )
+    async def test_compress_pdf_cli_error(self, tmp_path: Path) -> None:
+        _file_path, out_path = self._mock_compress(tmp_path)
+        self.cli_service.compress_pdf.side_effect = CLIServiceError()
+
+        with patch("pdf_bot.pdf.pdf_service.compress_losslessly") as compress_losslessly:
+            compress_losslessly.side_effect = self._write_file(90)
+            async with self.sut.compress_pdf(self.TELEGRAM_FILE_ID) as compress_result:
+                # The losslessly compressed file is kept
+                assert compress_result == CompressResult(100, 90, out_path)
 
     @pytest.mark.asyncio
-    async def test_compress_pdf(self) -> None:
-        old_size = 20
-        new_size = 10
+    async def test_compress_pdf_cli_error_without_fallback(self, tmp_path: Path) -> None:
+        self._mock_compress(tmp_path)
+        self.cli_service.compress_pdf.side_effect = CLIServiceError()
 
-        download_stat = self.mock_path_stat(self.download_path)
-        download_stat.st_size = old_size
+        with (
+            patch("pdf_bot.pdf.pdf_service.compress_losslessly", side_effect=PdfReadError),
+            pytest.raises(PdfServiceError),
+        ):
+            async with self.sut.compress_pdf(self.TELEGRAM_FILE_ID):
+                pass
 
-        file_stat = self.mock_path_stat(self.file_path)
-        file_stat.st_size = new_size
+    @pytest.mark.asyncio
+    async def test_convert_pdf_to_images(self, tmp_path: Path) -> None:
+        out_path = self._mock_convert_pdf_to_images(tmp_path, num_pages=5)
 
-        async with self.sut.compress_pdf(self.TELEGRAM_FILE_ID) as compress_result:
-            assert compress_result == CompressResult(old_size, new_size, self.file_path)
-            self.cli_service.compress_pdf.assert_called_once_with(
-                self.download_path, self.file_path
+        async with self.sut.convert_pdf_to_images(self.TELEGRAM_FILE_ID) as actual:
+            assert actual == out_path
+            self.telegram_service.download_pdf_file.assert_called_once_with(self.TELEGRAM_FILE_ID)
+            self.io_service.create_temp_zip_file.assert_called_once_with("PDF_images")
+
+            file_path = tmp_path / "file.pdf"
+            images_dir = tmp_path / "images"
+            self.cli_service.convert_pdf_to_images.assert_has_calls(
+                [
+                    call(file_path, images_dir / "pages_1", 1, 2, 200, False),
+                    call(file_path, images_dir / "pages_3", 3, 4, 200, False),
+                    call(file_path, images_dir / "pages_5", 5, 5, 200, False),
+                ]
             )
-            self._assert_telegram_and_io_services("Compressed")
+
+            with ZipFile(actual) as zf:
+                assert sorted(zf.namelist()) == [f"page_{i}.png" for i in range(1, 6)]
+                assert all(x.compress_type == ZIP_STORED for x in zf.infolist())
+                assert zf.read("page_3.png") == b"3"
+
+            # The images are removed once they're added to the archive
+            assert not any(images_dir.iterdir())
 
     @pytest.mark.asyncio
-    async def test_convert_to_images(self) -> None:
-        with patch("pdf_bot.pdf.pdf_service.pdf2image") as pdf2image:
-            async with self.sut.convert_pdf_to_images(self.TELEGRAM_FILE_ID) as actual:
-                assert actual == self.dir_path
-                self.telegram_service.download_pdf_file.assert_called_once_with(
-                    self.TELEGRAM_FILE_ID
-                )
-                self.io_service.create_temp_directory.assert_called_once_with("PDF_images")
-                pdf2image.convert_from_path.assert_called_once_with(
-                    self.download_path, output_folder=self.dir_path, fmt="png"
-                )
+    async def test_convert_pdf_to_images_error(self, tmp_path: Path) -> None:
+        self._mock_convert_pdf_to_images(tmp_path, num_pages=5)
+        self.cli_service.convert_pdf_to_images.side_effect = CLIServiceError
+
+        with pytest.raises(PdfServiceError):
+            async with self.sut.convert_pdf_to_images(self.TELEGRAM_FILE_ID):
+                pass
+
+    @pytest.mark.asyncio
+    async def test_convert_pdf_to_images_encrypted(self, tmp_path: Path) -> None:
+        file_path = tmp_path / "file.pdf"
+        with pikepdf.new() as pdf:
+            pdf.add_blank_page()
+            pdf.save(file_path, encryption=pikepdf.Encryption(user="user", owner="owner"))
+        self.telegram_service.download_pdf_file.return_value.__aenter__.return_value = file_path
+
+        with pytest.raises(PdfEncryptedError):
+            async with self.sut.convert_pdf_to_images(self.TELEGRAM_FILE_ID):
+                pass
+
+        self.cli_service.convert_pdf_to_images.assert_not_called()
 
     @pytest.mark.parametrize("has_font_data", [True, False])
     @pytest.mark.asyncio
@@ -213,13 +447,14 @@ class TestPDFService(
         font_config = MagicMock(spec=FontConfiguration)
 
         if has_font_data:
-            font_data = FontData("family", "url")
+            # The font configurations are cached by the fonts, so use a font that's unique
+            font_data = FontData("family", f"url_{uuid4()}")
             stylesheets = [css]
 
         with (
-            patch("pdf_bot.pdf.pdf_service.HTML") as html_cls,
-            patch("pdf_bot.pdf.pdf_service.CSS") as css_cls,
-            patch("pdf_bot.pdf.pdf_service.FontConfiguration") as font_config_cls,
+            patch("weasyprint.HTML") as html_cls,
+            patch("weasyprint.CSS") as css_cls,
+            patch("weasyprint.text.fonts.FontConfiguration") as font_config_cls,
         ):
             html_cls.return_value = html
             css_cls.return_value = css
@@ -249,11 +484,34 @@ class TestPDFService(
                 else:
                     css_cls.assert_not_called()
 
+    @pytest.mark.asyncio
+    async def test_create_pdf_from_text_reuses_font_config(self) -> None:
+        font_data = FontData("family", f"url_{uuid4()}")
+        font_config = MagicMock(spec=FontConfiguration)
+
+        with (
+            patch("weasyprint.HTML") as html_cls,
+            patch("weasyprint.CSS") as css_cls,
+            patch("weasyprint.text.fonts.FontConfiguration") as font_config_cls,
+        ):
+            font_config_cls.return_value = font_config
+
+            for _ in range(2):
+                async with self.sut.create_pdf_from_text(self.TELEGRAM_TEXT, font_data):
+                    pass
+
+            font_config_cls.assert_called_once()
+            css_cls.assert_called_once()
+            assert html_cls.return_value.write_pdf.call_count == 2
+            html_cls.return_value.write_pdf.assert_called_with(
+                self.file_path, stylesheets=[css_cls.return_value], font_config=font_config
+            )
+
     @pytest.mark.asyncio
     async def test_crop_pdf_by_percentage(self) -> None:
         percent = 0.1
 
-        with patch("pdf_bot.pdf.pdf_service.crop") as crop:
+        with patch("pdfCropMargins.crop") as crop:
             async with self.sut.crop_pdf_by_percentage(self.TELEGRAM_FILE_ID, percent) as actual:
                 assert actual == self.file_path
                 crop.assert_called_once_with(
@@ -265,7 +523,7 @@ class TestPDFService(
     async def test_crop_pdf_by_margin_size(self) -> None:
         margin_size = 10
 
-        with patch("pdf_bot.pdf.pdf_service.crop") as crop:
+        with patch("pdfCropMargins.crop") as crop:
             async with self.sut.crop_pdf_by_margin_size(
                 self.TELEGRAM_FILE_ID, margin_size
             ) as actual:
@@ -275,130 +533,105 @@ class TestPDFService(
                 )
                 self._assert_telegram_and_io_services("Cropped")
 
-    @pytest.mark.parametrize("num_pages", [0, 1, 2, 5])
     @pytest.mark.asyncio
-    async def test_decrypt_pdf(self, num_pages: int) -> None:
-        reader = MagicMock(spec=PdfReader)
-        writer = MagicMock(spec=PdfWriter)
-        reader.is_encrypted = True
+    async def test_extract_pdf_text(self, tmp_path: Path) -> None:
+        out_path = self._mock_extract_pdf_text(tmp_path, num_pages=5)
 
-        pages = [MagicMock() for _ in range(num_pages)]
-        reader.pages = pages
-
-        self.pdf_reader_cls.return_value = reader
-        self.pdf_writer_cls.return_value = writer
-
-        async with self.sut.decrypt_pdf(self.TELEGRAM_FILE_ID, self.PASSWORD) as actual:
-            assert actual == self.file_path
-            self._assert_telegram_and_io_services("Decrypted")
-            reader.decrypt.assert_called_once_with(self.PASSWORD)
+        async with self.sut.extract_pdf_text(self.TELEGRAM_FILE_ID) as actual:
+            assert actual == out_path
+            self.telegram_service.download_pdf_file.assert_called_once_with(self.TELEGRAM_FILE_ID)
+            self.io_service.create_temp_txt_file.assert_called_once_with("PDF_text")
 
-            calls = [call(page) for page in pages]
-            writer.add_page.assert_has_calls(calls)
+            file_path = tmp_path / "file.pdf"
+            text_dir = tmp_path / "text"
+            self.cli_service.extract_pdf_text.assert_has_calls(
+                [
+                    call(file_path, text_dir / "pages_1.txt", 1, 2),
+                    call(file_path, text_dir / "pages_3.txt", 3, 4),
+                    call(file_path, text_dir / "pages_5.txt", 5, 5),
+                ]
+            )
+            assert actual.read_text() == "".join(f"Page {i}\n" for i in range(1, 6))
+            assert not any(text_dir.iterdir())
 
+    @pytest.mark.parametrize(
+        ("engine", "func_name"),
+        [
+            ("pdfminer", "extract_text_with_pdfminer"),
+            ("pypdf", "extract_text_with_pypdf"),
+        ],
+    )
     @pytest.mark.asyncio
-    async def test_decrypt_pdf_not_encrypted(self) -> None:
-        reader = MagicMock(spec=PdfReader)
-        reader.is_encrypted = False
-        self.pdf_reader_cls.return_value = reader
-
-        with pytest.raises(PdfDecryptError):
-            async with self.sut.decrypt_pdf(self.TELEGRAM_FILE_ID, self.PASSWORD):
-                pass
+    async def test_extract_pdf_text_engine(
+        self, tmp_path: Path, engine: str, func_name: str
+    ) -> None:
+        out_path = self._mock_extract_pdf_text(tmp_path, num_pages=3)
+        laparams = {"line_margin": 1}
+        sut = PdfService(
+            self.cli_service,
+            self.executor_service,
+            self.io_service,
+            self.telegram_service,
+            self.watermark_cache_service,
+            Settings(
+                pdf_text_engine=engine,
+                pdf_text_window_size=self.TEXT_WINDOW_SIZE,
+                pdf_text_pdfminer_laparams=laparams,
+                ocr_cpu_budget=self.OCR_CPU_BUDGET,
+            ),
+        )
 
-        self.telegram_service.download_pdf_file.assert_called_once_with(self.TELEGRAM_FILE_ID)
-        reader.decrypt.assert_not_called()
-        self.io_service.create_temp_pdf_file.assert_not_called()
+        with patch(f"pdf_bot.pdf.pdf_service.{func_name}") as func:
+            func.side_effect = lambda _file_path, first, last, text_path, *_args: (
+                self._write_pages_text(text_path, first, last)
+            )
 
-    @pytest.mark.asyncio
-    async def test_decrypt_pdf_incorrect_password(self) -> None:
-        reader = MagicMock(spec=PdfReader)
-        reader.is_encrypted = True
-        reader.decrypt.return_value = 0
-        self.pdf_reader_cls.return_value = reader
+            async with sut.extract_pdf_text(self.TELEGRAM_FILE_ID) as actual:
+                assert actual == out_path
+                assert actual.read_text() == "Page 1\nPage 2\nPage 3\n"
 
-        with pytest.raises(PdfIncorrectPasswordError):
-            async with self.sut.decrypt_pdf(self.TELEGRAM_FILE_ID, self.PASSWORD):
-                pass
-        self._assert_decrypt_failure(reader)
+            file_path = tmp_path / "file.pdf"
+            text_path = tmp_path / "text" / "pages_1.txt"
+            if engine == "pdfminer":
+                func.assert_any_call(file_path, 1, 2, text_path, laparams)
+            else:
+                func.assert_any_call(file_path, 1, 2, text_path)
+            self.cli_service.extract_pdf_text.assert_not_called()
 
     @pytest.mark.asyncio
-    async def test_decrypt_pdf_invalid_encryption_method(self) -> None:
-        reader = MagicMock(spec=PdfReader)
-        reader.is_encrypted = True
-        reader.decrypt.side_effect = NotImplementedError()
-        self.pdf_reader_cls.return_value = reader
+    async def test_extract_pdf_text_no_text(self, tmp_path: Path) -> None:
+        self._mock_extract_pdf_text(tmp_path, num_pages=5)
+        self.cli_service.extract_pdf_text.side_effect = self._write_no_text
 
-        with pytest.raises(PdfDecryptError):
-            async with self.sut.decrypt_pdf(self.TELEGRAM_FILE_ID, self.PASSWORD):
+        with pytest.raises(PdfNoTextError):
+            async with self.sut.extract_pdf_text(self.TELEGRAM_FILE_ID):
                 pass
-        self._assert_decrypt_failure(reader)
-
-    @pytest.mark.parametrize("num_pages", [0, 1, 2, 5])
-    @pytest.mark.asyncio
-    async def test_encrypt_pdf(self, num_pages: int) -> None:
-        reader = MagicMock(spec=PdfReader)
-        writer = MagicMock(spec=PdfWriter)
-        reader.is_encrypted = False
-
-        pages = [MagicMock() for _ in range(num_pages)]
-        reader.pages = pages
-
-        self.pdf_reader_cls.return_value = reader
-        self.pdf_writer_cls.return_value = writer
-
-        async with self.sut.encrypt_pdf(self.TELEGRAM_FILE_ID, self.PASSWORD) as actual:
-            assert actual == self.file_path
-            self._assert_telegram_and_io_services("Encrypted")
-            writer.encrypt.assert_called_once_with(self.PASSWORD)
 
-            calls = [call(page) for page in pages]
-            writer.add_page.assert_has_calls(calls)
+        # Only the first window is extracted before bailing out
+        self.cli_service.extract_pdf_text.assert_called_once()
 
     @pytest.mark.asyncio
-    async def test_encrypt_pdf_already_encrypted(self) -> None:
-        reader = MagicMock(spec=PdfReader)
-        reader.is_encrypted = True
-        self.pdf_reader_cls.return_value = reader
+    async def test_extract_pdf_text_error(self, tmp_path: Path) -> None:
+        self._mock_extract_pdf_text(tmp_path, num_pages=5)
+        self.cli_service.extract_pdf_text.side_effect = CLIServiceError
 
-        with pytest.raises(PdfEncryptedError):
-            async with self.sut.encrypt_pdf(self.TELEGRAM_FILE_ID, self.PASSWORD):
-                pass
-
-        self.telegram_service.download_pdf_file.assert_called_once_with(self.TELEGRAM_FILE_ID)
-        self.io_service.create_temp_pdf_file.assert_not_called()
-
-    @pytest.mark.asyncio
-    async def test_extract_pdf_text(self) -> None:
-        async with self.sut.extract_pdf_text(self.TELEGRAM_FILE_ID) as actual:
-            assert actual == self.file_path
-            self.telegram_service.download_pdf_file.assert_called_once_with(self.TELEGRAM_FILE_ID)
-            self.io_service.create_temp_txt_file.assert_called_once_with("PDF_text")
-            self.extract_text.assert_called_once_with(self.download_path)
-
-    @pytest.mark.asyncio
-    async def test_extract_pdf_text_error(self) -> None:
-        self.extract_text.side_effect = PDFPasswordIncorrect
-
-        with pytest.raises(PdfEncryptedError):
+        with pytest.raises(PdfServiceError):
             async with self.sut.extract_pdf_text(self.TELEGRAM_FILE_ID):
                 pass
 
-        self.telegram_service.download_pdf_file.assert_called_once_with(self.TELEGRAM_FILE_ID)
-        self.io_service.create_temp_txt_file.assert_not_called()
-        self.extract_text.assert_called_once_with(self.download_path)
-
     @pytest.mark.asyncio
-    async def test_extract_pdf_text_no_text(self) -> None:
-        self.extract_text.return_value = ""
+    async def test_extract_pdf_text_encrypted(self, tmp_path: Path) -> None:
+        file_path = tmp_path / "file.pdf"
+        with pikepdf.new() as pdf:
+            pdf.add_blank_page()
+            pdf.save(file_path, encryption=pikepdf.Encryption(user="user", owner="owner"))
+        self.telegram_service.download_pdf_file.return_value.__aenter__.return_value = file_path
 
-        with pytest.raises(PdfNoTextError):
+        with pytest.raises(PdfEncryptedError):
             async with self.sut.extract_pdf_text(self.TELEGRAM_FILE_ID):
                 pass
 
-        self.telegram_service.download_pdf_file.assert_called_once_with(self.TELEGRAM_FILE_ID)
-        self.io_service.create_temp_txt_file.assert_not_called()
-        self.extract_text.assert_called_once_with(self.download_path)
+        self.cli_service.extract_pdf_text.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_extract_pdf_images(self) -> None:
@@ -456,6 +689,24 @@ class TestPDFService(
             self.io_service.create_temp_pdf_file.assert_called_once_with("Merged")
             writer.write.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_merge_pdfs_streaming(self) -> None:
+        file_data_list, _file_ids, file_paths = self._get_file_data_list(
+            2, file_size=self.STREAMING_MERGE_THRESHOLD
+        )
+        self.telegram_service.download_files.return_value.__aenter__.return_value = file_paths
+
+        with patch("pdf_bot.pdf.pdf_service.streaming_merge") as streaming_merge:
+            async with self.sut.merge_pdfs(file_data_list) as actual:
+                assert actual == self.file_path
+                streaming_merge.assert_called_once_with(
+                    file_paths,
+                    [x.name for x in file_data_list],
+                    self.file_path,
+                    self.sut.streaming_merge_memory_limit,
+                )
+                self.pdf_writer_cls.assert_not_called()
+
     @pytest.mark.asyncio
     @pytest.mark.parametrize("exception", [PyPdfReadError(), ValueError()])
     async def test_merge_pdfs_read_error(self, exception: Exception) -> None:
@@ -470,7 +721,7 @@ class TestPDFService(
                 pass
 
         self.telegram_service.download_files.assert_called_once_with(file_ids)
-        self.io_service.create_temp_pdf_file.assert_not_called()
+        self.io_service.create_temp_pdf_file.assert_called_once_with("Merged")
         writer.write.assert_not_called()
 
     @pytest.mark.asyncio
@@ -478,9 +729,96 @@ class TestPDFService(
         async with self.sut.ocr_pdf(self.TELEGRAM_FILE_ID) as actual:
             assert actual == self.file_path
             self._assert_telegram_and_io_services("OCR")
-            self.ocrmypdf.ocr.assert_called_once_with(
-                self.download_path, self.file_path, progress_bar=False
+            self.cli_service.render_pdf_previews.assert_called_once_with(
+                self.download_path, self.dir_path / "page", 20
             )
+            assert self.ocrmypdf.ocr.mock_calls == [self._ocr_call(["eng"], pages=None)]
+
+    @pytest.mark.asyncio
+    async def test_ocr_pdf_with_language(self) -> None:
+        async with self.sut.ocr_pdf(self.TELEGRAM_FILE_ID, "zh_TW"):
+            assert self.ocrmypdf.ocr.mock_calls == [self._ocr_call(["chi_tra", "eng"], pages=None)]
+
+    @pytest.mark.asyncio
+    async def test_ocr_pdf_redo_ocr(self) -> None:
+        sut = PdfService(
+            self.cli_service,
+            self.executor_service,
+            self.io_service,
+            self.telegram_service,
+            self.watermark_cache_service,
+            Settings(ocr_mode="redo_ocr", ocr_cpu_budget=1),
+        )
+
+        async with sut.ocr_pdf(self.TELEGRAM_FILE_ID):
+            assert self.ocrmypdf.ocr.mock_calls == [
+                self._ocr_call(["eng"], pages=None, jobs=1, redo_ocr=True)
+            ]
+
+    @pytest.mark.asyncio
+    async def test_ocr_pdf_skip_blank_pages(self, tmp_path: Path) -> None:
+        self._mock_render_pdf_previews(tmp_path, [False, True, False])
+
+        async with self.sut.ocr_pdf(self.TELEGRAM_FILE_ID):
+            assert self.ocrmypdf.ocr.mock_calls == [self._ocr_call(["eng"], pages="2")]
+
+    @pytest.mark.asyncio
+    async def test_ocr_pdf_all_blank_pages(self, tmp_path: Path) -> None:
+        self._mock_render_pdf_previews(tmp_path, [False, False])
+
+        with pytest.raises(PdfServiceError):
+            async with self.sut.ocr_pdf(self.TELEGRAM_FILE_ID):
+                pass
+
+        self.ocrmypdf.ocr.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_ocr_pdf_render_previews_error(self) -> None:
+        self.cli_service.render_pdf_previews.side_effect = CLIServiceError
+
+        async with self.sut.ocr_pdf(self.TELEGRAM_FILE_ID):
+            assert self.ocrmypdf.ocr.mock_calls == [self._ocr_call(["eng"], pages=None)]
+
+    @pytest.mark.asyncio
+    async def test_ocr_pdf_missing_language(self) -> None:
+        self.ocrmypdf.ocr.side_effect = [MissingDependencyError, None]
+
+        async with self.sut.ocr_pdf(self.TELEGRAM_FILE_ID, "de"):
+            self.ocrmypdf.ocr.assert_has_calls(
+                [
+                    self._ocr_call(["deu", "eng"], pages=None),
+                    self._ocr_call(["eng"], pages=None),
+                ]
+            )
+
+    @pytest.mark.asyncio
+    async def test_ocr_pdf_missing_default_language(self) -> None:
+        self.ocrmypdf.ocr.side_effect = MissingDependencyError
+
+        with pytest.raises(MissingDependencyError):
+            async with self.sut.ocr_pdf(self.TELEGRAM_FILE_ID):
+                pass
+
+        self.ocrmypdf.ocr.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_ocr_pdf_worker_crash(self) -> None:
+        self.executor_service.run.side_effect = ExecutorWorkerCrashError()
+
+        with pytest.raises(PdfServiceError):
+            async with self.sut.ocr_pdf(self.TELEGRAM_FILE_ID):
+                pass
+
+        self._assert_telegram_and_io_services("OCR")
+        assert self.executor_service.run.call_args.args[0] == ExecutorOperation.ocr
+        self.ocrmypdf.ocr.assert_not_called()
+
+    def test_encrypted_error_pickle(self) -> None:
+        err = PdfEncryptedError()
+        actual = pickle.loads(pickle.dumps(err))  # noqa: S301
+
+        assert isinstance(actual, PdfEncryptedError)
+        assert str(actual) == str(err)
 
     @pytest.mark.asyncio
     @pytest.mark.parametrize(
@@ -499,40 +837,7 @@ class TestPDFService(
                 pass
 
         self._assert_telegram_and_io_services("OCR")
-        self.ocrmypdf.ocr.assert_called_once_with(
-            self.download_path, self.file_path, progress_bar=False
-        )
-
-    @pytest.mark.asyncio
-    async def test_preview_pdf(self) -> None:
-        pdf_path = "pdf_path"
-        out_path = "out_path"
-
-        reader = MagicMock(spec=PdfReader)
-        writer = MagicMock(spec=PdfWriter)
-        page = MagicMock(spec=PageObject)
-        reader.is_encrypted = False
-        reader.pages = [page]
-
-        self.pdf_reader_cls.return_value = reader
-        self.pdf_writer_cls.return_value = writer
-
-        image = MagicMock()
-
-        self.io_service.create_temp_pdf_file.return_value.__enter__.return_value = pdf_path
-        self.io_service.create_temp_png_file.return_value.__enter__.return_value = out_path
-
-        with patch("pdf_bot.pdf.pdf_service.pdf2image") as pdf2image:
-            pdf2image.convert_from_path.return_value = [image]
-
-            async with self.sut.preview_pdf(self.TELEGRAM_FILE_ID) as actual:
-                assert actual == out_path
-                self.telegram_service.download_pdf_file.assert_called_once_with(
-                    self.TELEGRAM_FILE_ID
-                )
-                writer.add_page.assert_called_once_with(page)
-                pdf2image.convert_from_path.assert_called_once_with(pdf_path, fmt="png")
-                image.save.assert_called_once_with(out_path)
+        assert self.ocrmypdf.ocr.mock_calls == [self._ocr_call(["eng"], pages=None)]
 
     @pytest.mark.asyncio
     async def test_rename_pdf(self) -> None:
@@ -547,82 +852,218 @@ class TestPDFService(
                 self.io_service.create_temp_directory.assert_called_once()
                 shutil.copy.assert_called_once_with(self.download_path, expected)
 
-    @pytest.mark.parametrize("num_pages", [0, 1, 2, 5])
+    @pytest.mark.parametrize(
+        ("method", "backend_method", "args", "file_name"),
+        [
+            ("decrypt_pdf", "decrypt", (PASSWORD,), "Decrypted"),
+            ("encrypt_pdf", "encrypt", (PASSWORD,), "Encrypted"),
+            ("rotate_pdf", "rotate", (90,), "Rotated"),
+            ("scale_pdf_by_factor", "scale_by_factor", (ScaleByData(1, 2),), "Scaled"),
+            ("scale_pdf_to_dimension", "scale_to_dimension", (ScaleToData(1, 2),), "Scaled"),
+            ("split_pdf", "split", ("7:",), "Split"),
+        ],
+    )
+    @pytest.mark.parametrize("backend_name", ["pikepdf", "pypdf"])
     @pytest.mark.asyncio
-    async def test_rotate_pdf(self, num_pages: int) -> None:
-        degree = 90
-        reader = MagicMock(spec=PdfReader)
-        writer = MagicMock(spec=PdfWriter)
-        reader.is_encrypted = False
-
-        pages = [MagicMock(spec=PageObject) for _ in range(num_pages)]
-        rotated_pages = [MagicMock() for _ in pages]
-        for i, page in enumerate(pages):
-            page.rotate.return_value = rotated_pages[i]
-        reader.pages = pages
-
-        self.pdf_reader_cls.return_value = reader
-        self.pdf_writer_cls.return_value = writer
+    async def test_backend_operation(
+        self,
+        method: str,
+        backend_method: str,
+        args: tuple[Any, ...],
+        file_name: str,
+        backend_name: Literal["pikepdf", "pypdf"],
+    ) -> None:
+        # The scale methods share the same operation
+        operation = backend_method.split("_")[0]
+        other_name: Literal["pikepdf", "pypdf"] = (
+            "pypdf" if backend_name == "pikepdf" else "pikepdf"
+        )
+        sut = PdfService(
+            self.cli_service,
+            self.executor_service,
+            self.io_service,
+            self.telegram_service,
+            self.watermark_cache_service,
+            Settings(
+                pdf_default_backend=other_name,
+                pdf_backends={operation: backend_name},
+                ocr_cpu_budget=self.OCR_CPU_BUDGET,
+            ),
+        )
+        backends: dict[str, Any] = {
+            x: MagicMock(spec=AbstractPdfBackend) for x in ("pikepdf", "pypdf")
+        }
+        sut.backends = backends
 
-        async with self.sut.rotate_pdf(self.TELEGRAM_FILE_ID, degree) as actual:
+        async with getattr(sut, method)(self.TELEGRAM_FILE_ID, *args) as actual:
             assert actual == self.file_path
-            self._assert_telegram_and_io_services("Rotated")
-
-            for page in pages:
-                page.rotate.assert_called_once_with(degree)
-
-            calls = [call(page) for page in rotated_pages]
-            writer.add_page.assert_has_calls(calls)
+            self._assert_telegram_and_io_services(file_name)
+            getattr(backends[backend_name], backend_method).assert_called_once_with(
+                self.download_path, *args, self.file_path
+            )
+            assert not backends[other_name].method_calls
 
-    @pytest.mark.parametrize("num_pages", [0, 1, 2, 5])
     @pytest.mark.asyncio
-    async def test_scale_pdf_by_factor(self, num_pages: int) -> None:
-        scale_data = ScaleByData(1, 2)
+    async def test_backend_operation_error(self) -> None:
+        backend = MagicMock(spec=AbstractPdfBackend)
+        backend.decrypt.side_effect = PdfIncorrectPasswordError
+        self.sut.backends = {"pikepdf": backend}
 
-        reader = MagicMock(spec=PdfReader)
-        writer = MagicMock(spec=PdfWriter)
-        reader.is_encrypted = False
+        with pytest.raises(PdfIncorrectPasswordError):
+            async with self.sut.decrypt_pdf(self.TELEGRAM_FILE_ID, self.PASSWORD):
+                pass
 
-        pages = [MagicMock() for _ in range(num_pages)]
-        reader.pages = pages
+        self.io_service.create_temp_pdf_file.assert_called_once_with("Decrypted")
 
-        self.pdf_reader_cls.return_value = reader
-        self.pdf_writer_cls.return_value = writer
+    @pytest.mark.asyncio
+    async def test_run_pipeline(self, tmp_path: Path) -> None:
+        self.io_service.create_temp_directory.return_value.__enter__.return_value = tmp_path
+        backend = MagicMock(spec=AbstractPdfBackend)
+        self.sut.backends = {"pikepdf": backend}
+
+        rotate = PipelineStep(PipelineOperation.rotate, 90)
+        scale = PipelineStep(PipelineOperation.scale_by_factor, ScaleByData(2, 1))
+        compress = PipelineStep(PipelineOperation.compress)
+        grayscale = PipelineStep(PipelineOperation.grayscale)
+        split = PipelineStep(PipelineOperation.split, "::2")
+        encrypt = PipelineStep(PipelineOperation.encrypt, self.PASSWORD)
+
+        def apply_steps(_file_path: Path, _steps: list[PipelineStep], out_path: Path) -> None:
+            out_path.write_bytes(b"0" * 100)
+
+        backend.apply_steps.side_effect = apply_steps
+
+        with patch("pdf_bot.pdf.pdf_service.compress_losslessly") as compress_losslessly:
+            compress_losslessly.side_effect = self._write_file(50)
+            async with self.sut.run_pipeline(
+                self.TELEGRAM_FILE_ID, [rotate, scale, compress, grayscale, split, encrypt]
+            ) as actual:
+                assert actual == self.file_path
+                self._assert_telegram_and_io_services("Processed")
+
+                # The consecutive structural steps are run in a single backend call
+                backend.apply_steps.assert_has_calls(
+                    [
+                        call(self.download_path, [rotate, scale], tmp_path / "step_1.pdf"),
+                        call(tmp_path / "step_3.pdf", [split, encrypt], self.file_path),
+                    ]
+                )
+                assert backend.apply_steps.call_count == 2
+                compress_losslessly.assert_called_once_with(
+                    tmp_path / "step_1.pdf", tmp_path / "lossless.pdf"
+                )
+                assert (tmp_path / "step_2.pdf").stat().st_size == 50
+                self.cli_service.compress_pdf.assert_not_called()
+                self.cli_service.grayscale_pdf.assert_called_once_with(
+                    tmp_path / "step_2.pdf", tmp_path / "step_3.pdf"
+                )
 
-        async with self.sut.scale_pdf_by_factor(self.TELEGRAM_FILE_ID, scale_data) as actual:
+    @pytest.mark.asyncio
+    async def test_run_pipeline_single_group(self) -> None:
+        backend = MagicMock(spec=AbstractPdfBackend)
+        self.sut.backends = {"pikepdf": backend}
+        steps = [
+            PipelineStep(PipelineOperation.decrypt, self.PASSWORD),
+            PipelineStep(PipelineOperation.rotate, 90),
+        ]
+
+        async with self.sut.run_pipeline(self.TELEGRAM_FILE_ID, steps) as actual:
             assert actual == self.file_path
-            self._assert_telegram_and_io_services("Scaled")
+            backend.apply_steps.assert_called_once_with(self.download_path, steps, self.file_path)
+            self.cli_service.compress_pdf.assert_not_called()
 
-            calls = []
-            for page in pages:
-                page.scale.assert_called_once_with(scale_data.x, scale_data.y)
-                calls.append(call(page))
-            writer.add_page.assert_has_calls(calls)
-
-    @pytest.mark.parametrize("num_pages", [0, 1, 2, 5])
+    @pytest.mark.parametrize(
+        "steps",
+        [
+            [],
+            [
+                PipelineStep(PipelineOperation.rotate, 90),
+                PipelineStep(PipelineOperation.decrypt, PASSWORD),
+            ],
+            [
+                PipelineStep(PipelineOperation.encrypt, PASSWORD),
+                PipelineStep(PipelineOperation.compress),
+            ],
+        ],
+    )
     @pytest.mark.asyncio
-    async def test_scale_pdf_to_dimension(self, num_pages: int) -> None:
-        scale_data = ScaleToData(1, 2)
-
-        reader = MagicMock(spec=PdfReader)
-        writer = MagicMock(spec=PdfWriter)
-        reader.is_encrypted = False
+    async def test_run_pipeline_invalid_steps(self, steps: list[PipelineStep]) -> None:
+        with pytest.raises(PdfPipelineError):
+            async with self.sut.run_pipeline(self.TELEGRAM_FILE_ID, steps):
+                pass
+        self.telegram_service.download_pdf_file.assert_not_called()
 
-        pages = [MagicMock() for _ in range(num_pages)]
-        reader.pages = pages
+    @pytest.mark.asyncio
+    async def test_run_pipeline_cli_error(self, tmp_path: Path) -> None:
+        self._mock_compress(tmp_path)
+        self.cli_service.compress_pdf.side_effect = CLIServiceError()
+        backend = MagicMock(spec=AbstractPdfBackend)
+        self.sut.backends = {"pikepdf": backend}
+        steps = [
+            PipelineStep(PipelineOperation.compress),
+            PipelineStep(PipelineOperation.rotate, 90),
+        ]
 
-        self.pdf_reader_cls.return_value = reader
-        self.pdf_writer_cls.return_value = writer
+        with (
+            patch("pdf_bot.pdf.pdf_service.compress_losslessly", side_effect=PdfReadError),
+            pytest.raises(PdfServiceError),
+        ):
+            async with self.sut.run_pipeline(self.TELEGRAM_FILE_ID, steps):
+                pass
+        backend.apply_steps.assert_not_called()
 
-        async with self.sut.scale_pdf_to_dimension(self.TELEGRAM_FILE_ID, scale_data) as actual:
-            assert actual == self.file_path
-            self._assert_telegram_and_io_services("Scaled")
+    @pytest.mark.asyncio
+    async def test_split_pdf_by_ranges(self, tmp_path: Path) -> None:
+        self.io_service.create_temp_directory.return_value.__enter__.return_value = tmp_path
+        out_path = tmp_path / "out.zip"
+        self.io_service.create_temp_zip_file.return_value.__enter__.return_value = out_path
+        backend = MagicMock(spec=AbstractPdfBackend)
+        backend.split_many.side_effect = self._write_split_files
+        self.sut.backends = {"pikepdf": backend}
+
+        async with self.sut.split_pdf_by_ranges(
+            self.TELEGRAM_FILE_ID, ["0:3", "3:6", "7"]
+        ) as actual:
+            assert actual == out_path
+            self.io_service.create_temp_zip_file.assert_called_once_with("Split")
+
+            # The ranges are split in a batch per worker, each reading the file once
+            backend.split_many.assert_has_calls(
+                [
+                    call(
+                        self.download_path,
+                        ["0:3", "3:6"],
+                        [tmp_path / "range_1.pdf", tmp_path / "range_2.pdf"],
+                    ),
+                    call(self.download_path, ["7"], [tmp_path / "range_3.pdf"]),
+                ],
+                any_order=True,
+            )
+            with ZipFile(out_path) as zip_file:
+                assert sorted(zip_file.namelist()) == ["range_1.pdf", "range_2.pdf", "range_3.pdf"]
+            assert not (tmp_path / "range_1.pdf").exists()
 
-            calls = []
-            for page in pages:
-                page.scale_to.assert_called_once_with(scale_data.x, scale_data.y)
-                calls.append(call(page))
-            writer.add_page.assert_has_calls(calls)
+    @pytest.mark.asyncio
+    async def test_burst_pdf(self, tmp_path: Path) -> None:
+        file_path = self._create_pdf(tmp_path / "file.pdf", num_pages=12)
+        self._mock_download_pdf_file({self.TELEGRAM_FILE_ID: file_path})
+        dir_path = tmp_path / "split"
+        dir_path.mkdir()
+        self.io_service.create_temp_directory.return_value.__enter__.return_value = dir_path
+        out_path = tmp_path / "out.zip"
+        self.io_service.create_temp_zip_file.return_value.__enter__.return_value = out_path
+
+        async with self.sut.burst_pdf(self.TELEGRAM_FILE_ID) as actual:
+            assert actual == out_path
+            self.io_service.create_temp_zip_file.assert_called_once_with("Pages")
+
+            with ZipFile(out_path) as zip_file:
+                names = sorted(zip_file.namelist())
+                assert names == [f"page_{i:02d}.pdf" for i in range(1, 13)]
+
+                for name in names:
+                    with pikepdf.open(BytesIO(zip_file.read(name))) as pdf:
+                        assert len(pdf.pages) == 1
 
     @pytest.mark.parametrize(
         "split_range",
@@ -651,20 +1092,184 @@ class TestPDFService(
     async def test_split_range_invalid(self) -> None:
         assert self.sut.split_range_valid("clearly_invalid") is False
 
-    @pytest.mark.asyncio
-    async def test_split_pdf(self) -> None:
-        split_range = "7:"
-        reader = MagicMock(spec=PdfReader)
-        writer = MagicMock(spec=PdfWriter)
-        reader.is_encrypted = False
+    def _mock_extract_pdf_text(self, tmp_path: Path, num_pages: int) -> Path:
+        file_path = tmp_path / "file.pdf"
+        with pikepdf.new() as pdf:
+            for _ in range(num_pages):
+                pdf.add_blank_page()
+            pdf.save(file_path)
+
+        text_dir = tmp_path / "text"
+        text_dir.mkdir()
+        out_path = tmp_path / "out.txt"
+
+        async def extract_pdf_text(
+            _input_path: Path, output_path: Path, first_page: int, last_page: int
+        ) -> None:
+            self._write_pages_text(output_path, first_page, last_page)
+
+        self.telegram_service.download_pdf_file.return_value.__aenter__.return_value = file_path
+        self.io_service.create_temp_directory.return_value.__enter__.return_value = text_dir
+        self.io_service.create_temp_txt_file.return_value.__enter__.return_value = out_path
+        self.cli_service.extract_pdf_text.side_effect = extract_pdf_text
+        return out_path
+
+    def _mock_download_pdf_file(self, file_paths: dict[str, Path]) -> None:
+        def download_pdf_file(file_id: str) -> MagicMock:
+            mock = MagicMock()
+            mock.__aenter__.return_value = file_paths[file_id]
+            return mock
+
+        self.telegram_service.download_pdf_file.side_effect = download_pdf_file
+
+    def _mock_compress(self, tmp_path: Path) -> tuple[Path, Path]:
+        file_path = tmp_path / "in.pdf"
+        file_path.write_bytes(b"0" * 100)
+        out_path = tmp_path / "out.pdf"
+
+        self.telegram_service.download_pdf_file.return_value.__aenter__.return_value = file_path
+        self.io_service.create_temp_directory.return_value.__enter__.return_value = tmp_path
+        self.io_service.create_temp_pdf_file.return_value.__enter__.return_value = out_path
+        return file_path, out_path
 
-        self.pdf_reader_cls.return_value = reader
-        self.pdf_writer_cls.return_value = writer
+    @staticmethod
+    def _write_file(size: int) -> Callable[..., None]:
+        def write_file(_input_path: Path, out_path: Path, *_args: Any) -> None:
+            out_path.write_bytes(b"0" * size)
 
-        async with self.sut.split_pdf(self.TELEGRAM_FILE_ID, split_range) as actual:
-            assert actual == self.file_path
-            self._assert_telegram_and_io_services("Split")
-            writer.append.assert_called_once_with(reader, pages=PageRange(split_range))
+        return write_file
+
+    def _mock_watermark_cache(self, tmp_path: Path) -> Path:
+        cache_dir = tmp_path / "cache"
+        self.sut.watermark_cache_service = DownloadCacheService(cache_dir, 1024**2)
+        return cache_dir
+
+    @staticmethod
+    def _create_pdf(file_path: Path, num_pages: int) -> Path:
+        with pikepdf.new() as pdf:
+            for _ in range(num_pages):
+                pdf.add_blank_page()
+            pdf.save(file_path)
+        return file_path
+
+    @staticmethod
+    def _write_split_files(
+        _file_path: Path, _split_ranges: list[str], out_paths: list[Path]
+    ) -> None:
+        for path in out_paths:
+            path.write_bytes(b"pdf")
+
+    @staticmethod
+    def _context_manager(return_value: Path) -> MagicMock:
+        mock = MagicMock()
+        mock.__enter__.return_value = return_value
+        return mock
+
+    def _mock_compare_pdfs(self, tmp_path: Path, texts_a: list[str], texts_b: list[str]) -> Path:
+        texts: dict[Path, list[str]] = {}
+        for name, pages in (("a", texts_a), ("b", texts_b)):
+            file_path = tmp_path / f"{name}.pdf"
+            with pikepdf.new() as pdf:
+                for _ in pages:
+                    pdf.add_blank_page()
+                pdf.save(file_path)
+            texts[file_path] = pages
+
+        dir_path = tmp_path / "compare"
+        dir_path.mkdir()
+        out_path = tmp_path / "out.zip"
+
+        async def extract_pdf_text(
+            input_path: Path, output_path: Path, first_page: int, last_page: int
+        ) -> None:
+            pages = texts[input_path][first_page - 1 : last_page]
+            output_path.write_text("".join(f"{x}\f" for x in pages))
+
+        self.telegram_service.download_pdf_files.return_value.__aenter__.return_value = list(texts)
+        self.io_service.create_temp_directory.return_value.__enter__.return_value = dir_path
+        self.io_service.create_temp_zip_file.return_value.__enter__.return_value = out_path
+        self.cli_service.extract_pdf_text.side_effect = extract_pdf_text
+        return out_path
+
+    @staticmethod
+    def _write_diff_image(files: list[Path], out_file: Path) -> None:
+        for path in files:
+            with pikepdf.open(path) as pdf:
+                assert len(pdf.pages) == 1
+        out_file.write_bytes(b"image")
+
+    @staticmethod
+    def _write_pages_text(text_path: Path, first_page: int, last_page: int) -> None:
+        text_path.write_text("".join(f"Page {i}\f" for i in range(first_page, last_page + 1)))
+
+    @staticmethod
+    async def _write_no_text(_input_path: Path, output_path: Path, *_args: Any) -> None:
+        output_path.write_text("\f \f")
+
+    def _ocr_call(
+        self, languages: list[str], pages: str | None, jobs: int = 2, redo_ocr: bool = False
+    ) -> Any:
+        return call(
+            self.download_path,
+            self.file_path,
+            progress_bar=False,
+            jobs=jobs,
+            optimize=1,
+            pages=pages,
+            skip_text=not redo_ocr,
+            redo_ocr=redo_ocr,
+            language=languages,
+        )
+
+    def _mock_render_pdf_previews(self, tmp_path: Path, has_text: list[bool]) -> None:
+        self.io_service.create_temp_directory.return_value.__enter__.return_value = tmp_path
+
+        async def render_pdf_previews(_input_path: Path, output_path: Path, _dpi: int) -> None:
+            width = height = 10
+            for i, page_has_text in enumerate(has_text, start=1):
+                pixels = bytearray(b"\xff" * width * height)
+                if page_has_text:
+                    pixels[:width] = b"\x00" * width
+
+                path = output_path.parent / f"{output_path.name}-{i}.pgm"
+                path.write_bytes(b"P5\n%d %d\n255\n" % (width, height) + pixels)
+
+        self.cli_service.render_pdf_previews.side_effect = render_pdf_previews
+
+    def _mock_convert_pdf_to_images(self, tmp_path: Path, num_pages: int) -> Path:
+        file_path = tmp_path / "file.pdf"
+        with pikepdf.new() as pdf:
+            for _ in range(num_pages):
+                pdf.add_blank_page()
+            pdf.save(file_path)
+
+        images_dir = tmp_path / "images"
+        images_dir.mkdir()
+        out_path = tmp_path / "out.zip"
+
+        async def convert_pdf_to_images(
+            _input_path: Path,
+            output_path: Path,
+            first_page: int,
+            last_page: int,
+            *_args: Any,
+        ) -> None:
+            for page in range(first_page, last_page + 1):
+                output_path.with_name(f"{output_path.name}-{page}.png").write_bytes(
+                    str(page).encode()
+                )
+
+        self.telegram_service.download_pdf_file.return_value.__aenter__.return_value = file_path
+        self.io_service.create_temp_directory.return_value.__enter__.return_value = images_dir
+        self.io_service.create_temp_zip_file.return_value.__enter__.return_value = out_path
+        self.cli_service.convert_pdf_to_images.side_effect = convert_pdf_to_images
+        return out_path
+
+    @staticmethod
+    def _executor_run_side_effect(
+        _operation: ExecutorOperation, func: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> Any:
+        return func(*args, **kwargs)
 
     @staticmethod
     def _async_context_manager_side_effect_echo(
@@ -678,10 +1283,9 @@ class TestPDFService(
     def _method_side_effect_echo(return_value: str, *_args: Any, **_kwargs: Any) -> str:
         return return_value
 
-    @staticmethod
     def _get_file_data_list(
-        num_files: int,
-    ) -> tuple[list[FileData], list[str], list[str]]:
+        self, num_files: int, file_size: int = 1
+    ) -> tuple[list[FileData], list[str], list[MagicMock]]:
         file_data_list = []
         file_ids = []
         file_paths = []
@@ -690,15 +1294,13 @@ class TestPDFService(
             file_data = FileData(f"id_{i}", f"name_{i}")
             file_data_list.append(file_data)
             file_ids.append(file_data.id)
-            file_paths.append(f"path_{i}")
+
+            file_path = self.mock_file_path()
+            self.mock_path_stat(file_path).st_size = file_size
+            file_paths.append(file_path)
 
         return file_data_list, file_ids, file_paths
 
     def _assert_telegram_and_io_services(self, temp_pdf_file_prefix: str) -> None:
         self.telegram_service.download_pdf_file.assert_called_once_with(self.TELEGRAM_FILE_ID)
         self.io_service.create_temp_pdf_file.assert_called_once_with(temp_pdf_file_prefix)
-
-    def _assert_decrypt_failure(self, reader: MagicMock) -> None:
-        self.telegram_service.download_pdf_file.assert_called_once_with(self.TELEGRAM_FILE_ID)
-        reader.decrypt.assert_called_once_with(self.PASSWORD)
-        self.io_service.create_temp_pdf_file.assert_not_called()
@@ -0,0 +1,148 @@
+from pathlib import Path
+from unittest.mock import MagicMock, call, patch
+
+import pytest
+from pypdf import PageObject, PdfReader, PdfWriter
+from pypdf.errors import PdfReadError as PyPdfReadError
+from pypdf.pagerange import PageRange
+
+from pdf_bot.pdf import (
+    PdfDecryptError,
+    PdfEncryptedError,
+    PdfIncorrectPasswordError,
+    PdfReadError,
+    PypdfBackend,
+    ScaleByData,
+    ScaleToData,
+)
+
+
+class TestPypdfBackend:
+    PASSWORD = "password"
+    FILE_PATH = Path("file.pdf")
+    OUT_PATH = Path("out.pdf")
+
+    def setup_method(self) -> None:
+        self.reader = MagicMock(spec=PdfReader)
+        self.reader.is_encrypted = False
+        self.writer = MagicMock(spec=PdfWriter)
+
+        self.pdf_reader_patcher = patch(
+            "pdf_bot.pdf.pypdf_backend.PdfReader", return_value=self.reader
+        )
+        self.pdf_writer_patcher = patch(
+            "pdf_bot.pdf.pypdf_backend.PdfWriter", return_value=self.writer
+        )
+        self.pdf_reader_cls = self.pdf_reader_patcher.start()
+        self.pdf_writer_patcher.start()
+
+        self.sut = PypdfBackend()
+
+    def teardown_method(self) -> None:
+        self.pdf_reader_patcher.stop()
+        self.pdf_writer_patcher.stop()
+
+    @pytest.mark.parametrize("num_pages", [0, 1, 2, 5])
+    def test_decrypt(self, num_pages: int) -> None:
+        self.reader.is_encrypted = True
+        pages = [MagicMock() for _ in range(num_pages)]
+        self.reader.pages = pages
+
+        self.sut.decrypt(self.FILE_PATH, self.PASSWORD, self.OUT_PATH)
+
+        self.reader.decrypt.assert_called_once_with(self.PASSWORD)
+        self.writer.add_page.assert_has_calls([call(page) for page in pages])
+        self.writer.write.assert_called_once_with(self.OUT_PATH)
+
+    def test_decrypt_not_encrypted(self) -> None:
+        with pytest.raises(PdfDecryptError):
+            self.sut.decrypt(self.FILE_PATH, self.PASSWORD, self.OUT_PATH)
+        self.reader.decrypt.assert_not_called()
+
+    def test_decrypt_incorrect_password(self) -> None:
+        self.reader.is_encrypted = True
+        self.reader.decrypt.return_value = 0
+
+        with pytest.raises(PdfIncorrectPasswordError):
+            self.sut.decrypt(self.FILE_PATH, self.PASSWORD, self.OUT_PATH)
+        self.reader.decrypt.assert_called_once_with(self.PASSWORD)
+
+    def test_decrypt_invalid_encryption_method(self) -> None:
+        self.reader.is_encrypted = True
+        self.reader.decrypt.side_effect = NotImplementedError()
+
+        with pytest.raises(PdfDecryptError):
+            self.sut.decrypt(self.FILE_PATH, self.PASSWORD, self.OUT_PATH)
+        self.reader.decrypt.assert_called_once_with(self.PASSWORD)
+
+    @pytest.mark.parametrize("num_pages", [0, 1, 2, 5])
+    def test_encrypt(self, num_pages: int) -> None:
+        pages = [MagicMock() for _ in range(num_pages)]
+        self.reader.pages = pages
+
+        self.sut.encrypt(self.FILE_PATH, self.PASSWORD, self.OUT_PATH)
+
+        self.writer.encrypt.assert_called_once_with(self.PASSWORD)
+        self.writer.add_page.assert_has_calls([call(page) for page in pages])
+        self.writer.write.assert_called_once_with(self.OUT_PATH)
+
+    def test_encrypt_already_encrypted(self) -> None:
+        self.reader.is_encrypted = True
+
+        with pytest.raises(PdfEncryptedError):
+            self.sut.encrypt(self.FILE_PATH, self.PASSWORD, self.OUT_PATH)
+        self.writer.write.assert_not_called()
+
+    def test_read_error(self) -> None:
+        self.pdf_reader_cls.side_effect = PyPdfReadError()
+
+        with pytest.raises(PdfReadError):
+            self.sut.rotate(self.FILE_PATH, 90, self.OUT_PATH)
+
+    @pytest.mark.parametrize("num_pages", [0, 1, 2, 5])
+    def test_rotate(self, num_pages: int) -> None:
+        degree = 90
+        pages = [MagicMock(spec=PageObject) for _ in range(num_pages)]
+        rotated_pages = [MagicMock() for _ in pages]
+        for i, page in enumerate(pages):
+            page.rotate.return_value = rotated_pages[i]
+        self.reader.pages = pages
+
+        self.sut.rotate(self.FILE_PATH, degree, self.OUT_PATH)
+
+        for page in pages:
+            page.rotate.assert_called_once_with(degree)
+        self.writer.add_page.assert_has_calls([call(page) for page in rotated_pages])
+        self.writer.write.assert_called_once_with(self.OUT_PATH)
+
+    @pytest.mark.parametrize("num_pages", [0, 1, 2, 5])
+    def test_scale_by_factor(self, num_pages: int) -> None:
+        scale_data = ScaleByData(1, 2)
+        pages = [MagicMock() for _ in range(num_pages)]
+        self.reader.pages = pages
+
+        self.sut.scale_by_factor(self.FILE_PATH, scale_data, self.OUT_PATH)
+
+        for page in pages:
+            page.scale.assert_called_once_with(scale_data.x, scale_data.y)
+        self.writer.add_page.assert_has_calls([call(page) for page in pages])
+
+    @pytest.mark.parametrize("num_pages", [0, 1, 2, 5])
+    def test_scale_to_dimension(self, num_pages: int) -> None:
+        scale_data = ScaleToData(1, 2)
+        pages = [MagicMock() for _ in range(num_pages)]
+        self.reader.pages = pages
+
+        self.sut.scale_to_dimension(self.FILE_PATH, scale_data, self.OUT_PATH)
+
+        for page in pages:
+            page.scale_to.assert_called_once_with(scale_data.x, scale_data.y)
+        self.writer.add_page.assert_has_calls([call(page) for page in pages])
+
+    def test_split(self) -> None:
+        split_range = "7:"
+
+        self.sut.split(self.FILE_PATH, split_range, self.OUT_PATH)
+
+        self.writer.append.assert_called_once_with(self.reader, pages=PageRange(split_range))
+        self.writer.write.assert_called_once_with(self.OUT_PATH)
@@ -0,0 +1,93 @@
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pikepdf
+import pytest
+from pikepdf import Dictionary, Name, Pdf, PdfError, Stream
+
+from pdf_bot.pdf.exceptions import PdfEncryptedError, PdfReadError, PdfServiceError
+from pdf_bot.pdf.streaming_merge import streaming_merge
+
+
+class TestStreamingMerge:
+    IMAGE_DATA = b"\xff" * 100
+
+    def test_streaming_merge(self, tmp_path: Path) -> None:
+        file_paths = [
+            self._create_pdf(tmp_path / "a.pdf", num_pages=2),
+            self._create_pdf(tmp_path / "b.pdf", num_pages=3),
+        ]
+        out_path = tmp_path / "out.pdf"
+
+        streaming_merge(file_paths, ["a", "b"], out_path)
+
+        with Pdf.open(out_path) as pdf:
+            assert len(pdf.pages) == 5
+
+            # The image shared by the pages of each file is only copied once per file
+            images = {
+                page.Resources.XObject.Im0.objgen for page in pdf.pages if "/Resources" in page
+            }
+            assert len(images) == 2
+
+    def test_streaming_merge_invalid_file(self, tmp_path: Path) -> None:
+        file_path = self._create_pdf(tmp_path / "a.pdf")
+        invalid_path = tmp_path / "invalid.pdf"
+        invalid_path.write_bytes(b"invalid")
+
+        with pytest.raises(PdfReadError, match="invalid_name"):
+            streaming_merge([file_path, invalid_path], ["a", "invalid_name"], tmp_path / "out.pdf")
+
+    def test_streaming_merge_encrypted_file(self, tmp_path: Path) -> None:
+        file_path = tmp_path / "encrypted.pdf"
+        with Pdf.new() as pdf:
+            pdf.add_blank_page()
+            pdf.save(file_path, encryption=pikepdf.Encryption(user="user", owner="owner"))
+
+        with pytest.raises(PdfEncryptedError):
+            streaming_merge([file_path], ["encrypted"], tmp_path / "out.pdf")
+
+    def test_streaming_merge_job_error(self, tmp_path: Path) -> None:
+        file_path = self._create_pdf(tmp_path / "a.pdf")
+
+        with patch("pdf_bot.pdf.streaming_merge.Job") as job_cls:
+            job_cls.return_value.run.side_effect = PdfError
+
+            with pytest.raises(PdfServiceError):
+                streaming_merge([file_path], ["a"], tmp_path / "out.pdf")
+
+    def test_streaming_merge_memory_limit(self, tmp_path: Path) -> None:
+        file_path = self._create_pdf(tmp_path / "a.pdf")
+        memory_limit = 1024
+
+        with (
+            patch("pdf_bot.pdf.streaming_merge.multiprocessing") as multiprocessing,
+            patch("pdf_bot.pdf.streaming_merge.resource") as resource,
+            patch("pdf_bot.pdf.streaming_merge.Job") as job_cls,
+        ):
+            job_cls.return_value.run.side_effect = MemoryError
+            multiprocessing.parent_process.return_value = MagicMock()
+            resource.RLIM_INFINITY = -1
+            resource.getrlimit.return_value = (-1, -1)
+
+            with pytest.raises(PdfServiceError):
+                streaming_merge([file_path], ["a"], tmp_path / "out.pdf", memory_limit)
+
+            limit_call, restore_call = resource.setrlimit.call_args_list
+            assert limit_call.args[1][0] > memory_limit
+            assert restore_call.args[1] == (-1, -1)
+
+    def _create_pdf(self, path: Path, num_pages: int = 1) -> Path:
+        with Pdf.new() as pdf:
+            image = Stream(pdf, self.IMAGE_DATA)
+            image.Type = Name.XObject
+            image.Subtype = Name.Image
+            image.Width = image.Height = 10
+            image.ColorSpace = Name.DeviceGray
+            image.BitsPerComponent = 8
+
+            for _ in range(num_pages):
+                pdf.add_blank_page()
+                pdf.pages[-1].Resources = Dictionary(XObject=Dictionary(Im0=image))
+            pdf.save(path)
+        return path
@@ -0,0 +1,70 @@
+from pathlib import Path
+
+import pikepdf
+import pytest
+from pikepdf import Dictionary, Name, Pdf
+
+from pdf_bot.pdf.exceptions import PdfEncryptedError
+from pdf_bot.pdf.text_extraction import extract_text_with_pdfminer, extract_text_with_pypdf
+
+
+class TestTextExtraction:
+    NUM_PAGES = 4
+
+    @pytest.mark.parametrize("laparams", [None, {"line_margin": 0.5}])
+    def test_extract_text_with_pdfminer(
+        self, tmp_path: Path, laparams: dict[str, float] | None
+    ) -> None:
+        file_path = self._create_pdf(tmp_path / "file.pdf")
+        out_path = tmp_path / "out.txt"
+
+        extract_text_with_pdfminer(file_path, 2, 3, out_path, laparams)
+
+        pages = self._get_pages(out_path)
+        assert pages == ["Page 2", "Page 3"]
+
+    def test_extract_text_with_pdfminer_encrypted(self, tmp_path: Path) -> None:
+        file_path = self._create_pdf(tmp_path / "file.pdf", encrypted=True)
+
+        with pytest.raises(PdfEncryptedError):
+            extract_text_with_pdfminer(file_path, 1, 1, tmp_path / "out.txt")
+
+    def test_extract_text_with_pypdf(self, tmp_path: Path) -> None:
+        file_path = self._create_pdf(tmp_path / "file.pdf")
+        out_path = tmp_path / "out.txt"
+
+        extract_text_with_pypdf(file_path, 2, 3, out_path)
+
+        pages = self._get_pages(out_path)
+        assert pages == ["Page 2", "Page 3"]
+
+    def test_extract_text_with_pypdf_encrypted(self, tmp_path: Path) -> None:
+        file_path = self._create_pdf(tmp_path / "file.pdf", encrypted=True)
+
+        with pytest.raises(PdfEncryptedError):
+            extract_text_with_pypdf(file_path, 1, 1, tmp_path / "out.txt")
+
+    def _create_pdf(self, path: Path, encrypted: bool = False) -> Path:
+        with Pdf.new() as pdf:
+            font = pdf.make_indirect(
+                Dictionary(
+                    Type=Name.Font,
+                    Subtype=Name.Type1,
+                    BaseFont=Name.Helvetica,
+                    Encoding=Name.WinAnsiEncoding,
+                )
+            )
+            for i in range(1, self.NUM_PAGES + 1):
+                pdf.add_blank_page()
+                page = pdf.pages[-1]
+                page.Resources = Dictionary(Font=Dictionary(F1=font))
+                page.Contents = pdf.make_stream(f"BT /F1 12 Tf 72 720 Td (Page {i}) Tj ET".encode())
+
+            encryption = pikepdf.Encryption(user="user", owner="owner") if encrypted else False
+            pdf.save(path, encryption=encryption)
+        return path
+
+    @staticmethod
+    def _get_pages(path: Path) -> list[str]:
+        text = path.read_text(encoding="utf-8")
+        return [x.strip() for x in text.split("\f") if x.strip()]
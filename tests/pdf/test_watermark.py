@@ -0,0 +1,83 @@
+from pathlib import Path
+
+import pikepdf
+import pytest
+from pikepdf import Dictionary, Name, Pdf
+
+from pdf_bot.pdf import PdfEncryptedError, PdfReadError
+from pdf_bot.pdf.watermark import add_watermark, create_watermark_template
+
+
+class TestWatermark:
+    WATERMARK_CONTENT = b"BT /F1 48 Tf 100 400 Td (WATERMARK) Tj ET"
+
+    def test_create_watermark_template(self, tmp_path: Path) -> None:
+        wmk_path = self._create_watermark(tmp_path, num_pages=3)
+        template_path = tmp_path / "template.pdf"
+
+        create_watermark_template(wmk_path, template_path)
+
+        with Pdf.open(template_path) as pdf:
+            assert len(pdf.pages) == 1
+            assert pdf.pages[0].Contents.read_bytes() == self.WATERMARK_CONTENT
+
+    def test_create_watermark_template_no_pages(self, tmp_path: Path) -> None:
+        wmk_path = tmp_path / "wmk.pdf"
+        with Pdf.new() as pdf:
+            pdf.save(wmk_path)
+
+        with pytest.raises(PdfReadError):
+            create_watermark_template(wmk_path, tmp_path / "template.pdf")
+
+    def test_create_watermark_template_encrypted(self, tmp_path: Path) -> None:
+        wmk_path = tmp_path / "wmk.pdf"
+        with Pdf.new() as pdf:
+            pdf.add_blank_page()
+            pdf.save(wmk_path, encryption=pikepdf.Encryption(user="user", owner="owner"))
+
+        with pytest.raises(PdfEncryptedError):
+            create_watermark_template(wmk_path, tmp_path / "template.pdf")
+
+    def test_add_watermark(self, tmp_path: Path) -> None:
+        src_path = tmp_path / "src.pdf"
+        with Pdf.new() as pdf:
+            for _ in range(20):
+                pdf.add_blank_page()
+            pdf.save(src_path)
+
+        template_path = tmp_path / "template.pdf"
+        out_path = tmp_path / "out.pdf"
+        create_watermark_template(self._create_watermark(tmp_path), template_path)
+
+        add_watermark(src_path, template_path, out_path)
+
+        with Pdf.open(out_path) as pdf:
+            xobjects = [x for page in pdf.pages for x in page.Resources.XObject.values()]
+            assert len(xobjects) == 20
+            assert len({x.objgen for x in xobjects}) == 1
+            assert xobjects[0].read_bytes() == self.WATERMARK_CONTENT
+            assert xobjects[0].Resources.Font.F1.BaseFont == Name.Helvetica
+
+    def test_add_watermark_invalid_file(self, tmp_path: Path) -> None:
+        src_path = tmp_path / "src.pdf"
+        src_path.write_bytes(b"invalid")
+        template_path = tmp_path / "template.pdf"
+        create_watermark_template(self._create_watermark(tmp_path), template_path)
+
+        with pytest.raises(PdfReadError):
+            add_watermark(src_path, template_path, tmp_path / "out.pdf")
+
+    def _create_watermark(self, tmp_path: Path, num_pages: int = 1) -> Path:
+        file_path = tmp_path / "wmk.pdf"
+        with Pdf.new() as pdf:
+            font = pdf.make_indirect(
+                Dictionary(Type=Name.Font, Subtype=Name.Type1, BaseFont=Name.Helvetica)
+            )
+            for _ in range(num_pages):
+                pdf.add_blank_page()
+
+            page = pdf.pages[0]
+            page.Resources = Dictionary(Font=Dictionary(F1=font))
+            page.Contents = pdf.make_stream(self.WATERMARK_CONTENT)
+            pdf.save(file_path)
+        return file_path
@@ -12,24 +12,37 @@ from pdf_bot.language import LanguageService
 from pdf_bot.models import BackData, FileData, FileTaskResult, TaskData
 from pdf_bot.pdf import PdfService
 from pdf_bot.pdf_processor import AbstractPdfTextInputProcessor, TextInputData
+from pdf_bot.result_cache import ResultCacheService
+from pdf_bot.scheduler import SchedulerService
 from pdf_bot.telegram_internal import TelegramService
 from pdf_bot.telegram_internal.exceptions import TelegramGetUserDataError
 from tests.language import LanguageServiceTestMixin
 from tests.path_test_mixin import PathTestMixin
+from tests.result_cache import ResultCacheServiceTestMixin
+from tests.scheduler import SchedulerServiceTestMixin
 from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
 
 
 class MockProcessor(PathTestMixin, AbstractPdfTextInputProcessor):
     FILE_NAME = "file_name"
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         pdf_service: PdfService,
         telegram_service: TelegramService,
         language_service: LanguageService,
+        result_cache_service: ResultCacheService,
+        scheduler_service: SchedulerService,
         bypass_init_check: bool = False,
     ) -> None:
-        super().__init__(pdf_service, telegram_service, language_service, bypass_init_check)
+        super().__init__(
+            pdf_service,
+            telegram_service,
+            language_service,
+            result_cache_service,
+            scheduler_service,
+            bypass_init_check,
+        )
         path = self.mock_file_path()
         self.file_task_result = FileTaskResult(path)
 
@@ -62,6 +75,8 @@ class MockProcessor(PathTestMixin, AbstractPdfTextInputProcessor):
 
 class TestAbstractPdfTextInputProcessor(
     LanguageServiceTestMixin,
+    ResultCacheServiceTestMixin,
+    SchedulerServiceTestMixin,
     TelegramServiceTestMixin,
     TelegramTestMixin,
 ):
@@ -78,12 +93,16 @@ class TestAbstractPdfTextInputProcessor(
 
         self.pdf_service = MagicMock(spec=PdfService)
         self.language_service = self.mock_language_service()
+        self.result_cache_service = self.mock_result_cache_service()
+        self.scheduler_service = self.mock_scheduler_service()
         self.telegram_service = self.mock_telegram_service()
 
         self.sut = MockProcessor(
             self.pdf_service,
             self.telegram_service,
             self.language_service,
+            self.result_cache_service,
+            self.scheduler_service,
             bypass_init_check=True,
         )
 
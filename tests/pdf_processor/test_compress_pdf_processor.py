@@ -9,11 +9,15 @@ from pdf_bot.pdf import PdfService
 from pdf_bot.pdf.models import CompressResult
 from pdf_bot.pdf_processor import CompressPdfData, CompressPdfProcessor
 from tests.language import LanguageServiceTestMixin
+from tests.result_cache import ResultCacheServiceTestMixin
+from tests.scheduler import SchedulerServiceTestMixin
 from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
 
 
 class TestCompressPdfProcessor(
     LanguageServiceTestMixin,
+    ResultCacheServiceTestMixin,
+    SchedulerServiceTestMixin,
     TelegramServiceTestMixin,
     TelegramTestMixin,
 ):
@@ -21,12 +25,16 @@ class TestCompressPdfProcessor(
         super().setup_method()
         self.pdf_service = MagicMock(spec=PdfService)
         self.language_service = self.mock_language_service()
+        self.result_cache_service = self.mock_result_cache_service()
+        self.scheduler_service = self.mock_scheduler_service()
         self.telegram_service = self.mock_telegram_service()
 
         self.sut = CompressPdfProcessor(
             self.pdf_service,
             self.telegram_service,
             self.language_service,
+            self.result_cache_service,
+            self.scheduler_service,
             bypass_init_check=True,
         )
 
@@ -53,3 +61,13 @@ class TestCompressPdfProcessor(
             assert actual.path == self.file_path
             assert actual.message is not None
             self.pdf_service.compress_pdf.assert_called_once_with(self.FILE_DATA.id)
+
+    @pytest.mark.asyncio
+    async def test_process_file_task_not_reduced(self) -> None:
+        result = CompressResult(2, 2, self.file_path)
+        self.pdf_service.compress_pdf.return_value.__aenter__.return_value = result
+
+        async with self.sut.process_file_task(self.FILE_DATA) as actual:
+            assert actual.path == self.file_path
+            assert actual.message is not None
+            assert "already optimised" in actual.message
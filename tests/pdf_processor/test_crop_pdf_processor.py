@@ -8,11 +8,15 @@ from pdf_bot.models import TaskData
 from pdf_bot.pdf import PdfService
 from pdf_bot.pdf_processor import CropOptionAndInputData, CropPdfData, CropPdfProcessor, CropType
 from tests.language import LanguageServiceTestMixin
+from tests.result_cache import ResultCacheServiceTestMixin
+from tests.scheduler import SchedulerServiceTestMixin
 from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
 
 
 class TestPdfProcessor(
     LanguageServiceTestMixin,
+    ResultCacheServiceTestMixin,
+    SchedulerServiceTestMixin,
     TelegramServiceTestMixin,
     TelegramTestMixin,
 ):
@@ -25,12 +29,16 @@ class TestPdfProcessor(
 
         self.pdf_service = MagicMock(spec=PdfService)
         self.language_service = self.mock_language_service()
+        self.result_cache_service = self.mock_result_cache_service()
+        self.scheduler_service = self.mock_scheduler_service()
         self.telegram_service = self.mock_telegram_service()
 
         self.sut = CropPdfProcessor(
             self.pdf_service,
             self.telegram_service,
             self.language_service,
+            self.result_cache_service,
+            self.scheduler_service,
             bypass_init_check=True,
         )
 
@@ -6,26 +6,36 @@ from telegram.ext import CallbackQueryHandler
 from pdf_bot.analytics import TaskType
 from pdf_bot.models import TaskData
 from pdf_bot.pdf import PdfService
-from pdf_bot.pdf_processor import OcrPdfData, OcrPdfProcessor
+from pdf_bot.pdf_processor import OcrLanguageData, OcrPdfData, OcrPdfProcessor
 from tests.language import LanguageServiceTestMixin
+from tests.result_cache import ResultCacheServiceTestMixin
+from tests.scheduler import SchedulerServiceTestMixin
 from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
 
 
 class TestOCRPdfProcessor(
     LanguageServiceTestMixin,
+    ResultCacheServiceTestMixin,
+    SchedulerServiceTestMixin,
     TelegramServiceTestMixin,
     TelegramTestMixin,
 ):
+    LANGUAGE = "de_DE"
+
     def setup_method(self) -> None:
         super().setup_method()
         self.pdf_service = MagicMock(spec=PdfService)
         self.language_service = self.mock_language_service()
+        self.result_cache_service = self.mock_result_cache_service()
+        self.scheduler_service = self.mock_scheduler_service()
         self.telegram_service = self.mock_telegram_service()
 
         self.sut = OcrPdfProcessor(
             self.pdf_service,
             self.telegram_service,
             self.language_service,
+            self.result_cache_service,
+            self.scheduler_service,
             bypass_init_check=True,
         )
 
@@ -49,4 +59,28 @@ class TestOCRPdfProcessor(
 
         async with self.sut.process_file_task(self.FILE_DATA) as actual:
             assert actual == self.file_task_result
-            self.pdf_service.ocr_pdf.assert_called_once_with(self.FILE_DATA.id)
+            self.pdf_service.ocr_pdf.assert_called_once_with(self.FILE_DATA.id, None)
+
+    @pytest.mark.asyncio
+    async def test_process_file_task_with_language(self) -> None:
+        self.pdf_service.ocr_pdf.return_value.__aenter__.return_value = self.file_path
+        file_data = OcrLanguageData(self.FILE_DATA.id, language=self.LANGUAGE)
+
+        async with self.sut.process_file_task(file_data) as actual:
+            assert actual == self.file_task_result
+            self.pdf_service.ocr_pdf.assert_called_once_with(file_data.id, self.LANGUAGE)
+
+    @pytest.mark.asyncio
+    async def test_process_file_with_user_language(self) -> None:
+        self.pdf_service.ocr_pdf.return_value.__aenter__.return_value = self.file_path
+        self.language_service.get_user_language.return_value = self.LANGUAGE
+        self.telegram_service.get_file_data.return_value = self.FILE_DATA
+        self.telegram_update.callback_query = None
+
+        await self.sut.process_file(self.telegram_update, self.telegram_context)
+
+        expected = OcrLanguageData(
+            self.FILE_DATA.id, self.FILE_DATA.name, self.FILE_DATA.unique_id, language=self.LANGUAGE
+        )
+        self.result_cache_service.get_key.assert_called_once_with(expected, TaskType.ocr_pdf)
+        self.pdf_service.ocr_pdf.assert_called_once_with(self.FILE_DATA.id, self.LANGUAGE)
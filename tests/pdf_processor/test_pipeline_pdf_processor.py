@@ -0,0 +1,277 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from telegram import InlineKeyboardMarkup
+from telegram.ext import CallbackQueryHandler, CommandHandler, ConversationHandler, MessageHandler
+
+from pdf_bot.analytics import TaskType
+from pdf_bot.errors import CallbackQueryDataTypeError, FileDataTypeError
+from pdf_bot.file_processor import AbstractFileTaskProcessor
+from pdf_bot.models import BackData, TaskData
+from pdf_bot.pdf import PdfService, PipelineOperation, PipelineStep, ScaleData
+from pdf_bot.pdf_processor import (
+    PipelineInputData,
+    PipelinePdfData,
+    PipelinePdfProcessor,
+    PipelineRunData,
+)
+from tests.language import LanguageServiceTestMixin
+from tests.result_cache import ResultCacheServiceTestMixin
+from tests.scheduler import SchedulerServiceTestMixin
+from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
+
+
+class TestPipelinePdfProcessor(
+    LanguageServiceTestMixin,
+    ResultCacheServiceTestMixin,
+    SchedulerServiceTestMixin,
+    TelegramServiceTestMixin,
+    TelegramTestMixin,
+):
+    WAIT_STEP = "wait_pipeline_step"
+    WAIT_STEP_INPUT = "wait_pipeline_step_input"
+    ROTATE_STEP = PipelineStep(PipelineOperation.rotate, 90)
+
+    def setup_method(self) -> None:
+        super().setup_method()
+        self.pdf_service = MagicMock(spec=PdfService)
+        self.language_service = self.mock_language_service()
+        self.result_cache_service = self.mock_result_cache_service()
+        self.scheduler_service = self.mock_scheduler_service()
+        self.telegram_service = self.mock_telegram_service()
+
+        self.sut = PipelinePdfProcessor(
+            self.pdf_service,
+            self.telegram_service,
+            self.language_service,
+            self.result_cache_service,
+            self.scheduler_service,
+            bypass_init_check=True,
+        )
+
+    def test_task_type(self) -> None:
+        actual = self.sut.task_type
+        assert actual == TaskType.pipeline_pdf
+
+    def test_task_data(self) -> None:
+        actual = self.sut.task_data
+        assert actual == TaskData("Multiple tasks", PipelinePdfData)
+
+    def test_cache_results(self) -> None:
+        assert self.sut.cache_results is False
+
+    def test_handler(self) -> None:
+        actual = self.sut.handler
+        assert isinstance(actual, ConversationHandler)
+
+        entry_points = actual.entry_points
+        assert len(entry_points) == 1
+        assert isinstance(entry_points[0], CallbackQueryHandler)
+        assert entry_points[0].pattern == PipelinePdfData
+
+        wait_step_state = actual.states[self.WAIT_STEP]
+        assert [x.pattern for x in wait_step_state] == [  # type: ignore[attr-defined]
+            PipelineRunData,
+            PipelineInputData,
+            PipelinePdfData,
+            BackData,
+        ]
+
+        wait_step_input_state = actual.states[self.WAIT_STEP_INPUT]
+        assert len(wait_step_input_state) == 2
+        assert isinstance(wait_step_input_state[0], MessageHandler)
+        assert isinstance(wait_step_input_state[1], CallbackQueryHandler)
+        assert wait_step_input_state[1].pattern == PipelinePdfData
+
+        fallbacks = actual.fallbacks
+        assert len(fallbacks) == 1
+        assert isinstance(fallbacks[0], CommandHandler)
+        assert fallbacks[0].commands == {"cancel"}
+
+        map_to_parent = actual.map_to_parent
+        assert map_to_parent is not None
+        assert (
+            map_to_parent[AbstractFileTaskProcessor.WAIT_FILE_TASK]
+            == AbstractFileTaskProcessor.WAIT_FILE_TASK
+        )
+
+    @pytest.mark.asyncio
+    async def test_process_file_task(self) -> None:
+        file_data = PipelineRunData(
+            id=self.TELEGRAM_DOCUMENT_ID, name=self.TELEGRAM_DOCUMENT_NAME, steps=[self.ROTATE_STEP]
+        )
+        self.pdf_service.run_pipeline.return_value.__aenter__.return_value = self.file_path
+
+        async with self.sut.process_file_task(file_data) as actual:
+            assert actual == self.file_task_result
+            self.pdf_service.run_pipeline.assert_called_once_with(
+                self.TELEGRAM_DOCUMENT_ID, [self.ROTATE_STEP]
+            )
+
+    @pytest.mark.asyncio
+    async def test_process_file_task_invalid_file_data(self) -> None:
+        with pytest.raises(FileDataTypeError):
+            async with self.sut.process_file_task(self.FILE_DATA):
+                pass
+        self.pdf_service.run_pipeline.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_ask_step(self) -> None:
+        self.telegram_callback_query.data = PipelinePdfData(self.TELEGRAM_DOCUMENT_ID)
+
+        actual = await self.sut.ask_step(self.telegram_update, self.telegram_context)
+
+        assert actual == self.WAIT_STEP
+        self.telegram_service.answer_query_and_drop_data.assert_called_once_with(
+            self.telegram_context, self.telegram_callback_query
+        )
+
+        data = self._get_button_data()
+        assert PipelinePdfData(self.TELEGRAM_DOCUMENT_ID, steps=[self.ROTATE_STEP]) in data
+        assert (
+            PipelineInputData(
+                id=self.TELEGRAM_DOCUMENT_ID, operation=PipelineOperation.decrypt, steps=[]
+            )
+            in data
+        )
+        assert not any(isinstance(x, PipelineRunData) for x in data)
+
+    @pytest.mark.asyncio
+    async def test_ask_step_with_steps(self) -> None:
+        self.telegram_callback_query.data = PipelinePdfData(
+            self.TELEGRAM_DOCUMENT_ID, steps=[self.ROTATE_STEP]
+        )
+
+        actual = await self.sut.ask_step(self.telegram_update, self.telegram_context)
+
+        assert actual == self.WAIT_STEP
+        text = self.telegram_callback_query.edit_message_text.call_args.args[0]
+        assert "1. Rotate 90" in text
+
+        data = self._get_button_data()
+        assert PipelineRunData(self.TELEGRAM_DOCUMENT_ID, steps=[self.ROTATE_STEP]) in data
+        assert not any(
+            isinstance(x, PipelineInputData) and x.operation == PipelineOperation.decrypt
+            for x in data
+        )
+
+    @pytest.mark.asyncio
+    async def test_ask_step_max_steps(self) -> None:
+        steps = [self.ROTATE_STEP] * self.sut.MAX_STEPS
+        self.telegram_callback_query.data = PipelinePdfData(self.TELEGRAM_DOCUMENT_ID, steps=steps)
+
+        await self.sut.ask_step(self.telegram_update, self.telegram_context)
+
+        # Only the run and back buttons are left
+        data = self._get_button_data()
+        assert len(data) == 2
+        assert isinstance(data[0], PipelineRunData)
+
+    @pytest.mark.asyncio
+    async def test_ask_step_invalid_callback_query_data(self) -> None:
+        with pytest.raises(CallbackQueryDataTypeError):
+            await self.sut.ask_step(self.telegram_update, self.telegram_context)
+        self.telegram_callback_query.edit_message_text.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_ask_step_input(self) -> None:
+        data = PipelineInputData(
+            id=self.TELEGRAM_DOCUMENT_ID, operation=PipelineOperation.split, steps=[]
+        )
+        self.telegram_callback_query.data = data
+        self.telegram_callback_query.edit_message_text.return_value = self.telegram_message
+
+        actual = await self.sut.ask_step_input(self.telegram_update, self.telegram_context)
+
+        assert actual == self.WAIT_STEP_INPUT
+        self.telegram_service.cache_file_data.assert_called_once_with(self.telegram_context, data)
+        self.telegram_service.cache_message_data.assert_called_once_with(
+            self.telegram_context, self.telegram_message
+        )
+
+    @pytest.mark.asyncio
+    async def test_process_step_input(self) -> None:
+        self.telegram_message.text = "2 0.5"
+        self.telegram_service.get_file_data.return_value = PipelineInputData(
+            id=self.TELEGRAM_DOCUMENT_ID,
+            operation=PipelineOperation.scale_by_factor,
+            steps=[self.ROTATE_STEP],
+        )
+
+        actual = await self.sut.process_step_input(self.telegram_update, self.telegram_context)
+
+        assert actual == self.WAIT_STEP
+        self.telegram_context.bot.delete_message.assert_called_once_with(
+            self.TELEGRAM_CHAT_ID, self.TELEGRAM_MESSAGE_ID
+        )
+
+        reply_markup = self.telegram_message.reply_text.call_args.kwargs["reply_markup"]
+        expected = [
+            self.ROTATE_STEP,
+            PipelineStep(PipelineOperation.scale_by_factor, ScaleData(2, 0.5)),
+        ]
+        assert PipelineRunData(self.TELEGRAM_DOCUMENT_ID, steps=expected) in self._get_markup_data(
+            reply_markup
+        )
+
+    @pytest.mark.parametrize(
+        ("operation", "text"),
+        [
+            (PipelineOperation.scale_by_factor, "invalid"),
+            (PipelineOperation.scale_to_dimension, "1"),
+            (PipelineOperation.split, "invalid"),
+        ],
+    )
+    @pytest.mark.asyncio
+    async def test_process_step_input_invalid(
+        self, operation: PipelineOperation, text: str
+    ) -> None:
+        self.telegram_message.text = text
+        self.pdf_service.split_range_valid.return_value = False
+        self.telegram_service.get_file_data.return_value = PipelineInputData(
+            id=self.TELEGRAM_DOCUMENT_ID, operation=operation, steps=[]
+        )
+
+        actual = await self.sut.process_step_input(self.telegram_update, self.telegram_context)
+
+        assert actual == self.WAIT_STEP_INPUT
+        self.telegram_service.cache_file_data.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_process_step_input_encrypt(self) -> None:
+        self.telegram_message.text = "password"
+        self.telegram_service.get_file_data.return_value = PipelineInputData(
+            id=self.TELEGRAM_DOCUMENT_ID,
+            operation=PipelineOperation.encrypt,
+            steps=[self.ROTATE_STEP],
+        )
+
+        with patch.object(
+            self.sut, "process_file", return_value=ConversationHandler.END
+        ) as process_file:
+            actual = await self.sut.process_step_input(self.telegram_update, self.telegram_context)
+
+            assert actual == ConversationHandler.END
+            process_file.assert_called_once_with(self.telegram_update, self.telegram_context)
+            self.telegram_service.cache_file_data.assert_called_once_with(
+                self.telegram_context,
+                PipelineRunData(
+                    self.TELEGRAM_DOCUMENT_ID,
+                    steps=[self.ROTATE_STEP, PipelineStep(PipelineOperation.encrypt, "password")],
+                ),
+            )
+
+    @pytest.mark.asyncio
+    async def test_process_step_input_invalid_file_data(self) -> None:
+        with pytest.raises(FileDataTypeError):
+            await self.sut.process_step_input(self.telegram_update, self.telegram_context)
+
+    def _get_button_data(self) -> list[object]:
+        reply_markup = self.telegram_callback_query.edit_message_text.call_args.kwargs[
+            "reply_markup"
+        ]
+        return self._get_markup_data(reply_markup)
+
+    @staticmethod
+    def _get_markup_data(reply_markup: InlineKeyboardMarkup) -> list[object]:
+        return [x.callback_data for row in reply_markup.inline_keyboard for x in row]
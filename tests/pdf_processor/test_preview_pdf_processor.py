@@ -5,27 +5,38 @@ from telegram.ext import CallbackQueryHandler
 
 from pdf_bot.analytics import TaskType
 from pdf_bot.models import TaskData
+from pdf_bot.page_render import PageRenderService
 from pdf_bot.pdf import PdfService
 from pdf_bot.pdf_processor import PreviewPdfData, PreviewPdfProcessor
 from tests.language import LanguageServiceTestMixin
+from tests.result_cache import ResultCacheServiceTestMixin
+from tests.scheduler import SchedulerServiceTestMixin
 from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
 
 
 class TestPreviewPdfProcessor(
     LanguageServiceTestMixin,
+    ResultCacheServiceTestMixin,
+    SchedulerServiceTestMixin,
     TelegramServiceTestMixin,
     TelegramTestMixin,
 ):
     def setup_method(self) -> None:
         super().setup_method()
         self.pdf_service = MagicMock(spec=PdfService)
+        self.page_render_service = MagicMock(spec=PageRenderService)
         self.language_service = self.mock_language_service()
+        self.result_cache_service = self.mock_result_cache_service()
+        self.scheduler_service = self.mock_scheduler_service()
         self.telegram_service = self.mock_telegram_service()
 
         self.sut = PreviewPdfProcessor(
             self.pdf_service,
+            self.page_render_service,
             self.telegram_service,
             self.language_service,
+            self.result_cache_service,
+            self.scheduler_service,
             bypass_init_check=True,
         )
 
@@ -45,8 +56,8 @@ class TestPreviewPdfProcessor(
 
     @pytest.mark.asyncio
     async def test_process_file_task(self) -> None:
-        self.pdf_service.preview_pdf.return_value.__aenter__.return_value = self.file_path
+        self.page_render_service.preview_page.return_value.__aenter__.return_value = self.file_path
 
         async with self.sut.process_file_task(self.FILE_DATA) as actual:
             assert actual == self.file_task_result
-            self.pdf_service.preview_pdf.assert_called_once_with(self.FILE_DATA.id)
+            self.page_render_service.preview_page.assert_called_once_with(self.FILE_DATA)
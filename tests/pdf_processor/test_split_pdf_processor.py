@@ -1,18 +1,23 @@
 from unittest.mock import MagicMock
 
 import pytest
+from telegram.ext import CallbackQueryHandler
 
 from pdf_bot.analytics import TaskType
 from pdf_bot.errors import FileDataTypeError
 from pdf_bot.models import TaskData
 from pdf_bot.pdf import PdfService
-from pdf_bot.pdf_processor import SplitPdfData, SplitPdfProcessor
+from pdf_bot.pdf_processor import BurstPdfData, SplitPdfData, SplitPdfProcessor, TextInputData
 from tests.language import LanguageServiceTestMixin
+from tests.result_cache import ResultCacheServiceTestMixin
+from tests.scheduler import SchedulerServiceTestMixin
 from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
 
 
 class TestSplitPdfProcessor(
     LanguageServiceTestMixin,
+    ResultCacheServiceTestMixin,
+    SchedulerServiceTestMixin,
     TelegramServiceTestMixin,
     TelegramTestMixin,
 ):
@@ -20,12 +25,16 @@ class TestSplitPdfProcessor(
         super().setup_method()
         self.pdf_service = MagicMock(spec=PdfService)
         self.language_service = self.mock_language_service()
+        self.result_cache_service = self.mock_result_cache_service()
+        self.scheduler_service = self.mock_scheduler_service()
         self.telegram_service = self.mock_telegram_service()
 
         self.sut = SplitPdfProcessor(
             self.pdf_service,
             self.telegram_service,
             self.language_service,
+            self.result_cache_service,
+            self.scheduler_service,
             bypass_init_check=True,
         )
 
@@ -49,6 +58,34 @@ class TestSplitPdfProcessor(
         actual = self.sut.get_cleaned_text_input(self.TELEGRAM_TEXT)
         assert actual == expected
 
+    @pytest.mark.parametrize("text", ["0:3, 3:6,7", "0:3 3:6 7", "0:3,\n3:6,  7"])
+    def test_get_cleaned_text_input_multiple_ranges(self, text: str) -> None:
+        self.pdf_service.split_range_valid.return_value = True
+        actual = self.sut.get_cleaned_text_input(text)
+        assert actual == "0:3 3:6 7"
+
+    @pytest.mark.parametrize("text", ["", " , "])
+    def test_get_cleaned_text_input_no_ranges(self, text: str) -> None:
+        actual = self.sut.get_cleaned_text_input(text)
+        assert actual is None
+
+    def test_text_input_option_handlers(self) -> None:
+        actual = self.sut.text_input_option_handlers
+
+        assert len(actual) == 1
+        assert isinstance(actual[0], CallbackQueryHandler)
+        assert actual[0].pattern == BurstPdfData
+
+    def test_get_text_input_option_buttons(self) -> None:
+        actual = self.sut.get_text_input_option_buttons(
+            self.language_service.set_app_language(), self.FILE_DATA
+        )
+
+        assert len(actual) == 1
+        assert actual[0].callback_data == BurstPdfData(
+            self.FILE_DATA.id, self.FILE_DATA.name, self.FILE_DATA.unique_id
+        )
+
     @pytest.mark.asyncio
     async def test_process_file_task(self) -> None:
         self.pdf_service.split_pdf.return_value.__aenter__.return_value = self.file_path
@@ -59,6 +96,27 @@ class TestSplitPdfProcessor(
                 self.TEXT_INPUT_DATA.id, self.TEXT_INPUT_DATA.text
             )
 
+    @pytest.mark.asyncio
+    async def test_process_file_task_multiple_ranges(self) -> None:
+        file_data = TextInputData(id=self.TELEGRAM_DOCUMENT_ID, text="0:3 3:6")
+        self.pdf_service.split_pdf_by_ranges.return_value.__aenter__.return_value = self.file_path
+
+        async with self.sut.process_file_task(file_data) as actual:
+            assert actual == self.file_task_result
+            self.pdf_service.split_pdf_by_ranges.assert_called_once_with(
+                self.TELEGRAM_DOCUMENT_ID, ["0:3", "3:6"]
+            )
+            self.pdf_service.split_pdf.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_process_file_task_burst(self) -> None:
+        file_data = BurstPdfData(self.TELEGRAM_DOCUMENT_ID)
+        self.pdf_service.burst_pdf.return_value.__aenter__.return_value = self.file_path
+
+        async with self.sut.process_file_task(file_data) as actual:
+            assert actual == self.file_task_result
+            self.pdf_service.burst_pdf.assert_called_once_with(self.TELEGRAM_DOCUMENT_ID)
+
     @pytest.mark.asyncio
     async def test_process_file_task_invalid_file_data(self) -> None:
         with pytest.raises(FileDataTypeError):
@@ -0,0 +1,3 @@
+from .result_cache_service_test_mixin import ResultCacheServiceTestMixin
+
+__all__ = ["ResultCacheServiceTestMixin"]
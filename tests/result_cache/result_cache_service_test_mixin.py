@@ -0,0 +1,11 @@
+from unittest.mock import MagicMock
+
+from pdf_bot.result_cache import ResultCacheService
+
+
+class ResultCacheServiceTestMixin:
+    @staticmethod
+    def mock_result_cache_service() -> MagicMock:
+        service = MagicMock(spec=ResultCacheService)
+        service.get_key.return_value = None
+        return service
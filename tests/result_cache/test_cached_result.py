@@ -0,0 +1,33 @@
+from unittest.mock import MagicMock
+
+from telegram import Message, PhotoSize
+
+from pdf_bot.result_cache import CachedResult
+from tests.telegram_internal import TelegramTestMixin
+
+
+class TestCachedResult(TelegramTestMixin):
+    def test_from_telegram_message_document(self) -> None:
+        self.telegram_message.document = self.telegram_document
+
+        actual = CachedResult.from_telegram_message(self.telegram_message, self.TELEGRAM_TEXT)
+
+        assert actual == CachedResult(self.TELEGRAM_DOCUMENT_ID, message=self.TELEGRAM_TEXT)
+
+    def test_from_telegram_message_photo(self) -> None:
+        small_photo = MagicMock(spec=PhotoSize)
+        self.telegram_message.document = None
+        self.telegram_message.photo = (small_photo, self.telegram_photo_size)
+
+        actual = CachedResult.from_telegram_message(self.telegram_message)
+
+        assert actual == CachedResult(self.TELEGRAM_PHOTO_SIZE_ID, is_photo=True)
+
+    def test_from_telegram_message_without_file(self) -> None:
+        message = MagicMock(spec=Message)
+        message.document = None
+        message.photo = ()
+
+        actual = CachedResult.from_telegram_message(message)
+
+        assert actual is None
@@ -0,0 +1,46 @@
+from unittest.mock import patch
+
+from pdf_bot.result_cache import CachedResult, MemoryResultCacheBackend
+
+
+class TestMemoryResultCacheBackend:
+    MAX_SIZE = 2
+    TTL = 60
+
+    def setup_method(self) -> None:
+        self.time_patcher = patch(
+            "pdf_bot.result_cache.memory_result_cache_backend.time.monotonic", return_value=0
+        )
+        self.monotonic = self.time_patcher.start()
+
+        self.sut = MemoryResultCacheBackend(self.MAX_SIZE, self.TTL)
+
+    def teardown_method(self) -> None:
+        self.time_patcher.stop()
+
+    def test_get_and_set(self) -> None:
+        result = CachedResult("file_id", is_photo=True, message="message")
+
+        self.sut.set("key", result)
+
+        assert self.sut.get("key") == result
+        assert self.sut.get("unknown") is None
+
+    def test_expired(self) -> None:
+        self.sut.set("key", CachedResult("file_id"))
+        self.monotonic.return_value = self.TTL
+
+        assert self.sut.get("key") is None
+        assert len(self.sut) == 0
+
+    def test_lru_eviction(self) -> None:
+        self.sut.set("a", CachedResult("a"))
+        self.sut.set("b", CachedResult("b"))
+        self.sut.get("a")
+
+        self.sut.set("c", CachedResult("c"))
+
+        assert len(self.sut) == self.MAX_SIZE
+        assert self.sut.get("a") == CachedResult("a")
+        assert self.sut.get("b") is None
+        assert self.sut.get("c") == CachedResult("c")
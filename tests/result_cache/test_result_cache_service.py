@@ -0,0 +1,192 @@
+import asyncio
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from pdf_bot.analytics import TaskType
+from pdf_bot.models import FileData
+from pdf_bot.pdf.models import ScaleByData
+from pdf_bot.result_cache import (
+    CachedResult,
+    MemoryResultCacheBackend,
+    ResultCacheService,
+    SqliteResultCacheBackend,
+)
+from tests.telegram_internal import TelegramTestMixin
+
+
+class Option(Enum):
+    a = "a"
+    b = "b"
+
+
+@dataclass(kw_only=True)
+class ParamsData(FileData):
+    option: Option
+    text: object
+
+
+class TestResultCacheService(TelegramTestMixin):
+    KEY = "key"
+    FILE_ID = "file_id"
+    UNIQUE_ID = "unique_id"
+
+    def setup_method(self) -> None:
+        super().setup_method()
+        self.backend = MemoryResultCacheBackend(max_size=10, ttl=60)
+        self.result = CachedResult(self.FILE_ID)
+        self.compute_count = 0
+
+        self.sut = ResultCacheService(self.backend)
+
+    def test_get_key(self) -> None:
+        file_data = FileData(self.TELEGRAM_DOCUMENT_ID, unique_id=self.UNIQUE_ID)
+        other_file_data = FileData("other_id", "other_name", self.UNIQUE_ID)
+
+        actual = self.sut.get_key(file_data, TaskType.rotate_pdf)
+
+        assert actual is not None
+        assert actual == self.sut.get_key(other_file_data, TaskType.rotate_pdf)
+        assert actual != self.sut.get_key(file_data, TaskType.ocr_pdf)
+
+    def test_get_key_without_unique_id(self) -> None:
+        actual = self.sut.get_key(self.FILE_DATA, TaskType.rotate_pdf)
+        assert actual is None
+
+    def test_get_key_params(self) -> None:
+        def get_key(option: Option, text: object) -> str | None:
+            file_data = ParamsData(
+                self.TELEGRAM_DOCUMENT_ID, unique_id=self.UNIQUE_ID, option=option, text=text
+            )
+            return self.sut.get_key(file_data, TaskType.scale_pdf)
+
+        actual = get_key(Option.a, ScaleByData(1, 2))
+
+        assert actual == get_key(Option.a, ScaleByData(1, 2))
+        assert actual != get_key(Option.b, ScaleByData(1, 2))
+        assert actual != get_key(Option.a, ScaleByData(2, 1))
+        assert actual != get_key(Option.a, "1 2")
+
+    def test_get_key_unsupported_param(self) -> None:
+        file_data = ParamsData(
+            self.TELEGRAM_DOCUMENT_ID, unique_id=self.UNIQUE_ID, option=Option.a, text=object()
+        )
+
+        with pytest.raises(TypeError):
+            self.sut.get_key(file_data, TaskType.scale_pdf)
+
+    @pytest.mark.asyncio
+    async def test_get_or_compute_miss(self) -> None:
+        actual = await self.sut.get_or_compute(self.KEY, self._compute)
+
+        assert actual == (self.result, True)
+        assert self.compute_count == 1
+        assert self.backend.get(self.KEY) == self.result
+        assert self.sut.stats.misses == 1
+        assert self.sut.stats.hits == 0
+
+    @pytest.mark.asyncio
+    async def test_get_or_compute_hit(self) -> None:
+        self.backend.set(self.KEY, self.result)
+
+        actual = await self.sut.get_or_compute(self.KEY, self._compute)
+
+        assert actual == (self.result, False)
+        assert self.compute_count == 0
+        assert self.sut.stats.hits == 1
+        assert self.sut.stats.misses == 0
+
+    @pytest.mark.asyncio
+    async def test_get_or_compute_no_result(self) -> None:
+        self.result = None  # type: ignore[assignment]
+
+        actual = await self.sut.get_or_compute(self.KEY, self._compute)
+
+        assert actual == (None, True)
+        assert len(self.backend) == 0
+
+    @pytest.mark.asyncio
+    async def test_get_or_compute_error(self) -> None:
+        compute = MagicMock(side_effect=ValueError)
+
+        with pytest.raises(ValueError):  # noqa: PT011
+            await self.sut.get_or_compute(self.KEY, compute)
+
+        assert len(self.backend) == 0
+        assert await self.sut.get_or_compute(self.KEY, self._compute) == (self.result, True)
+
+    @pytest.mark.asyncio
+    async def test_get_or_compute_coalesced(self) -> None:
+        event = asyncio.Event()
+
+        async def compute() -> CachedResult:
+            await event.wait()
+            return await self._compute()
+
+        tasks = [asyncio.create_task(self.sut.get_or_compute(self.KEY, compute)) for _ in range(3)]
+        await asyncio.sleep(0)
+        event.set()
+        actual = await asyncio.gather(*tasks)
+
+        assert actual == [(self.result, True), (self.result, False), (self.result, False)]
+        assert self.compute_count == 1
+        assert self.sut.stats.misses == 1
+        assert self.sut.stats.coalesced == 2
+
+    @pytest.mark.asyncio
+    async def test_get_or_compute_coalesced_error(self) -> None:
+        event = asyncio.Event()
+
+        async def failed_compute() -> CachedResult:
+            await event.wait()
+            raise ValueError
+
+        failed_task = asyncio.create_task(self.sut.get_or_compute(self.KEY, failed_compute))
+        await asyncio.sleep(0)
+        task = asyncio.create_task(self.sut.get_or_compute(self.KEY, self._compute))
+        await asyncio.sleep(0)
+        event.set()
+
+        with pytest.raises(ValueError):  # noqa: PT011
+            await failed_task
+
+        # The waiting call computes the result itself when the in-flight one has failed
+        assert await task == (self.result, True)
+        assert self.compute_count == 1
+
+    @pytest.mark.asyncio
+    async def test_get_or_compute_sqlite_backend(self, tmp_path: Path) -> None:
+        backend = SqliteResultCacheBackend(10, 60, tmp_path / "cache.sqlite3")
+        sut = ResultCacheService(backend)
+        is_started = asyncio.Event()
+        event = asyncio.Event()
+
+        async def compute() -> CachedResult:
+            is_started.set()
+            await event.wait()
+            return await self._compute()
+
+        tasks = [asyncio.create_task(sut.get_or_compute(self.KEY, compute)) for _ in range(3)]
+        await is_started.wait()
+        event.set()
+        actual = await asyncio.gather(*tasks)
+
+        assert sorted(x[1] for x in actual) == [False, False, True]
+        assert self.compute_count == 1
+        assert await sut.get_or_compute(self.KEY, self._compute) == (self.result, False)
+        sut.close()
+
+    def test_close(self) -> None:
+        backend = MagicMock(spec=MemoryResultCacheBackend)
+        sut = ResultCacheService(backend)
+
+        sut.close()
+
+        backend.close.assert_called_once()
+
+    async def _compute(self) -> CachedResult:
+        self.compute_count += 1
+        return self.result
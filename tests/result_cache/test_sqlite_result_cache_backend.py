@@ -0,0 +1,89 @@
+import asyncio
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from pdf_bot.result_cache import CachedResult, SqliteResultCacheBackend
+
+
+class TestSqliteResultCacheBackend:
+    MAX_SIZE = 2
+    TTL = 60
+
+    def setup_method(self) -> None:
+        self.time_patcher = patch(
+            "pdf_bot.result_cache.sqlite_result_cache_backend.time.time", return_value=0
+        )
+        self.time = self.time_patcher.start()
+
+    def teardown_method(self) -> None:
+        self.time_patcher.stop()
+
+    def test_get_and_set(self, tmp_path: Path) -> None:
+        sut = SqliteResultCacheBackend(self.MAX_SIZE, self.TTL, tmp_path / "cache.sqlite3")
+        result = CachedResult("file_id", is_photo=True, message="message")
+
+        sut.set("key", result)
+
+        assert sut.get("key") == result
+        assert sut.get("unknown") is None
+        sut.close()
+
+    def test_persisted(self, tmp_path: Path) -> None:
+        path = tmp_path / "cache.sqlite3"
+        sut = SqliteResultCacheBackend(self.MAX_SIZE, self.TTL, path)
+        sut.set("key", CachedResult("file_id"))
+        sut.close()
+
+        sut = SqliteResultCacheBackend(self.MAX_SIZE, self.TTL, path)
+
+        assert sut.get("key") == CachedResult("file_id")
+        sut.close()
+
+    def test_expired(self, tmp_path: Path) -> None:
+        sut = SqliteResultCacheBackend(self.MAX_SIZE, self.TTL, tmp_path / "cache.sqlite3")
+        sut.set("key", CachedResult("file_id"))
+        self.time.return_value = self.TTL
+
+        assert sut.get("key") is None
+        assert len(sut) == 0
+        sut.close()
+
+    def test_lru_eviction(self, tmp_path: Path) -> None:
+        sut = SqliteResultCacheBackend(self.MAX_SIZE, self.TTL, tmp_path / "cache.sqlite3")
+        sut.set("a", CachedResult("a"))
+        self.time.return_value = 1
+        sut.set("b", CachedResult("b"))
+        self.time.return_value = 2
+        sut.get("a")
+
+        self.time.return_value = 3
+        sut.set("c", CachedResult("c"))
+
+        assert len(sut) == self.MAX_SIZE
+        assert sut.get("a") == CachedResult("a")
+        assert sut.get("b") is None
+        assert sut.get("c") == CachedResult("c")
+        sut.close()
+
+    @pytest.mark.asyncio
+    async def test_get_and_set_async(self, tmp_path: Path) -> None:
+        sut = SqliteResultCacheBackend(self.MAX_SIZE, self.TTL, tmp_path / "cache.sqlite3")
+        result = CachedResult("file_id")
+        loop_thread = threading.get_ident()
+        threads = set()
+
+        def get_time() -> float:
+            threads.add(threading.get_ident())
+            return 0
+
+        self.time.side_effect = get_time
+        await sut.set_async("key", result)
+        actual = await asyncio.gather(*(sut.get_async("key") for _ in range(10)))
+
+        # The queries are run off the event loop on the shared connection
+        assert actual == [result] * 10
+        assert loop_thread not in threads
+        sut.close()
@@ -0,0 +1,9 @@
+from unittest.mock import MagicMock
+
+from pdf_bot.scheduler import SchedulerService
+
+
+class SchedulerServiceTestMixin:
+    @staticmethod
+    def mock_scheduler_service() -> MagicMock:
+        return MagicMock(spec=SchedulerService)
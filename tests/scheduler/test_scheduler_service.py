@@ -0,0 +1,159 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from contextlib import AsyncExitStack
+
+import pytest
+from telegram.error import BadRequest
+
+from pdf_bot.analytics import TaskType
+from pdf_bot.scheduler import SchedulerService, TaskCost
+from pdf_bot.settings import Settings
+from tests.language import LanguageServiceTestMixin
+from tests.telegram_internal import TelegramTestMixin
+
+
+class TestSchedulerService(LanguageServiceTestMixin, TelegramTestMixin):
+    USER_A = 1
+    USER_B = 2
+
+    def setup_method(self) -> None:
+        super().setup_method()
+        self.language_service = self.mock_language_service()
+        self.settings = Settings(
+            scheduler_default_task_cost="medium",
+            scheduler_task_costs={TaskType.ocr_pdf.value: "heavy"},
+            scheduler_default_max_jobs=3,
+            scheduler_max_jobs={"heavy": 1},
+        )
+        self.sut = SchedulerService(self.language_service, self.settings)
+        self.positions: dict[str, list[int]] = {}
+
+    def test_get_task_cost(self) -> None:
+        assert self.sut.get_task_cost(TaskType.ocr_pdf) == TaskCost.heavy
+        assert self.sut.get_task_cost(TaskType.rename_pdf) == TaskCost.medium
+
+    @pytest.mark.asyncio
+    async def test_schedule(self) -> None:
+        async with self.sut.schedule(TaskType.ocr_pdf, self.USER_A, self._on_queued("a")):
+            pass
+        assert self.positions == {}
+
+    @pytest.mark.asyncio
+    async def test_schedule_queued(self) -> None:
+        order: list[str] = []
+        async with self.sut.schedule(TaskType.ocr_pdf, self.USER_A):
+            task = asyncio.create_task(self._run_job("b", self.USER_B, order))
+            await asyncio.sleep(0)
+
+            assert not task.done()
+            assert self.positions == {"b": [1]}
+
+        await task
+        assert order == ["b"]
+
+    @pytest.mark.asyncio
+    async def test_schedule_cost_classes(self) -> None:
+        # Light and medium tasks aren't queued behind the heavy ones
+        async with (
+            self.sut.schedule(TaskType.ocr_pdf, self.USER_A),
+            self.sut.schedule(TaskType.rename_pdf, self.USER_B, self._on_queued("b")),
+        ):
+            pass
+        assert self.positions == {}
+
+    @pytest.mark.asyncio
+    async def test_schedule_fair_queuing(self) -> None:
+        order: list[str] = []
+        async with self.sut.schedule(TaskType.ocr_pdf, self.USER_A):
+            tasks = []
+            for name, user_id in (("a2", self.USER_A), ("a3", self.USER_A), ("b1", self.USER_B)):
+                tasks.append(asyncio.create_task(self._run_job(name, user_id, order)))
+                await asyncio.sleep(0)
+            await asyncio.sleep(0)
+
+            # The users take turns, so the job of user B goes before the next job of user A
+            assert {k: v[-1] for k, v in self.positions.items()} == {"a2": 1, "a3": 3, "b1": 2}
+
+        await asyncio.gather(*tasks)
+        assert order == ["a2", "b1", "a3"]
+
+    @pytest.mark.asyncio
+    async def test_schedule_cancelled_while_queued(self) -> None:
+        order: list[str] = []
+        async with self.sut.schedule(TaskType.ocr_pdf, self.USER_A):
+            task_b = asyncio.create_task(self._run_job("b", self.USER_B, order))
+            await asyncio.sleep(0)
+            task_a = asyncio.create_task(self._run_job("a", self.USER_A, order))
+            await asyncio.sleep(0)
+
+            task_b.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task_b
+            await asyncio.sleep(0)
+
+            assert self.positions["a"] == [2, 1]
+
+        await task_a
+        assert order == ["a"]
+
+    @pytest.mark.asyncio
+    async def test_schedule_releases_on_error(self) -> None:
+        with pytest.raises(ValueError, match="error"):
+            async with self.sut.schedule(TaskType.ocr_pdf, self.USER_A):
+                raise ValueError("error")  # noqa: EM101
+
+        async with self.sut.schedule(TaskType.ocr_pdf, self.USER_A, self._on_queued("a")):
+            pass
+        assert self.positions == {}
+
+    @pytest.mark.asyncio
+    async def test_schedule_update(self) -> None:
+        async with self.sut.schedule_update(
+            self.telegram_update, self.telegram_context, TaskType.ocr_pdf
+        ):
+            pass
+        self.telegram_message.reply_text.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_schedule_update_queued(self) -> None:
+        queue_message = self.telegram_message.reply_text.return_value
+
+        async with AsyncExitStack() as stack:
+            await stack.enter_async_context(self.sut.schedule(TaskType.ocr_pdf, self.USER_A))
+            task = asyncio.create_task(self._schedule_update())
+            await asyncio.sleep(0)
+
+            self.telegram_message.reply_text.assert_called_once()
+            assert "number 1" in self.telegram_message.reply_text.call_args.args[0]
+            queue_message.delete.assert_not_called()
+
+        await task
+        queue_message.delete.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_schedule_update_telegram_error(self) -> None:
+        self.telegram_message.reply_text.side_effect = BadRequest("error")
+
+        async with AsyncExitStack() as stack:
+            await stack.enter_async_context(self.sut.schedule(TaskType.ocr_pdf, self.USER_A))
+            task = asyncio.create_task(self._schedule_update())
+            await asyncio.sleep(0)
+
+        # The task still runs even if the queue position can't be sent
+        await task
+
+    async def _schedule_update(self) -> None:
+        async with self.sut.schedule_update(
+            self.telegram_update, self.telegram_context, TaskType.ocr_pdf
+        ):
+            pass
+
+    async def _run_job(self, name: str, user_id: int, order: list[str]) -> None:
+        async with self.sut.schedule(TaskType.ocr_pdf, user_id, self._on_queued(name)):
+            order.append(name)
+
+    def _on_queued(self, name: str) -> Callable[[int], Awaitable[None]]:
+        async def on_queued(position: int) -> None:
+            self.positions.setdefault(name, []).append(position)
+
+        return on_queued
@@ -0,0 +1,41 @@
+from subprocess import CompletedProcess
+from unittest.mock import patch
+
+from pdf_bot.startup import ImportProfile, ImportTime, parse_import_times, profile_imports
+
+
+class TestImportProfiler:
+    OUTPUT = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       100 |        100 |     numpy.core\n"
+        "import time:        50 |        150 |   numpy\n"
+        "import time:       300 |        300 |   telegram\n"
+        "import time:        20 |        470 | pdf_bot\n"
+    )
+
+    def test_profile_imports(self) -> None:
+        with patch("pdf_bot.startup.import_profiler.subprocess") as subprocess:
+            subprocess.run.return_value = CompletedProcess([], 0, stderr=self.OUTPUT)
+            actual = profile_imports("pdf_bot")
+
+            assert len(actual.import_times) == 4
+            args = subprocess.run.call_args.args[0]
+            assert args[1:] == ["-X", "importtime", "-c", "import pdf_bot"]
+
+    def test_parse_import_times(self) -> None:
+        actual = parse_import_times(self.OUTPUT)
+        assert actual == ImportProfile(
+            [
+                ImportTime("numpy.core", 100, 100),
+                ImportTime("numpy", 50, 150),
+                ImportTime("telegram", 300, 300),
+                ImportTime("pdf_bot", 20, 470),
+            ]
+        )
+        assert actual.total_us == 470
+        assert actual.get_package_times() == [("telegram", 300), ("numpy", 150), ("pdf_bot", 20)]
+
+    def test_parse_import_times_empty(self) -> None:
+        actual = parse_import_times("")
+        assert actual.import_times == []
+        assert actual.total_us == 0
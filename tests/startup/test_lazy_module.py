@@ -0,0 +1,54 @@
+import json
+from collections.abc import Generator
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from pdf_bot.startup import LazyModule, lazy_import, load_lazy_modules
+
+
+class TestLazyModule:
+    MODULE_NAME = "module"
+
+    @pytest.fixture(autouse=True)
+    def lazy_modules(self) -> Generator[None, None, None]:
+        with patch.dict("pdf_bot.startup.lazy_module._lazy_modules", clear=True):
+            yield
+
+    def test_lazy_module(self) -> None:
+        module = MagicMock()
+
+        with patch("pdf_bot.startup.lazy_module.importlib") as importlib:
+            importlib.import_module.return_value = module
+            sut = LazyModule(self.MODULE_NAME)
+
+            importlib.import_module.assert_not_called()
+            assert sut.__name__ == self.MODULE_NAME
+
+            assert sut.attribute == module.attribute
+            assert sut.other_attribute == module.other_attribute
+            assert sut.is_loaded is True
+            importlib.import_module.assert_called_once_with(self.MODULE_NAME)
+
+    def test_lazy_module_patched(self) -> None:
+        sut = LazyModule("json")
+        with patch("json.dumps") as dumps:
+            assert sut.dumps == dumps
+        assert sut.dumps == json.dumps
+
+    def test_lazy_import(self) -> None:
+        actual = lazy_import(self.MODULE_NAME)
+        assert isinstance(actual, LazyModule)
+        assert actual.__name__ == self.MODULE_NAME
+        assert lazy_import(self.MODULE_NAME) is actual
+
+    def test_load_lazy_modules(self) -> None:
+        modules = [lazy_import("json"), lazy_import("module_not_found")]
+        load_lazy_modules()
+
+        assert modules[0].is_loaded is True
+        assert modules[0].load() is json
+        assert modules[1].is_loaded is False
+
+        with pytest.raises(ModuleNotFoundError):
+            modules[1].load()
@@ -20,6 +20,10 @@ class TelegramServiceTestMixin(TelegramTestMixin):
         service.get_message_data.return_value = self.MESSAGE_DATA
         service.get_back_inline_markup.return_value = self.BACK_INLINE_MARKUP
         service.download_pdf_file.return_value.__aenter__.return_value = self.download_path
+        service.download_pdf_files.return_value.__aenter__.return_value = [
+            self.download_path,
+            self.download_path,
+        ]
 
         return service
 
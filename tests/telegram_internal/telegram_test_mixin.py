@@ -27,9 +27,12 @@ class TelegramTestMixin(PathTestMixin):
     TELEGRAM_MESSAGE_ID = 3
     TELEGRAM_USERNAME = "username"
     TELEGRAM_FILE_ID = "file_id"
+    TELEGRAM_FILE_UNIQUE_ID = "file_unique_id"
     TELEGRAM_DOCUMENT_ID = "document_id"
     TELEGRAM_DOCUMENT_NAME = "document_name"
+    TELEGRAM_DOCUMENT_UNIQUE_ID = "document_unique_id"
     TELEGRAM_PHOTO_SIZE_ID = "photo_size_id"
+    TELEGRAM_PHOTO_SIZE_UNIQUE_ID = "photo_size_unique_id"
     TELEGRAM_TEXT = "text"
 
     FILE_DATA = FileData(TELEGRAM_DOCUMENT_ID, TELEGRAM_DOCUMENT_NAME)
@@ -62,13 +65,16 @@ class TelegramTestMixin(PathTestMixin):
 
         self.telegram_file = MagicMock(spec=File)
         self.telegram_file.file_id = self.TELEGRAM_FILE_ID
+        self.telegram_file.file_unique_id = self.TELEGRAM_FILE_UNIQUE_ID
 
         self.telegram_document = MagicMock(spec=Document)
         self.telegram_document.file_id = self.TELEGRAM_DOCUMENT_ID
         self.telegram_document.file_name = self.TELEGRAM_DOCUMENT_NAME
+        self.telegram_document.file_unique_id = self.TELEGRAM_DOCUMENT_UNIQUE_ID
 
         self.telegram_photo_size = MagicMock(spec=PhotoSize)
         self.telegram_photo_size.file_id = self.TELEGRAM_PHOTO_SIZE_ID
+        self.telegram_photo_size.file_unique_id = self.TELEGRAM_PHOTO_SIZE_UNIQUE_ID
 
         self.telegram_message = AsyncMock(spec=Message)
         self.telegram_message.chat = self.telegram_chat
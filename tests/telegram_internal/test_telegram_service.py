@@ -1,14 +1,19 @@
-from dataclasses import dataclass
+import asyncio
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any
 from unittest.mock import MagicMock, call, patch
 
 import pytest
 from telegram import File, InlineKeyboardMarkup, Message, ReplyKeyboardMarkup
 from telegram.constants import ChatAction, FileSizeLimit, MessageLimit, ParseMode
+from telegram.error import TelegramError
 from telegram.ext import Application, ConversationHandler
 
 from pdf_bot.analytics import AnalyticsService, EventAction, TaskType
 from pdf_bot.consts import FILE_DATA, MESSAGE_DATA
-from pdf_bot.io import IOService
+from pdf_bot.download_cache import DownloadCacheService
 from pdf_bot.models import BackData, FileData, MessageData
 from pdf_bot.telegram_internal import (
     TelegramFileMimeTypeError,
@@ -34,16 +39,19 @@ class TestTelegramService(LanguageServiceTestMixin, TelegramTestMixin):
 
     def setup_method(self) -> None:
         super().setup_method()
-        self.io_service = MagicMock(spec=IOService)
+        self.download_cache_service = MagicMock(spec=DownloadCacheService)
+        self.download_cache_service.get_file.return_value.__aenter__.return_value = self.file_path
         self.language_service = self.mock_language_service()
         self.analytics_service = MagicMock(spec=AnalyticsService)
         self.sut = TelegramService(
-            self.io_service,
+            self.download_cache_service,
             self.language_service,
             self.analytics_service,
             bot=self.telegram_bot,
         )
 
+        self.released_paths: list[Path] = []
+
         self.open_patcher = patch("builtins.open")
         self.open_patcher.start()
 
@@ -51,6 +59,45 @@ class TestTelegramService(LanguageServiceTestMixin, TelegramTestMixin):
         self.open_patcher.stop()
         super().teardown_method()
 
+    @asynccontextmanager
+    async def _get_cached_file(
+        self,
+        unique_id: str,
+        download: Callable[[Path], Awaitable[object]],
+        suffix: str = "",
+    ) -> AsyncGenerator[Path, None]:
+        path = Path(f"{unique_id}{suffix}")
+        await download(path)
+
+        try:
+            yield path
+        finally:
+            self.released_paths.append(path)
+
+    @staticmethod
+    def _download_with_delay(delay: float) -> Callable[..., Awaitable[None]]:
+        async def download(**_kwargs: Any) -> None:
+            await asyncio.sleep(delay)
+
+        return download
+
+    def _mock_files(self, num_files: int) -> tuple[list[str], dict[str, MagicMock]]:
+        file_ids: list[str] = []
+        files: dict[str, MagicMock] = {}
+
+        for i in range(num_files):
+            file_id = f"file_id_{i}"
+            file_ids.append(file_id)
+
+            file = MagicMock(spec=File)
+            file.file_unique_id = f"file_unique_id_{i}"
+            files[file_id] = file
+
+        self.telegram_bot.get_file.side_effect = lambda file_id: files[file_id]
+        self.download_cache_service.get_file.side_effect = self._get_cached_file
+
+        return file_ids, files
+
     @pytest.mark.asyncio
     async def test_init_with_telegram_app(self) -> None:
         app = MagicMock(spec=Application)
@@ -167,48 +214,100 @@ class TestTelegramService(LanguageServiceTestMixin, TelegramTestMixin):
 
     @pytest.mark.asyncio
     async def test_download_pdf_file(self) -> None:
-        self.io_service.create_temp_pdf_file.return_value.__enter__.return_value = self.file_path
         self.telegram_bot.get_file.return_value = self.telegram_file
 
         async with self.sut.download_pdf_file(self.TELEGRAM_FILE_ID) as actual:
             assert actual == self.file_path
             self.telegram_bot.get_file.assert_called_with(self.TELEGRAM_FILE_ID)
-            self.telegram_file.download_to_drive.assert_called_once_with(custom_path=self.file_path)
+            self.download_cache_service.get_file.assert_called_once()
+
+            args = self.download_cache_service.get_file.call_args
+            assert args.args[0] == self.TELEGRAM_FILE_UNIQUE_ID
+            assert args.kwargs == {"suffix": ".pdf"}
+
+            await args.args[1](self.download_path)
+            self.telegram_file.download_to_drive.assert_called_once_with(
+                custom_path=self.download_path
+            )
 
     @pytest.mark.asyncio
     @pytest.mark.parametrize("num_files", [1, 2, 5])
     async def test_download_files(self, num_files: int) -> None:
-        @dataclass
-        class FileAndPath:
-            file: MagicMock
-            path: str
+        file_ids, files = self._mock_files(num_files)
 
-        file_ids: list[str] = []
-        file_paths: list[str] = []
-        files: dict[str, FileAndPath] = {}
+        async with self.sut.download_files(file_ids) as actual:
+            assert actual == [Path(x.file_unique_id) for x in files.values()]
 
-        for i in range(num_files):
-            file_id = f"file_id_{i}"
-            file_path = f"file_path_{i}"
-            file_ids.append(file_id)
-            file_paths.append(file_path)
+            get_file_calls = [call(file_id) for file_id in file_ids]
+            self.telegram_bot.get_file.assert_has_calls(get_file_calls, any_order=True)
 
-            file = MagicMock(spec=File)
-            files[file_id] = FileAndPath(file, file_path)
+            for file in files.values():
+                file.download_to_drive.assert_called_once_with(
+                    custom_path=Path(file.file_unique_id)
+                )
+
+        assert sorted(self.released_paths) == sorted(actual)
+
+    @pytest.mark.asyncio
+    async def test_download_pdf_files(self) -> None:
+        file_ids, files = self._mock_files(2)
+
+        async with self.sut.download_pdf_files(file_ids) as actual:
+            assert actual == [Path(f"{x.file_unique_id}.pdf") for x in files.values()]
 
-        self.io_service.create_temp_files.return_value.__enter__.return_value = file_paths
-        self.telegram_bot.get_file.side_effect = lambda file_id: files[file_id].file
+    @pytest.mark.asyncio
+    async def test_download_files_order_preserved(self) -> None:
+        file_ids, files = self._mock_files(3)
+
+        # The first file finishes downloading last
+        for i, file in enumerate(files.values()):
+            file.download_to_drive.side_effect = self._download_with_delay(0.03 - i * 0.01)
 
         async with self.sut.download_files(file_ids) as actual:
-            assert actual == file_paths
+            assert actual == [Path(x.file_unique_id) for x in files.values()]
 
-            get_file_calls = [call(file_id) for file_id in file_ids]
-            self.telegram_bot.get_file.assert_has_calls(get_file_calls)
+    @pytest.mark.asyncio
+    async def test_download_files_max_concurrent_downloads(self) -> None:
+        max_concurrent_downloads = 2
+        num_downloads = 0
+        max_num_downloads = 0
+
+        async def download(**_kwargs: Any) -> None:
+            nonlocal num_downloads, max_num_downloads
+            num_downloads += 1
+            max_num_downloads = max(max_num_downloads, num_downloads)
+            await asyncio.sleep(0.01)
+            num_downloads -= 1
+
+        sut = TelegramService(
+            self.download_cache_service,
+            self.language_service,
+            self.analytics_service,
+            bot=self.telegram_bot,
+            max_concurrent_downloads=max_concurrent_downloads,
+        )
+        file_ids, files = self._mock_files(5)
+        for file in files.values():
+            file.download_to_drive.side_effect = download
 
-            for file_and_path in files.values():
-                file_and_path.file.download_to_drive.assert_called_once_with(
-                    custom_path=file_and_path.path
-                )
+        async with sut.download_files(file_ids):
+            pass
+
+        assert max_num_downloads == max_concurrent_downloads
+
+    @pytest.mark.asyncio
+    async def test_download_files_error(self) -> None:
+        file_ids, files = self._mock_files(3)
+        slow_file, failed_file, _file = files.values()
+        slow_file.download_to_drive.side_effect = self._download_with_delay(10)
+        failed_file.download_to_drive.side_effect = TelegramError("Error")
+
+        with pytest.raises(TelegramError):
+            async with self.sut.download_files(file_ids):
+                pass
+
+        # The slow download is cancelled and the completed one is released
+        assert self.released_paths == [Path(_file.file_unique_id)]
 
     @pytest.mark.asyncio
     async def test_cancel_conversation(self) -> None:
@@ -380,13 +479,14 @@ class TestTelegramService(LanguageServiceTestMixin, TelegramTestMixin):
         stat.st_size = FileSizeLimit.FILESIZE_UPLOAD
         self.telegram_update.callback_query = None
 
-        await self.sut.send_file(
+        actual = await self.sut.send_file(
             self.telegram_update,
             self.telegram_context,
             file_path,
             TaskType.merge_pdf,
         )
 
+        assert actual == self.telegram_bot.send_document.return_value
         self.telegram_bot.send_chat_action.assert_called_once_with(
             self.TELEGRAM_CHAT_ID, ChatAction.UPLOAD_DOCUMENT
         )
@@ -457,18 +557,63 @@ class TestTelegramService(LanguageServiceTestMixin, TelegramTestMixin):
         stat = self.mock_path_stat(self.file_path)
         stat.st_size = FileSizeLimit.FILESIZE_UPLOAD + 1
 
-        await self.sut.send_file(
+        actual = await self.sut.send_file(
             self.telegram_update,
             self.telegram_context,
             self.file_path,
             TaskType.merge_pdf,
         )
 
+        assert actual is None
         self.telegram_bot.send_chat_action.assert_not_called()
         self.telegram_bot.send_document.assert_not_called()
         self.telegram_bot.send_photo.assert_not_called()
         self.analytics_service.send_event.assert_not_called()
 
+    @pytest.mark.asyncio
+    async def test_send_file_by_id_document(self) -> None:
+        self.telegram_update.callback_query = None
+
+        actual = await self.sut.send_file_by_id(
+            self.telegram_update,
+            self.telegram_context,
+            self.TELEGRAM_DOCUMENT_ID,
+            TaskType.merge_pdf,
+        )
+
+        assert actual == self.telegram_bot.send_document.return_value
+        self.telegram_bot.send_chat_action.assert_called_once_with(
+            self.TELEGRAM_CHAT_ID, ChatAction.UPLOAD_DOCUMENT
+        )
+        self.telegram_bot.send_document.assert_called_once()
+        assert self.telegram_bot.send_document.call_args.args[1] == self.TELEGRAM_DOCUMENT_ID
+        self.analytics_service.send_event.assert_called_once_with(
+            self.telegram_update,
+            self.telegram_context,
+            TaskType.merge_pdf,
+            EventAction.complete,
+        )
+
+    @pytest.mark.asyncio
+    async def test_send_file_by_id_photo(self) -> None:
+        self.telegram_update.callback_query = None
+
+        actual = await self.sut.send_file_by_id(
+            self.telegram_update,
+            self.telegram_context,
+            self.TELEGRAM_PHOTO_SIZE_ID,
+            TaskType.merge_pdf,
+            is_photo=True,
+        )
+
+        assert actual == self.telegram_bot.send_photo.return_value
+        self.telegram_bot.send_chat_action.assert_called_once_with(
+            self.TELEGRAM_CHAT_ID, ChatAction.UPLOAD_PHOTO
+        )
+        self.telegram_bot.send_photo.assert_called_once()
+        assert self.telegram_bot.send_photo.call_args.args[1] == self.TELEGRAM_PHOTO_SIZE_ID
+        self.telegram_bot.send_document.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_send_file_names(self) -> None:
         file_data_list = [FileData("a", "a"), FileData("b")]
@@ -1,49 +1,302 @@
-from unittest.mock import MagicMock
+import asyncio
+import json
+import os
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
 
-from requests import Response, Session
+import pytest
+from requests import ConnectionError as RequestsConnectionError
+from requests import HTTPError, Response, Session
 
 from pdf_bot.pdf import FontData
 from pdf_bot.text import TextRepository
 
 
 class TestTextRepository:
-    FONT_FAMILY = "font_family"
+    FONT_FAMILY = "Font Family"
     FONT_URL = "font_url"
     GOOGLE_FONTS_TOKEN = "google_fonts_token"
+    CATALOG_TTL = 60
+    ETAG = "etag"
+
+    @pytest.fixture(autouse=True)
+    def setup_tmp_path(self, tmp_path: Path) -> None:
+        self.cache_dir = tmp_path
+        self.catalog_path = tmp_path / "webfonts.json"
 
     def setup_method(self) -> None:
-        self.response = MagicMock(spec=Response)
-        self.response.json.return_value = {
-            "items": [{"family": self.FONT_FAMILY, "files": {"regular": self.FONT_URL}}]
-        }
+        self.items: list[dict[str, Any]] = [
+            {"family": self.FONT_FAMILY, "files": {"regular": self.FONT_URL}},
+            {"family": "Font Family Mono", "files": {"regular": "mono_url"}},
+            {"family": "Fonts Family", "files": {"regular": "fonts_url"}},
+            {"family": "Bold Family", "files": {"700": "bold_url"}},
+            {"family": "Roboto", "files": {"regular": "roboto_url"}},
+        ]
 
         self.session = MagicMock(spec=Session)
-        self.session.get.return_value = self.response
+        self.session.get.side_effect = lambda *_args, **_kwargs: self._create_response()
 
-        self.sut = TextRepository(self.session, self.GOOGLE_FONTS_TOKEN)
+    @pytest.mark.asyncio
+    async def test_get_font(self) -> None:
+        sut = self._create_sut()
 
-    def test_get_font(self) -> None:
-        actual = self.sut.get_font(self.FONT_FAMILY)
+        actual = await sut.get_font(self.FONT_FAMILY)
 
         assert actual == FontData(self.FONT_FAMILY, self.FONT_URL)
         self._assert_api_call()
 
-    def test_get_font_no_regular_font(self) -> None:
-        self.response.json.return_value = {"items": [{"family": self.FONT_FAMILY, "files": {}}]}
+    @pytest.mark.asyncio
+    async def test_get_font_case_insensitive(self) -> None:
+        sut = self._create_sut()
+
+        actual = await sut.get_font(f" {self.FONT_FAMILY.upper()} ")
+
+        assert actual == FontData(self.FONT_FAMILY, self.FONT_URL)
+
+    @pytest.mark.asyncio
+    async def test_get_font_no_regular_font(self) -> None:
+        sut = self._create_sut()
 
-        actual = self.sut.get_font(self.FONT_FAMILY)
+        actual = await sut.get_font("Bold Family")
 
         assert actual is None
         self._assert_api_call()
 
-    def test_get_font_unknown_font(self) -> None:
-        actual = self.sut.get_font("clearly_unknown_font")
+    @pytest.mark.asyncio
+    async def test_get_font_unknown_font(self) -> None:
+        sut = self._create_sut()
+
+        actual = await sut.get_font("clearly_unknown_font")
 
         assert actual is None
         self._assert_api_call()
 
-    def _assert_api_call(self) -> None:
+    @pytest.mark.asyncio
+    async def test_get_font_cached_in_memory(self) -> None:
+        sut = self._create_sut()
+
+        await sut.get_font(self.FONT_FAMILY)
+        await sut.get_font("Roboto")
+
+        self.session.get.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_get_font_cached_on_disk(self) -> None:
+        await self._create_sut().get_font(self.FONT_FAMILY)
+        sut = self._create_sut()
+
+        actual = await sut.get_font(self.FONT_FAMILY)
+
+        assert actual == FontData(self.FONT_FAMILY, self.FONT_URL)
+        self.session.get.assert_called_once()
+        assert json.loads(self.catalog_path.read_text()) == {"etag": self.ETAG, "items": self.items}
+
+    @pytest.mark.asyncio
+    async def test_get_font_concurrent(self) -> None:
+        sut = self._create_sut()
+
+        await asyncio.gather(*(sut.get_font(self.FONT_FAMILY) for _ in range(3)))
+
+        self.session.get.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_get_font_invalid_disk_cache(self) -> None:
+        self.catalog_path.write_text("invalid")
+        sut = self._create_sut()
+
+        with patch("pdf_bot.text.text_repository.logger") as logger:
+            actual = await sut.get_font(self.FONT_FAMILY)
+            logger.exception.assert_called_once()
+
+        assert actual == FontData(self.FONT_FAMILY, self.FONT_URL)
+        self._assert_api_call()
+
+    @pytest.mark.asyncio
+    async def test_get_font_expired_refresh(self) -> None:
+        await self._create_sut().get_font(self.FONT_FAMILY)
+        self._expire_disk_cache()
+        self.items = [{"family": "New Family", "files": {"regular": "new_url"}}]
+        sut = self._create_sut()
+
+        # The expired catalog is used while it's refreshed in the background
+        actual = await sut.get_font(self.FONT_FAMILY)
+        assert actual == FontData(self.FONT_FAMILY, self.FONT_URL)
+        await self._wait_for_refresh()
+
+        assert await sut.get_font(self.FONT_FAMILY) is None
+        assert await sut.get_font("New Family") == FontData("New Family", "new_url")
+        self._assert_api_call(self.ETAG)
+
+    @pytest.mark.asyncio
+    async def test_get_font_expired_not_modified(self) -> None:
+        await self._create_sut().get_font(self.FONT_FAMILY)
+        self._expire_disk_cache()
+        self.session.get.side_effect = lambda *_args, **_kwargs: self._create_response(
+            HTTPStatus.NOT_MODIFIED
+        )
+        sut = self._create_sut()
+
+        await sut.get_font(self.FONT_FAMILY)
+        await self._wait_for_refresh()
+        await sut.get_font(self.FONT_FAMILY)
+
+        # The catalog isn't refreshed again as it's renewed for another TTL
+        assert self.session.get.call_count == 2
+        self._assert_api_call(self.ETAG)
+        assert self.catalog_path.stat().st_mtime > 0
+
+    @pytest.mark.asyncio
+    async def test_get_font_expired_refresh_error(self) -> None:
+        await self._create_sut().get_font(self.FONT_FAMILY)
+        self._expire_disk_cache()
+        self.session.get.side_effect = RequestsConnectionError()
+        sut = self._create_sut()
+
+        with patch("pdf_bot.text.text_repository.logger") as logger:
+            await sut.get_font(self.FONT_FAMILY)
+            await self._wait_for_refresh()
+            logger.exception.assert_called_once()
+
+        # The refresh isn't retried until the retry interval is over
+        actual = await sut.get_font(self.FONT_FAMILY)
+        assert actual == FontData(self.FONT_FAMILY, self.FONT_URL)
+        assert self.session.get.call_count == 2
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("status_code", [HTTPStatus.FORBIDDEN, HTTPStatus.SERVICE_UNAVAILABLE])
+    async def test_get_font_expired_refresh_http_error(self, status_code: HTTPStatus) -> None:
+        await self._create_sut().get_font(self.FONT_FAMILY)
+        self._expire_disk_cache()
+        self.session.get.side_effect = lambda *_args, **_kwargs: self._create_response(status_code)
+        sut = self._create_sut()
+
+        with patch("pdf_bot.text.text_repository.logger") as logger:
+            for _ in range(3):
+                actual = await sut.get_font(self.FONT_FAMILY)
+                await self._wait_for_refresh()
+            logger.exception.assert_called_once()
+
+        assert actual == FontData(self.FONT_FAMILY, self.FONT_URL)
+        assert self.session.get.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_get_font_expired_refresh_without_items(self) -> None:
+        await self._create_sut().get_font(self.FONT_FAMILY)
+        self._expire_disk_cache()
+        self.session.get.side_effect = lambda *_args, **_kwargs: self._create_response()
+        self.items = None  # type: ignore[assignment]
+        sut = self._create_sut()
+
+        with patch("pdf_bot.text.text_repository.logger") as logger:
+            for _ in range(3):
+                actual = await sut.get_font(self.FONT_FAMILY)
+                await self._wait_for_refresh()
+            logger.exception.assert_called_once()
+
+        assert actual == FontData(self.FONT_FAMILY, self.FONT_URL)
+        assert self.session.get.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_get_font_http_error(self) -> None:
+        self.session.get.side_effect = lambda *_args, **_kwargs: self._create_response(
+            HTTPStatus.FORBIDDEN
+        )
+        sut = self._create_sut()
+
+        with pytest.raises(HTTPError):
+            await sut.get_font(self.FONT_FAMILY)
+
+    @pytest.mark.asyncio
+    async def test_get_font_error(self) -> None:
+        self.session.get.side_effect = RequestsConnectionError()
+        sut = self._create_sut()
+
+        with pytest.raises(RequestsConnectionError):
+            await sut.get_font(self.FONT_FAMILY)
+
+    @pytest.mark.asyncio
+    async def test_get_font_suggestions(self) -> None:
+        sut = self._create_sut()
+
+        actual = await sut.get_font_suggestions("font")
+
+        assert actual == [self.FONT_FAMILY, "Font Family Mono", "Fonts Family"]
+
+    @pytest.mark.asyncio
+    async def test_get_font_suggestions_fuzzy(self) -> None:
+        sut = self._create_sut()
+
+        actual = await sut.get_font_suggestions("robotto")
+
+        assert actual == ["Roboto"]
+
+    @pytest.mark.asyncio
+    async def test_get_font_suggestions_limit(self) -> None:
+        sut = self._create_sut()
+
+        actual = await sut.get_font_suggestions("font family", limit=1)
+
+        assert actual == [self.FONT_FAMILY]
+
+    @pytest.mark.asyncio
+    async def test_get_font_suggestions_no_regular_font(self) -> None:
+        sut = self._create_sut()
+
+        actual = await sut.get_font_suggestions("bold")
+
+        assert actual == []
+
+    def test_download_font(self) -> None:
+        response = MagicMock(spec=Response)
+        response.content = b"font"
+        self.session.get.side_effect = None
+        self.session.get.return_value = response
+        out_path = self.cache_dir / "font.ttf"
+
+        self._create_sut().download_font(self.FONT_URL, out_path)
+
+        assert out_path.read_bytes() == b"font"
+        self.session.get.assert_called_once_with(self.FONT_URL, timeout=30)
+
+    def test_download_font_http_error(self) -> None:
+        response = self._create_response(HTTPStatus.NOT_FOUND)
+        response.content = b"<html>Not Found</html>"
+        self.session.get.side_effect = None
+        self.session.get.return_value = response
+        out_path = self.cache_dir / "font.ttf"
+
+        with pytest.raises(HTTPError):
+            self._create_sut().download_font(self.FONT_URL, out_path)
+
+        assert not out_path.exists()
+
+    def _create_sut(self) -> TextRepository:
+        return TextRepository(
+            self.session, self.GOOGLE_FONTS_TOKEN, self.cache_dir, self.CATALOG_TTL
+        )
+
+    def _create_response(self, status_code: int = HTTPStatus.OK) -> MagicMock:
+        response = MagicMock(spec=Response)
+        response.status_code = status_code
+        response.headers = {"ETag": self.ETAG}
+        response.json.return_value = {"items": self.items}
+        if status_code >= HTTPStatus.BAD_REQUEST:
+            response.json.return_value = {"error": {"code": status_code}}
+            response.raise_for_status.side_effect = HTTPError(response=response)
+        return response
+
+    def _expire_disk_cache(self) -> None:
+        os.utime(self.catalog_path, (0, 0))
+
+    async def _wait_for_refresh(self) -> None:
+        await asyncio.gather(*(asyncio.all_tasks() - {asyncio.current_task()}))
+
+    def _assert_api_call(self, etag: str | None = None) -> None:
         self.session.get.assert_called_with(
             "https://www.googleapis.com/webfonts/v1/webfonts",
             params={"key": self.GOOGLE_FONTS_TOKEN},
+            headers={"If-None-Match": etag} if etag is not None else {},
+            timeout=30,
         )
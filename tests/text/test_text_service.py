@@ -1,31 +1,49 @@
-from unittest.mock import MagicMock
+from pathlib import Path
+from unittest.mock import MagicMock, patch
 
 import pytest
+from requests import ConnectionError as RequestsConnectionError
 from telegram.ext import ConversationHandler
 
 from pdf_bot.analytics import TaskType
+from pdf_bot.download_cache import DownloadCacheService
 from pdf_bot.pdf import PdfService
 from pdf_bot.pdf.models import FontData
 from pdf_bot.telegram_internal import TelegramServiceError
 from pdf_bot.text import TextRepository, TextService
 from tests.language import LanguageServiceTestMixin
+from tests.scheduler import SchedulerServiceTestMixin
 from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
 
 
-class TestTextService(LanguageServiceTestMixin, TelegramServiceTestMixin, TelegramTestMixin):
+class TestTextService(
+    LanguageServiceTestMixin,
+    SchedulerServiceTestMixin,
+    TelegramServiceTestMixin,
+    TelegramTestMixin,
+):
     WAIT_TEXT = 0
     WAIT_FONT = 1
 
     TEXT_KEY = "text"
     SKIP = "Skip"
     PDF_TEXT = "pdf_text"
+    FONT_FAMILY = "font_family"
+    FONT_URL = "https://fonts.gstatic.com/s/font_family/v1/font.ttf"
+    FONT_BYTES = b"font"
 
-    def setup_method(self) -> None:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path: Path) -> None:
         super().setup_method()
-        self.font_data = MagicMock(spec=FontData)
+        self.font_data = FontData(self.FONT_FAMILY, self.FONT_URL)
 
         self.text_repository = MagicMock(spec=TextRepository)
         self.text_repository.get_font.return_value = self.font_data
+        self.text_repository.get_font_suggestions.return_value = []
+        self.text_repository.download_font.side_effect = lambda _url, path: path.write_bytes(
+            self.FONT_BYTES
+        )
+        self.font_cache_service = DownloadCacheService(tmp_path / "fonts", 1024**2)
 
         self.pdf_service = MagicMock(spec=PdfService)
         self.language_service = self.mock_language_service()
@@ -34,11 +52,14 @@ class TestTextService(LanguageServiceTestMixin, TelegramServiceTestMixin, Telegr
         self.telegram_service.get_user_data.side_effect = None
         self.telegram_service.get_user_data.return_value = self.PDF_TEXT
 
+        self.scheduler_service = self.mock_scheduler_service()
         self.sut = TextService(
             self.text_repository,
+            self.font_cache_service,
             self.pdf_service,
             self.telegram_service,
             self.language_service,
+            self.scheduler_service,
         )
 
     @pytest.mark.asyncio
@@ -78,13 +99,41 @@ class TestTextService(LanguageServiceTestMixin, TelegramServiceTestMixin, Telegr
         self.telegram_service.get_user_data.assert_called_once_with(
             self.telegram_context, self.TEXT_KEY
         )
-        self.pdf_service.create_pdf_from_text.assert_called_once_with(self.PDF_TEXT, self.font_data)
+        self.text_repository.download_font.assert_called_once()
+        self._assert_local_font()
         self.telegram_service.send_file.assert_called_once_with(
             self.telegram_update,
             self.telegram_context,
             self.file_path,
             TaskType.text_to_pdf,
         )
+        self.scheduler_service.schedule_update.assert_called_once_with(
+            self.telegram_update, self.telegram_context, TaskType.text_to_pdf
+        )
+
+    @pytest.mark.asyncio
+    async def test_check_text_font_cached(self) -> None:
+        self.pdf_service.create_pdf_from_text.return_value.__aenter__.return_value = self.file_path
+
+        for _ in range(2):
+            await self.sut.check_text(self.telegram_update, self.telegram_context)
+
+        self.text_repository.download_font.assert_called_once()
+        self._assert_local_font()
+
+    @pytest.mark.asyncio
+    async def test_check_text_font_download_error(self) -> None:
+        self.pdf_service.create_pdf_from_text.return_value.__aenter__.return_value = self.file_path
+        self.text_repository.download_font.side_effect = RequestsConnectionError()
+
+        with patch("pdf_bot.text.text_service.logger") as logger:
+            actual = await self.sut.check_text(self.telegram_update, self.telegram_context)
+            logger.exception.assert_called_once()
+
+        # The remote font file is used instead
+        assert actual == ConversationHandler.END
+        self.pdf_service.create_pdf_from_text.assert_called_once_with(self.PDF_TEXT, self.font_data)
+        self.telegram_service.send_file.assert_called_once()
 
     @pytest.mark.asyncio
     async def test_check_text_invalid_user_data(self) -> None:
@@ -108,10 +157,29 @@ class TestTextService(LanguageServiceTestMixin, TelegramServiceTestMixin, Telegr
 
         assert actual == self.WAIT_FONT
         self.text_repository.get_font.assert_called_once_with(self.TELEGRAM_TEXT)
+        self.text_repository.get_font_suggestions.assert_called_once_with(self.TELEGRAM_TEXT)
+        self.telegram_message.reply_text.assert_called_once_with("Unknown font, please try again")
         self.telegram_service.get_user_data.assert_not_called()
         self.pdf_service.create_pdf_from_text.assert_not_called()
         self.telegram_service.send_file.assert_not_called()
 
+    @pytest.mark.asyncio
+    async def test_check_text_unknown_font_suggestions(self) -> None:
+        self.text_repository.get_font.return_value = None
+        self.text_repository.get_font_suggestions.return_value = ["Roboto", "Roboto Mono"]
+
+        actual = await self.sut.check_text(self.telegram_update, self.telegram_context)
+
+        assert actual == self.WAIT_FONT
+        self.telegram_message.reply_text.assert_called_once()
+        reply_markup = self.telegram_message.reply_text.call_args.kwargs["reply_markup"]
+        assert [[x.text for x in row] for row in reply_markup.keyboard] == [
+            ["Roboto"],
+            ["Roboto Mono"],
+            [self.SKIP],
+        ]
+        self.pdf_service.create_pdf_from_text.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_check_text_skip_option(self) -> None:
         self.telegram_message.text = self.SKIP
@@ -143,3 +211,12 @@ class TestTextService(LanguageServiceTestMixin, TelegramServiceTestMixin, Telegr
         self.telegram_service.get_user_data.assert_not_called()
         self.pdf_service.create_pdf_from_text.assert_not_called()
         self.telegram_service.send_file.assert_not_called()
+
+    def _assert_local_font(self) -> None:
+        text, font_data = self.pdf_service.create_pdf_from_text.call_args.args
+        assert text == self.PDF_TEXT
+        assert font_data.font_family == self.FONT_FAMILY
+
+        font_path = Path.from_uri(font_data.font_url)
+        assert font_path.suffix == ".ttf"
+        assert font_path.read_bytes() == self.FONT_BYTES
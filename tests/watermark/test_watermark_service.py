@@ -4,14 +4,21 @@ import pytest
 from telegram.ext import ConversationHandler
 
 from pdf_bot.analytics import TaskType
+from pdf_bot.models import FileData
 from pdf_bot.pdf import PdfService, PdfServiceError
 from pdf_bot.telegram_internal import TelegramGetUserDataError, TelegramServiceError
 from pdf_bot.watermark import WatermarkService
 from tests.language import LanguageServiceTestMixin
+from tests.scheduler import SchedulerServiceTestMixin
 from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
 
 
-class TestWatermarkService(LanguageServiceTestMixin, TelegramServiceTestMixin, TelegramTestMixin):
+class TestWatermarkService(
+    LanguageServiceTestMixin,
+    SchedulerServiceTestMixin,
+    TelegramServiceTestMixin,
+    TelegramTestMixin,
+):
     WAIT_SOURCE_PDF = 0
     WAIT_WATERMARK_PDF = 1
     WATERMARK_KEY = "watermark"
@@ -26,10 +33,12 @@ class TestWatermarkService(LanguageServiceTestMixin, TelegramServiceTestMixin, T
         self.telegram_service.get_user_data.side_effect = None
         self.telegram_service.get_user_data.return_value = self.SOURCE_FILE_ID
 
+        self.scheduler_service = self.mock_scheduler_service()
         self.sut = WatermarkService(
             self.pdf_service,
             self.telegram_service,
             self.language_service,
+            self.scheduler_service,
         )
 
     @pytest.mark.asyncio
@@ -73,7 +82,12 @@ class TestWatermarkService(LanguageServiceTestMixin, TelegramServiceTestMixin, T
             self.telegram_context, self.WATERMARK_KEY
         )
         self.pdf_service.add_watermark_to_pdf.assert_called_once_with(
-            self.SOURCE_FILE_ID, self.TELEGRAM_DOCUMENT_ID
+            self.SOURCE_FILE_ID,
+            FileData(
+                self.TELEGRAM_DOCUMENT_ID,
+                self.TELEGRAM_DOCUMENT_NAME,
+                self.TELEGRAM_DOCUMENT_UNIQUE_ID,
+            ),
         )
         self.telegram_service.send_file.assert_called_once_with(
             self.telegram_update,
@@ -81,6 +95,9 @@ class TestWatermarkService(LanguageServiceTestMixin, TelegramServiceTestMixin, T
             self.file_path,
             TaskType.watermark_pdf,
         )
+        self.scheduler_service.schedule_update.assert_called_once_with(
+            self.telegram_update, self.telegram_context, TaskType.watermark_pdf
+        )
 
     @pytest.mark.asyncio
     async def test_add_watermark_to_pdf_service_error(self) -> None:
@@ -94,7 +111,12 @@ class TestWatermarkService(LanguageServiceTestMixin, TelegramServiceTestMixin, T
             self.telegram_context, self.WATERMARK_KEY
         )
         self.pdf_service.add_watermark_to_pdf.assert_called_once_with(
-            self.SOURCE_FILE_ID, self.TELEGRAM_DOCUMENT_ID
+            self.SOURCE_FILE_ID,
+            FileData(
+                self.TELEGRAM_DOCUMENT_ID,
+                self.TELEGRAM_DOCUMENT_NAME,
+                self.TELEGRAM_DOCUMENT_UNIQUE_ID,
+            ),
         )
         self.telegram_service.send_file.assert_not_called()
 
@@ -11,10 +11,16 @@ from pdf_bot.io import IOService
 from pdf_bot.telegram_internal import TelegramGetUserDataError, TelegramUpdateUserDataError
 from pdf_bot.webpage import WebpageService
 from tests.language import LanguageServiceTestMixin
+from tests.scheduler import SchedulerServiceTestMixin
 from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
 
 
-class TestWebpageService(LanguageServiceTestMixin, TelegramServiceTestMixin, TelegramTestMixin):
+class TestWebpageService(
+    LanguageServiceTestMixin,
+    SchedulerServiceTestMixin,
+    TelegramServiceTestMixin,
+    TelegramTestMixin,
+):
     URL = "https://example.com"
     HOSTNAME = "example.com"
     URL_HASH = hashlib.sha256(URL.encode("utf-8")).hexdigest()
@@ -30,12 +36,13 @@ class TestWebpageService(LanguageServiceTestMixin, TelegramServiceTestMixin, Tel
         self.telegram_service.user_data_contains.return_value = False
 
         self.language_service = self.mock_language_service()
-        self.sut = WebpageService(self.io_service, self.language_service, self.telegram_service)
+        self.scheduler_service = self.mock_scheduler_service()
+        self.sut = WebpageService(
+            self.io_service, self.language_service, self.telegram_service, self.scheduler_service
+        )
 
         self.html = MagicMock(spec=HTML)
-        self.html_cls_patcher = patch(
-            "pdf_bot.webpage.webpage_service.HTML", return_value=self.html
-        )
+        self.html_cls_patcher = patch("weasyprint.HTML", return_value=self.html)
         self.html_cls = self.html_cls_patcher.start()
 
     def teardown_method(self) -> None:
@@ -128,3 +135,6 @@ class TestWebpageService(LanguageServiceTestMixin, TelegramServiceTestMixin, Tel
             self.file_path,
             TaskType.url_to_pdf,
         )
+        self.scheduler_service.schedule_update.assert_called_once_with(
+            self.telegram_update, self.telegram_context, TaskType.url_to_pdf
+        )